@@ -14,10 +14,11 @@ from traceback import print_exc
 
 from twisted.internet import reactor
 from twisted.internet.defer import Deferred, inlineCallbacks, DeferredList, returnValue, succeed
-from twisted.internet.task import LoopingCall
+from twisted.internet.task import LoopingCall, deferLater
 from twisted.internet.threads import deferToThread
 from twisted.python.threadable import isInIOThread
 
+from Tribler.Core.APIImplementation.startup_orchestrator import StartupOrchestrator
 from Tribler.Core.CacheDB.sqlitecachedb import forceDBThread
 from Tribler.Core.DownloadConfig import DownloadStartupConfig, DefaultDownloadStartupConfig
 from Tribler.Core.Modules.resource_monitor import ResourceMonitor
@@ -33,7 +34,7 @@ from Tribler.Core.Video.VideoServer import VideoServer
 from Tribler.Core.exceptions import DuplicateDownloadException
 from Tribler.Core.simpledefs import (NTFY_DISPERSY, NTFY_STARTED, NTFY_TORRENTS, NTFY_UPDATE, NTFY_TRIBLER,
                                      NTFY_FINISHED, DLSTATUS_DOWNLOADING, DLSTATUS_STOPPED_ON_ERROR, NTFY_ERROR,
-                                     DLSTATUS_SEEDING, NTFY_TORRENT, NTFY_MARKET_IOM_INPUT_REQUIRED)
+                                     DLSTATUS_SEEDING, NTFY_TORRENT, NTFY_MARKET_IOM_INPUT_REQUIRED, NTFY_STATE)
 from Tribler.community.market.wallet.btc_wallet import BitcoinWallet
 from Tribler.community.market.wallet.dummy_wallet import DummyWallet1, DummyWallet2
 from Tribler.community.market.wallet.tc_wallet import TrustchainWallet
@@ -41,6 +42,9 @@ from Tribler.community.tunnel.tunnel_community import TunnelSettings
 from Tribler.dispersy.taskmanager import TaskManager
 from Tribler.dispersy.util import blockingCallFromThread, blocking_call_on_reactor_thread
 
+# The number of checkpointed downloads of which the pstates are parsed together in the thread pool
+CHECKPOINT_BATCH_SIZE = 50
+
 
 class TriblerLaunchMany(TaskManager):
 
@@ -70,6 +74,7 @@ class TriblerLaunchMany(TaskManager):
         # modules
         self.torrent_store = None
         self.metadata_store = None
+        self.checkpoint_store = None
         self.rtorrent_handler = None
         self.tftp_handler = None
         self.api_manager = None
@@ -96,6 +101,7 @@ class TriblerLaunchMany(TaskManager):
         self.tunnel_community = None
 
         self.startup_deferred = Deferred()
+        self.startup_timings = {}
 
         self.boosting_manager = None
         self.market_community = None
@@ -113,81 +119,245 @@ class TriblerLaunchMany(TaskManager):
             if sys.platform == 'darwin':
                 os.environ['SSL_CERT_FILE'] = os.path.join(get_lib_path(), 'root_certs_mac.pem')
 
-            if self.session.config.get_torrent_store_enabled():
-                from Tribler.Core.leveldbstore import LevelDbStore
-                self.torrent_store = LevelDbStore(self.session.config.get_torrent_store_dir())
+        if self.initComplete:
+            self.notify_started()
+        else:
+            orchestrator = StartupOrchestrator()
+            self.add_startup_components(orchestrator)
+            orchestrator.start().addCallbacks(self.on_components_started, self.startup_deferred.errback)
 
-            if self.session.config.get_metadata_enabled():
-                from Tribler.Core.leveldbstore import LevelDbStore
-                self.metadata_store = LevelDbStore(self.session.config.get_metadata_store_dir())
+        return self.startup_deferred
 
-            # torrent collecting: RemoteTorrentHandler
-            if self.session.config.get_torrent_collecting_enabled():
-                from Tribler.Core.RemoteTorrentHandler import RemoteTorrentHandler
-                self.rtorrent_handler = RemoteTorrentHandler(self.session)
+    def on_components_started(self, timings):
+        self.startup_timings = timings
+        self.initComplete = True
+        self.notify_started()
 
-            # TODO(emilon): move this to a megacache component or smth
-            if self.session.config.get_megacache_enabled():
-                from Tribler.Core.CacheDB.SqliteCacheDBHandler import (PeerDBHandler, TorrentDBHandler,
-                                                                       MyPreferenceDBHandler, VoteCastDBHandler,
-                                                                       ChannelCastDBHandler)
-                from Tribler.Core.Category.Category import Category
+    def notify_started(self):
+        self.session.add_observer(self.on_tribler_started, NTFY_TRIBLER, [NTFY_STARTED])
+        self.session.notifier.notify(NTFY_TRIBLER, NTFY_STARTED, None)
 
-                self._logger.debug('tlm: Reading Session state from %s', self.session.config.get_state_dir())
+    def on_tribler_started(self, subject, changetype, objectID, *args):
+        reactor.callFromThread(self.startup_deferred.callback, None)
 
-                self.category = Category()
+    def add_startup_components(self, orchestrator):
+        """
+        Add the components of the session to the startup orchestrator, together with the components they depend on.
+        Components that do not depend on each other are started concurrently.
+        """
+        config = self.session.config
 
-                # create DBHandlers
-                self.peer_db = PeerDBHandler(self.session)
-                self.torrent_db = TorrentDBHandler(self.session)
-                self.mypref_db = MyPreferenceDBHandler(self.session)
-                self.votecast_db = VoteCastDBHandler(self.session)
-                self.channelcast_db = ChannelCastDBHandler(self.session)
+        def added(*names):
+            return [name for name in names if name in orchestrator.components]
 
-                # initializes DBHandlers
-                self.peer_db.initialize()
-                self.torrent_db.initialize()
-                self.mypref_db.initialize()
-                self.votecast_db.initialize()
-                self.channelcast_db.initialize()
+        if config.get_torrent_store_enabled():
+            orchestrator.add_component("torrent_store", self.start_torrent_store, in_thread=True)
 
-                from Tribler.Core.Modules.tracker_manager import TrackerManager
-                self.tracker_manager = TrackerManager(self.session)
+        if config.get_metadata_enabled():
+            orchestrator.add_component("metadata_store", self.start_metadata_store, in_thread=True)
 
-            if self.session.config.get_video_server_enabled():
-                self.video_server = VideoServer(self.session.config.get_video_server_port(), self.session)
-                self.video_server.start()
+        if config.get_checkpoint_store_enabled():
+            orchestrator.add_component("checkpoint_store", self.start_checkpoint_store, in_thread=True)
 
-            # Dispersy
-            self.tftp_handler = None
-            if self.session.config.get_dispersy_enabled():
-                from Tribler.dispersy.dispersy import Dispersy
-                from Tribler.dispersy.endpoint import StandaloneEndpoint
+        # torrent collecting: RemoteTorrentHandler
+        if config.get_torrent_collecting_enabled():
+            orchestrator.add_component("rtorrent_handler", self.start_rtorrent_handler)
 
-                # set communication endpoint
-                endpoint = StandaloneEndpoint(self.session.config.get_dispersy_port())
+        if config.get_megacache_enabled():
+            orchestrator.add_component("megacache", self.start_megacache, added("rtorrent_handler"))
 
-                working_directory = unicode(self.session.config.get_state_dir())
-                self.dispersy = Dispersy(endpoint, working_directory)
+        if config.get_video_server_enabled():
+            orchestrator.add_component("video_server", self.start_video_server)
 
-                # register TFTP service
-                from Tribler.Core.TFTP.handler import TftpHandler
-                self.tftp_handler = TftpHandler(self.session, endpoint, "fffffffd".decode('hex'), block_size=1024)
-                self.tftp_handler.initialize()
+        if config.get_dispersy_enabled():
+            orchestrator.add_component("dispersy", self.start_dispersy,
+                                       added("torrent_store", "metadata_store", "megacache"))
+            orchestrator.add_component("communities", self.load_communities, ["dispersy"])
 
-            if self.session.config.get_torrent_search_enabled() or self.session.config.get_channel_search_enabled():
-                self.search_manager = SearchManager(self.session)
-                self.search_manager.initialize()
+            if config.get_channel_search_enabled():
+                orchestrator.add_component("channel_manager", self.start_channel_manager, ["communities"])
 
-        if not self.initComplete:
-            self.init()
+        if config.get_torrent_search_enabled() or config.get_channel_search_enabled():
+            orchestrator.add_component("search_manager", self.start_search_manager, added("megacache", "dispersy"))
 
-        self.session.add_observer(self.on_tribler_started, NTFY_TRIBLER, [NTFY_STARTED])
-        self.session.notifier.notify(NTFY_TRIBLER, NTFY_STARTED, None)
-        return self.startup_deferred
+        if config.get_mainline_dht_enabled():
+            orchestrator.add_component("mainline_dht", self.start_mainline_dht)
 
-    def on_tribler_started(self, subject, changetype, objectID, *args):
-        reactor.callFromThread(self.startup_deferred.callback, None)
+        if config.get_libtorrent_enabled():
+            # Libtorrent maps the UPnP ports of Dispersy and the DHT and uses the proxy settings of the communities
+            orchestrator.add_component("libtorrent", self.start_libtorrent,
+                                       added("torrent_store", "checkpoint_store", "communities", "mainline_dht"))
+
+        if config.get_torrent_checking_enabled():
+            orchestrator.add_component("torrent_checker", self.start_torrent_checker,
+                                       added("megacache", "libtorrent"))
+
+        if config.get_torrent_collecting_enabled():
+            orchestrator.add_component("rtorrent_handler_initialize", self.initialize_rtorrent_handler,
+                                       added("rtorrent_handler", "megacache", "dispersy"))
+
+        if config.get_watch_folder_enabled():
+            orchestrator.add_component("watch_folder", self.start_watch_folder, added("libtorrent"))
+
+        if config.get_credit_mining_enabled():
+            orchestrator.add_component("credit_mining", self.start_credit_mining,
+                                       added("libtorrent", "torrent_checker"))
+
+        if config.get_resource_monitor_enabled():
+            orchestrator.add_component("resource_monitor", self.start_resource_monitor)
+
+        orchestrator.add_component("version_check_manager", self.start_version_check_manager)
+        orchestrator.add_component("download_states_callback", self.start_download_states_callback,
+                                   added("libtorrent"))
+
+        # The REST endpoints access most of the other components, so they are started after all of them
+        if self.api_manager:
+            orchestrator.add_component("api_endpoints", self.api_manager.root_endpoint.start_endpoints,
+                                       list(orchestrator.components))
+
+    def start_torrent_store(self):
+        """ Called by a thread from the thread pool """
+        from Tribler.Core.leveldbstore import LevelDbStore
+        self.torrent_store = LevelDbStore(self.session.config.get_torrent_store_dir())
+
+    def start_metadata_store(self):
+        """ Called by a thread from the thread pool """
+        from Tribler.Core.leveldbstore import LevelDbStore
+        self.metadata_store = LevelDbStore(self.session.config.get_metadata_store_dir())
+
+    def start_checkpoint_store(self):
+        """ Called by a thread from the thread pool """
+        from Tribler.Core.leveldbstore import LevelDbStore
+        self.checkpoint_store = LevelDbStore(self.session.config.get_checkpoint_store_dir())
+
+    def start_rtorrent_handler(self):
+        from Tribler.Core.RemoteTorrentHandler import RemoteTorrentHandler
+        self.rtorrent_handler = RemoteTorrentHandler(self.session)
+
+    def initialize_rtorrent_handler(self):
+        self.rtorrent_handler.initialize()
+
+    # TODO(emilon): move this to a megacache component or smth
+    def start_megacache(self):
+        from Tribler.Core.CacheDB.SqliteCacheDBHandler import (PeerDBHandler, TorrentDBHandler,
+                                                               MyPreferenceDBHandler, VoteCastDBHandler,
+                                                               ChannelCastDBHandler)
+        from Tribler.Core.Category.Category import Category
+
+        self._logger.debug('tlm: Reading Session state from %s', self.session.config.get_state_dir())
+
+        self.category = Category()
+
+        # create DBHandlers
+        self.peer_db = PeerDBHandler(self.session)
+        self.torrent_db = TorrentDBHandler(self.session)
+        self.mypref_db = MyPreferenceDBHandler(self.session)
+        self.votecast_db = VoteCastDBHandler(self.session)
+        self.channelcast_db = ChannelCastDBHandler(self.session)
+
+        # initializes DBHandlers
+        self.peer_db.initialize()
+        self.torrent_db.initialize()
+        self.mypref_db.initialize()
+        self.votecast_db.initialize()
+        self.channelcast_db.initialize()
+
+        from Tribler.Core.Modules.tracker_manager import TrackerManager
+        self.tracker_manager = TrackerManager(self.session)
+
+    def start_video_server(self):
+        self.video_server = VideoServer(self.session.config.get_video_server_port(), self.session)
+        self.video_server.start()
+
+    def start_dispersy(self):
+        from Tribler.dispersy.community import HardKilledCommunity
+        from Tribler.dispersy.dispersy import Dispersy
+        from Tribler.dispersy.endpoint import StandaloneEndpoint
+
+        # set communication endpoint
+        endpoint = StandaloneEndpoint(self.session.config.get_dispersy_port())
+
+        working_directory = unicode(self.session.config.get_state_dir())
+        self.dispersy = Dispersy(endpoint, working_directory)
+
+        # register TFTP service
+        from Tribler.Core.TFTP.handler import TftpHandler
+        self.tftp_handler = TftpHandler(self.session, endpoint, "fffffffd".decode('hex'), block_size=1024,
+                                        window_size=self.session.config.get_dispersy_tftp_window_size())
+        self.tftp_handler.initialize()
+
+        self._logger.info("lmc: Starting Dispersy...")
+
+        now = timemod.time()
+        success = self.dispersy.start(self.session.autoload_discovery)
+
+        diff = timemod.time() - now
+        if success:
+            self._logger.info("lmc: Dispersy started successfully in %.2f seconds [port: %d]",
+                              diff, self.dispersy.wan_address[1])
+        else:
+            self._logger.info("lmc: Dispersy failed to start in %.2f seconds", diff)
+
+        self.upnp_ports.append((self.dispersy.wan_address[1], 'UDP'))
+
+        from Tribler.dispersy.crypto import M2CryptoSK
+        private_key = self.dispersy.crypto.key_to_bin(
+            M2CryptoSK(filename=self.session.config.get_permid_keypair_filename()))
+        self.session.dispersy_member = blockingCallFromThread(reactor, self.dispersy.get_member,
+                                                              private_key=private_key)
+
+        blockingCallFromThread(reactor, self.dispersy.define_auto_load, HardKilledCommunity,
+                               self.session.dispersy_member, load=True)
+
+        if self.session.config.get_megacache_enabled():
+            self.dispersy.database.attach_commit_callback(self.session.sqlite_db.commit_now)
+
+        # notify dispersy finished loading
+        self.session.notifier.notify(NTFY_DISPERSY, NTFY_STARTED, None)
+
+    def start_channel_manager(self):
+        from Tribler.Core.Modules.channel.channel_manager import ChannelManager
+        self.channel_manager = ChannelManager(self.session)
+        self.channel_manager.initialize()
+
+    def start_search_manager(self):
+        self.search_manager = SearchManager(self.session)
+        self.search_manager.initialize()
+
+    def start_mainline_dht(self):
+        from Tribler.Core.DecentralizedTracking import mainlineDHT
+        self.mainline_dht = mainlineDHT.init(('127.0.0.1', self.session.config.get_mainline_dht_port()),
+                                             self.session.config.get_state_dir())
+        self.upnp_ports.append((self.session.config.get_mainline_dht_port(), 'UDP'))
+
+    def start_libtorrent(self):
+        from Tribler.Core.Libtorrent.LibtorrentMgr import LibtorrentMgr
+        self.ltmgr = LibtorrentMgr(self.session)
+        self.ltmgr.initialize()
+        for port, protocol in self.upnp_ports:
+            self.ltmgr.add_upnp_mapping(port, protocol)
+
+    def start_torrent_checker(self):
+        self.torrent_checker = TorrentChecker(self.session)
+        self.torrent_checker.initialize()
+
+    def start_watch_folder(self):
+        self.watch_folder = WatchFolder(self.session)
+        self.watch_folder.start()
+
+    def start_credit_mining(self):
+        from Tribler.Core.CreditMining.BoostingManager import BoostingManager
+        self.boosting_manager = BoostingManager(self.session)
+
+    def start_resource_monitor(self):
+        self.resource_monitor = ResourceMonitor(self.session)
+        self.resource_monitor.start()
+
+    def start_version_check_manager(self):
+        self.version_check_manager = VersionCheckManager(self.session)
+
+    def start_download_states_callback(self):
+        self.session.set_download_states_callback(self.sesscb_states_callback)
 
     @blocking_call_on_reactor_thread
     def load_communities(self):
@@ -281,90 +451,6 @@ class TriblerLaunchMany(TaskManager):
 
         self._logger.info("tribler: communities are ready in %.2f seconds", timemod.time() - now_time)
 
-    def init(self):
-        if self.dispersy:
-            from Tribler.dispersy.community import HardKilledCommunity
-
-            self._logger.info("lmc: Starting Dispersy...")
-
-            now = timemod.time()
-            success = self.dispersy.start(self.session.autoload_discovery)
-
-            diff = timemod.time() - now
-            if success:
-                self._logger.info("lmc: Dispersy started successfully in %.2f seconds [port: %d]",
-                                  diff, self.dispersy.wan_address[1])
-            else:
-                self._logger.info("lmc: Dispersy failed to start in %.2f seconds", diff)
-
-            self.upnp_ports.append((self.dispersy.wan_address[1], 'UDP'))
-
-            from Tribler.dispersy.crypto import M2CryptoSK
-            private_key = self.dispersy.crypto.key_to_bin(
-                M2CryptoSK(filename=self.session.config.get_permid_keypair_filename()))
-            self.session.dispersy_member = blockingCallFromThread(reactor, self.dispersy.get_member,
-                                                                  private_key=private_key)
-
-            blockingCallFromThread(reactor, self.dispersy.define_auto_load, HardKilledCommunity,
-                                   self.session.dispersy_member, load=True)
-
-            if self.session.config.get_megacache_enabled():
-                self.dispersy.database.attach_commit_callback(self.session.sqlite_db.commit_now)
-
-            # notify dispersy finished loading
-            self.session.notifier.notify(NTFY_DISPERSY, NTFY_STARTED, None)
-
-            self.load_communities()
-
-            tunnel_community_ports = self.session.config.get_tunnel_community_socks5_listen_ports()
-            self.session.config.set_anon_proxy_settings(2, ("127.0.0.1", tunnel_community_ports))
-
-            if self.session.config.get_channel_search_enabled():
-                from Tribler.Core.Modules.channel.channel_manager import ChannelManager
-                self.channel_manager = ChannelManager(self.session)
-                self.channel_manager.initialize()
-
-        if self.session.config.get_mainline_dht_enabled():
-            from Tribler.Core.DecentralizedTracking import mainlineDHT
-            self.mainline_dht = mainlineDHT.init(('127.0.0.1', self.session.config.get_mainline_dht_port()),
-                                                 self.session.config.get_state_dir())
-            self.upnp_ports.append((self.session.config.get_mainline_dht_port(), 'UDP'))
-
-        if self.session.config.get_libtorrent_enabled():
-            from Tribler.Core.Libtorrent.LibtorrentMgr import LibtorrentMgr
-            self.ltmgr = LibtorrentMgr(self.session)
-            self.ltmgr.initialize()
-            for port, protocol in self.upnp_ports:
-                self.ltmgr.add_upnp_mapping(port, protocol)
-
-        # add task for tracker checking
-        if self.session.config.get_torrent_checking_enabled():
-            self.torrent_checker = TorrentChecker(self.session)
-            self.torrent_checker.initialize()
-
-        if self.rtorrent_handler:
-            self.rtorrent_handler.initialize()
-
-        if self.api_manager:
-            self.api_manager.root_endpoint.start_endpoints()
-
-        if self.session.config.get_watch_folder_enabled():
-            self.watch_folder = WatchFolder(self.session)
-            self.watch_folder.start()
-
-        if self.session.config.get_credit_mining_enabled():
-            from Tribler.Core.CreditMining.BoostingManager import BoostingManager
-            self.boosting_manager = BoostingManager(self.session)
-
-        if self.session.config.get_resource_monitor_enabled():
-            self.resource_monitor = ResourceMonitor(self.session)
-            self.resource_monitor.start()
-
-        self.version_check_manager = VersionCheckManager(self.session)
-        self.session.set_download_states_callback(self.sesscb_states_callback)
-
-        self.initComplete = True
-
     def add(self, tdef, dscfg, pstate=None, setupDelay=0, hidden=False,
             share_mode=False, checkpoint_disabled=False):
         """ Called by any thread """
@@ -608,42 +694,139 @@ class TriblerLaunchMany(TaskManager):
         if self.state_cb_count % 4 == 0 and self.tunnel_community:
             self.tunnel_community.monitor_downloads(states_list)
 
+        # Push the changes in the download states to the clients of the REST API
+        self.session.notifier.notify(NTFY_TORRENT, NTFY_STATE, None, states_list)
+
         return []
 
     #
     # Persistence methods
     #
     def load_checkpoint(self):
-        """ Called by any thread """
+        """
+        Called by any thread. The pstates of the checkpointed downloads are parsed in batches in the thread pool,
+        and the downloads of a batch are resumed on the reactor thread as soon as its pstates have been parsed.
+        When the checkpoint store is enabled, all its pstates are read in one pass over the store.
+        :return: A Deferred that fires when all checkpointed downloads have been resumed.
+        """
+        def load_pstates(filenames):
+            pstates = []
+            for filename in filenames:
+                try:
+                    pstates.append(self.load_download_pstate(filename))
+                except Exception:
+                    # The pstate is invalid, resume_download falls back to the torrent store
+                    pstates.append(None)
+            return zip(filenames, pstates)
+
+        def load_stored_pstates():
+            filenames_pstates = []
+            for hexinfohash, data in self.checkpoint_store.rangescan():
+                pstate = CallbackConfigParser()
+                try:
+                    pstate.read_string(data)
+                except Exception:
+                    pstate = None
+                filenames_pstates.append((self.get_download_pstate_filename(hexinfohash.decode('hex')), pstate))
+            return filenames_pstates
+
+        def resume_downloads(filenames_pstates, migrate=False):
+            migrated_filenames = []
+            with self.session_lock:
+                for filename, pstate in filenames_pstates:
+                    self.resume_download(filename, pstate=pstate)
+                    if migrate and pstate is not None:
+                        # Move the checkpoint from its file into the checkpoint store
+                        infohash = binascii.unhexlify(os.path.basename(filename)[:-6])
+                        self.write_download_pstate(infohash, pstate)
+                        migrated_filenames.append(filename)
+
+            if migrated_filenames:
+                migrate_checkpoint_files(migrated_filenames)
+            return len(filenames_pstates)
+
+        def migrate_checkpoint_files(filenames):
+            # The checkpoint files are only removed once their pstates have been written to disk by the store
+            try:
+                self.checkpoint_store.flush()
+            except Exception as e:
+                self._logger.error("tlm: could not write %d checkpoints to the checkpoint store: %s",
+                                   len(filenames), e)
+                return
+
+            for filename in filenames:
+                try:
+                    os.remove(filename)
+                except OSError as e:
+                    self._logger.warning("tlm: could not remove migrated checkpoint %s: %s", filename, e)
 
         def do_load_checkpoint():
-            with self.session_lock:
-                for i, filename in enumerate(iglob(os.path.join(self.session.get_downloads_pstate_dir(), '*.state'))):
-                    self.resume_download(filename, setupDelay=i * 0.1)
+            start_time = timemod.time()
+            filenames = sorted(iglob(os.path.join(self.session.get_downloads_pstate_dir(), '*.state')))
+            migrate = self.checkpoint_store is not None
+
+            deferreds = [deferToThread(load_pstates, filenames[index:index + CHECKPOINT_BATCH_SIZE])
+                         .addCallback(resume_downloads, migrate=migrate)
+                         for index in xrange(0, len(filenames), CHECKPOINT_BATCH_SIZE)]
+            if self.checkpoint_store is not None:
+                deferreds.append(deferToThread(load_stored_pstates).addCallback(resume_downloads))
+
+            def on_checkpoint_loaded(results):
+                self._logger.info("tlm: resumed %d checkpointed downloads in %.2f seconds",
+                                  sum(result for success, result in results if success), timemod.time() - start_time)
+
+            return DeferredList(deferreds, consumeErrors=True).addCallback(on_checkpoint_loaded)
 
         if self.initComplete:
-            do_load_checkpoint()
+            return do_load_checkpoint()
+
+        load_deferred = deferLater(reactor, 1, do_load_checkpoint)
+        self.register_task("load_checkpoint", load_deferred)
+        return load_deferred
+
+    def get_download_pstate_filename(self, infohash):
+        """ Returns the name of the file in which the pstate of the download with the given infohash is saved """
+        return os.path.join(self.session.get_downloads_pstate_dir(), binascii.hexlify(infohash) + '.state')
+
+    def has_download_pstate(self, infohash):
+        """ Called by any thread """
+        if self.checkpoint_store is not None and binascii.hexlify(infohash) in self.checkpoint_store:
+            return True
+        return os.path.isfile(self.get_download_pstate_filename(infohash))
+
+    def write_download_pstate(self, infohash, pstate):
+        """
+        Called by the network thread. When the checkpoint store is enabled, the pstate is written to the store in a
+        batch together with the pstates of the other downloads, on the next checkpoint or the next store flush.
+        """
+        if self.checkpoint_store is not None:
+            self.checkpoint_store[binascii.hexlify(infohash)] = pstate.write_string()
         else:
-            self.register_task("load_checkpoint", reactor.callLater(1, do_load_checkpoint))
+            pstate.write_file(self.get_download_pstate_filename(infohash))
 
     def load_download_pstate_noexc(self, infohash):
         """ Called by any thread, assume session_lock already held """
         try:
-            basename = binascii.hexlify(infohash) + '.state'
-            filename = os.path.join(self.session.get_downloads_pstate_dir(), basename)
+            if self.checkpoint_store is not None and binascii.hexlify(infohash) in self.checkpoint_store:
+                pstate = CallbackConfigParser()
+                pstate.read_string(self.checkpoint_store[binascii.hexlify(infohash)])
+                return pstate
+
+            filename = self.get_download_pstate_filename(infohash)
             if os.path.exists(filename):
                 return self.load_download_pstate(filename)
             else:
-                self._logger.info("%s not found", basename)
+                self._logger.info("%s not found", os.path.basename(filename))
 
         except Exception:
             self._logger.exception("Exception while loading pstate: %s", infohash)
 
-    def resume_download(self, filename, setupDelay=0):
-        tdef = dscfg = pstate = None
+    def resume_download(self, filename, setupDelay=0, pstate=None):
+        tdef = dscfg = None
 
         try:
-            pstate = self.load_download_pstate(filename)
+            if pstate is None:
+                pstate = self.load_download_pstate(filename)
 
             # SWIFTPROC
             metainfo = pstate.get('state', 'metainfo')
@@ -695,7 +878,7 @@ class TriblerLaunchMany(TaskManager):
                     self._logger.exception("tlm: load check_point: exception while adding download %s", tdef)
             else:
                 self._logger.info("tlm: removing checkpoint %s destdir is %s", filename, dscfg.get_dest_dir())
-                os.remove(filename)
+                self.remove_pstate(tdef.get_infohash())
         else:
             self._logger.info("tlm: could not resume checkpoint %s %s %s", filename, tdef, dscfg)
 
@@ -712,7 +895,12 @@ class TriblerLaunchMany(TaskManager):
         for download in downloads:
             deferred_list.append(download.checkpoint())
 
-        return DeferredList(deferred_list)
+        def flush_checkpoint_store(_):
+            # Write the pstates of all downloads to the checkpoint store in one batch
+            if self.checkpoint_store is not None:
+                self.checkpoint_store.flush()
+
+        return DeferredList(deferred_list).addCallback(flush_checkpoint_store)
 
     def shutdown_downloads(self):
         """
@@ -724,13 +912,14 @@ class TriblerLaunchMany(TaskManager):
     def remove_pstate(self, infohash):
         def do_remove():
             if not self.download_exists(infohash):
-                dlpstatedir = self.session.get_downloads_pstate_dir()
-
                 # Remove checkpoint
                 hexinfohash = binascii.hexlify(infohash)
                 try:
-                    basename = hexinfohash + '.state'
-                    filename = os.path.join(dlpstatedir, basename)
+                    if self.checkpoint_store is not None and hexinfohash in self.checkpoint_store:
+                        self._logger.debug("remove pstate: removing checkpoint store entry %s", hexinfohash)
+                        del self.checkpoint_store[hexinfohash]
+
+                    filename = self.get_download_pstate_filename(infohash)
                     self._logger.debug("remove pstate: removing dlcheckpoint entry %s", filename)
                     if os.access(filename, os.F_OK):
                         os.remove(filename)
@@ -868,6 +1057,10 @@ class TriblerLaunchMany(TaskManager):
             self.ltmgr.shutdown()
             self.ltmgr = None
 
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.close()
+        self.checkpoint_store = None
+
     def save_download_pstate(self, infohash, pstate):
         """ Called by network thread """
 
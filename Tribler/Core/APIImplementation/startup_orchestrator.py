@@ -0,0 +1,104 @@
+import logging
+import time
+from collections import OrderedDict
+
+from twisted.internet.defer import Deferred, maybeDeferred
+from twisted.internet.threads import deferToThread
+
+
+class StartupOrchestrator(object):
+    """
+    Starts the components of a session in the order of their dependencies.
+
+    A component is started as soon as all components it depends on have been started, so components that do not depend
+    on each other are started concurrently. The start function of a component is called on the reactor thread, unless
+    the component is added with in_thread=True, in which case it runs in the thread pool. This is meant for IO-bound
+    work that does not touch the reactor, such as opening a database. A start function may return a Deferred, the
+    component is started when it fires.
+
+    The time it took to start each component is kept in the timings dictionary.
+    """
+
+    def __init__(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+        self.components = OrderedDict()  # name -> (start function, dependencies, in_thread)
+        self.timings = OrderedDict()  # name -> seconds it took to start the component
+        self.started = set()
+        self.starting = set()
+        self.start_time = None
+        self.finished_deferred = Deferred()
+
+    def add_component(self, name, start_function, dependencies=(), in_thread=False):
+        """
+        Add a component that should be started.
+        :param name: The unique name of the component.
+        :param start_function: The function that starts the component, it is called without arguments.
+        :param dependencies: The names of the components that should be started before this component.
+        :param in_thread: Whether to call the start function in the thread pool instead of on the reactor thread.
+        """
+        if name in self.components:
+            raise ValueError("Component %s has been added already" % name)
+        self.components[name] = (start_function, tuple(dependencies), in_thread)
+
+    def start(self):
+        """
+        Start all components.
+        :return: A Deferred that fires with the timings dictionary when all components have been started, or that
+        fails with the failure of the first component that could not be started.
+        """
+        for name, (_, dependencies, _) in self.components.iteritems():
+            for dependency in dependencies:
+                if dependency not in self.components:
+                    raise ValueError("Component %s depends on unknown component %s" % (name, dependency))
+
+        self.start_time = time.time()
+        self._start_ready_components()
+        return self.finished_deferred
+
+    def _start_ready_components(self):
+        if self.finished_deferred.called:
+            return
+
+        if len(self.started) == len(self.components):
+            self._logger.info("Started %d components in %.2f seconds: %s", len(self.components),
+                              time.time() - self.start_time,
+                              ", ".join("%s %.2fs" % item for item in self.timings.iteritems()))
+            self.finished_deferred.callback(self.timings)
+            return
+
+        ready_components = [name for name, (_, dependencies, _) in self.components.iteritems()
+                            if name not in self.started and name not in self.starting
+                            and all(dependency in self.started for dependency in dependencies)]
+        if not ready_components and not self.starting:
+            self.finished_deferred.errback(ValueError("Components %s have circular dependencies" %
+                                                      sorted(set(self.components) - self.started)))
+            return
+
+        self.starting.update(ready_components)
+        for name in ready_components:
+            self._start_component(name)
+
+    def _start_component(self, name):
+        start_function, _, in_thread = self.components[name]
+        self._logger.debug("Starting component %s", name)
+
+        start_time = time.time()
+        if in_thread:
+            deferred = deferToThread(start_function)
+        else:
+            deferred = maybeDeferred(start_function)
+        deferred.addCallbacks(lambda _: self._on_component_started(name, start_time),
+                              lambda failure: self._on_component_failed(name, failure))
+
+    def _on_component_started(self, name, start_time):
+        self.timings[name] = time.time() - start_time
+        self.starting.discard(name)
+        self.started.add(name)
+        self._start_ready_components()
+
+    def _on_component_failed(self, name, failure):
+        self._logger.error("Component %s failed to start: %s", name, failure.getErrorMessage())
+        self.starting.discard(name)
+        if not self.finished_deferred.called:
+            self.finished_deferred.errback(failure)
@@ -5,6 +5,11 @@ Author(s): Jelle Roozenburg
 """
 import logging
 import threading
+import time
+from collections import defaultdict
+
+from twisted.internet import reactor
+from twisted.python.threadable import isInIOThread
 
 from Tribler.Core.simpledefs import (NTFY_TORRENTS, NTFY_PLAYLISTS, NTFY_COMMENTS,
                                      NTFY_MODIFICATIONS, NTFY_MODERATIONS, NTFY_MARKINGS, NTFY_MYPREFERENCES,
@@ -20,6 +25,9 @@ from Tribler.Core.simpledefs import (NTFY_TORRENTS, NTFY_PLAYLISTS, NTFY_COMMENT
                                      NTFY_MARKET_IOM_INPUT_REQUIRED, NTFY_MARKET_ON_PAYMENT_RECEIVED,
                                      NTFY_MARKET_ON_PAYMENT_SENT)
 
+# Observers that take longer than this number of seconds to handle an event are reported as slow
+SLOW_OBSERVER_THRESHOLD = 0.1
+
 
 class Notifier(object):
 
@@ -36,10 +44,15 @@ class Notifier(object):
         self._logger = logging.getLogger(self.__class__.__name__)
 
         self.observers = []
+        self.observers_by_event = defaultdict(list)  # (subject, changeType) -> observers
         self.observerscache = {}
         self.observertimers = {}
         self.observerLock = threading.Lock()
 
+        self.start_time = time.time()
+        self.event_counts = defaultdict(int)  # subject -> number of notifications
+        self.slow_observers = {}  # observer name -> (number of slow calls, longest call duration)
+
     def add_observer(self, func, subject, changeTypes=[NTFY_UPDATE, NTFY_INSERT, NTFY_DELETE], id=None, cache=0):
         """
         Add observer function which will be called upon certain event
@@ -49,79 +62,123 @@ class Notifier(object):
         addObserver(NTFY_TORRENTS, [NTFY_SEARCH_RESULT], 'a_search_id') -> get
                     callbacks when peer-searchresults of of search
                     with id=='a_search_id' come in
+        Observers with a cache get the events that arrive within cache seconds in one list, on the reactor thread.
         """
         assert isinstance(changeTypes, list)
         assert subject in self.SUBJECTS, 'Subject %s not in SUBJECTS' % subject
 
         obs = (func, subject, changeTypes, id, cache)
-        self.observerLock.acquire()
-        self.observers.append(obs)
-        self.observerLock.release()
+        with self.observerLock:
+            self.observers.append(obs)
+            for changeType in changeTypes:
+                self.observers_by_event[(subject, changeType)].append(obs)
 
     def remove_observer(self, func):
         """ Remove all observers with function func
         """
         with self.observerLock:
-            i = 0
-            while i < len(self.observers):
-                ofunc = self.observers[i][0]
-                if ofunc == func:
-                    del self.observers[i]
+            self.observers = [obs for obs in self.observers if obs[0] != func]
+            for event, observers in self.observers_by_event.items():
+                observers = [obs for obs in observers if obs[0] != func]
+                if observers:
+                    self.observers_by_event[event] = observers
                 else:
-                    i += 1
+                    del self.observers_by_event[event]
 
     def remove_observers(self):
         with self.observerLock:
             for timer in self.observertimers.values():
-                timer.cancel()
+                if timer.active():
+                    timer.cancel()
             self.observerscache = {}
             self.observertimers = {}
             self.observers = []
+            self.observers_by_event = defaultdict(list)
 
     def notify(self, subject, changeType, obj_id, *args):
         """
-        Notify all interested observers about an event with threads from the pool
+        Notify all interested observers about an event. Observers without a cache are called in this thread,
+        the events for observers with a cache are queued and delivered on the reactor thread.
         """
         tasks = []
+        flushes = []
         assert subject in self.SUBJECTS, 'Subject %s not in SUBJECTS' % subject
 
         args = [subject, changeType, obj_id] + list(args)
 
-        self.observerLock.acquire()
-        for ofunc, osubject, ochangeTypes, oid, cache in self.observers:
-            try:
-                if (subject == osubject and
-                    changeType in ochangeTypes and
-                        (oid is None or oid == obj_id)):
-
-                    if not cache:
-                        tasks.append(ofunc)
-                    else:
-                        if ofunc not in self.observerscache:
-                            def doQueue(ofunc):
-                                self.observerLock.acquire()
-                                if ofunc in self.observerscache:
-                                    events = self.observerscache[ofunc]
-                                    del self.observerscache[ofunc]
-                                    del self.observertimers[ofunc]
-                                else:
-                                    events = []
-                                self.observerLock.release()
-
-                                if events:
-                                    ofunc(events)
-
-                            t = threading.Timer(cache, doQueue, (ofunc,))
-                            t.setName("Notifier-timer-%s" % subject)
-                            t.start()
-
-                            self.observerscache[ofunc] = []
-                            self.observertimers[ofunc] = t
-
-                        self.observerscache[ofunc].append(args)
-            except:
-                self._logger.exception("OIDs were %s %s", repr(oid), repr(obj_id))
-
-        self.observerLock.release()
+        with self.observerLock:
+            self.event_counts[subject] += 1
+
+            for ofunc, _, _, oid, cache in self.observers_by_event.get((subject, changeType), ()):
+                if oid is not None and oid != obj_id:
+                    continue
+
+                if not cache:
+                    tasks.append(ofunc)
+                    continue
+
+                if ofunc not in self.observerscache:
+                    self.observerscache[ofunc] = []
+                    flushes.append((ofunc, cache))
+
+                self.observerscache[ofunc].append(args)
+
+        for ofunc, cache in flushes:
+            if isInIOThread():
+                self._schedule_cache_flush(ofunc, cache)
+            else:
+                reactor.callFromThread(self._schedule_cache_flush, ofunc, cache)
+
         for task in tasks:
-            task(*args)  # call observer function in this thread
+            self._call_observer(task, *args)  # call observer function in this thread
+
+    def _schedule_cache_flush(self, ofunc, cache):
+        with self.observerLock:
+            # The observer might have been removed before the flush could be scheduled
+            if ofunc in self.observerscache:
+                self.observertimers[ofunc] = reactor.callLater(cache, self._flush_cache, ofunc)
+
+    def _flush_cache(self, ofunc):
+        with self.observerLock:
+            events = self.observerscache.pop(ofunc, [])
+            self.observertimers.pop(ofunc, None)
+
+        if events:
+            self._call_observer(ofunc, events)
+
+    def _call_observer(self, ofunc, *args):
+        start_time = time.time()
+        try:
+            ofunc(*args)
+        finally:
+            duration = time.time() - start_time
+            if duration > SLOW_OBSERVER_THRESHOLD:
+                self._on_slow_observer(ofunc, duration)
+
+    def _on_slow_observer(self, ofunc, duration):
+        name = get_observer_name(ofunc)
+        self._logger.warning("Observer %s took %.3f seconds to handle an event", name, duration)
+        with self.observerLock:
+            count, max_duration = self.slow_observers.get(name, (0, 0))
+            self.slow_observers[name] = (count + 1, max(max_duration, duration))
+
+    def get_statistics(self):
+        """
+        Return the number and rate per second of the notifications of each subject, and the number of slow calls and
+        the longest call duration of each slow observer.
+        """
+        with self.observerLock:
+            uptime = max(time.time() - self.start_time, 1)
+            return {"events": {subject: {"count": count, "rate": count / uptime}
+                               for subject, count in self.event_counts.iteritems()},
+                    "slow_observers": {name: {"count": count, "max_duration": max_duration}
+                                       for name, (count, max_duration) in self.slow_observers.iteritems()}}
+
+
+def get_observer_name(func):
+    """
+    Return a readable name of an observer function, including its class if it is a method.
+    """
+    owner = getattr(func, 'im_self', None)
+    name = getattr(func, '__name__', repr(func))
+    return "%s.%s" % (owner.__class__.__name__, name) if owner is not None else name
@@ -4,8 +4,8 @@ SqlitecacheDBHanler.
 Author(s): Jie Yang
 """
 import logging
-import math
 import os
+import random
 import threading
 from collections import OrderedDict, defaultdict
 from copy import deepcopy
@@ -15,12 +15,15 @@ from pprint import pformat
 from struct import unpack_from
 from time import time
 from traceback import print_exc
+from twisted.internet import reactor
+from twisted.internet.defer import CancelledError
 from twisted.internet.task import LoopingCall
 
 from Tribler.Core.CacheDB.sqlitecachedb import bin2str, str2bin
 from Tribler.Core.TorrentDef import TorrentDef
 import Tribler.Core.Utilities.json_util as json
 from Tribler.Core.Utilities.search_utils import split_into_keywords, filter_keywords
+from Tribler.Core.Utilities.suggestion_index import SearchSuggestionIndex, levenshtein_distance
 from Tribler.Core.Utilities.tracker_utils import get_uniformed_tracker_url
 from Tribler.Core.Utilities.unicode import dunno2unicode
 from Tribler.Core.simpledefs import (INFOHASH_LENGTH, NTFY_UPDATE, NTFY_INSERT, NTFY_DELETE, NTFY_CREATE,
@@ -32,8 +35,25 @@ from Tribler.dispersy.taskmanager import TaskManager
 
 VOTECAST_FLUSH_DB_INTERVAL = 15
 
+# Torrents received from Dispersy are written to the database in batches. A batch is written after
+# TORRENT_FLUSH_DB_INTERVAL seconds, or immediately when MAX_PENDING_TORRENTS torrents are queued.
+TORRENT_FLUSH_DB_INTERVAL = 1
+MAX_PENDING_TORRENTS = 1000
+
+# Random rows are selected by probing random rowids instead of sorting all matching rows by RANDOM(). The number of
+# rowids that is probed per requested row, and the maximum number of probed rowids (SQLite allows 999 variables).
+RANDOM_SAMPLE_PROBE_FACTOR = 4
+MAX_RANDOM_SAMPLE_PROBES = 400
+
+# The maximum number of parameters we bind in a single query (SQLite allows at most 999 by default)
+MAX_SQL_VARIABLES = 500
+
 DEFAULT_ID_CACHE_SIZE = 1024 * 5
 
+# The number of similar terms per keyword and the number of swarmnames that are considered for a search suggestion
+MAX_SIMILAR_TERMS = 5
+MAX_SUGGESTION_CANDIDATES = 100
+
 
 class LimitedOrderedDict(OrderedDict):
 
@@ -76,6 +96,50 @@ class BasicDBHandler(TaskManager):
     def getAll(self, value_name, where=None, group_by=None, having=None, order_by=None, limit=None, offset=None, conj=u"AND", **kw):
         return self._db.getAll(self.table_name, value_name, where=where, group_by=group_by, having=having, order_by=order_by, limit=limit, offset=offset, conj=conj, **kw)
 
+    def getOneAsync(self, value_name, where=None, conj=u"AND", **kw):
+        return self._db.getOneAsync(self.table_name, value_name, where=where, conj=conj, **kw)
+
+    def getAllAsync(self, value_name, where=None, group_by=None, having=None, order_by=None, limit=None,
+                    offset=None, conj=u"AND", **kw):
+        return self._db.getAllAsync(self.table_name, value_name, where=where, group_by=group_by, having=having,
+                                    order_by=order_by, limit=limit, offset=offset, conj=conj, **kw)
+
+    def _fetch_random_rows(self, sql, args, column, limit, range_sql, range_args=()):
+        """
+        Return at most limit random rows of a query, without having SQLite sort all matching rows by RANDOM().
+        Random values between the lowest and highest value of the (rowid) column are probed instead. When too few of
+        the probed rows match the query, the result is completed with the matching rows following a random rowid.
+        :param sql: the query, with a %s placeholder for the condition on the column, after all other arguments
+        :param args: the arguments of the query
+        :param column: the integer primary key column that is sampled
+        :param limit: the maximum number of rows to return
+        :param range_sql: a query that returns the lowest and highest value of the column
+        :param range_args: the arguments of range_sql
+        :return: a list with the rows in random order
+        """
+        min_rowid, max_rowid = self._db.fetchone(range_sql, range_args) or (None, None)
+        if limit <= 0 or min_rowid is None:
+            return []
+
+        population = xrange(min_rowid, max_rowid + 1)
+        probed = random.sample(population, min(len(population), limit * RANDOM_SAMPLE_PROBE_FACTOR,
+                                               MAX_RANDOM_SAMPLE_PROBES))
+        probed_marks = u", ".join(u"?" * len(probed))
+        rows = self._db.fetchall(sql % (u"%s IN (%s)" % (column, probed_marks)), tuple(args) + tuple(probed))
+        rows = random.sample(rows, min(limit, len(rows)))
+
+        if len(rows) < limit and len(probed) < len(population):
+            start = random.randint(min_rowid, max_rowid)
+            for operator in (u">=", u"<"):
+                condition = u"%s %s ? AND %s NOT IN (%s)" % (column, operator, column, probed_marks)
+                rows.extend(self._db.fetchall(sql % condition + u" LIMIT ?",
+                                              tuple(args) + (start,) + tuple(probed) + (limit - len(rows),)))
+                if len(rows) >= limit:
+                    break
+
+        random.shuffle(rows)
+        return rows
+
 
 class PeerDBHandler(BasicDBHandler):
 
@@ -227,6 +291,14 @@ class TorrentDBHandler(BasicDBHandler):
         # to incoming remote torrents without doing a full text search.
         self.latest_matchinfo_torrent = None
 
+        # Torrents (without torrent file) that are waiting to be written to the database, indexed by infohash
+        self._pending_torrents = OrderedDict()
+        self.max_pending_torrents = MAX_PENDING_TORRENTS
+
+        # The terms in the names of the known torrents, which is loaded in the background on initialization
+        self.suggestion_index = SearchSuggestionIndex()
+        self._suggestion_index_loaded = False
+
     def initialize(self, *args, **kwargs):
         super(TorrentDBHandler, self).initialize(*args, **kwargs)
         self.category = self.session.lm.category
@@ -234,8 +306,10 @@ class TorrentDBHandler(BasicDBHandler):
         self.votecast_db = self.session.open_dbhandler(NTFY_VOTECAST)
         self.channelcast_db = self.session.open_dbhandler(NTFY_CHANNELCAST)
         self._rtorrent_handler = self.session.lm.rtorrent_handler
+        self.register_task(u"load search suggestion index", self._load_suggestion_index())
 
     def close(self):
+        self.flush_pending_torrents()
         super(TorrentDBHandler, self).close()
         self.category = None
         self.mypref_db = None
@@ -261,12 +335,14 @@ class TorrentDBHandler(BasicDBHandler):
             else:
                 to_select.append(bin2str(infohash))
 
-        parameters = '?,' * len(to_select)
-        parameters = parameters[:-1]
-        sql_stmt = u"SELECT torrent_id, infohash FROM Torrent WHERE infohash IN (%s)" % parameters
-        torrents = self._db.fetchall(sql_stmt, to_select)
-        for torrent_id, infohash in torrents:
-            self.infohash_id[str2bin(infohash)] = torrent_id
+        for index in xrange(0, len(to_select), MAX_SQL_VARIABLES):
+            chunk = to_select[index:index + MAX_SQL_VARIABLES]
+            parameters = '?,' * len(chunk)
+            parameters = parameters[:-1]
+            sql_stmt = u"SELECT torrent_id, infohash FROM Torrent WHERE infohash IN (%s)" % parameters
+            torrents = self._db.fetchall(sql_stmt, chunk)
+            for torrent_id, infohash in torrents:
+                self.infohash_id[str2bin(infohash)] = torrent_id
 
         for infohash in unique_infohashes:
             if infohash not in to_return:
@@ -311,47 +387,165 @@ class TorrentDBHandler(BasicDBHandler):
             self.notifier.notify(NTFY_TORRENTS, NTFY_INSERT, infohash)
 
     def addExternalTorrentNoDef(self, infohash, name, files, trackers, timestamp, extra_info={}):
-        if not self.hasTorrent(infohash):
-            metainfo = {'info': {}, 'encoding': 'utf_8'}
-            metainfo['info']['name'] = name.encode('utf_8')
-            metainfo['info']['piece length'] = -1
-            metainfo['info']['pieces'] = ''
-
-            if len(files) > 1:
-                files_as_dict = []
-                for filename, file_length in files:
-                    filename = filename.encode('utf_8')
-                    files_as_dict.append({'path': [filename], 'length': file_length})
-                metainfo['info']['files'] = files_as_dict
-
-            elif len(files) == 1:
-                metainfo['info']['length'] = files[0][1]
-            else:
-                return
+        self.addExternalTorrentsNoDef([(infohash, name, files, trackers, timestamp, extra_info)])
 
-            if len(trackers) > 0:
-                metainfo['announce'] = trackers[0]
-                metainfo['announce-list'] = [list(trackers)]
-            else:
-                metainfo['nodes'] = []
+    def addExternalTorrentsNoDef(self, torrents):
+        """
+        Adds torrents of which we only know the metadata (and not the torrent file) to the database. The torrents,
+        full text index entries, trackers and files are written with a single executemany per table.
+        :param torrents: A list of (infohash, name, files, trackers, timestamp, extra_info) tuples.
+        """
+        collected = self._get_collected_infohashes([torrent[0] for torrent in torrents])
 
-            metainfo['creation date'] = timestamp
+        to_add = []
+        seen = set()
+        for infohash, name, files, trackers, timestamp, extra_info in torrents:
+            if infohash in collected or infohash in seen:
+                continue
+            seen.add(infohash)
 
             try:
-                torrentdef = TorrentDef.load_from_dict(metainfo)
-                torrentdef.infohash = infohash
-
-                torrent_id = self._addTorrentToDB(torrentdef, extra_info)
-                if self._rtorrent_handler:
-                    self._rtorrent_handler.notify_possible_torrent_infohash(infohash)
-
-                insert_files = [(torrent_id, unicode(path), length) for path, length in files]
-                sql_insert_files = "INSERT OR IGNORE INTO TorrentFiles (torrent_id, path, length) VALUES (?,?,?)"
-                self._db.executemany(sql_insert_files, insert_files)
+                torrentdef = self._create_torrentdef_no_def(infohash, name, files, trackers, timestamp)
+                if torrentdef:
+                    to_add.append((torrentdef, self._get_database_dict(torrentdef, extra_info), files))
             except:
                 self._logger.exception("Could not create a TorrentDef instance %r %r %r %r %r %r",
                                        infohash, timestamp, name, files, trackers, extra_info)
 
+        if not to_add:
+            return
+
+        torrent_ids = self._add_torrents_to_db_in_batch([database_dict for _, database_dict, _ in to_add])
+
+        index_values = []
+        tracker_mappings = []
+        insert_files = []
+        for torrentdef, _, files in to_add:
+            torrent_id = torrent_ids[torrentdef.get_infohash()]
+
+            swarmname = torrentdef.get_name_as_unicode()
+            if not torrentdef.is_multifile_torrent():
+                swarmname, _ = os.path.splitext(swarmname)
+            index_values.append(self._get_index_values(torrent_id, swarmname, torrentdef.get_files()))
+
+            tracker_mappings.append((torrent_id, self._get_torrent_tracker_list(torrentdef)))
+            insert_files.extend((torrent_id, unicode(path), length) for path, length in files)
+
+        self._index_torrents_in_batch(index_values)
+        self.addTorrentTrackerMappingsInBatch(tracker_mappings)
+
+        sql_insert_files = "INSERT OR IGNORE INTO TorrentFiles (torrent_id, path, length) VALUES (?,?,?)"
+        self._db.executemany(sql_insert_files, insert_files)
+
+        if self._rtorrent_handler:
+            for torrentdef, _, _ in to_add:
+                self._rtorrent_handler.notify_possible_torrent_infohash(torrentdef.get_infohash())
+
+    def queue_external_torrent_no_def(self, infohash, name, files, trackers, timestamp, extra_info={}):
+        """
+        Queues a torrent of which we only know the metadata, to be added to the database in the next batch.
+        When the queue is full, the batch is written immediately, so callers are slowed down to the rate at which we
+        can write to the database.
+        """
+        self._pending_torrents[infohash] = (infohash, name, files, trackers, timestamp, extra_info)
+
+        if len(self._pending_torrents) >= self.max_pending_torrents:
+            self.flush_pending_torrents()
+        elif not self.is_pending_task_active(u"flush pending torrents"):
+            self.register_task(u"flush pending torrents",
+                               reactor.callLater(TORRENT_FLUSH_DB_INTERVAL, self.flush_pending_torrents))
+
+    def flush_pending_torrents(self):
+        """
+        Writes all queued torrents to the database.
+        """
+        if self.is_pending_task_active(u"flush pending torrents"):
+            self.cancel_pending_task(u"flush pending torrents")
+
+        if not self._pending_torrents:
+            return
+
+        torrents = self._pending_torrents.values()
+        self._pending_torrents = OrderedDict()
+        self.addExternalTorrentsNoDef(torrents)
+
+    def _get_collected_infohashes(self, infohashes):
+        collected = set(infohash for infohash in infohashes if infohash in self.existed_torrents)
+
+        to_select = [bin2str(infohash) for infohash in set(infohashes) if infohash not in collected]
+        for index in xrange(0, len(to_select), MAX_SQL_VARIABLES):
+            chunk = to_select[index:index + MAX_SQL_VARIABLES]
+            sql = u"SELECT infohash FROM CollectedTorrent WHERE infohash IN (%s)" % u",".join(u"?" * len(chunk))
+            for infohash, in self._db.fetchall(sql, chunk):
+                collected.add(str2bin(infohash))
+
+        self.existed_torrents.update(collected)
+        return collected
+
+    @staticmethod
+    def _create_torrentdef_no_def(infohash, name, files, trackers, timestamp):
+        metainfo = {'info': {}, 'encoding': 'utf_8'}
+        metainfo['info']['name'] = name.encode('utf_8')
+        metainfo['info']['piece length'] = -1
+        metainfo['info']['pieces'] = ''
+
+        if len(files) > 1:
+            files_as_dict = []
+            for filename, file_length in files:
+                filename = filename.encode('utf_8')
+                files_as_dict.append({'path': [filename], 'length': file_length})
+            metainfo['info']['files'] = files_as_dict
+
+        elif len(files) == 1:
+            metainfo['info']['length'] = files[0][1]
+        else:
+            return None
+
+        if len(trackers) > 0:
+            metainfo['announce'] = trackers[0]
+            metainfo['announce-list'] = [list(trackers)]
+        else:
+            metainfo['nodes'] = []
+
+        metainfo['creation date'] = timestamp
+
+        torrentdef = TorrentDef.load_from_dict(metainfo)
+        torrentdef.infohash = infohash
+        return torrentdef
+
+    def _add_torrents_to_db_in_batch(self, database_dicts):
+        """
+        Inserts or updates the torrents described by the database dictionaries.
+        :return: A dictionary mapping each infohash to its torrent id.
+        """
+        infohashes = [str2bin(database_dict["infohash"]) for database_dict in database_dicts]
+        torrent_ids = self.getTorrentIDS(infohashes)
+
+        # Rows are grouped by their columns, since not every dictionary contains the seeders/leechers
+        inserts = defaultdict(list)
+        updates = defaultdict(list)
+        for infohash, database_dict in zip(infohashes, database_dicts):
+            torrent_id = torrent_ids[infohash]
+            if torrent_id is None:
+                columns = tuple(sorted(database_dict.keys()))
+                inserts[columns].append(tuple(database_dict[column] for column in columns))
+            else:
+                columns = tuple(sorted(column for column in database_dict.keys() if column != "infohash"))
+                updates[columns].append(tuple(database_dict[column] for column in columns) + (torrent_id,))
+
+        for columns, values in inserts.iteritems():
+            sql = u"INSERT INTO Torrent (%s) VALUES (%s)" % (u", ".join(columns), u",".join(u"?" * len(columns)))
+            self._db.executemany(sql, values)
+
+        for columns, values in updates.iteritems():
+            sql = u"UPDATE Torrent SET %s WHERE torrent_id = ?" % u", ".join(u"%s = ?" % column for column in columns)
+            self._db.executemany(sql, values)
+
+        if inserts:
+            torrent_ids.update(self.getTorrentIDS([infohash for infohash in infohashes
+                                                   if torrent_ids[infohash] is None]))
+        return torrent_ids
+
     def addOrGetTorrentID(self, infohash):
         assert isinstance(infohash, str), "INFOHASH has invalid type: %s" % type(infohash)
         assert len(infohash) == INFOHASH_LENGTH, "INFOHASH has invalid length: %d" % len(infohash)
@@ -431,6 +625,25 @@ class TorrentDBHandler(BasicDBHandler):
         return torrent_id
 
     def _indexTorrent(self, torrent_id, swarmname, files):
+        self._index_torrents_in_batch([self._get_index_values(torrent_id, swarmname, files)])
+
+    def _index_torrents_in_batch(self, index_values):
+        try:
+            # INSERT OR REPLACE not working for fts3 table
+            self._db.executemany(u"DELETE FROM FullTextIndex WHERE rowid = ?",
+                                 [(values[0],) for values in index_values])
+            self._db.executemany(
+                u"INSERT INTO FullTextIndex (rowid, swarmname, filenames, fileextensions) VALUES(?,?,?,?)",
+                index_values)
+        except:
+            # this will fail if the fts3 module cannot be found
+            print_exc()
+
+        for values in index_values:
+            self.suggestion_index.add_text(values[1])
+
+    @staticmethod
+    def _get_index_values(torrent_id, swarmname, files):
         # Niels: new method for indexing, replaces invertedindex
         # Making sure that swarmname does not include extension for single file torrents
         swarm_keywords = " ".join(split_into_keywords(swarmname))
@@ -451,23 +664,17 @@ class TorrentDBHandler(BasicDBHandler):
             filenames.sort(cmp=popSort, reverse=True)
             filenames = filenames[:1000]
 
-        values = (torrent_id, swarm_keywords, " ".join(filenames), " ".join(fileextensions))
-        try:
-            # INSERT OR REPLACE not working for fts3 table
-            self._db.execute_write(u"DELETE FROM FullTextIndex WHERE rowid = ?", (torrent_id,))
-            self._db.execute_write(
-                u"INSERT INTO FullTextIndex (rowid, swarmname, filenames, fileextensions) VALUES(?,?,?,?)", values)
-        except:
-            # this will fail if the fts3 module cannot be found
-            print_exc()
+        return torrent_id, swarm_keywords, " ".join(filenames), " ".join(fileextensions)
 
     # ------------------------------------------------------------
     # Adds the trackers of a given torrent into the database.
     # ------------------------------------------------------------
     def _addTorrentTracker(self, torrent_id, torrentdef, extra_info={}):
-        # Set add_all to True if you want to put all multi-trackers into db.
-        # In the current version (4.2) only the main tracker is used.
+        # add trackers in batch
+        self.addTorrentTrackerMappingInBatch(torrent_id, self._get_torrent_tracker_list(torrentdef))
 
+    @staticmethod
+    def _get_torrent_tracker_list(torrentdef):
         announce = torrentdef.get_tracker()
         announce_list = torrentdef.get_tracker_hierarchy()
 
@@ -491,8 +698,7 @@ class TorrentDBHandler(BasicDBHandler):
                     if tracker_url:
                         new_tracker_set.add(tracker_url)
 
-        # add trackers in batch
-        self.addTorrentTrackerMappingInBatch(torrent_id, list(new_tracker_set))
+        return list(new_tracker_set)
 
     def updateTorrent(self, infohash, notify=True, **kw):  # watch the schema of database
         if 'seeder' in kw:
@@ -618,6 +824,41 @@ class TorrentDBHandler(BasicDBHandler):
         # notify
         self.notifier.notify(NTFY_TORRENTS, NTFY_UPDATE, infohash)
 
+    def updateTorrentCheckResults(self, results, retry_interval, max_retries):
+        """
+        Stores the results of multiple torrent checks at once.
+        The status and the time of the next check are derived from the number of failed checks so far:
+        a torrent without seeders is checked again after retry_interval * 2 ^ <retries> seconds and it is
+        considered to be dead after max_retries of such checks.
+        :param results: A list of (infohash, seeders, leechers, last_check) tuples.
+        :param retry_interval: The base interval between checks, in seconds.
+        :param max_retries: The maximum number of retries.
+        """
+        if not results:
+            return
+
+        # All expressions in the SET clause refer to the values from before the update
+        sql = u"""
+            UPDATE Torrent SET num_seeders = :seeders, num_leechers = :leechers, last_tracker_check = :last_check,
+              status = CASE WHEN :seeders > 0 THEN 'good'
+                            WHEN tracker_check_retries + 1 < :max_retries THEN 'unknown'
+                            ELSE 'dead' END,
+              next_tracker_check = :last_check + :retry_interval *
+                (1 << CASE WHEN :seeders > 0 THEN 0 ELSE MIN(tracker_check_retries + 1, :max_retries) END),
+              tracker_check_retries = CASE WHEN :seeders > 0 THEN 0
+                                           ELSE MIN(tracker_check_retries + 1, :max_retries) END
+              WHERE infohash = :infohash
+            """
+        self._db.executemany(sql, [{'infohash': bin2str(infohash), 'seeders': seeders, 'leechers': leechers,
+                                    'last_check': last_check, 'retry_interval': retry_interval,
+                                    'max_retries': max_retries}
+                                   for infohash, seeders, leechers, last_check in results])
+
+        self._logger.debug(u"updated %d torrent check results", len(results))
+
+        for infohash, _, _, _ in results:
+            self.notifier.notify(NTFY_TORRENTS, NTFY_UPDATE, infohash)
+
     def addTorrentTrackerMapping(self, torrent_id, tracker):
         self.addTorrentTrackerMappingInBatch(torrent_id, [tracker, ])
 
@@ -625,15 +866,28 @@ class TorrentDBHandler(BasicDBHandler):
         if not tracker_list:
             return
 
-        parameters = u"?," * len(tracker_list)
-        parameters = parameters[:-1]
-        sql = u"SELECT tracker FROM TrackerInfo WHERE tracker IN (%s)" % parameters
+        self.addTorrentTrackerMappingsInBatch([(torrent_id, tracker_list)])
+
+    def addTorrentTrackerMappingsInBatch(self, mappings):
+        """
+        Adds the trackers of multiple torrents to the database.
+        :param mappings: A list of (torrent_id, tracker_list) tuples.
+        """
+        mappings = [(torrent_id, tracker_list) for torrent_id, tracker_list in mappings if tracker_list]
+        if not mappings:
+            return
 
-        found_tracker_list = self._db.fetchall(sql, tuple(tracker_list))
-        found_tracker_list = [tracker[0] for tracker in found_tracker_list]
+        all_trackers = list(set(chain.from_iterable(tracker_list for _, tracker_list in mappings)))
+        found_tracker_list = set()
+        for index in xrange(0, len(all_trackers), MAX_SQL_VARIABLES):
+            chunk = all_trackers[index:index + MAX_SQL_VARIABLES]
+            parameters = u"?," * len(chunk)
+            parameters = parameters[:-1]
+            sql = u"SELECT tracker FROM TrackerInfo WHERE tracker IN (%s)" % parameters
+            found_tracker_list.update(tracker[0] for tracker in self._db.fetchall(sql, tuple(chunk)))
 
         # update tracker info
-        not_found_tracker_list = [tracker for tracker in tracker_list if tracker not in found_tracker_list]
+        not_found_tracker_list = [tracker for tracker in all_trackers if tracker not in found_tracker_list]
         for tracker in not_found_tracker_list:
             if self.session.lm.tracker_manager is not None:
                 self.session.lm.tracker_manager.add_tracker(tracker)
@@ -641,10 +895,15 @@ class TorrentDBHandler(BasicDBHandler):
         # update torrent-tracker mapping
         sql = 'INSERT OR IGNORE INTO TorrentTrackerMapping(torrent_id, tracker_id)'\
             + ' VALUES(?, (SELECT tracker_id FROM TrackerInfo WHERE tracker = ?))'
-        new_mapping_list = [(torrent_id, tracker) for tracker in tracker_list]
+        new_mapping_list = [(torrent_id, tracker) for torrent_id, tracker_list in mappings
+                            for tracker in tracker_list]
         if new_mapping_list:
             self._db.executemany(sql, new_mapping_list)
 
+        for torrent_id, tracker_list in mappings:
+            self._add_trackers_to_collected_torrent(torrent_id, tracker_list)
+
+    def _add_trackers_to_collected_torrent(self, torrent_id, tracker_list):
         # add trackers into the torrent file if it has been collected
         if not self.session.config.get_torrent_store_enabled() or self.session.lm.torrent_store is None:
             return
@@ -678,17 +937,27 @@ class TorrentDBHandler(BasicDBHandler):
                 # have to use bencode to get around the TorrentDef.is_finalized() check in TorrentDef.encode()
                 self.session.save_collected_torrent(infohash, bencode(tdef.metainfo))
 
-    def getTorrentsOnTracker(self, tracker, current_time, limit=30):
-        sql = """
-            SELECT T.infohash
+    def get_torrents_to_check_async(self, check_before, failed_before, limit):
+        """
+        Asynchronously selects the torrents to check on their trackers, the torrents that are overdue the longest first.
+        Dead trackers and trackers that have failed after failed_before are skipped.
+        :param check_before: Only torrents that should be checked before this time are selected.
+        :param failed_before: Trackers that have failed after this time are skipped.
+        :param limit: The maximum number of (torrent, tracker) pairs to select.
+        :return: A Deferred that fires with a list of (infohash, next_check, tracker_url) tuples.
+        """
+        sql = u"""
+            SELECT T.infohash, T.next_tracker_check, TI.tracker
               FROM Torrent T, TrackerInfo TI, TorrentTrackerMapping TTM
-              WHERE TI.tracker = ?
-              AND TI.tracker_id = TTM.tracker_id AND T.torrent_id = TTM.torrent_id
-              AND next_tracker_check < ?
-              ORDER BY next_tracker_check DESC
+              WHERE TI.tracker_id = TTM.tracker_id AND T.torrent_id = TTM.torrent_id
+              AND TI.tracker != 'DHT' AND TI.tracker != 'no-DHT' AND TI.is_alive = 1
+              AND (TI.failures = 0 OR TI.last_check < ?)
+              AND T.next_tracker_check < ?
+              ORDER BY T.next_tracker_check
               LIMIT ?
             """
-        return [str2bin(tinfo[0]) for tinfo in self._db.fetchall(sql, (tracker, current_time, limit))]
+        return self._db.fetchall_async(sql, (failed_before, check_before, limit)).addCallback(
+            lambda rows: [(str2bin(infohash), next_check, tracker) for infohash, next_check, tracker in rows])
 
     def getTrackerListByTorrentID(self, torrent_id):
         sql = 'SELECT TR.tracker FROM TrackerInfo TR, TorrentTrackerMapping MP'\
@@ -802,9 +1071,10 @@ class TorrentDBHandler(BasicDBHandler):
              FROM Torrent T, CollectedTorrent CT
              WHERE CT.torrent_id = T.torrent_id
              AND CT.insert_time < ?
-             AND T.secret is not 1 ORDER BY RANDOM() DESC LIMIT ?
+             AND T.secret is not 1 AND %s
             """
-        results = self._db.fetchall(sql, (insert_time, limit))
+        results = self._fetch_random_rows(sql, (insert_time,), u"T.torrent_id", limit,
+                                          u"SELECT MIN(torrent_id), MAX(torrent_id) FROM Torrent")
         return [[str2bin(result[0]), result[1], result[2], result[3] or 0] for result in results]
 
     def select_torrents_to_collect(self, hashes):
@@ -867,60 +1137,72 @@ class TorrentDBHandler(BasicDBHandler):
         self._logger.info("Erased %d torrents", deleted)
         return deleted
 
-    def search_in_local_torrents_db(self, query, keys=None):
+    def search_in_local_torrents_db(self, query, keys=None, limit=None):
         """
         Search in the local database for torrents matching a specific query. This method also assigns a relevance
-        score to each torrent, based on the name, files and file extensions.
-        The algorithm is based on BM25. The document length factor is regarded since our "documents" are very small
-        (often a few keywords).
-        See https://en.wikipedia.org/wiki/Okapi_BM25 for more information about BM25.
+        score to each torrent, based on the name, files and file extensions (see get_bm25_score in search_utils).
+        The score is computed by SQLite, which also orders the results by relevance, so only the top results have to
+        be returned if a limit is given.
         """
-        search_results = []
-        keys_str = ", ".join(keys)
         keywords = split_into_keywords(query, to_filter_stopwords=True)
-        infohash_index = keys.index('infohash')
+        sql, args = self._get_local_torrents_search_sql(keywords, keys, limit)
+        return self._process_local_torrents_search_results(self._db.fetchall(sql, args), keywords, keys)
+
+    def search_in_local_torrents_db_async(self, query, keys=None, limit=None):
+        """
+        Asynchronous version of search_in_local_torrents_db. The full text search is executed on one of the read-only
+        database connections, so it does not block the reactor thread.
+        :return: A Deferred that fires with the search results.
+        """
+        keywords = split_into_keywords(query, to_filter_stopwords=True)
+        sql, args = self._get_local_torrents_search_sql(keywords, keys, limit)
+        return self._db.fetchall_async(sql, args).addCallback(self._process_local_torrents_search_results,
+                                                              keywords, keys)
+
+    def stream_local_torrents_search_async(self, query, keys, on_results, limit=None, chunk_size=50):
+        """
+        Searches the local database like search_in_local_torrents_db_async, but passes the results to on_results in
+        chunks of chunk_size results, ordered by relevance, as soon as they are read from the database.
+        :return: A Deferred that fires with the total number of results, after the last chunk has been passed.
+        """
+        keywords = split_into_keywords(query, to_filter_stopwords=True)
+        sql, args = self._get_local_torrents_search_sql(keywords, keys, limit)
+
+        def on_chunk(rows):
+            on_results(self._process_local_torrents_search_results(rows, keywords, keys))
+
+        return self._db.fetchchunks_async(sql, args, chunk_size, on_chunk)
 
+    @staticmethod
+    def _get_local_torrents_search_sql(keywords, keys, limit=None):
         # This query gets torrents matching speciifc keywords. The matchinfo object is also returned. For more
         # information about the returned matchinfo parameters, see https://www.sqlite.org/fts3.html#matchinfo.
-        results = self._db.fetchall("SELECT DISTINCT %s, Matchinfo(FullTextIndex, 'pcnalx') "
-                                    "FROM Torrent T, FullTextIndex "
-                                    "LEFT OUTER JOIN _ChannelTorrents C ON T.torrent_id = C.torrent_id "
-                                    "WHERE t.name IS NOT NULL AND t.torrent_id = FullTextIndex.rowid "
-                                    "AND C.deleted_at IS NULL AND FullTextIndex MATCH ?"
-                                    % keys_str, (" OR ".join(keywords),))
+        sql = "SELECT DISTINCT %s, Matchinfo(FullTextIndex, 'pcnalx'), " \
+              "bm25_score(Matchinfo(FullTextIndex, 'pcnalx')) AS relevance " \
+              "FROM Torrent T, FullTextIndex " \
+              "LEFT OUTER JOIN _ChannelTorrents C ON T.torrent_id = C.torrent_id " \
+              "WHERE t.name IS NOT NULL AND t.torrent_id = FullTextIndex.rowid " \
+              "AND C.deleted_at IS NULL AND FullTextIndex MATCH ? " \
+              "ORDER BY relevance DESC" % ", ".join(keys)
+        args = (" OR ".join(keywords),)
+
+        if limit is not None:
+            sql += " LIMIT ?"
+            args += (limit,)
+        return sql, args
+
+    def _process_local_torrents_search_results(self, results, keywords, keys):
+        search_results = []
+        infohash_index = keys.index('infohash')
 
         for result in results:
             result = list(result)  # We convert the result to a mutable list since we have to decode the infohash
             result[infohash_index] = str2bin(result[infohash_index])
-            matchinfo = result[len(keys)]  # The matchinfo is the last element in the results tuple
-            self.latest_matchinfo_torrent = matchinfo, keywords
-            num_phrases, num_cols, num_rows = unpack_from('III', matchinfo)
-
-            unpack_str = 'I' * (3 * num_cols * num_phrases)
-            matchinfo = unpack_from('I' * 9 + unpack_str, matchinfo)[9:]
-
-            scores = []
+            search_results.append(result)
 
-            for col_ind in xrange(num_cols):
-                score = 0
-                for phrase_ind in xrange(num_phrases):
-                    # Fetch info about the current matching term. This number is fetched from the matchinfo object.
-                    # See https://www.sqlite.org/fts3.html#matchinfo for info about the offset calculation.
-                    base_term_offset = 3 * (col_ind + phrase_ind * num_cols)
-                    rows_with_term = matchinfo[base_term_offset + 2]
-                    term_freq = matchinfo[base_term_offset]
-
-                    inv_doc_freq = math.log((num_rows - rows_with_term + 0.5) / (rows_with_term + 0.5), 2)
-                    right_side = ((term_freq * (1.2 + 1)) / (term_freq + 1.2))
-
-                    score += inv_doc_freq * right_side
-
-                scores.append(score)
-
-            # Our score is 80% dependent on matching in the name of the torrent, 10% on the names of the files in the
-            # torrent and 10% on the extensions of files in the torrent.
-            extended_result = result + [0.8 * scores[0] + 0.1 * scores[1] + 0.1 * scores[2]]
-            search_results.append(extended_result)
+        if search_results:
+            # The matchinfo is the element after the requested keys in the results
+            self.latest_matchinfo_torrent = search_results[-1][len(keys)], keywords
 
         return search_results
 
@@ -947,7 +1229,8 @@ class TorrentDBHandler(BasicDBHandler):
                     """
 
         if not local:
-            mainsql += "AND T.secret is not 1 LIMIT 250"
+            # Only return the most relevant torrents, these are ranked by SQLite
+            mainsql += "AND T.secret is not 1 ORDER BY bm25_score(Matchinfo(FullTextIndex, 'pcnalx')) DESC LIMIT 250"
 
         query = " ".join(filter_keywords(kws))
         not_negated = [kw for kw in filter_keywords(kws) if kw[0] != '-']
@@ -1062,6 +1345,13 @@ class TorrentDBHandler(BasicDBHandler):
         return results
 
     def getAutoCompleteTerms(self, keyword, max_terms, limit=100):
+        if self._suggestion_index_loaded:
+            words = keyword.split(' ')
+            completed = u" ".join(words[:-1] + [u""])
+            if not words[-1]:
+                return []
+            return [completed + term for term in self.suggestion_index.get_completions(words[-1], max_terms)]
+
         sql = "SELECT swarmname FROM FullTextIndex WHERE swarmname MATCH ? LIMIT ?"
         result = self._db.fetchall(sql, ('"%s*"' % keyword, limit))
 
@@ -1083,29 +1373,24 @@ class TorrentDBHandler(BasicDBHandler):
     def getSearchSuggestion(self, keywords, limit=1):
         match = [keyword.lower() for keyword in keywords if len(keyword) > 3]
 
-        def lev(a, b):
-            "Calculates the Levenshtein distance between a and b."
-            n, m = len(a), len(b)
-            if n > m:
-                # Make sure n <= m, to use O(min(n,m)) space
-                a, b = b, a
-                n, m = m, n
-
-            current = range(n + 1)
-            for i in range(1, m + 1):
-                previous, current = current, [i] + [0] * n
-                for j in range(1, n + 1):
-                    add, delete = previous[j] + 1, current[j - 1] + 1
-                    change = previous[j - 1]
-                    if a[j - 1] != b[i - 1]:
-                        change = change + 1
-                    current[j] = min(add, delete, change)
-
-            return current[n]
+        if self._suggestion_index_loaded:
+            # Only the swarmnames that contain a term similar to one of the keywords have to be ranked
+            similar_terms = set()
+            for keyword in match:
+                similar_terms.update(self.suggestion_index.get_similar_terms(keyword, limit=MAX_SIMILAR_TERMS))
+            if not similar_terms:
+                return []
+
+            sql = "SELECT swarmname FROM FullTextIndex WHERE swarmname MATCH ? LIMIT ?"
+            results = self._db.fetchall(sql, (' OR '.join(['"%s"' % term for term in similar_terms]),
+                                              MAX_SUGGESTION_CANDIDATES))
+            swarmnames = sorted((result[0] for result in results),
+                                key=lambda swarmname: self._get_suggestion_distance(swarmname, match))
+            return swarmnames[:limit]
 
         def levcollate(s1, s2):
-            l1 = sum(sorted([lev(a, b) for a in s1.split() for b in match])[:len(match)])
-            l2 = sum(sorted([lev(a, b) for a in s2.split() for b in match])[:len(match)])
+            l1 = self._get_suggestion_distance(s1, match)
+            l2 = self._get_suggestion_distance(s2, match)
 
             # return -1 if s1<s2, +1 if s1>s2 else 0
             if l1 < l2:
@@ -1123,6 +1408,36 @@ class TorrentDBHandler(BasicDBHandler):
         connection.createcollation("leven", None)
         return [result[0] for result in results]
 
+    @staticmethod
+    def _get_suggestion_distance(swarmname, match):
+        """
+        Returns the sum of the edit distances between the keywords in match and their closest terms in swarmname.
+        """
+        return sum(sorted([levenshtein_distance(a, b) for a in swarmname.split() for b in match])[:len(match)])
+
+    def _load_suggestion_index(self):
+        """
+        Builds the search suggestion index from the full text index, on one of the read-only connections.
+        """
+        def build_suggestion_index(cursor):
+            suggestion_index = SearchSuggestionIndex()
+            for swarmname, in cursor.execute(u"SELECT swarmname FROM FullTextIndex"):
+                suggestion_index.add_text(swarmname)
+            return suggestion_index
+
+        def on_suggestion_index_built(suggestion_index):
+            # Add the terms of the torrents that have been indexed in the meantime
+            suggestion_index.merge(self.suggestion_index)
+            self.suggestion_index = suggestion_index
+            self._suggestion_index_loaded = True
+
+        def on_failure(failure):
+            if not failure.check(CancelledError):
+                self._logger.error(u"Failed to build the search suggestion index: %s", failure.value)
+
+        return self._db.run_with_read_cursor_async(build_suggestion_index)\
+            .addCallbacks(on_suggestion_index_built, on_failure)
+
 
 class MyPreferenceDBHandler(BasicDBHandler):
 
@@ -1486,9 +1801,9 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             channel_id, dispersy_id, peer_id, infohash, timestamp, name, files, trackers = torrent
             torrent_id = torrent_ids[i]
 
-            # if new or not yet collected
+            # if new or not yet collected, the torrent metadata is written in the next batch
             if infohash in inserted:
-                self.torrent_db.addExternalTorrentNoDef(
+                self.torrent_db.queue_external_torrent_no_def(
                     infohash, name, files, trackers, timestamp, {'dispersy_id': dispersy_id})
 
             insert_data.append((dispersy_id, torrent_id, channel_id, peer_id, name, timestamp))
@@ -1498,10 +1813,14 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             sql_insert_torrent = "INSERT INTO _ChannelTorrents (dispersy_id, torrent_id, channel_id, peer_id, name, time_stamp) VALUES (?,?,?,?,?,?)"
             self._db.executemany(sql_insert_torrent, insert_data)
 
+        channel_torrent_ids = {}
+        for channel_id in updated_channels.iterkeys():
+            channel_torrent_ids.update(self._get_channel_torrent_ids(channel_id, set(torrent_ids)))
+
         updated_channel_torrent_dict = defaultdict(list)
-        for torrent in torrentlist:
+        for i, torrent in enumerate(torrentlist):
             channel_id, dispersy_id, peer_id, infohash, timestamp, name, files, trackers = torrent
-            channel_torrent_id = self.get_channel_torrent_id(channel_id, infohash)
+            channel_torrent_id = channel_torrent_ids.get((channel_id, torrent_ids[i]))
             updated_channel_torrent_dict[channel_id].append({u'info_hash': infohash,
                                                              u'channel_torrent_id': channel_torrent_id})
 
@@ -1569,6 +1888,20 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             channeltorrent_id = self._db.fetchone(sql, (torrent_id, channel_id))
             return channeltorrent_id
 
+    def _get_channel_torrent_ids(self, channel_id, torrent_ids):
+        """
+        Returns a dictionary mapping (channel_id, torrent_id) to the id of the channel torrent.
+        """
+        torrent_ids = list(torrent_ids)
+        channel_torrent_ids = {}
+        for index in xrange(0, len(torrent_ids), MAX_SQL_VARIABLES):
+            chunk = torrent_ids[index:index + MAX_SQL_VARIABLES]
+            sql = "SELECT id, torrent_id FROM ChannelTorrents WHERE channel_id = ? AND torrent_id IN (%s)" \
+                  % ",".join("?" * len(chunk))
+            for channeltorrent_id, torrent_id in self._db.fetchall(sql, [channel_id] + chunk):
+                channel_torrent_ids[(channel_id, torrent_id)] = channeltorrent_id
+        return channel_torrent_ids
+
     def hasTorrent(self, channel_id, infohash):
         return True if self.get_channel_torrent_id(channel_id, infohash) else False
 
@@ -1718,15 +2051,18 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
                                   prev_modification_id, prev_modification_global_time):
         if isinstance(prev_modification_id, (str)):
             prev_modification_id = buffer(prev_modification_id)
+        mid, global_time = mid_global_time.rsplit("@", 1)
+        global_time = long(global_time)
 
         sql = """INSERT OR REPLACE INTO _ChannelMetaData
-        (dispersy_id, channel_id, peer_id, type, value, time_stamp, prev_modification, prev_global_time)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?); SELECT last_insert_rowid();"""
+        (dispersy_id, channel_id, peer_id, type, value, time_stamp, prev_modification, prev_global_time, global_time,
+        mid) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?); SELECT last_insert_rowid();"""
         metadata_id = self._db.fetchone(sql, (dispersy_id, channel_id, peer_id,
                                               modification_type,
                                               modification_value, timestamp,
                                               prev_modification_id,
-                                              prev_modification_global_time))
+                                              prev_modification_global_time,
+                                              global_time, buffer(mid)))
 
         if channeltorrent_id:
             sql = "INSERT INTO MetaDataTorrent (metadata_id, channeltorrent_id) VALUES (?,?)"
@@ -1745,6 +2081,11 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
         sql = "UPDATE _ChannelMetaData SET prev_modification = ? WHERE prev_modification = ?;"
         self._db.execute_write(sql, (dispersy_id, buffer(mid_global_time)))
 
+        target_id = {u"torrent": channeltorrent_id, u"playlist": playlist_id, u"channel": channel_id}.get(type)
+        if target_id:
+            self._on_new_modification(type, target_id, modification_type, dispersy_id,
+                                      prev_modification_global_time, global_time, mid)
+
     def on_remove_metadata_from_dispersy(self, channel_id, dispersy_id, redo):
         sql = "UPDATE _ChannelMetaData SET deleted_at = ? WHERE dispersy_id = ? AND channel_id = ?"
 
@@ -1754,12 +2095,16 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             deleted_at = long(time())
         self._db.execute_write(sql, (deleted_at, dispersy_id, channel_id))
 
+        self._update_latest_modification_of(dispersy_id)
+
     def on_moderation(self, channel_id, dispersy_id, peer_id, by_peer_id, cause, message, timestamp, severity):
         sql = """INSERT OR REPLACE INTO _Moderations
         (dispersy_id, channel_id, peer_id, by_peer_id, message, cause, time_stamp, severity)
         VALUES (?,?,?,?,?,?,?,?)"""
         self._db.execute_write(sql, (dispersy_id, channel_id, peer_id, by_peer_id, message, cause, timestamp, severity))
 
+        self._update_latest_modification_of(cause)
+
         self.notifier.notify(NTFY_MODERATIONS, NTFY_INSERT, channel_id)
 
     def on_remove_moderation(self, channel_id, dispersy_id, redo):
@@ -1770,6 +2115,115 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             deleted_at = long(time())
         self._db.execute_write(sql, (deleted_at, dispersy_id, channel_id))
 
+        cause = self._db.fetchone(u"SELECT cause FROM _Moderations WHERE dispersy_id = ?", (dispersy_id,))
+        if cause:
+            self._update_latest_modification_of(cause)
+
+    def get_latest_modification(self, target_type, target_id, modification_type):
+        """
+        Return the dispersy id and value of the modification of a type that is in effect for a channel, playlist or
+        torrent, or None if it has not been modified.
+        :param target_type: u"channel", u"playlist" or u"torrent"
+        :param target_id: the id of the channel, playlist or channel torrent
+        """
+        sql = u"""SELECT LatestModification.dispersy_id, value FROM LatestModification, _ChannelMetaData
+        WHERE LatestModification.dispersy_id = _ChannelMetaData.dispersy_id
+        AND target_type = ? AND target_id = ? AND LatestModification.type = ?"""
+        return self._db.fetchone(sql, (target_type, target_id, modification_type))
+
+    def _on_new_modification(self, target_type, target_id, modification_type, dispersy_id, prev_global_time,
+                             global_time, mid):
+        """
+        Make a new modification the latest modification of its type for a channel, playlist or torrent if it
+        supersedes the current one: when it has a higher prev_global_time, then a higher global_time, then a lower mid.
+        """
+        sql = u"""SELECT prev_global_time, global_time, mid FROM LatestModification
+        WHERE target_type = ? AND target_id = ? AND type = ?"""
+        latest = self._db.fetchone(sql, (target_type, target_id, modification_type))
+        if latest:
+            latest_prev_global_time, latest_global_time, latest_mid = latest
+            new_times = (prev_global_time or 0, global_time or 0)
+            latest_times = (latest_prev_global_time or 0, latest_global_time or 0)
+            if new_times < latest_times or (new_times == latest_times and str(mid) > str(latest_mid or "")):
+                return
+
+        sql = u"""INSERT OR REPLACE INTO LatestModification
+        (target_type, target_id, type, dispersy_id, prev_global_time, global_time, mid) VALUES (?,?,?,?,?,?,?)"""
+        self._db.execute_write(sql, (target_type, target_id, modification_type, dispersy_id, prev_global_time,
+                                     global_time, buffer(mid)))
+
+    def _update_latest_modification_of(self, dispersy_id):
+        """
+        Determine the latest modification again for the channel, playlist or torrent that is modified by the
+        modification with the given dispersy id, after it has been undone, redone or moderated.
+        """
+        metadata = self._db.fetchone(u"SELECT id, channel_id, type FROM _ChannelMetaData WHERE dispersy_id = ?",
+                                     (dispersy_id,))
+        if not metadata:
+            return
+        metadata_id, channel_id, modification_type = metadata
+
+        channeltorrent_id = self._db.fetchone(u"SELECT channeltorrent_id FROM MetaDataTorrent WHERE metadata_id = ?",
+                                              (metadata_id,))
+        playlist_id = self._db.fetchone(u"SELECT playlist_id FROM MetaDataPlaylist WHERE metadata_id = ?",
+                                        (metadata_id,))
+        if channeltorrent_id:
+            self._update_latest_modification(u"torrent", channeltorrent_id, modification_type, channel_id)
+        elif playlist_id:
+            self._update_latest_modification(u"playlist", playlist_id, modification_type, channel_id)
+        else:
+            self._update_latest_modification(u"channel", channel_id, modification_type, channel_id)
+
+    def _update_latest_modification(self, target_type, target_id, modification_type, channel_id):
+        """
+        Determine the latest modification of a type for a channel, playlist or torrent from all its modifications that
+        have not been undone or moderated.
+        """
+        if target_type == u"torrent":
+            sql = u"""SELECT dispersy_id, prev_global_time, global_time, mid FROM ChannelMetaData, MetaDataTorrent
+            WHERE ChannelMetaData.id = MetaDataTorrent.metadata_id AND channeltorrent_id = ? AND type = ?"""
+        elif target_type == u"playlist":
+            sql = u"""SELECT dispersy_id, prev_global_time, global_time, mid FROM ChannelMetaData, MetaDataPlaylist
+            WHERE ChannelMetaData.id = MetaDataPlaylist.metadata_id AND playlist_id = ? AND type = ?"""
+        else:
+            sql = u"""SELECT dispersy_id, prev_global_time, global_time, mid FROM ChannelMetaData
+            WHERE channel_id = ? AND type = ?
+            AND NOT EXISTS (SELECT * FROM MetaDataTorrent WHERE metadata_id = ChannelMetaData.id)
+            AND NOT EXISTS (SELECT * FROM MetaDataPlaylist WHERE metadata_id = ChannelMetaData.id)"""
+        sql += u""" AND dispersy_id NOT IN (SELECT cause FROM Moderations WHERE channel_id = ?)
+        ORDER BY prev_global_time DESC, global_time DESC, mid LIMIT 1"""
+        latest = self._db.fetchone(sql, (target_id, modification_type, channel_id))
+
+        if latest:
+            sql = u"""INSERT OR REPLACE INTO LatestModification
+            (target_type, target_id, type, dispersy_id, prev_global_time, global_time, mid) VALUES (?,?,?,?,?,?,?)"""
+            self._db.execute_write(sql, (target_type, target_id, modification_type) + tuple(latest))
+        else:
+            sql = u"DELETE FROM LatestModification WHERE target_type = ? AND target_id = ? AND type = ?"
+            self._db.execute_write(sql, (target_type, target_id, modification_type))
+
+    def rebuild_latest_modifications(self):
+        """
+        Determine the latest modification of every type for all channels, playlists and torrents.
+        """
+        self._db.execute_write(u"DELETE FROM LatestModification")
+
+        sql = u"""SELECT DISTINCT channeltorrent_id, type, channel_id FROM ChannelMetaData, MetaDataTorrent
+        WHERE ChannelMetaData.id = MetaDataTorrent.metadata_id"""
+        for channeltorrent_id, modification_type, channel_id in self._db.fetchall(sql):
+            self._update_latest_modification(u"torrent", channeltorrent_id, modification_type, channel_id)
+
+        sql = u"""SELECT DISTINCT playlist_id, type, channel_id FROM ChannelMetaData, MetaDataPlaylist
+        WHERE ChannelMetaData.id = MetaDataPlaylist.metadata_id"""
+        for playlist_id, modification_type, channel_id in self._db.fetchall(sql):
+            self._update_latest_modification(u"playlist", playlist_id, modification_type, channel_id)
+
+        sql = u"""SELECT DISTINCT channel_id, type FROM ChannelMetaData
+        WHERE NOT EXISTS (SELECT * FROM MetaDataTorrent WHERE metadata_id = ChannelMetaData.id)
+        AND NOT EXISTS (SELECT * FROM MetaDataPlaylist WHERE metadata_id = ChannelMetaData.id)"""
+        for channel_id, modification_type in self._db.fetchall(sql):
+            self._update_latest_modification(u"channel", channel_id, modification_type, channel_id)
+
     def on_mark_torrent(self, channel_id, dispersy_id, global_time, peer_id, infohash, type, timestamp):
         channeltorrent_id = self.addOrGetChannelTorrentID(channel_id, infohash)
 
@@ -1816,9 +2270,9 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
     def getChannelNrTorrents(self, limit=None):
         if limit:
             sql = """select count(torrent_id), channel_id from Channels, ChannelTorrents
-            WHERE Channels.id = ChannelTorrents.channel_id AND dispersy_cid <> -1
-            GROUP BY channel_id ORDER BY RANDOM() LIMIT ?"""
-            return self._db.fetchall(sql, (limit,))
+            WHERE Channels.id = ChannelTorrents.channel_id AND dispersy_cid <> -1 AND %s
+            GROUP BY channel_id"""
+            return self._fetch_random_rows(sql, (), u"Channels.id", limit, u"SELECT MIN(id), MAX(id) FROM _Channels")
 
         sql = """SELECT count(torrent_id), channel_id FROM Channels, ChannelTorrents
         WHERE Channels.id = ChannelTorrents.channel_id AND dispersy_cid <>  -1 GROUP BY channel_id"""
@@ -1829,9 +2283,9 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             sql = """SELECT count(CollectedTorrent.torrent_id), max(ChannelTorrents.time_stamp),
             channel_id from Channels, ChannelTorrents, CollectedTorrent
             WHERE ChannelTorrents.torrent_id = CollectedTorrent.torrent_id
-            AND Channels.id = ChannelTorrents.channel_id AND dispersy_cid == -1
-            GROUP BY channel_id ORDER BY RANDOM() LIMIT ?"""
-            return self._db.fetchall(sql, (limit,))
+            AND Channels.id = ChannelTorrents.channel_id AND dispersy_cid == -1 AND %s
+            GROUP BY channel_id"""
+            return self._fetch_random_rows(sql, (), u"Channels.id", limit, u"SELECT MIN(id), MAX(id) FROM _Channels")
 
         sql = """SELECT count(CollectedTorrent.torrent_id), max(ChannelTorrents.time_stamp), channel_id from Channels,
         ChannelTorrents, CollectedTorrent
@@ -1861,8 +2315,11 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             sql = """SELECT dispersy_cid, infohash from ChannelTorrents, Channels, Torrent
             WHERE ChannelTorrents.torrent_id = Torrent.torrent_id AND Channels.id = ChannelTorrents.channel_id
             AND ChannelTorrents.channel_id==? AND time_stamp<?
-            AND ChannelTorrents.dispersy_id <> -1 order by random() limit ?"""
-            myrandomtorrents = self._db.fetchall(sql, (self._channel_id, least_recent, NUM_OWN_RANDOM_TORRENTS))
+            AND ChannelTorrents.dispersy_id <> -1 AND %s"""
+            myrandomtorrents = self._fetch_random_rows(sql, (self._channel_id, least_recent), u"ChannelTorrents.id",
+                                                       NUM_OWN_RANDOM_TORRENTS,
+                                                       u"SELECT MIN(id), MAX(id) FROM _ChannelTorrents "
+                                                       u"WHERE channel_id = ?", (self._channel_id,))
             for cid, infohash, _ in myrecenttorrents:
                 torrent_dict.setdefault(str(cid), set()).add(str2bin(infohash))
 
@@ -1896,8 +2353,12 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             WHERE ChannelTorrents.torrent_id = Torrent.torrent_id AND Channels.id = ChannelTorrents.channel_id
             AND ChannelTorrents.channel_id in (select channel_id from ChannelVotes
             WHERE voter_id ISNULL and vote=2) and time_stamp < ?
-            AND ChannelTorrents.dispersy_id <> -1 order by random() limit ?"""
-            othersrandomtorrents = self._db.fetchall(sql, (least_recent, NUM_OTHERS_RANDOM_TORRENTS))
+            AND ChannelTorrents.dispersy_id <> -1 AND %s"""
+            othersrandomtorrents = self._fetch_random_rows(sql, (least_recent,), u"ChannelTorrents.id",
+                                                           NUM_OTHERS_RANDOM_TORRENTS,
+                                                           u"SELECT MIN(id), MAX(id) FROM _ChannelTorrents "
+                                                           u"WHERE channel_id IN (SELECT channel_id FROM ChannelVotes "
+                                                           u"WHERE voter_id ISNULL AND vote=2)")
             for cid, infohash in othersrandomtorrents:
                 torrent_dict.setdefault(str(cid), set()).add(str2bin(infohash))
 
@@ -1920,10 +2381,12 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
 
     def getRandomTorrents(self, channel_id, limit=15):
         sql = """SELECT infohash FROM ChannelTorrents, Torrent WHERE ChannelTorrents.torrent_id = Torrent.torrent_id
-        AND channel_id = ? ORDER BY RANDOM() LIMIT ?"""
+        AND channel_id = ? AND %s"""
 
         returnar = []
-        for infohash, in self._db.fetchall(sql, (channel_id, limit)):
+        for infohash, in self._fetch_random_rows(sql, (channel_id,), u"ChannelTorrents.id", limit,
+                                                 u"SELECT MIN(id), MAX(id) FROM _ChannelTorrents WHERE channel_id = ?",
+                                                 (channel_id,)):
             returnar.append(str2bin(infohash))
         return returnar
 
@@ -1947,8 +2410,9 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
         """
         sql = "SELECT %s FROM ChannelTorrents, Torrent " \
               "WHERE ChannelTorrents.torrent_id = Torrent.torrent_id AND Torrent.name IS NOT NULL " \
-              "ORDER BY RANDOM() LIMIT ?" % ", ".join(keys)
-        results = self._db.fetchall(sql, (limit,))
+              "AND %%s" % ", ".join(keys)
+        results = self._fetch_random_rows(sql, (), u"ChannelTorrents.id", limit,
+                                          u"SELECT MIN(id), MAX(id) FROM _ChannelTorrents")
         return self.__fixTorrents(keys, results)
 
     def getTorrentFromChannelTorrentId(self, channeltorrent_id, keys):
@@ -2297,8 +2761,22 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
         """
         Searches for matching channels against a given query in the database.
         """
-        search_results = []
         keywords = split_into_keywords(query, to_filter_stopwords=True)
+        sql, bindings = self._get_local_channels_search_sql(keywords)
+        return self._process_local_channels_search_results(self._db.fetchall(sql, bindings), keywords)
+
+    def search_in_local_channels_db_async(self, query):
+        """
+        Asynchronous version of search_in_local_channels_db.
+        :return: A Deferred that fires with the search results.
+        """
+        keywords = split_into_keywords(query, to_filter_stopwords=True)
+        sql, bindings = self._get_local_channels_search_sql(keywords)
+        return self._db.fetchall_async(sql, bindings).addCallback(self._process_local_channels_search_results,
+                                                                  keywords)
+
+    @staticmethod
+    def _get_local_channels_search_sql(keywords):
         sql = "SELECT id, dispersy_cid, name, description, nr_torrents, nr_favorite, nr_spam, modified " \
               "FROM Channels WHERE "
         for _ in xrange(len(keywords)):
@@ -2306,8 +2784,10 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
         sql = sql[:-4]
 
         bindings = list(chain.from_iterable(['%%%s%%' % keyword] * 2 for keyword in keywords))
-        results = self._db.fetchall(sql, bindings)
+        return sql, bindings
 
+    def _process_local_channels_search_results(self, results, keywords):
+        search_results = []
         my_votes = self.votecast_db.getMyVotes()
 
         for result in results:
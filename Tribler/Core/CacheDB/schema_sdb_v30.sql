@@ -210,6 +210,8 @@ CREATE TABLE IF NOT EXISTS _ChannelMetaData (
   time_stamp            integer         NOT NULL,
   inserted              integer         DEFAULT (strftime('%s','now')),
   deleted_at            integer,
+  global_time           integer,
+  mid                   blob,
   UNIQUE (dispersy_id)
 );
 CREATE VIEW ChannelMetaData AS SELECT * FROM _ChannelMetaData WHERE deleted_at IS NULL;
@@ -232,6 +234,17 @@ CREATE TABLE IF NOT EXISTS MetaDataPlaylist (
 );
 CREATE INDEX IF NOT EXISTS MePlaylistIndex ON MetaDataPlaylist(playlist_id);
 
+CREATE TABLE IF NOT EXISTS LatestModification (
+  target_type           text            NOT NULL,
+  target_id             integer         NOT NULL,
+  type                  text            NOT NULL,
+  dispersy_id           integer         NOT NULL,
+  prev_global_time      integer,
+  global_time           integer,
+  mid                   blob,
+  PRIMARY KEY (target_type, target_id, type)
+);
+
 CREATE TABLE IF NOT EXISTS _ChannelVotes (
   channel_id            integer,
   voter_id              integer,
@@ -277,7 +290,7 @@ COMMIT TRANSACTION create_table;
 
 BEGIN TRANSACTION init_values;
 
-INSERT INTO MyInfo VALUES ('version', 28);
+INSERT INTO MyInfo VALUES ('version', 30);
 
 INSERT INTO TrackerInfo (tracker) VALUES ('no-DHT');
 INSERT INTO TrackerInfo (tracker) VALUES ('DHT');
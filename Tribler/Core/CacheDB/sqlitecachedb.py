@@ -5,12 +5,18 @@ Author(s): Jie Yang
 """
 import logging
 import os
+from Queue import Queue
+from itertools import islice
 
 from Tribler.Core.Utilities.install_dir import get_lib_path
 from apsw import CantOpenError, SQLError
 from base64 import encodestring, decodestring
 from threading import currentThread, RLock
+from twisted.internet import reactor
+from twisted.internet.defer import succeed, fail
+from twisted.internet.threads import deferToThreadPool
 from twisted.python.threadable import isInIOThread
+from twisted.python.threadpool import ThreadPool
 
 import apsw
 
@@ -18,6 +24,7 @@ from Tribler.dispersy.taskmanager import TaskManager
 from Tribler.dispersy.util import blocking_call_on_reactor_thread, call_on_reactor_thread
 
 from Tribler.Core.CacheDB.db_versions import LATEST_DB_VERSION
+from Tribler.Core.Utilities.search_utils import get_bm25_score
 
 
 DB_SCRIPT_NAME = "schema_sdb_v%s.sql" % str(LATEST_DB_VERSION)
@@ -28,6 +35,7 @@ DB_FILE_RELATIVE_PATH = os.path.join(DB_DIR_NAME, DB_FILE_NAME)
 DB_SCRIPT_ABSOLUTE_PATH = os.path.join(get_lib_path(), 'Core', 'CacheDB', DB_SCRIPT_NAME)
 
 DEFAULT_BUSY_TIMEOUT = 10000
+DEFAULT_READ_POOL_SIZE = 4
 
 forceDBThread = call_on_reactor_thread
 forceAndReturnDBThread = blocking_call_on_reactor_thread
@@ -47,7 +55,8 @@ def str2bin(str_data):
 
 class SQLiteCacheDB(TaskManager):
 
-    def __init__(self, db_path, db_script_path=DB_SCRIPT_ABSOLUTE_PATH, busytimeout=DEFAULT_BUSY_TIMEOUT):
+    def __init__(self, db_path, db_script_path=DB_SCRIPT_ABSOLUTE_PATH, busytimeout=DEFAULT_BUSY_TIMEOUT,
+                 read_pool_size=DEFAULT_READ_POOL_SIZE):
         super(SQLiteCacheDB, self).__init__()
 
         self._logger = logging.getLogger(self.__class__.__name__)
@@ -65,6 +74,12 @@ class SQLiteCacheDB(TaskManager):
         self._should_commit = False
         self._show_execute = False
 
+        # Read-only connections used to answer queries outside the reactor thread. In WAL mode, readers do not
+        # block the writer (and vice versa), so these connections can be used concurrently with the main one.
+        self._read_pool_size = read_pool_size
+        self._read_pool = None
+        self._read_connections = Queue()
+
     @property
     def version(self):
         """The version of this database."""
@@ -93,6 +108,7 @@ class SQLiteCacheDB(TaskManager):
         Cancels all pending tasks and closes all cursors. Then, it closes the connection.
         """
         self.cancel_all_pending_tasks()
+        self._close_read_pool()
         with self._cursor_lock:
             for cursor in self._cursor_table.itervalues():
                 cursor.close()
@@ -122,6 +138,7 @@ class SQLiteCacheDB(TaskManager):
         try:
             self._connection = apsw.Connection(self.sqlite_db_path)
             self._connection.setbusytimeout(self._busytimeout)
+            self._register_functions(self._connection)
         except CantOpenError as e:
             msg = u"Failed to open connection to %s: %s" % (self.sqlite_db_path, e)
             raise CantOpenError(msg)
@@ -189,6 +206,96 @@ class SQLiteCacheDB(TaskManager):
         else:
             self._version = 1
 
+    @staticmethod
+    def _register_functions(connection):
+        """
+        Registers the SQL functions we use in our queries on a connection.
+        """
+        connection.createscalarfunction("bm25_score", get_bm25_score, 1)
+
+    @property
+    def supports_async_reads(self):
+        """
+        Returns whether queries can be offloaded to a pool of read-only connections. An in-memory database cannot be
+        shared between connections, in which case asynchronous queries are executed on the main connection instead.
+        """
+        return self.sqlite_db_path != u":memory:" and self._read_pool_size > 0
+
+    def _open_read_pool(self):
+        """
+        Opens the read-only connections and starts the threadpool that executes asynchronous queries on them.
+        This is done lazily, on the first asynchronous query.
+        """
+        for _ in xrange(self._read_pool_size):
+            connection = apsw.Connection(self.sqlite_db_path, flags=apsw.SQLITE_OPEN_READONLY)
+            connection.setbusytimeout(self._busytimeout)
+            self._register_functions(connection)
+            self._read_connections.put(connection)
+
+        self._read_pool = ThreadPool(minthreads=1, maxthreads=self._read_pool_size, name="SQLiteCacheDB-reader")
+        self._read_pool.start()
+
+    def _close_read_pool(self):
+        if self._read_pool is None:
+            return
+
+        self._read_pool.stop()
+        self._read_pool = None
+        while not self._read_connections.empty():
+            self._read_connections.get_nowait().close()
+
+    def _run_with_read_cursor(self, function, *args):
+        """
+        Calls function with a cursor of one of the read-only connections. This method is invoked from the threadpool.
+        """
+        connection = self._read_connections.get()
+        try:
+            cursor = connection.cursor()
+            try:
+                return function(cursor, *args)
+            finally:
+                cursor.close()
+        finally:
+            self._read_connections.put(connection)
+
+    def _run_read_query(self, sql, args, chunk_size=None, on_chunk=None):
+        """
+        Executes a query on one of the read-only connections. This method is invoked from the threadpool.
+        If on_chunk is given, the resulting rows are passed to it on the reactor thread, in chunks of chunk_size rows.
+        """
+        def execute(cursor):
+            if self._show_execute:
+                self._logger.info(u"===%s===\n%s\n-----\n%s\n======\n", currentThread().getName(), sql, args)
+
+            rows = cursor.execute(sql) if args is None else cursor.execute(sql, args)
+            if on_chunk is None:
+                return list(rows)
+            return self._pass_chunks(rows, chunk_size, lambda chunk: reactor.callFromThread(on_chunk, chunk))
+
+        try:
+            return self._run_with_read_cursor(execute)
+        except Exception:
+            self._logger.exception(u"cachedb: ===%s===\nSQL Type: %s\n-----\n%s\n-----\n%s\n======\n",
+                                   currentThread().getName(), type(sql), sql, args)
+            raise
+
+    @staticmethod
+    def _pass_chunks(rows, chunk_size, on_chunk):
+        """
+        Passes the rows to on_chunk, in chunks of at most chunk_size rows. At least one (possibly empty) chunk is
+        passed.
+        :return: The total number of rows.
+        """
+        rows = iter(rows)
+        num_rows = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if chunk or not num_rows:
+                on_chunk(chunk)
+            num_rows += len(chunk)
+            if len(chunk) < chunk_size:
+                return num_rows
+
     def get_cursor(self):
         thread_name = currentThread().getName()
 
@@ -383,15 +490,17 @@ class SQLiteCacheDB(TaskManager):
         find = self.execute_read(sql, args)
         if not find:
             return
+        return self._first_row(sql, list(find))
+
+    def _first_row(self, sql, rows):
+        if len(rows) > 0:
+            if len(rows) > 1:
+                self._logger.debug(
+                    u"FetchONE resulted in many more rows than one, consider putting a LIMIT 1 in the sql statement "
+                    u"%s, %s", sql, len(rows))
+            find = rows[0]
         else:
-            find = list(find)
-            if len(find) > 0:
-                if len(find) > 1:
-                    self._logger.debug(
-                        u"FetchONE resulted in many more rows than one, consider putting a LIMIT 1 in the sql statement %s, %s", sql, len(find))
-                find = find[0]
-            else:
-                return
+            return
         if len(find) > 1:
             return find
         else:
@@ -406,9 +515,82 @@ class SQLiteCacheDB(TaskManager):
         else:
             return []  # should it return None?
 
+    # -------- Asynchronous Read Operations --------
+    def fetchall_async(self, sql, args=None):
+        """
+        Executes a read query on one of the read-only connections, outside of the reactor thread.
+        Note that the read connections only see committed data.
+        :return: A Deferred that fires with the list of resulting rows.
+        """
+        if not self.supports_async_reads:
+            try:
+                return succeed(self.fetchall(sql, args))
+            except Exception:
+                return fail()
+
+        if self._read_pool is None:
+            self._open_read_pool()
+
+        return deferToThreadPool(reactor, self._read_pool, self._run_read_query, sql, args)
+
+    def fetchchunks_async(self, sql, args, chunk_size, on_chunk):
+        """
+        Executes a read query on one of the read-only connections, outside of the reactor thread. The resulting rows are
+        passed to on_chunk on the reactor thread while they are being read, in chunks of at most chunk_size rows.
+        This allows a caller to start processing the first rows of a large (sorted) result early.
+        :return: A Deferred that fires with the total number of rows, after the last chunk has been passed.
+        """
+        if not self.supports_async_reads:
+            try:
+                return succeed(self._pass_chunks(self.fetchall(sql, args), chunk_size, on_chunk))
+            except Exception:
+                return fail()
+
+        if self._read_pool is None:
+            self._open_read_pool()
+
+        return deferToThreadPool(reactor, self._read_pool, self._run_read_query, sql, args, chunk_size, on_chunk)
+
+    def run_with_read_cursor_async(self, function, *args):
+        """
+        Calls function(cursor, *args) with a cursor of one of the read-only connections, outside of the reactor thread.
+        This allows for reading a large result without blocking the reactor. The function should not touch any state
+        that is shared with the reactor thread.
+        :return: A Deferred that fires with the return value of function.
+        """
+        if not self.supports_async_reads:
+            try:
+                return succeed(function(self.get_cursor(), *args))
+            except Exception:
+                return fail()
+
+        if self._read_pool is None:
+            self._open_read_pool()
+
+        return deferToThreadPool(reactor, self._read_pool, self._run_with_read_cursor, function, *args)
+
+    def fetchone_async(self, sql, args=None):
+        """
+        Asynchronous version of fetchone.
+        :return: A Deferred that fires with the first resulting row (or value), or None if there is no result.
+        """
+        return self.fetchall_async(sql, args).addCallback(lambda rows: self._first_row(sql, rows))
+
     def getOne(self, table_name, value_name, where=None, conj=u"AND", **kw):
         """ value_name could be a string, a tuple of strings, or '*'
         """
+        sql, arg = self._build_get_one_sql(table_name, value_name, where=where, conj=conj, **kw)
+
+        # print >> sys.stderr, 'SQL: %s %s' % (sql, arg)
+        return self.fetchone(sql, arg)
+
+    def getOneAsync(self, table_name, value_name, where=None, conj=u"AND", **kw):
+        """ Asynchronous version of getOne, returns a Deferred
+        """
+        sql, arg = self._build_get_one_sql(table_name, value_name, where=where, conj=conj, **kw)
+        return self.fetchone_async(sql, arg)
+
+    def _build_get_one_sql(self, table_name, value_name, where=None, conj=u"AND", **kw):
         if isinstance(value_name, tuple):
             value_names = u",".join(value_name)
         elif isinstance(value_name, list):
@@ -446,8 +628,7 @@ class SQLiteCacheDB(TaskManager):
         else:
             arg = None
 
-        # print >> sys.stderr, 'SQL: %s %s' % (sql, arg)
-        return self.fetchone(sql, arg)
+        return sql, arg
 
     def getAll(self, table_name, value_name, where=None, group_by=None, having=None, order_by=None, limit=None,
                offset=None, conj=u"AND", **kw):
@@ -455,6 +636,30 @@ class SQLiteCacheDB(TaskManager):
             order by is represented as order_by
             group by is represented as group_by
         """
+        sql, arg = self._build_get_all_sql(table_name, value_name, where=where, group_by=group_by, having=having,
+                                           order_by=order_by, limit=limit, offset=offset, conj=conj, **kw)
+
+        try:
+            return self.fetchall(sql, arg) or []
+        except Exception as msg:
+            self._logger.exception(u"Wrong getAll sql statement: %s", sql)
+            raise Exception(msg)
+
+    def getAllAsync(self, table_name, value_name, where=None, group_by=None, having=None, order_by=None, limit=None,
+                    offset=None, conj=u"AND", **kw):
+        """ Asynchronous version of getAll, returns a Deferred
+        """
+        sql, arg = self._build_get_all_sql(table_name, value_name, where=where, group_by=group_by, having=having,
+                                           order_by=order_by, limit=limit, offset=offset, conj=conj, **kw)
+
+        def on_error(failure):
+            self._logger.error(u"Wrong getAll sql statement: %s", sql)
+            return failure
+
+        return self.fetchall_async(sql, arg).addErrback(on_error)
+
+    def _build_get_all_sql(self, table_name, value_name, where=None, group_by=None, having=None, order_by=None,
+                           limit=None, offset=None, conj=u"AND", **kw):
         if isinstance(value_name, tuple):
             value_names = u",".join(value_name)
         elif isinstance(value_name, list):
@@ -505,8 +710,4 @@ class SQLiteCacheDB(TaskManager):
         if offset is not None:
             sql += u' OFFSET %d' % offset
 
-        try:
-            return self.fetchall(sql, arg) or []
-        except Exception as msg:
-            self._logger.exception(u"Wrong getAll sql statement: %s", sql)
-            raise Exception(msg)
+        return sql, arg
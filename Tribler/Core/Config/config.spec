@@ -46,11 +46,16 @@ port = integer(min=-1, max=65536, default=-1)
 
 [torrent_checking]
 enabled = boolean(default=True)
+max_concurrent_checks = integer(min=1, default=10)
 
 [torrent_store]
 enabled = boolean(default=True)
 store_dir = string(default=collected_torrents)
 
+[checkpoint_store]
+enabled = boolean(default=False)
+store_dir = string(default=dlcheckpoints_store)
+
 [torrent_collecting]
 enabled = boolean(default=True)
 max_torrents = integer(default=50000)
@@ -63,6 +68,7 @@ proxy_type = integer(min=0, max=5, default=0)
 proxy_server = string(default='')
 proxy_auth = string(default='')
 max_connections_download = integer(default=-1)
+max_metainfo_requests = integer(min=1, default=10)
 max_download_rate = integer(default=0)
 max_upload_rate = integer(default=0)
 utp = boolean(default=True)
@@ -85,6 +91,7 @@ seeding_time = float(default=60)
 [dispersy]
 enabled = boolean(default=True)
 port = integer(min=-1, max=65536, default=-1)
+tftp_window_size = integer(min=1, default=16)
 
 [video_server]
 enabled = boolean(default=True)
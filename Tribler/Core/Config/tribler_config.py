@@ -221,6 +221,12 @@ class TriblerConfig(object):
     def get_torrent_checking_enabled(self):
         return self.config['torrent_checking']['enabled']
 
+    def set_torrent_checking_max_concurrent_checks(self, value):
+        self.config['torrent_checking']['max_concurrent_checks'] = value
+
+    def get_torrent_checking_max_concurrent_checks(self):
+        return self.config['torrent_checking']['max_concurrent_checks']
+
     # HTTP API
 
     def set_http_api_enabled(self, http_api_enabled):
@@ -249,6 +255,12 @@ class TriblerConfig(object):
     def get_dispersy_port(self):
         return self._obtain_port('dispersy', 'port')
 
+    def set_dispersy_tftp_window_size(self, value):
+        self.config['dispersy']['tftp_window_size'] = value
+
+    def get_dispersy_tftp_window_size(self):
+        return self.config['dispersy']['tftp_window_size']
+
     # Libtorrent
 
     def set_libtorrent_enabled(self, value):
@@ -349,6 +361,19 @@ class TriblerConfig(object):
         """
         return self.config['libtorrent']['max_connections_download']
 
+    def set_libtorrent_max_metainfo_requests(self, value):
+        """
+        Set the maximum number of metainfo requests that are looked up at the same time. Other requests are queued.
+        :param value: int.
+        """
+        self.config['libtorrent']['max_metainfo_requests'] = value
+
+    def get_libtorrent_max_metainfo_requests(self):
+        """ Returns the maximum number of metainfo requests that are looked up at the same time
+        :return: int.
+        """
+        return self.config['libtorrent']['max_metainfo_requests']
+
     def set_libtorrent_max_upload_rate(self, value):
         """
         Sets the maximum upload rate (kB / s).
@@ -518,6 +543,20 @@ class TriblerConfig(object):
     def set_torrent_store_dir(self, value):
         self.config['torrent_store']['store_dir'] = value
 
+    # Checkpoint store
+
+    def get_checkpoint_store_enabled(self):
+        return self.config['checkpoint_store']['enabled']
+
+    def set_checkpoint_store_enabled(self, value):
+        self.config['checkpoint_store']['enabled'] = value
+
+    def get_checkpoint_store_dir(self):
+        return os.path.join(self.get_state_dir(), self.config['checkpoint_store']['store_dir'])
+
+    def set_checkpoint_store_dir(self, value):
+        self.config['checkpoint_store']['store_dir'] = value
+
     # Metadata
 
     def get_metadata_enabled(self):
@@ -8,8 +8,8 @@ import logging
 import os
 import random
 import sys
-import time
 from binascii import hexlify
+from threading import Event, Lock
 from traceback import print_exc
 from twisted.internet import defer, reactor
 from twisted.internet.defer import Deferred, CancelledError, succeed
@@ -38,6 +38,9 @@ if sys.platform == "win32":
     except ImportError:
         pass
 
+# The number of seconds a thread waits for a piece finished alert before it checks the piece itself again
+VOD_PIECE_WAIT_TIMEOUT = 1
+
 
 class VODFile(object):
 
@@ -61,8 +64,10 @@ class VODFile(object):
 
         self._logger.debug('VODFile: get bytes %s - %s', oldpos, oldpos + args[0])
 
-        while not self._file.closed and self._download.get_byte_progress([(self._download.get_vod_fileindex(), oldpos, oldpos + args[0])]) < 1 and self._download.vod_seekpos is not None:
-            time.sleep(1)
+        byteranges = [(self._download.get_vod_fileindex(), oldpos, oldpos + args[0])]
+        while not self._file.closed and self._download.vod_seekpos is not None and \
+                not self._download.wait_for_bytes(byteranges):
+            pass
 
         if self._file.closed:
             self._logger.debug('VODFile: got no bytes, file is closed')
@@ -95,6 +100,7 @@ class VODFile(object):
 
     def close(self, *args):
         self._file.close(*args)
+        self._download.wake_piece_waiters()
 
     @property
     def closed(self):
@@ -161,6 +167,12 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
         self.deferreds_handle = []
         self.deferred_removed = Deferred()
 
+        # Set while the download has a valid libtorrent handle, threads outside the reactor can wait for it
+        self.handle_available = Event()
+        # Threads waiting for a piece to be downloaded, piece index -> Event
+        self.piece_waiters = {}
+        self.piece_waiters_lock = Lock()
+
         self.handle_check_lc = self.register_task("handle_check", LoopingCall(self.check_handle))
 
     def __str__(self):
@@ -185,6 +197,7 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
         for the handle.
         """
         if self.handle and self.handle.is_valid():
+            self.handle_available.set()
             self.handle_check_lc.stop()
             for deferred in self.deferreds_handle:
                 deferred.callback(self.handle)
@@ -200,6 +213,22 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
         self.deferreds_handle.append(deferred)
         return deferred
 
+    def wait_for_handle(self, timeout=None):
+        """
+        Block the calling thread until the download has a valid libtorrent handle or the timeout expires. Should not
+        be called from the reactor thread.
+        :return: True if the download has a valid handle, False otherwise.
+        """
+        with self.dllock:
+            if self.handle and self.handle.is_valid():
+                return True
+            # The handle might have become invalid after it was reported to be available
+            self.handle_available.clear()
+
+        self.handle_available.wait(timeout)
+        with self.dllock:
+            return bool(self.handle and self.handle.is_valid())
+
     def setup(self, dcfg=None, pstate=None, wrapperDelay=0, share_mode=False, checkpoint_disabled=False):
         """
         Create a Download object. Used internally by Session.
@@ -341,6 +370,7 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
             self.handle = self.ltmgr.add_torrent(self, atp)
             # assert self.handle.status().share_mode == share_mode
             if self.handle.is_valid():
+                self.handle_available.set()
 
                 self.set_selected_files()
 
@@ -404,6 +434,10 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
             self.handle.set_priority(0)
             if self.get_vod_fileindex() >= 0:
                 self.set_byte_priority([(self.get_vod_fileindex(), 0, -1)], 1)
+            self.wake_piece_waiters()
+
+        if self.ltmgr:
+            self.ltmgr.set_piece_alerts(self, enable)
 
     def get_vod_fileindex(self):
         if self.vod_index is not None:
@@ -462,6 +496,13 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
 
     @checkHandleAndSynchronize(0.0)
     def get_byte_progress(self, byteranges, consecutive=False):
+        return self.get_piece_progress(self.get_byte_pieces(byteranges), consecutive)
+
+    @checkHandleAndSynchronize()
+    def get_byte_pieces(self, byteranges):
+        """
+        Return the sorted indices of the pieces that contain the given byte ranges, or None if there is no valid handle.
+        """
         pieces = []
         for fileindex, bytes_begin, bytes_end in byteranges:
             if fileindex >= 0:
@@ -480,8 +521,52 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
             else:
                 self._logger.info("LibtorrentDownloadImpl: could not get progress for incorrect fileindex")
 
-        pieces = list(set(pieces))
-        return self.get_piece_progress(pieces, consecutive)
+        return sorted(set(pieces))
+
+    @checkHandleAndSynchronize(False)
+    def has_piece(self, piece):
+        return self.handle.have_piece(piece)
+
+    def wait_for_pieces(self, pieces, timeout=VOD_PIECE_WAIT_TIMEOUT):
+        """
+        Block the calling thread until the first missing piece is downloaded or the timeout expires. The thread is woken
+        up by the piece finished alert of that piece. Should not be called from the reactor thread.
+        :return: True if all pieces have been downloaded, False otherwise.
+        """
+        for piece in pieces:
+            if self.has_piece(piece):
+                continue
+
+            with self.piece_waiters_lock:
+                event = self.piece_waiters.setdefault(piece, Event())
+            # The piece might have finished before the waiter was registered
+            if not self.has_piece(piece):
+                event.wait(timeout)
+            return all(self.has_piece(index) for index in pieces)
+        return True
+
+    def wait_for_bytes(self, byteranges, timeout=VOD_PIECE_WAIT_TIMEOUT):
+        """
+        Block the calling thread until the pieces containing the given byte ranges are downloaded or the timeout
+        expires.
+        :return: True if all bytes have been downloaded, False otherwise.
+        """
+        if not self.wait_for_handle(timeout):
+            return False
+
+        pieces = self.get_byte_pieces(byteranges)
+        return pieces is not None and self.wait_for_pieces(pieces, timeout)
+
+    def wake_piece_waiters(self):
+        """
+        Wake up all threads waiting for pieces, so they can check whether they should still wait.
+        """
+        with self.piece_waiters_lock:
+            events = self.piece_waiters.values()
+            self.piece_waiters = {}
+
+        for event in events:
+            event.set()
 
     @checkHandleAndSynchronize()
     def set_piece_priority(self, pieces_need, priority):
@@ -532,7 +617,7 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
 
         alert_types = ('tracker_reply_alert', 'tracker_error_alert', 'tracker_warning_alert', 'metadata_received_alert',
                        'file_renamed_alert', 'performance_alert', 'torrent_checked_alert', 'torrent_finished_alert',
-                       'save_resume_data_alert', 'save_resume_data_failed_alert')
+                       'save_resume_data_alert', 'save_resume_data_failed_alert', 'piece_finished_alert')
 
         if alert_type in alert_types:
             getattr(self, 'on_' + alert_type)(alert)
@@ -542,7 +627,7 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
     def on_save_resume_data_alert(self, alert):
         """
         Callback for the alert that contains the resume data of a specific download.
-        This resume data will be written to a file on disk.
+        This resume data will be checkpointed by the session, either to a file on disk or to the checkpoint store.
         """
         if self._checkpoint_disabled:
             return
@@ -553,13 +638,8 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
         self.pstate_for_restart.set('state', 'engineresumedata', resume_data)
         self._logger.debug("%s get resume data %s", hexlify(resume_data['info-hash']), resume_data)
 
-        # save it to file
-        basename = hexlify(resume_data['info-hash']) + '.state'
-        filename = os.path.join(self.session.get_downloads_pstate_dir(), basename)
-
-        self._logger.debug("tlm: network checkpointing: to file %s", filename)
-
-        self.pstate_for_restart.write_file(filename)
+        self._logger.debug("tlm: network checkpointing %s", hexlify(resume_data['info-hash']))
+        self.session.lm.write_download_pstate(resume_data['info-hash'], self.pstate_for_restart)
 
         # fire callback for all deferreds_resume
         for deferred_r in self.deferreds_resume:
@@ -576,6 +656,12 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
         # empties the deferred list
         self.deferreds_resume = []
 
+    def on_piece_finished_alert(self, alert):
+        with self.piece_waiters_lock:
+            event = self.piece_waiters.pop(alert.piece_index, None)
+        if event:
+            event.set()
+
     def on_tracker_reply_alert(self, alert):
         self.tracker_status[alert.url] = [alert.num_peers, 'Working']
 
@@ -1075,6 +1161,9 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
                 if removestate:
                     out = self.ltmgr.remove_torrent(self, removecontent)
                     self.handle = None
+                    self.handle_available.clear()
+                    self.ltmgr.set_piece_alerts(self, False)
+                    self.wake_piece_waiters()
                 else:
                     self.set_vod_mode(False)
                     self.handle.pause()
@@ -1170,9 +1259,7 @@ class LibtorrentDownloadImpl(DownloadConfigInterface, TaskManager):
         if not self.handle or not self.handle.is_valid():
             # Libtorrent hasn't received or initialized this download yet
             # 1. Check if we have data for this infohash already (don't overwrite it if we do!)
-            basename = hexlify(self.tdef.get_infohash()) + '.state'
-            filename = os.path.join(self.session.get_downloads_pstate_dir(), basename)
-            if not os.path.isfile(filename):
+            if not self.session.lm.has_download_pstate(self.tdef.get_infohash()):
                 # 2. If there is no saved data for this infohash, checkpoint it without data so we do not
                 #    lose it when we crash or restart before the download becomes known.
                 resume_data = {
@@ -4,6 +4,7 @@ A wrapper around libtorrent
 Author(s): Egbert Bouman
 """
 import binascii
+import heapq
 import logging
 import os
 import random
@@ -11,7 +12,7 @@ import tempfile
 import threading
 import time
 from binascii import hexlify
-from copy import deepcopy
+from collections import OrderedDict, deque
 from shutil import rmtree
 from urllib import url2pathname
 
@@ -33,8 +34,92 @@ from Tribler.dispersy.util import blocking_call_on_reactor_thread, call_on_react
 
 LTSTATE_FILENAME = "lt.state"
 METAINFO_CACHE_PERIOD = 5 * 60
+METAINFO_CACHE_MAX_SIZE = 10 * 1024 * 1024
+
+# The priorities of metainfo requests, requests with a lower value are handled first
+METAINFO_PRIORITY_HIGH = 0
+METAINFO_PRIORITY_NORMAL = 1
+
+# The maximum number of seconds a metainfo request waits for a handle before it times out
+METAINFO_MAX_QUEUE_TIME = 120
+
+# The number of metainfo fetch latencies the statistics are based on
+METAINFO_LATENCY_HISTORY = 100
 DHT_CHECK_RETRIES = 1
 
+# The interval in seconds between processing libtorrent alerts, a shorter interval is used while a download is in
+# VOD mode so threads waiting for pieces are woken up soon after the pieces have been downloaded
+PROCESS_ALERTS_INTERVAL = 1
+VOD_PROCESS_ALERTS_INTERVAL = 0.1
+
+
+class MetainfoCache(object):
+    """
+    A least recently used cache of bencoded metainfo, bounded by the total size of the metainfo and by its age.
+    """
+
+    def __init__(self, max_size=METAINFO_CACHE_MAX_SIZE, max_age=METAINFO_CACHE_PERIOD):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # infohash -> (time added, bencoded metainfo), least recently used first
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, infohash):
+        _, metainfo = self._entries.pop(infohash)
+        self.size -= len(metainfo)
+
+    def get(self, infohash):
+        """
+        Return the bencoded metainfo of an infohash, or None if it is not cached or has expired.
+        """
+        if infohash in self._entries:
+            added_time, metainfo = self._entries.pop(infohash)
+            if added_time >= time.time() - self.max_age:
+                self._entries[infohash] = (added_time, metainfo)
+                self.hits += 1
+                return metainfo
+            self.size -= len(metainfo)
+
+        self.misses += 1
+        return None
+
+    def put(self, infohash, metainfo):
+        """
+        Cache the bencoded metainfo of an infohash, evicting the least recently used metainfo if the cache is full.
+        """
+        if infohash in self._entries:
+            self._remove(infohash)
+        if len(metainfo) > self.max_size:
+            return
+
+        self._entries[infohash] = (time.time(), metainfo)
+        self.size += len(metainfo)
+        while self.size > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def expire(self):
+        """
+        Remove the metainfo that is older than the maximum age.
+        """
+        oldest_time = time.time() - self.max_age
+        # The entries are ordered on their last use, not on their age
+        for infohash, (added_time, _) in self._entries.items():
+            if added_time < oldest_time:
+                self._remove(infohash)
+
+    def get_statistics(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self._entries),
+                'size': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0}
+
 
 class LibtorrentMgr(TaskManager):
 
@@ -57,9 +142,16 @@ class LibtorrentMgr(TaskManager):
         self.dht_ready = False
 
         self.metadata_tmpdir = None
+        # Requests are coalesced per infohash, at most a configured number of them have a handle at the same time
         self.metainfo_requests = {}
+        self.metainfo_queue = []  # heap of (priority, sequence number, infohash) of the requests without a handle
+        self.metainfo_queue_counter = 0
         self.metainfo_lock = threading.RLock()
-        self.metainfo_cache = {}
+        self.metainfo_cache = MetainfoCache()
+        self.metainfo_latencies = deque(maxlen=METAINFO_LATENCY_HISTORY)
+
+        # The downloads in VOD mode, for which piece finished alerts are requested
+        self.piece_alert_downloads = set()
 
         self.process_alerts_lc = self.register_task("process_alerts", LoopingCall(self._task_process_alerts))
         self.check_reachability_lc = self.register_task("check_reachability", LoopingCall(self._check_reachability))
@@ -73,7 +165,7 @@ class LibtorrentMgr(TaskManager):
         self.metadata_tmpdir = tempfile.mkdtemp(suffix=u'tribler_metainfo_tmpdir')
 
         # register tasks
-        self.process_alerts_lc.start(1, now=False)
+        self.process_alerts_lc.start(PROCESS_ALERTS_INTERVAL, now=False)
         self.check_reachability_lc.start(5, now=True)
         self._schedule_next_check(5, DHT_CHECK_RETRIES)
 
@@ -140,12 +232,7 @@ class LibtorrentMgr(TaskManager):
             ltsession.add_extension(lt.create_smart_ban_plugin)
 
         ltsession.set_settings(settings)
-        ltsession.set_alert_mask(lt.alert.category_t.stats_notification |
-                                 lt.alert.category_t.error_notification |
-                                 lt.alert.category_t.status_notification |
-                                 lt.alert.category_t.storage_notification |
-                                 lt.alert.category_t.performance_warning |
-                                 lt.alert.category_t.tracker_notification)
+        ltsession.set_alert_mask(self.get_alert_mask(hops))
 
         # Load proxy settings
         if hops == 0:
@@ -190,6 +277,40 @@ class LibtorrentMgr(TaskManager):
 
         return ltsession
 
+    def get_alert_mask(self, hops=0):
+        mask = lt.alert.category_t.stats_notification | \
+            lt.alert.category_t.error_notification | \
+            lt.alert.category_t.status_notification | \
+            lt.alert.category_t.storage_notification | \
+            lt.alert.category_t.performance_warning | \
+            lt.alert.category_t.tracker_notification
+        if any(download.get_hops() == hops for download in self.piece_alert_downloads):
+            mask |= lt.alert.category_t.progress_notification
+        return mask
+
+    @call_on_reactor_thread
+    def set_piece_alerts(self, download, enable):
+        """
+        Enable or disable the piece finished alerts for a download. These alerts wake up the threads that stream the
+        download while it is in VOD mode.
+        """
+        if enable:
+            self.piece_alert_downloads.add(download)
+        else:
+            self.piece_alert_downloads.discard(download)
+
+        if self.ltsessions is None:
+            return
+
+        for hops, ltsession in self.ltsessions.iteritems():
+            if ltsession:
+                ltsession.set_alert_mask(self.get_alert_mask(hops))
+
+        interval = VOD_PROCESS_ALERTS_INTERVAL if self.piece_alert_downloads else PROCESS_ALERTS_INTERVAL
+        if self.process_alerts_lc.running and self.process_alerts_lc.interval != interval:
+            self.process_alerts_lc.stop()
+            self.process_alerts_lc.start(interval, now=False)
+
     def get_session(self, hops=0):
         if hops not in self.ltsessions:
             self.ltsessions[hops] = self.create_session(hops)
@@ -328,6 +449,10 @@ class LibtorrentMgr(TaskManager):
 
     def process_alert(self, alert):
         alert_type = str(type(alert)).split("'")[1].split(".")[-1]
+        if alert_type.startswith('block_'):
+            # Block alerts come along with the piece finished alerts, but nothing is interested in them
+            return
+
         handle = getattr(alert, 'handle', None)
         if handle:
             if handle.is_valid():
@@ -348,7 +473,8 @@ class LibtorrentMgr(TaskManager):
                         deferred.callback(None)
                 self._logger.debug("Alert for invalid torrent")
 
-    def get_metainfo(self, infohash_or_magnet, callback, timeout=30, timeout_callback=None, notify=True):
+    def get_metainfo(self, infohash_or_magnet, callback, timeout=30, timeout_callback=None, notify=True,
+                     priority=METAINFO_PRIORITY_NORMAL):
         if not self.is_dht_ready() and timeout > 5:
             self._logger.info("DHT not ready, rescheduling get_metainfo")
 
@@ -356,7 +482,8 @@ class LibtorrentMgr(TaskManager):
                 random_id = ''.join(random.choice('0123456789abcdef') for _ in xrange(30))
                 self.register_task("schedule_metainfo_lookup_%s" % random_id,
                                    reactor.callLater(5, lambda i=infohash_or_magnet, c=callback, t=timeout - 5,
-                                                  tcb=timeout_callback, n=notify: self.get_metainfo(i, c, t, tcb, n)))
+                                                  tcb=timeout_callback, n=notify, p=priority:
+                                                  self.get_metainfo(i, c, t, tcb, n, p)))
 
             reactor.callFromThread(schedule_call)
             return
@@ -371,51 +498,121 @@ class LibtorrentMgr(TaskManager):
         with self.metainfo_lock:
             self._logger.debug('get_metainfo %s %s %s', infohash_or_magnet, callback, timeout)
 
-            cache_result = self._get_cached_metainfo(infohash)
+            cache_result = self.metainfo_cache.get(infohash)
             if cache_result:
-                callback(deepcopy(cache_result))
+                callback(lt.bdecode(cache_result))
 
             elif infohash not in self.metainfo_requests:
-                # Flags = 4 (upload mode), should prevent libtorrent from creating files
-                atp = {'save_path': self.metadata_tmpdir,
-                       'flags': (lt.add_torrent_params_flags_t.flag_duplicate_is_error |
-                                 lt.add_torrent_params_flags_t.flag_upload_mode)}
-                if magnet:
-                    atp['url'] = magnet
-                else:
-                    atp['info_hash'] = lt.big_number(infohash_bin)
-                try:
-                    handle = self.get_session().add_torrent(encode_atp(atp))
-                except TypeError as e:
-                    self._logger.warning("Failed to add torrent with infohash %s, "
-                                         "attempting to use it as it is and hoping for the best",
-                                         hexlify(infohash_bin))
-                    self._logger.warning("Error was: %s", e)
-                    atp['info_hash'] = infohash_bin
-                    handle = self.get_session().add_torrent(encode_atp(atp))
-
-                if notify:
-                    self.notifier.notify(NTFY_TORRENTS, NTFY_MAGNET_STARTED, infohash_bin)
-
-                self.metainfo_requests[infohash] = {'handle': handle,
+                self.metainfo_requests[infohash] = {'handle': None,
+                                                    'magnet': magnet,
                                                     'callbacks': [callback],
                                                     'timeout_callbacks': [timeout_callback] if timeout_callback else [],
-                                                    'notify': notify}
-
-                def schedule_call():
-                    random_id = ''.join(random.choice('0123456789abcdef') for _ in xrange(30))
-                    self.register_task("schedule_got_metainfo_lookup_%s" % random_id,
-                                       reactor.callLater(timeout, lambda: self.got_metainfo(infohash, timeout=True)))
-
-                reactor.callFromThread(schedule_call)
+                                                    'notify': notify,
+                                                    'priority': priority,
+                                                    'timeout': timeout,
+                                                    'request_time': time.time()}
+                self._queue_metainfo_request(infohash, priority)
+                self._process_metainfo_queue()
+
+                if infohash in self.metainfo_requests and not self.metainfo_requests[infohash]['handle']:
+                    def schedule_queue_timeout():
+                        self.register_task("metainfo_queue_timeout_%s" % infohash,
+                                           reactor.callLater(METAINFO_MAX_QUEUE_TIME,
+                                                             lambda: self._on_metainfo_queue_timeout(infohash)))
+
+                    reactor.callFromThread(schedule_queue_timeout)
             else:
-                self.metainfo_requests[infohash]['notify'] = self.metainfo_requests[infohash]['notify'] and notify
-                callbacks = self.metainfo_requests[infohash]['callbacks']
+                request_dict = self.metainfo_requests[infohash]
+                request_dict['notify'] = request_dict['notify'] and notify
+                if timeout_callback and timeout_callback not in request_dict['timeout_callbacks']:
+                    request_dict['timeout_callbacks'].append(timeout_callback)
+                if priority < request_dict['priority'] and not request_dict['handle']:
+                    request_dict['priority'] = priority
+                    self._queue_metainfo_request(infohash, priority)
+
+                callbacks = request_dict['callbacks']
                 if callback not in callbacks:
                     callbacks.append(callback)
                 else:
                     self._logger.debug('get_metainfo duplicate detected, ignoring')
 
+    def _queue_metainfo_request(self, infohash, priority):
+        # Requests are handled first in, first out within a priority. A request that has been queued again with a
+        # higher priority leaves a stale entry in the queue, which is skipped.
+        self.metainfo_queue_counter += 1
+        heapq.heappush(self.metainfo_queue, (priority, self.metainfo_queue_counter, infohash))
+
+    def _process_metainfo_queue(self):
+        """
+        Add handles for the queued metainfo requests, as long as the maximum number of handles is not reached.
+        """
+        with self.metainfo_lock:
+            max_active = self.tribler_session.config.get_libtorrent_max_metainfo_requests()
+            active = sum(1 for request_dict in self.metainfo_requests.itervalues() if request_dict['handle'])
+
+            while self.metainfo_queue and active < max_active:
+                _, _, infohash = heapq.heappop(self.metainfo_queue)
+                request_dict = self.metainfo_requests.get(infohash)
+                if request_dict and not request_dict['handle'] and \
+                        self._start_metainfo_request(infohash, request_dict):
+                    active += 1
+
+    def _on_metainfo_queue_timeout(self, infohash):
+        with self.metainfo_lock:
+            request_dict = self.metainfo_requests.get(infohash)
+            if request_dict and not request_dict['handle']:
+                self._logger.info("Metainfo request for %s did not get a handle in time", infohash)
+                self.got_metainfo(infohash, timeout=True)
+
+    def _start_metainfo_request(self, infohash, request_dict):
+        """
+        Add a handle for a queued metainfo request. If libtorrent does not accept the handle, the request is removed
+        and its timeout callbacks are invoked.
+        :return: True if the request got a handle, False otherwise.
+        """
+        infohash_bin = binascii.unhexlify(infohash)
+
+        # Flags = 4 (upload mode), should prevent libtorrent from creating files
+        atp = {'save_path': self.metadata_tmpdir,
+               'flags': (lt.add_torrent_params_flags_t.flag_duplicate_is_error |
+                         lt.add_torrent_params_flags_t.flag_upload_mode)}
+        if request_dict['magnet']:
+            atp['url'] = request_dict['magnet']
+        else:
+            atp['info_hash'] = lt.big_number(infohash_bin)
+        try:
+            try:
+                handle = self.get_session().add_torrent(encode_atp(atp))
+            except TypeError as e:
+                self._logger.warning("Failed to add torrent with infohash %s, "
+                                     "attempting to use it as it is and hoping for the best",
+                                     hexlify(infohash_bin))
+                self._logger.warning("Error was: %s", e)
+                atp['info_hash'] = infohash_bin
+                handle = self.get_session().add_torrent(encode_atp(atp))
+        except (RuntimeError, TypeError) as e:
+            self._logger.error("Failed to add metainfo request for infohash %s: %s", infohash, e)
+            del self.metainfo_requests[infohash]
+            reactor.callFromThread(self.cancel_pending_task, "metainfo_queue_timeout_%s" % infohash)
+            for callback in request_dict['timeout_callbacks']:
+                callback(infohash_bin)
+            return False
+
+        if request_dict['notify']:
+            self.notifier.notify(NTFY_TORRENTS, NTFY_MAGNET_STARTED, infohash_bin)
+
+        request_dict['handle'] = handle
+
+        # The timeout starts once the request has a handle, the time spent in the queue is bounded separately
+        def schedule_call():
+            self.cancel_pending_task("metainfo_queue_timeout_%s" % infohash)
+            self.register_task("schedule_got_metainfo_lookup_%s" % infohash,
+                               reactor.callLater(request_dict['timeout'],
+                                                 lambda: self.got_metainfo(infohash, timeout=True)))
+
+        reactor.callFromThread(schedule_call)
+        return True
+
     def got_metainfo(self, infohash, timeout=False):
         with self.metainfo_lock:
             infohash_bin = binascii.unhexlify(infohash)
@@ -429,67 +626,74 @@ class LibtorrentMgr(TaskManager):
 
                 self._logger.debug('got_metainfo %s %s %s', infohash, handle, timeout)
 
-                assert handle
-                if handle:
-                    if callbacks and not timeout:
-                        metainfo = {"info": lt.bdecode(get_info_from_handle(handle).metadata())}
-                        trackers = [tracker.url for tracker in get_info_from_handle(handle).trackers()]
-                        peers = []
-                        leechers = 0
-                        seeders = 0
-                        for peer in handle.get_peer_info():
-                            peers.append(peer.ip)
-                            if peer.progress == 1:
-                                seeders += 1
-                            else:
-                                leechers += 1
-
-                        if trackers:
-                            if len(trackers) > 1:
-                                metainfo["announce-list"] = [trackers]
-                            metainfo["announce"] = trackers[0]
+                if handle and callbacks and not timeout:
+                    metainfo = {"info": lt.bdecode(get_info_from_handle(handle).metadata())}
+                    trackers = [tracker.url for tracker in get_info_from_handle(handle).trackers()]
+                    peers = []
+                    leechers = 0
+                    seeders = 0
+                    for peer in handle.get_peer_info():
+                        peers.append(peer.ip)
+                        if peer.progress == 1:
+                            seeders += 1
                         else:
-                            metainfo["nodes"] = []
-                        if peers and notify:
-                            self.notifier.notify(NTFY_TORRENTS, NTFY_MAGNET_GOT_PEERS, infohash_bin, len(peers))
-                        metainfo["initial peers"] = peers
-                        metainfo["leechers"] = leechers
-                        metainfo["seeders"] = seeders
-
-                        self._add_cached_metainfo(infohash, metainfo)
-
-                        for callback in callbacks:
-                            callback(deepcopy(metainfo))
-
-                        # let's not print the hashes of the pieces
-                        debuginfo = deepcopy(metainfo)
-                        del debuginfo['info']['pieces']
-                        self._logger.debug('got_metainfo result %s', debuginfo)
-
-                    elif timeout_callbacks and timeout:
-                        for callback in timeout_callbacks:
-                            callback(infohash_bin)
-
-                if handle:
+                            leechers += 1
+
+                    if trackers:
+                        if len(trackers) > 1:
+                            metainfo["announce-list"] = [trackers]
+                        metainfo["announce"] = trackers[0]
+                    else:
+                        metainfo["nodes"] = []
+                    if peers and notify:
+                        self.notifier.notify(NTFY_TORRENTS, NTFY_MAGNET_GOT_PEERS, infohash_bin, len(peers))
+                    metainfo["initial peers"] = peers
+                    metainfo["leechers"] = leechers
+                    metainfo["seeders"] = seeders
+
+                    # Every callback gets its own copy of the metainfo, decoded from the cached bencoded metainfo
+                    metainfo_bytes = lt.bencode(metainfo)
+                    self.metainfo_cache.put(infohash, metainfo_bytes)
+                    self.metainfo_latencies.append(time.time() - request_dict['request_time'])
+
+                    for callback in callbacks:
+                        callback(lt.bdecode(metainfo_bytes))
+
+                    # let's not print the hashes of the pieces
+                    self._logger.debug('got_metainfo result %s',
+                                       {key: value for key, value in metainfo.iteritems() if key != 'info'})
+
+                elif timeout_callbacks and timeout:
+                    for callback in timeout_callbacks:
+                        callback(infohash_bin)
+
+                if not handle:
+                    reactor.callFromThread(self.cancel_pending_task, "metainfo_queue_timeout_%s" % infohash)
+                else:
+                    reactor.callFromThread(self.cancel_pending_task, "schedule_got_metainfo_lookup_%s" % infohash)
                     self.get_session().remove_torrent(handle, 1)
                     if notify:
                         self.notifier.notify(NTFY_TORRENTS, NTFY_MAGNET_CLOSE, infohash_bin)
+                    self._process_metainfo_queue()
 
-    def _get_cached_metainfo(self, infohash):
-        if infohash in self.metainfo_cache:
-            return self.metainfo_cache[infohash]['meta_info']
-
-    def _add_cached_metainfo(self, infohash, metainfo):
-        self.metainfo_cache[infohash] = {'time': time.time(),
-                                         'meta_info': metainfo}
+    def get_metainfo_statistics(self):
+        """
+        Return statistics about the metainfo requests: the number of requests waiting for a handle and with a handle,
+        the metainfo cache and the latency of the recently fetched metainfo.
+        """
+        with self.metainfo_lock:
+            active = sum(1 for request_dict in self.metainfo_requests.itervalues() if request_dict['handle'])
+            latencies = list(self.metainfo_latencies)
+            return {'queued': len(self.metainfo_requests) - active,
+                    'active': active,
+                    'max_active': self.tribler_session.config.get_libtorrent_max_metainfo_requests(),
+                    'cache': self.metainfo_cache.get_statistics(),
+                    'latency': {'average': sum(latencies) / len(latencies) if latencies else 0.0,
+                                'max': max(latencies) if latencies else 0.0}}
 
     def _task_cleanup_metainfo_cache(self):
-        oldest_time = time.time() - METAINFO_CACHE_PERIOD
-
-        for info_hash, values in self.metainfo_cache.items():
-            last_time, metainfo = values
-            if last_time < oldest_time:
-                del self.metainfo_cache[info_hash]
+        with self.metainfo_lock:
+            self.metainfo_cache.expire()
 
     def _task_process_alerts(self):
         for ltsession in self.ltsessions.itervalues():
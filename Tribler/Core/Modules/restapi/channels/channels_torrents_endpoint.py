@@ -4,6 +4,7 @@ from twisted.internet.defer import Deferred
 from twisted.web import http
 from twisted.web.server import NOT_DONE_YET
 
+from Tribler.Core.Libtorrent.LibtorrentMgr import METAINFO_PRIORITY_HIGH
 from Tribler.Core.Modules.restapi.channels.base_channels_endpoint import BaseChannelsEndpoint
 from Tribler.Core.Modules.restapi.util import convert_db_torrent_to_json
 from Tribler.Core.TorrentDef import TorrentDef
@@ -213,7 +214,8 @@ class ChannelModifyTorrentEndpoint(BaseChannelsEndpoint):
         if self.path.startswith("magnet:"):
             try:
                 self.session.lm.ltmgr.get_metainfo(self.path, callback=self.deferred.callback,
-                                                   timeout=30, timeout_callback=self.deferred.errback, notify=True)
+                                                   timeout=30, timeout_callback=self.deferred.errback, notify=True,
+                                                   priority=METAINFO_PRIORITY_HIGH)
             except Exception as ex:
                 self.deferred.errback(ex)
 
@@ -22,7 +22,8 @@ class DebugEndpoint(resource.Resource):
         child_handler_dict = {"circuits": DebugCircuitsEndpoint, "open_files": DebugOpenFilesEndpoint,
                               "open_sockets": DebugOpenSocketsEndpoint, "threads": DebugThreadsEndpoint,
                               "cpu": DebugCPUEndpoint, "memory": DebugMemoryEndpoint,
-                              "log": DebugLogEndpoint}
+                              "log": DebugLogEndpoint, "notifier": DebugNotifierEndpoint,
+                              "metainfo": DebugMetainfoEndpoint}
 
         for path, child_cls in child_handler_dict.iteritems():
             self.putChild(path, child_cls(session))
@@ -222,6 +223,85 @@ class DebugThreadsEndpoint(resource.Resource):
         return json.dumps({"threads": watchdog.get_threads_info()})
 
 
+class DebugNotifierEndpoint(resource.Resource):
+    """
+    This class handles request for information about the notifications in the session.
+    """
+
+    def __init__(self, session):
+        resource.Resource.__init__(self)
+        self.session = session
+
+    def render_GET(self, request):
+        """
+        .. http:get:: /debug/notifier
+
+        A GET request to this endpoint returns the number and rate per second of the notifications of each subject,
+        and the observers that were slow to handle a notification.
+
+            **Example request**:
+
+            .. sourcecode:: none
+
+                curl -X GET http://localhost:8085/debug/notifier
+
+            **Example response**:
+
+            .. sourcecode:: javascript
+
+                {
+                    "events": {
+                        "torrents": {"count": 1234, "rate": 2.5}, ...
+                    },
+                    "slow_observers": {
+                        "SearchManager._on_torrent_search_results": {"count": 3, "max_duration": 0.25}, ...
+                    }
+                }
+        """
+        return json.dumps(self.session.notifier.get_statistics())
+
+
+class DebugMetainfoEndpoint(resource.Resource):
+    """
+    This class handles request for information about the metainfo requests of the libtorrent manager.
+    """
+
+    def __init__(self, session):
+        resource.Resource.__init__(self)
+        self.session = session
+
+    def render_GET(self, request):
+        """
+        .. http:get:: /debug/metainfo
+
+        A GET request to this endpoint returns the number of queued and active metainfo requests, the statistics of
+        the metainfo cache and the latency in seconds of the recently fetched metainfo.
+
+            **Example request**:
+
+            .. sourcecode:: none
+
+                curl -X GET http://localhost:8085/debug/metainfo
+
+            **Example response**:
+
+            .. sourcecode:: javascript
+
+                {
+                    "queued": 12,
+                    "active": 10,
+                    "max_active": 10,
+                    "cache": {"entries": 34, "size": 1234567, "hits": 56, "misses": 78, "hit_rate": 0.42},
+                    "latency": {"average": 4.5, "max": 12.3}
+                }
+        """
+        if not self.session.lm.ltmgr:
+            request.setResponseCode(http.NOT_FOUND)
+            return json.dumps({"error": "libtorrent is not enabled"})
+
+        return json.dumps(self.session.lm.ltmgr.get_metainfo_statistics())
+
+
 class DebugCPUEndpoint(resource.Resource):
     """
     This class handles request for information about CPU.
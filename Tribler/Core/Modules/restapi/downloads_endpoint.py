@@ -4,9 +4,7 @@ from twisted.web import http, resource
 from twisted.web.server import NOT_DONE_YET
 
 from Tribler.Core.DownloadConfig import DownloadStartupConfig
-from Tribler.Core.Libtorrent.LibtorrentDownloadImpl import LibtorrentStatisticsResponse
-from Tribler.Core.Modules.restapi.util import return_handled_exception
-from Tribler.Core.simpledefs import DOWNLOAD, UPLOAD, dlstatus_strings, DLMODE_VOD
+from Tribler.Core.Modules.restapi.util import return_handled_exception, convert_download_state_to_json
 import Tribler.Core.Utilities.json_util as json
 
 
@@ -90,6 +88,10 @@ class DownloadsEndpoint(DownloadBaseEndpoint):
         Note that setting this flag has a negative impact on performance and should only be used in situations
         where this data is required.
 
+        The downloads can be restricted to specific downloads by passing their hex-encoded infohashes as infohash
+        parameters. Changes in the state of the downloads, except for the files, trackers, peers and pieces, are also
+        pushed over the events endpoint, so clients do not have to poll all downloads.
+
             **Example request**:
 
             .. sourcecode:: none
@@ -161,11 +163,16 @@ class DownloadsEndpoint(DownloadBaseEndpoint):
                 and request.args['get_pieces'][0] == "1":
             get_pieces = True
 
-        downloads_json = []
         downloads = self.session.get_downloads()
+        if 'infohash' in request.args:
+            infohashes = set(request.args['infohash'])
+            downloads = [download for download in downloads
+                         if download.get_def().get_infohash().encode('hex') in infohashes]
+
+        downloads_json = []
         for download in downloads:
-            stats = download.network_create_statistics_reponse() or LibtorrentStatisticsResponse(0, 0, 0, 0, 0, 0, 0)
             state = download.network_get_state(None, get_peers)
+            download_json = convert_download_state_to_json(self.session, state)
 
             # Create files information of the download
             files_completion = dict((name, progress) for name, progress in state.get_files_completion())
@@ -177,35 +184,13 @@ class DownloadsEndpoint(DownloadBaseEndpoint):
                                     "included": (file in selected_files or not selected_files),
                                     "progress": files_completion.get(file, 0.0)})
                 file_index += 1
+            download_json["files"] = files_array
 
             # Create tracker information of the download
             tracker_info = []
             for url, url_info in download.network_tracker_status().iteritems():
                 tracker_info.append({"url": url, "peers": url_info[0], "status": url_info[1]})
-
-            ratio = 0.0
-            if stats.downTotal > 0:
-                ratio = stats.upTotal / float(stats.downTotal)
-
-            download_json = {"name": download.get_def().get_name(), "progress": download.get_progress(),
-                             "infohash": download.get_def().get_infohash().encode('hex'),
-                             "speed_down": download.get_current_speed(DOWNLOAD),
-                             "speed_up": download.get_current_speed(UPLOAD),
-                             "status": dlstatus_strings[download.get_status()],
-                             "size": download.get_def().get_length(), "eta": download.network_calc_eta(),
-                             "num_peers": stats.numPeers, "num_seeds": stats.numSeeds, "total_up": stats.upTotal,
-                             "total_down": stats.downTotal, "ratio": ratio,
-                             "files": files_array, "trackers": tracker_info, "hops": download.get_hops(),
-                             "anon_download": download.get_anon_mode(), "safe_seeding": download.get_safe_seeding(),
-                             # Maximum upload/download rates are set for entire sessions
-                             "max_upload_speed": self.session.config.get_libtorrent_max_upload_rate(),
-                             "max_download_speed": self.session.config.get_libtorrent_max_download_rate(),
-                             "destination": download.get_dest_dir(), "availability": state.get_availability(),
-                             "total_pieces": download.get_num_pieces(), "vod_mode": download.get_mode() == DLMODE_VOD,
-                             "vod_prebuffering_progress": state.get_vod_prebuffering_progress(),
-                             "vod_prebuffering_progress_consec": state.get_vod_prebuffering_progress_consec(),
-                             "error": repr(state.get_error()) if state.get_error() else "",
-                             "time_added": download.get_time_added()}
+            download_json["trackers"] = tracker_info
 
             # Add peers information if requested
             if get_peers:
@@ -1,16 +1,23 @@
+import time
+
 from twisted.web import server, resource
 
 from Tribler.Core.Modules.restapi.util import convert_db_channel_to_json, convert_search_torrent_to_json, \
-    fix_unicode_dict
+    fix_unicode_dict, convert_download_state_to_json
 from Tribler.Core.simpledefs import (NTFY_CHANNELCAST, SIGNAL_CHANNEL, SIGNAL_ON_SEARCH_RESULTS, SIGNAL_TORRENT,
                                      NTFY_UPGRADER, NTFY_STARTED, NTFY_WATCH_FOLDER_CORRUPT_TORRENT, NTFY_INSERT,
                                      NTFY_NEW_VERSION, NTFY_FINISHED, NTFY_TRIBLER, NTFY_UPGRADER_TICK, NTFY_CHANNEL,
                                      NTFY_DISCOVERED, NTFY_TORRENT, NTFY_ERROR, NTFY_DELETE, NTFY_MARKET_ON_ASK,
                                      NTFY_UPDATE, NTFY_MARKET_ON_BID, NTFY_MARKET_ON_TRANSACTION_COMPLETE,
                                      NTFY_MARKET_ON_ASK_TIMEOUT, NTFY_MARKET_ON_BID_TIMEOUT,
-                                     NTFY_MARKET_ON_PAYMENT_RECEIVED, NTFY_MARKET_ON_PAYMENT_SENT)
+                                     NTFY_MARKET_ON_PAYMENT_RECEIVED, NTFY_MARKET_ON_PAYMENT_SENT, NTFY_STATE,
+                                     NTFY_TORRENT_CREATION)
 import Tribler.Core.Utilities.json_util as json
 from Tribler.Core.version import version_id
+from Tribler.dispersy.util import call_on_reactor_thread
+
+# The minimum number of seconds between two download_states events
+DOWNLOAD_STATES_MIN_INTERVAL = 0.5
 
 
 class EventsEndpoint(resource.Resource):
@@ -43,6 +50,12 @@ class EventsEndpoint(resource.Resource):
       torrent that has finished downloading.
     - torrent_error: An error has occurred during the download process of a specific torrent. The event includes the
       infohash and a readable string of the error message.
+    - download_states: The state of the downloads has changed. The event includes a list with, for each changed
+      download, its infohash and the fields of the downloads endpoint that changed since the previous event, and a list
+      with the infohashes of the removed downloads. The first event after opening the event socket includes all fields
+      of all downloads. The files, trackers, peers and pieces of the downloads are not included.
+    - torrent_creation_progress: The files of a torrent that is being created have been hashed further. The event
+      includes the list of files of the torrent and the fraction of the files that has been hashed.
     - tribler_exception: An exception has occurred in Tribler. The event includes a readable string of the error.
     - market_ask: Tribler learned about a new ask in the market. The event includes information about the ask.
     - market_bid: Tribler learned about a new bid in the market. The event includes information about the bid.
@@ -65,6 +78,9 @@ class EventsEndpoint(resource.Resource):
         self.infohashes_sent = set()
         self.channel_cids_sent = set()
 
+        self.download_states_sent = {}  # infohash -> JSON dictionary of the last state sent
+        self.download_states_sent_time = 0
+
         self.session.add_observer(self.on_search_results_channels, SIGNAL_CHANNEL, [SIGNAL_ON_SEARCH_RESULTS])
         self.session.add_observer(self.on_search_results_torrents, SIGNAL_TORRENT, [SIGNAL_ON_SEARCH_RESULTS])
         self.session.add_observer(self.on_upgrader_started, NTFY_UPGRADER, [NTFY_STARTED])
@@ -79,6 +95,8 @@ class EventsEndpoint(resource.Resource):
         self.session.add_observer(self.on_torrent_removed_from_channel, NTFY_TORRENT, [NTFY_DELETE])
         self.session.add_observer(self.on_torrent_finished, NTFY_TORRENT, [NTFY_FINISHED])
         self.session.add_observer(self.on_torrent_error, NTFY_TORRENT, [NTFY_ERROR])
+        self.session.add_observer(self.on_download_states, NTFY_TORRENT, [NTFY_STATE])
+        self.session.add_observer(self.on_torrent_creation_progress, NTFY_TORRENT_CREATION, [NTFY_UPDATE])
         self.session.add_observer(self.on_market_ask, NTFY_MARKET_ON_ASK, [NTFY_UPDATE])
         self.session.add_observer(self.on_market_bid, NTFY_MARKET_ON_BID, [NTFY_UPDATE])
         self.session.add_observer(self.on_market_ask_timeout, NTFY_MARKET_ON_ASK_TIMEOUT, [NTFY_UPDATE])
@@ -173,6 +191,46 @@ class EventsEndpoint(resource.Resource):
     def on_torrent_error(self, subject, changetype, objectID, *args):
         self.write_data({"type": "torrent_error", "event": {"infohash": objectID.encode('hex'), "error": args[0]}})
 
+    @call_on_reactor_thread
+    def on_download_states(self, subject, changetype, objectID, *args):
+        """
+        Push the fields of the download states that changed since the previous download_states event. The download
+        states are notified by a thread of the thread pool, so they are processed on the reactor thread.
+        """
+        if not self.events_requests:
+            self.download_states_sent = {}
+            return
+
+        now = time.time()
+        if now - self.download_states_sent_time < DOWNLOAD_STATES_MIN_INTERVAL:
+            return
+
+        download_states_sent = self.download_states_sent
+        download_states = {}
+        changed_downloads = []
+        for download_state in args[0]:
+            download_json = convert_download_state_to_json(self.session, download_state)
+            infohash = download_json["infohash"]
+            download_states[infohash] = download_json
+
+            previous_json = download_states_sent.get(infohash, {})
+            changed_fields = dict((key, value) for key, value in download_json.iteritems()
+                                  if key not in previous_json or previous_json[key] != value)
+            if changed_fields:
+                changed_fields["infohash"] = infohash
+                changed_downloads.append(changed_fields)
+
+        removed_downloads = [infohash for infohash in download_states_sent if infohash not in download_states]
+
+        self.download_states_sent = download_states
+        if changed_downloads or removed_downloads:
+            self.download_states_sent_time = now
+            self.write_data({"type": "download_states", "event": {"downloads": changed_downloads,
+                                                                  "removed": removed_downloads}})
+
+    def on_torrent_creation_progress(self, subject, changetype, objectID, *args):
+        self.write_data({"type": "torrent_creation_progress", "event": {"files": args[0], "progress": args[1]}})
+
     def on_tribler_exception(self, exception_text):
         self.write_data({"type": "tribler_exception", "event": {"text": exception_text}})
 
@@ -213,6 +271,8 @@ class EventsEndpoint(resource.Resource):
             self.events_requests.remove(request)
 
         self.events_requests.append(request)
+        # The new client does not know any download yet, so the next download_states event includes all fields
+        self.download_states_sent = {}
         request.notifyFinish().addCallbacks(on_request_finished, on_request_finished)
 
         request.write(json.dumps({"type": "events_start", "event": {
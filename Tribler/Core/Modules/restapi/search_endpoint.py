@@ -7,6 +7,11 @@ from Tribler.Core.simpledefs import NTFY_CHANNELCAST, NTFY_TORRENTS, SIGNAL_TORR
     SIGNAL_CHANNEL
 import Tribler.Core.Utilities.json_util as json
 
+# The maximum number of (most relevant) torrents returned from the local database, and the number of torrents pushed
+# over the events endpoint at once.
+MAX_LOCAL_TORRENT_RESULTS = 500
+LOCAL_TORRENT_RESULTS_CHUNK_SIZE = 50
+
 
 class SearchEndpoint(resource.Resource):
     """
@@ -29,8 +34,10 @@ class SearchEndpoint(resource.Resource):
         .. http:get:: /search?q=(string:query)
 
         A GET request to this endpoint will create a search. Results are returned over the events endpoint, one by one.
-        First, the results available in the local database will be pushed. After that, incoming Dispersy results are
-        pushed. The query to this endpoint is passed using the url, i.e. /search?q=pioneer.
+        First, the results available in the local database will be pushed, most relevant torrents first. After that,
+        incoming Dispersy results are pushed. Note that torrents and channels that have not been committed to the
+        database yet, are not included in the local results. The query to this endpoint is passed using the url, i.e.
+        /search?q=pioneer.
 
             **Example request**:
 
@@ -66,25 +73,40 @@ class SearchEndpoint(resource.Resource):
         # Notify the events endpoint that we are starting a new search query
         self.events_endpoint.start_new_query()
 
-        # We first search the local database for torrents and channels
+        # We first search the local database for torrents and channels. These queries are executed on a separate
+        # database connection, outside of the reactor thread.
         query = unicode(request.args['q'][0], 'utf-8')
         keywords = split_into_keywords(query)
-        results_local_channels = self.channel_db_handler.search_in_local_channels_db(query)
-        results_dict = {"keywords": keywords, "result_list": results_local_channels}
-        self.session.notifier.notify(SIGNAL_CHANNEL, SIGNAL_ON_SEARCH_RESULTS, None, results_dict)
-
-        torrent_db_columns = ['T.torrent_id', 'infohash', 'T.name', 'length', 'category',
-                              'num_seeders', 'num_leechers', 'last_tracker_check']
-        results_local_torrents = self.torrent_db_handler.search_in_local_torrents_db(query, keys=torrent_db_columns)
-        results_dict = {"keywords": keywords, "result_list": results_local_torrents}
-        self.session.notifier.notify(SIGNAL_TORRENT, SIGNAL_ON_SEARCH_RESULTS, None, results_dict)
-
-        # Create remote searches
-        try:
-            self.session.search_remote_torrents(keywords)
-            self.session.search_remote_channels(keywords)
-        except OperationNotEnabledByConfigurationException as exc:
-            self._logger.error(exc)
+
+        def on_local_channels(results_local_channels):
+            results_dict = {"keywords": keywords, "result_list": results_local_channels}
+            self.session.notifier.notify(SIGNAL_CHANNEL, SIGNAL_ON_SEARCH_RESULTS, None, results_dict)
+
+            # The most relevant torrents are streamed first, in chunks
+            torrent_db_columns = ['T.torrent_id', 'infohash', 'T.name', 'length', 'category',
+                                  'num_seeders', 'num_leechers', 'last_tracker_check']
+            return self.torrent_db_handler.stream_local_torrents_search_async(
+                query, torrent_db_columns, on_local_torrents, limit=MAX_LOCAL_TORRENT_RESULTS,
+                chunk_size=LOCAL_TORRENT_RESULTS_CHUNK_SIZE)
+
+        def on_local_torrents(results_local_torrents):
+            results_dict = {"keywords": keywords, "result_list": results_local_torrents}
+            self.session.notifier.notify(SIGNAL_TORRENT, SIGNAL_ON_SEARCH_RESULTS, None, results_dict)
+
+        def create_remote_searches(_):
+            try:
+                self.session.search_remote_torrents(keywords)
+                self.session.search_remote_channels(keywords)
+            except OperationNotEnabledByConfigurationException as exc:
+                self._logger.error(exc)
+
+        def on_search_error(failure):
+            self._logger.error("Error when searching the local database: %s", failure.getErrorMessage())
+
+        self.channel_db_handler.search_in_local_channels_db_async(query)\
+            .addCallback(on_local_channels)\
+            .addErrback(on_search_error)\
+            .addCallback(create_remote_searches)
 
         return json.dumps({"queried": True})
 
@@ -42,6 +42,8 @@ class StateEndpoint(resource.Resource):
         - UPGRADING: The upgrader is active
         - STARTED: The Tribler core has started
 
+        When the core has started, the time in seconds it took to start each of its components is returned as well.
+
             **Example request**:
 
             .. sourcecode:: none
@@ -54,7 +56,13 @@ class StateEndpoint(resource.Resource):
 
                 {
                     "state": "STARTED",
-                    "last_exception": None
+                    "last_exception": None,
+                    "startup_timings": {
+                        "torrent_store": 0.12,
+                        "dispersy": 1.53,
+                        ...
+                    }
                 }
         """
-        return json.dumps({"state": self.tribler_state, "last_exception": self.last_exception})
+        return json.dumps({"state": self.tribler_state, "last_exception": self.last_exception,
+                           "startup_timings": self.session.lm.startup_timings})
@@ -8,6 +8,7 @@ from twisted.internet.error import DNSLookupError, ConnectError
 from twisted.web import http, resource
 from twisted.web.server import NOT_DONE_YET
 
+from Tribler.Core.Libtorrent.LibtorrentMgr import METAINFO_PRIORITY_HIGH
 from Tribler.Core.TorrentDef import TorrentDef
 import Tribler.Core.Utilities.json_util as json
 from Tribler.Core.Utilities.utilities import fix_torrent, http_get, parse_magnetlink
@@ -114,7 +115,8 @@ class TorrentInfoEndpoint(resource.Resource):
                 return NOT_DONE_YET
 
             self.session.lm.ltmgr.get_metainfo(uri, callback=metainfo_deferred.callback, timeout=20,
-                                               timeout_callback=on_metainfo_timeout, notify=True)
+                                               timeout_callback=on_metainfo_timeout, notify=True,
+                                               priority=METAINFO_PRIORITY_HIGH)
         else:
             request.setResponseCode(http.BAD_REQUEST)
             return json.dumps({"error": "invalid uri"})
@@ -6,7 +6,7 @@ from struct import unpack_from
 from twisted.web import http
 
 from Tribler.Core.Modules.restapi import VOTE_SUBSCRIBE
-from Tribler.Core.simpledefs import NTFY_TORRENTS
+from Tribler.Core.simpledefs import NTFY_TORRENTS, DOWNLOAD, UPLOAD, DLMODE_VOD, dlstatus_strings
 import Tribler.Core.Utilities.json_util as json
 from Tribler.community.channel.community import ChannelCommunity
 from Tribler.dispersy.exception import CommunityNotFoundException
@@ -104,6 +104,41 @@ def convert_remote_torrent_to_json(torrent):
             'relevance_score': relevance_score}
 
 
+def convert_download_state_to_json(session, download_state):
+    """
+    This method converts the state of a download to a JSON dictionary. The files, trackers, peers and pieces of the
+    download are not included, since they are expensive to gather and serialize for every download.
+    """
+    download = download_state.get_download()
+    tdef = download.get_def()
+
+    total_up = download_state.get_total_transferred(UPLOAD)
+    total_down = download_state.get_total_transferred(DOWNLOAD)
+    num_peers = download_state.get_num_nonseeds()
+    error = download_state.get_error()
+
+    return {"name": tdef.get_name(), "progress": download_state.get_progress(),
+            "infohash": tdef.get_infohash().encode('hex'),
+            "speed_down": download_state.get_current_speed(DOWNLOAD),
+            "speed_up": download_state.get_current_speed(UPLOAD),
+            "status": dlstatus_strings[download_state.get_status()],
+            "size": tdef.get_length(), "eta": download_state.get_eta(),
+            "num_peers": num_peers, "num_seeds": download_state.get_num_peers() - num_peers,
+            "total_up": total_up, "total_down": total_down,
+            "ratio": total_up / float(total_down) if total_down > 0 else 0.0,
+            "hops": download.get_hops(), "anon_download": download.get_anon_mode(),
+            "safe_seeding": download.get_safe_seeding(),
+            # Maximum upload/download rates are set for entire sessions
+            "max_upload_speed": session.config.get_libtorrent_max_upload_rate(),
+            "max_download_speed": session.config.get_libtorrent_max_download_rate(),
+            "destination": download.get_dest_dir(), "availability": download_state.get_availability(),
+            "total_pieces": download.get_num_pieces(), "vod_mode": download.get_mode() == DLMODE_VOD,
+            "vod_prebuffering_progress": download_state.get_vod_prebuffering_progress(),
+            "vod_prebuffering_progress_consec": download_state.get_vod_prebuffering_progress_consec(),
+            "error": repr(error) if error else "",
+            "time_added": download.get_time_added()}
+
+
 def get_parameter(parameters, name):
     """
     Return a specific parameter with a name from a HTTP request (or None if that parameter is not available).
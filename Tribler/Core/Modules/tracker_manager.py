@@ -89,18 +89,3 @@ class TrackerManager(object):
         value_tuple = (tracker_info[u'last_check'], tracker_info[u'failures'], tracker_info[u'is_alive'],
                        tracker_info[u'id'])
         self._session.sqlite_db.execute(sql_stmt, value_tuple)
-
-    @blocking_call_on_reactor_thread
-    def get_next_tracker_for_auto_check(self):
-        """
-        Gets the next tracker for automatic tracker-checking.
-        :return: The next tracker for automatic tracker-checking.
-        """
-        try:
-            sql_stmt = u"SELECT tracker FROM TrackerInfo WHERE tracker != 'no-DHT' AND tracker != 'DHT' AND " \
-                       u"last_check + ? <= strftime('%s','now') AND is_alive = 1 ORDER BY last_check LIMIT 1;"
-            result = self._session.sqlite_db.execute(sql_stmt, (TRACKER_RETRY_INTERVAL,)).next()
-        except StopIteration:
-            return None
-
-        return result[0]
@@ -1,6 +1,10 @@
 import logging
 import os
+from twisted.internet import reactor
+from twisted.internet.defer import DeferredList, succeed
 from twisted.internet.task import LoopingCall
+from twisted.internet.threads import deferToThread
+from twisted.python.filepath import FilePath
 
 from Tribler.Core.DownloadConfig import DefaultDownloadStartupConfig
 from Tribler.Core.TorrentDef import TorrentDef
@@ -8,8 +12,21 @@ from Tribler.Core.Utilities.utilities import fix_torrent
 from Tribler.Core.simpledefs import NTFY_WATCH_FOLDER_CORRUPT_TORRENT, NTFY_INSERT
 from Tribler.dispersy.taskmanager import TaskManager
 
+try:
+    from twisted.internet import inotify
+except ImportError:
+    # inotify is only available on Linux, we fall back to polling the watch folder
+    inotify = None
+
 WATCH_FOLDER_CHECK_INTERVAL = 10
 
+# The delay in seconds between a change in the watch folder being reported by inotify and the folder being checked,
+# so a burst of new torrent files is handled in one check
+WATCH_FOLDER_INOTIFY_DELAY = 1
+
+# The number of torrent files that are parsed together in the thread pool
+WATCH_FOLDER_PARSE_BATCH_SIZE = 50
+
 
 class WatchFolder(TaskManager):
 
@@ -19,12 +36,44 @@ class WatchFolder(TaskManager):
         self._logger = logging.getLogger(self.__class__.__name__)
         self.session = session
 
+        self.fingerprints = {}  # path -> (size, mtime) of the torrent files that have been handled
+        self.check_deferred = None
+        self.notifier = None
+
     def start(self):
         self.register_task("check watch folder", LoopingCall(self.check_watch_folder))\
             .start(WATCH_FOLDER_CHECK_INTERVAL, now=False)
+        self.start_inotify()
 
     def stop(self):
         self.cancel_all_pending_tasks()
+        if self.notifier:
+            self.notifier.loseConnection()
+            self.notifier = None
+
+    def start_inotify(self):
+        """
+        Check the watch folder shortly after inotify reports a change in it, if inotify is available. The watch folder
+        is still polled, since its path might change while Tribler is running.
+        """
+        watch_folder_path = self.session.config.get_watch_folder_path()
+        if inotify is None or not os.path.isdir(watch_folder_path):
+            return
+
+        try:
+            self.notifier = inotify.INotify()
+            self.notifier.startReading()
+            self.notifier.watch(FilePath(watch_folder_path), mask=inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO,
+                                autoAdd=True, recursive=True, callbacks=[self.on_watch_folder_changed])
+        except Exception as exc:
+            self._logger.warning("Watch folder - inotify not available, polling only: %s", exc)
+            if self.notifier:
+                self.notifier.loseConnection()
+            self.notifier = None
+
+    def on_watch_folder_changed(self, _, filepath, mask):
+        if filepath.basename().endswith(u".torrent") and not self.is_pending_task_active("inotify check"):
+            self.register_task("inotify check", reactor.callLater(WATCH_FOLDER_INOTIFY_DELAY, self.check_watch_folder))
 
     def cleanup_torrent_file(self, root, name):
         if not os.path.exists(os.path.join(root, name)):
@@ -36,28 +85,95 @@ class WatchFolder(TaskManager):
         self.session.notifier.notify(NTFY_WATCH_FOLDER_CORRUPT_TORRENT, NTFY_INSERT, None, name)
 
     def check_watch_folder(self):
-        if not os.path.isdir(self.session.config.get_watch_folder_path()):
-            return
-
-        for root, _, files in os.walk(self.session.config.get_watch_folder_path()):
+        """
+        Start a download for each torrent file in the watch folder that is new or changed since the previous check.
+        Walking the folder and parsing the torrent files is done in the thread pool.
+        :return: A Deferred that fires when the check has been completed.
+        """
+        if self.check_deferred:
+            # The previous check is still running, the next check picks up the files it misses
+            return self.check_deferred
+
+        watch_folder_path = self.session.config.get_watch_folder_path()
+        if not os.path.isdir(watch_folder_path):
+            return succeed(None)
+
+        def on_check_done(_):
+            self.check_deferred = None
+
+        self.check_deferred = deferToThread(self.get_changed_files, watch_folder_path)\
+            .addCallback(self.load_changed_files)\
+            .addErrback(lambda failure: self._logger.error("Watch folder - check failed: %s",
+                                                           failure.getErrorMessage()))\
+            .addCallback(on_check_done)
+        return self.check_deferred
+
+    def get_changed_files(self, watch_folder_path):
+        """
+        Called by a thread from the thread pool. Return the paths of all torrent files in the watch folder, and the
+        torrent files with their fingerprint whose fingerprint differs from the one they had when they were handled.
+        """
+        paths = set()
+        changed_files = []
+        for root, _, files in os.walk(watch_folder_path):
             for name in files:
                 if not name.endswith(u".torrent"):
                     continue
 
+                paths.add(os.path.join(root, name))
                 try:
-                    tdef = TorrentDef.load_from_memory(fix_torrent(os.path.join(root, name)))
-                except:  # torrent appears to be corrupt
-                    self.cleanup_torrent_file(root, name)
-                    continue
-
-                infohash = tdef.get_infohash()
-
-                if not self.session.has_download(infohash):
-                    self._logger.info("Starting download from torrent file %s", name)
-                    dl_config = DefaultDownloadStartupConfig.getInstance().copy()
-
-                    anon_enabled = self.session.config.get_default_anonymity_enabled()
-                    default_num_hops = self.session.config.get_default_number_hops()
-                    dl_config.set_hops(default_num_hops if anon_enabled else 0)
-                    dl_config.set_safe_seeding(self.session.config.get_default_safeseeding_enabled())
-                    self.session.lm.ltmgr.start_download(tdef=tdef, dconfig=dl_config)
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue  # the file has been removed in the mean time
+
+                fingerprint = (stat.st_size, stat.st_mtime)
+                if self.fingerprints.get(os.path.join(root, name)) != fingerprint:
+                    changed_files.append((root, name, fingerprint))
+        return paths, changed_files
+
+    def load_changed_files(self, scan_result):
+        paths, changed_files = scan_result
+
+        # Forget the fingerprints of the files that have been removed from the watch folder
+        for path in set(self.fingerprints) - paths:
+            del self.fingerprints[path]
+
+        batches = [changed_files[index:index + WATCH_FOLDER_PARSE_BATCH_SIZE]
+                   for index in xrange(0, len(changed_files), WATCH_FOLDER_PARSE_BATCH_SIZE)]
+        return DeferredList([deferToThread(self.parse_torrent_files, batch).addCallback(self.start_downloads)
+                             for batch in batches], consumeErrors=True)
+
+    @staticmethod
+    def parse_torrent_files(files):
+        """
+        Called by a thread from the thread pool. Return the files together with their TorrentDef, which is None if the
+        torrent file appears to be corrupt.
+        """
+        parsed_files = []
+        for root, name, fingerprint in files:
+            try:
+                tdef = TorrentDef.load_from_memory(fix_torrent(os.path.join(root, name)))
+            except:  # torrent appears to be corrupt
+                tdef = None
+            parsed_files.append((root, name, fingerprint, tdef))
+        return parsed_files
+
+    def start_downloads(self, parsed_files):
+        anon_enabled = self.session.config.get_default_anonymity_enabled()
+        default_num_hops = self.session.config.get_default_number_hops()
+        safe_seeding = self.session.config.get_default_safeseeding_enabled()
+
+        for root, name, fingerprint, tdef in parsed_files:
+            if tdef is None:
+                self.cleanup_torrent_file(root, name)
+                continue
+
+            self.fingerprints[os.path.join(root, name)] = fingerprint
+            infohash = tdef.get_infohash()
+
+            if not self.session.has_download(infohash):
+                self._logger.info("Starting download from torrent file %s", name)
+                dl_config = DefaultDownloadStartupConfig.getInstance().copy()
+                dl_config.set_hops(default_num_hops if anon_enabled else 0)
+                dl_config.set_safe_seeding(safe_seeding)
+                self.session.lm.ltmgr.start_download(tdef=tdef, dconfig=dl_config)
@@ -266,8 +266,14 @@ class RemoteTorrentHandler(TaskManager):
             for requester in requesters.itervalues():
                 bw += requester.total_bandwidth
             return {"type": qname, "bandwidth": bw}
-        return [stats_dict for stats_dict in [get_bandwidth_stats("TQueue", self.torrent_requesters),
-                                              get_bandwidth_stats("DQueue", self.magnet_requesters)]]
+        stats = [stats_dict for stats_dict in [get_bandwidth_stats("TQueue", self.torrent_requesters),
+                                               get_bandwidth_stats("DQueue", self.magnet_requesters)]]
+
+        if self.session.lm.tftp_handler:
+            tftp_stats = self.session.lm.tftp_handler.get_statistics()
+            tftp_stats["type"] = "TFTP"
+            stats.append(tftp_stats)
+        return stats
 
 
 class Requester(object):
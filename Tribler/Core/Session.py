@@ -9,7 +9,7 @@ import os
 import sys
 import time
 from binascii import hexlify
-from twisted.internet import threads
+from twisted.internet import reactor, threads
 from twisted.internet.defer import inlineCallbacks, fail
 from twisted.python.failure import Failure
 from twisted.python.log import addObserver
@@ -28,8 +28,8 @@ from Tribler.Core.Utilities.crypto_patcher import patch_crypto_be_discovery
 from Tribler.Core.exceptions import NotYetImplementedException, OperationNotEnabledByConfigurationException, \
     DuplicateTorrentFileError
 from Tribler.Core.simpledefs import (NTFY_CHANNELCAST, NTFY_DELETE, NTFY_INSERT, NTFY_MYPREFERENCES, NTFY_PEERS,
-                                     NTFY_TORRENTS, NTFY_UPDATE, NTFY_VOTECAST, STATEDIR_DLPSTATE_DIR,
-                                     STATEDIR_WALLET_DIR)
+                                     NTFY_TORRENTS, NTFY_TORRENT_CREATION, NTFY_UPDATE, NTFY_VOTECAST,
+                                     STATEDIR_DLPSTATE_DIR, STATEDIR_WALLET_DIR)
 from Tribler.Core.statistics import TriblerStatistics
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
 
@@ -451,8 +451,10 @@ class Session(object):
         Restart Downloads from a saved checkpoint, if any. Note that we fetch information from the user download
         choices since it might be that a user has stopped a download. In that case, the download should not be
         resumed immediately when being loaded by libtorrent.
+
+        :return: A Deferred that fires when all checkpointed downloads have been resumed.
         """
-        self.lm.load_checkpoint()
+        return self.lm.load_checkpoint()
 
     def checkpoint(self):
         """
@@ -494,7 +496,7 @@ class Session(object):
 
         def load_checkpoint(_):
             if self.config.get_libtorrent_enabled():
-                self.load_checkpoint()
+                return self.load_checkpoint()
 
         return startup_deferred.addCallback(load_checkpoint)
 
@@ -691,17 +693,23 @@ class Session(object):
             raise OperationNotEnabledByConfigurationException("channel_search is not enabled")
         self.lm.search_manager.search_for_channels(keywords)
 
-    @staticmethod
-    def create_torrent_file(file_path_list, params=None):
+    def create_torrent_file(self, file_path_list, params=None):
         """
-        Creates a torrent file.
+        Creates a torrent file. The progress of hashing the files is notified with NTFY_TORRENT_CREATION events,
+        that include the file_path_list and the fraction of the files that has been hashed.
 
         :param file_path_list: files to add in torrent file
         :param params: optional parameters for torrent file
         :return: a Deferred that fires when the torrent file has been created
         """
         params = params or {}
-        return threads.deferToThread(torrent_utils.create_torrent_file, file_path_list, params)
+
+        def on_progress(progress):
+            reactor.callFromThread(self.notifier.notify, NTFY_TORRENT_CREATION, NTFY_UPDATE, None,
+                                   file_path_list, progress)
+
+        return threads.deferToThread(torrent_utils.create_torrent_file, file_path_list, params,
+                                     progress_callback=on_progress)
 
     def create_channel(self, name, description, mode=u'closed'):
         """
@@ -1,6 +1,7 @@
 import logging
 from base64 import b64encode
 from binascii import hexlify
+from collections import deque
 from hashlib import sha1
 from random import randint
 from socket import inet_aton
@@ -14,7 +15,7 @@ from Tribler.dispersy.util import call_on_reactor_thread, blocking_call_on_react
 from .exception import InvalidPacketException, FileNotFound
 from .packet import (encode_packet, decode_packet, OPCODE_RRQ, OPCODE_WRQ, OPCODE_ACK, OPCODE_DATA, OPCODE_OACK,
                      OPCODE_ERROR, ERROR_DICT)
-from .session import Session, DEFAULT_BLOCK_SIZE, DEFAULT_TIMEOUT
+from .session import Session, DEFAULT_BLOCK_SIZE, DEFAULT_TIMEOUT, DEFAULT_WINDOW_SIZE
 
 MAX_INT16 = 2 ** 16 - 1
 
@@ -23,6 +24,9 @@ METADATA_PREFIX = "metadata" + SEPARATOR
 
 DEFAULT_RETIES = 5
 
+# the number of finished sessions of which the throughput is kept
+SESSION_STATISTICS_HISTORY = 100
+
 
 class TftpHandler(TaskManager):
 
@@ -31,7 +35,7 @@ class TftpHandler(TaskManager):
     """
 
     def __init__(self, session, endpoint, prefix, block_size=DEFAULT_BLOCK_SIZE, timeout=DEFAULT_TIMEOUT,
-                 max_retries=DEFAULT_RETIES):
+                 max_retries=DEFAULT_RETIES, window_size=DEFAULT_WINDOW_SIZE):
         """ The constructor.
         :param session:     The tribler session.
         :param endpoint:    The endpoint to use.
@@ -39,6 +43,7 @@ class TftpHandler(TaskManager):
         :param block_size:  Transmission block size.
         :param timeout:     Transmission timeout.
         :param max_retries: Transmission maximum retries.
+        :param window_size: Maximum number of DATA blocks that are sent before an ACK is expected.
         """
         super(TftpHandler, self).__init__()
         self._logger = logging.getLogger(self.__class__.__name__)
@@ -51,6 +56,7 @@ class TftpHandler(TaskManager):
         self._block_size = block_size
         self._timeout = timeout
         self._max_retries = max_retries
+        self._window_size = window_size
 
         self._timeout_check_interval = 0.5
 
@@ -62,6 +68,9 @@ class TftpHandler(TaskManager):
 
         self._is_running = False
 
+        self._session_statistics = deque(maxlen=SESSION_STATISTICS_HISTORY)
+        self._total_bytes = 0
+
     def initialize(self):
         """ Initializes the TFTP service. We create a UDP socket and a server session.
         """
@@ -125,7 +134,8 @@ class TftpHandler(TaskManager):
         self._logger.debug(u"start downloading %s from %s:%s, sid = %s", file_name, ip, port, session_id)
         session = Session(True, session_id, (ip, port), OPCODE_RRQ, file_name, '', None, None,
                           extra_info=extra_info, block_size=self._block_size, timeout=self._timeout,
-                          success_callback=success_callback, failure_callback=failure_callback)
+                          window_size=self._window_size, success_callback=success_callback,
+                          failure_callback=failure_callback)
 
         self._add_new_session(session)
         self._send_request_packet(session)
@@ -165,11 +175,26 @@ class TftpHandler(TaskManager):
         has_failed = False
         timeout = session.timeout * (2**session.retries)
         if session.last_contact_time + timeout < time():
-            # we do NOT resend packets that are not data-related
-            if session.retries < self._max_retries and session.last_sent_packet['opcode'] in (OPCODE_ACK, OPCODE_DATA):
+            if session.retries >= self._max_retries:
+                return True
+
+            opcode = session.last_sent_packet['opcode']
+            if opcode == OPCODE_RRQ and session.window_size > 1:
+                # the remote host might not support windowed transfers, request the file again without them
+                self._logger.info(u"%s no response to windowed request, retrying without window", session)
+                session.window_size = 1
+                self._send_request_packet(session)
+                session.retries += 1
+            elif opcode == OPCODE_DATA:
+                # retransmit all DATA blocks that have not been acknowledged
+                session.last_sent_block = session.block_number
+                self._send_window(session)
+                session.retries += 1
+            elif opcode == OPCODE_ACK:
                 self._send_packet(session, session.last_sent_packet)
                 session.retries += 1
             else:
+                # we do NOT resend packets that are not data-related
                 has_failed = True
         return has_failed
 
@@ -254,6 +279,7 @@ class TftpHandler(TaskManager):
                 self._callbacks.append(callback)
         elif session.is_done:
             self._logger.info(u"%s finished", session)
+            self._add_session_statistics(session)
             if session.success_callback:
                 callback = lambda cb = session.success_callback, a = session.address, fn = session.file_name,\
                     fd = session.file_data, ei = session.extra_info: cb(a, fn, fd, ei)
@@ -283,6 +309,7 @@ class TftpHandler(TaskManager):
         file_name = packet['file_name'].decode('utf8')
         block_size = packet['options']['blksize']
         timeout = packet['options']['timeout']
+        window_size = max(1, min(packet['options'].get('windowsize', 1), self._window_size))
 
         # check session_id
         if (ip, port, packet['session_id']) in self._session_dict:
@@ -318,7 +345,8 @@ class TftpHandler(TaskManager):
 
         # create a session object
         session = Session(False, packet['session_id'], (ip, port), packet['opcode'],
-                          file_name, file_data, file_size, checksum, block_size=block_size, timeout=timeout)
+                          file_name, file_data, file_size, checksum, block_size=block_size, timeout=timeout,
+                          window_size=window_size)
 
         # insert session_id and session
         self._add_new_session(session)
@@ -353,20 +381,46 @@ class TftpHandler(TaskManager):
 
         return file_data, len(file_data)
 
-    def _get_next_data(self, session):
-        """ Gets the next block of data to be uploaded. This method is only used for data uploading.
-        :return The data to transfer.
+    def _get_data_block(self, session, block_number):
+        """ Gets a block of data to be uploaded. This method is only used for data uploading.
+        :return A memoryview on the data to transfer, so the file data is not copied for every block.
         """
-        start_idx = session.block_number * session.block_size
-        end_idx = start_idx + session.block_size
-        data = session.file_data[start_idx:end_idx]
-        session.block_number += 1
+        start_idx = (block_number - 1) * session.block_size
+        return memoryview(session.file_data)[start_idx:start_idx + session.block_size]
+
+    def _get_last_block_number(self, session):
+        """ Gets the number of the last DATA block, which is smaller than the block size (and possibly empty).
+        """
+        return session.file_size // session.block_size + 1
 
-        # check if we are done
-        if len(data) < session.block_size:
+    def _send_window(self, session):
+        """ Sends the DATA blocks after the last sent block, up to a window of blocks after the last acknowledged block.
+        """
+        last_block_number = self._get_last_block_number(session)
+        while session.last_sent_block < min(session.block_number + session.window_size, last_block_number):
+            session.last_sent_block += 1
+            self._send_data_packet(session, session.last_sent_block,
+                                   self._get_data_block(session, session.last_sent_block))
+
+        if session.last_sent_block == last_block_number:
             session.is_waiting_for_last_ack = True
 
-        return data
+    def _add_session_statistics(self, session):
+        duration = time() - session.start_time
+        size = session.file_size or 0
+        self._total_bytes += size
+        self._session_statistics.append({"file_name": session.file_name,
+                                         "is_client": session.is_client,
+                                         "size": size,
+                                         "window_size": session.window_size,
+                                         "duration": duration,
+                                         "throughput": size / duration if duration > 0 else 0})
+
+    def get_statistics(self):
+        """ Gets the number of bytes transferred in finished sessions, and the size, duration and throughput (in
+        bytes per second) of the most recently finished sessions.
+        """
+        return {"bandwidth": self._total_bytes, "sessions": list(self._session_statistics)}
 
     def _process_packet(self, session, packet):
         """ processes an incoming packet.
@@ -410,12 +464,15 @@ class TftpHandler(TaskManager):
 
                 session.file_size = packet['options']['tsize']
                 session.checksum = packet['options']['checksum']
+                # the sender might use a smaller window than we requested, without the option it does not use one
+                session.window_size = packet['options'].get('windowsize', 1)
 
                 if session.request == OPCODE_RRQ:
                     # send ACK
                     self._send_ack_packet(session, session.block_number)
+                    session.last_acked_block = session.block_number
                     session.block_number += 1
-                    session.file_data = ""
+                    session.file_blocks = []
 
             else:
                 self._logger.error(u"%s Got OPCODE %s which is not expected", session, packet['opcode'])
@@ -433,25 +490,40 @@ class TftpHandler(TaskManager):
         # check block_number
         # ignore old ones, they may be retransmissions
         if packet['block_number'] < session.block_number:
-            self._logger.warn(u"%s ignore old block number DATA %s < %s",
-                              session, packet['block_number'], session.block_number)
+            self._logger.debug(u"%s ignore old block number DATA %s < %s",
+                               session, packet['block_number'], session.block_number)
+            if packet['block_number'] == session.last_acked_block:
+                # the sender retransmitted its window because our ACK got lost
+                self._send_ack_packet(session, session.last_acked_block)
             return
 
-        if packet['block_number'] != session.block_number:
-            msg = "%s Got ACK with block# %s while expecting %s" %\
-                  (session, packet['block_number'], session.block_number)
-            self._logger.error(msg)
-            self._handle_error(session, 0, error_msg=msg)  # Error: block_number mismatch
+        if packet['block_number'] > session.block_number:
+            # a block got lost, ask the sender once to continue after the last block we received in order
+            self._logger.debug(u"%s got DATA with block# %s while expecting %s",
+                               session, packet['block_number'], session.block_number)
+            if session.gap_acked_block != session.block_number:
+                session.gap_acked_block = session.block_number
+                self._send_ack_packet(session, session.block_number - 1)
+                session.last_acked_block = session.block_number - 1
             return
 
         # save data
-        session.file_data += packet['data']
-        self._send_ack_packet(session, session.block_number)
+        session.file_blocks.append(packet['data'])
+        session.retries = 0
+        is_last_block = len(packet['data']) < session.block_size
+
+        # acknowledge the last block of a window and the last block of the file
+        if is_last_block or session.block_number - session.last_acked_block >= session.window_size:
+            self._send_ack_packet(session, session.block_number)
+            session.last_acked_block = session.block_number
         session.block_number += 1
 
         # check if it is the end
-        if len(packet['data']) < session.block_size:
+        if is_last_block:
             self._logger.info(u"%s transfer finished. checking data integrity...", session)
+            session.file_data = "".join(session.file_blocks)
+            session.file_blocks = []
+
             # check file size and checksum
             if session.file_size != len(session.file_data):
                 self._logger.error(u"%s file size %s doesn't match expectation %s",
@@ -486,20 +558,25 @@ class TftpHandler(TaskManager):
                               session, packet['block_number'], session.block_number)
             return
 
-        if packet['block_number'] != session.block_number:
-            msg = "%s got ACK with block# %s while expecting %s" %\
-                  (session, packet['block_number'], session.block_number)
+        if packet['block_number'] > session.last_sent_block:
+            msg = "%s got ACK with block# %s while the last sent block# is %s" %\
+                  (session, packet['block_number'], session.last_sent_block)
             self._logger.error(msg)
             self._handle_error(session, 0, error_msg=msg)  # Error: block_number mismatch
             return
 
-        if session.is_waiting_for_last_ack:
+        if packet['block_number'] > session.block_number:
+            session.retries = 0
+        session.block_number = packet['block_number']
+
+        if session.is_waiting_for_last_ack and session.block_number == self._get_last_block_number(session):
             session.is_done = True
             return
 
-        data = self._get_next_data(session)
-        # send DATA
-        self._send_data_packet(session, session.block_number, data)
+        # the receiver acknowledges the last block of a window, or the last block it received before a lost block,
+        # in which case we continue sending after that block
+        session.last_sent_block = session.block_number
+        self._send_window(session)
 
     def _handle_error(self, session, error_code, error_msg=""):
         """ Handles an error during packet processing.
@@ -531,6 +608,8 @@ class TftpHandler(TaskManager):
                   'options': {'blksize': session.block_size,
                               'timeout': session.timeout,
                               }}
+        if session.window_size > 1:
+            packet['options']['windowsize'] = session.window_size
         self._send_packet(session, packet)
 
     def _send_data_packet(self, session, block_number, data):
@@ -563,4 +642,6 @@ class TftpHandler(TaskManager):
                               'tsize': session.file_size,
                               'checksum': session.checksum,
                               }}
+        if session.window_size > 1:
+            packet['options']['windowsize'] = session.window_size
         self._send_packet(session, packet)
@@ -12,7 +12,7 @@ OPCODE_ERROR = 5
 OPCODE_OACK = 6
 
 # supported options
-OPTIONS = ("blksize", "timeout", "tsize", "checksum")
+OPTIONS = ("blksize", "timeout", "tsize", "checksum", "windowsize")
 
 # error codes and messages
 ERROR_DICT = {
@@ -74,9 +74,9 @@ def _decode_options(packet, buff, start_idx):
         if k not in OPTIONS:
             raise InvalidOptionException(u"Unknown option[%s]" % repr(k))
 
-        # blksize, timeout, and tsize are all integers
+        # blksize, timeout, tsize, and windowsize are all integers
         try:
-            if k in ("blksize", "timeout", "tsize"):
+            if k in ("blksize", "timeout", "tsize", "windowsize"):
                 packet['options'][k] = int(v)
             else:
                 packet['options'][k] = v
@@ -215,7 +215,9 @@ def encode_packet(packet):
 
     elif packet['opcode'] == OPCODE_DATA:
         packet_buff += struct.pack("!H", packet['block_number'])
-        packet_buff += packet['data']
+        # the data of a block that is sent is a memoryview on the file data
+        data = packet['data']
+        packet_buff += data.tobytes() if isinstance(data, memoryview) else data
 
     elif packet['opcode'] == OPCODE_ACK:
         packet_buff += struct.pack("!H", packet['block_number'])
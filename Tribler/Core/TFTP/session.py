@@ -7,12 +7,15 @@ DEFAULT_BLOCK_SIZE = 512
 # default timeout and maximum retries
 DEFAULT_TIMEOUT = 2
 
+# default number of DATA blocks that are sent before an ACK is expected (RFC 7440), 1 means stop-and-wait
+DEFAULT_WINDOW_SIZE = 1
+
 
 class Session(object):
 
     def __init__(self, is_client, session_id, address, request, file_name, file_data, file_size, checksum,
                  extra_info=None, block_size=DEFAULT_BLOCK_SIZE, timeout=DEFAULT_TIMEOUT,
-                 success_callback=None, failure_callback=None):
+                 window_size=DEFAULT_WINDOW_SIZE, success_callback=None, failure_callback=None):
         self.is_client = is_client
         self.session_id = session_id
         self.address = address
@@ -27,6 +30,7 @@ class Session(object):
         self.block_number = 0
         self.block_size = block_size
         self.timeout = timeout
+        self.window_size = window_size
         self.success_callback = success_callback
         self.failure_callback = failure_callback
 
@@ -35,6 +39,15 @@ class Session(object):
         self.last_sent_packet = None
         self.is_waiting_for_last_ack = False
 
+        # sender: the highest DATA block number that has been sent
+        self.last_sent_block = 0
+        # receiver: the DATA block number that has been acknowledged last, and the received DATA blocks
+        self.last_acked_block = 0
+        self.gap_acked_block = None
+        self.file_blocks = []
+
+        self.start_time = time()
+
         self.retries = 0
 
         self.is_done = False
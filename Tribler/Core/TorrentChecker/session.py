@@ -26,6 +26,8 @@ MAX_INT32 = 2 ** 16 - 1
 UDP_TRACKER_INIT_CONNECTION_ID = 0x41727101980
 UDP_TRACKER_RECHECK_INTERVAL = 15
 UDP_TRACKER_MAX_RETRIES = 8
+UDP_TRACKER_CONNECTION_ID_TIMEOUT = 60  # BEP 15: a connection id can be used for one minute
+UDP_TRACKER_DNS_CACHE_TIMEOUT = 600
 
 HTTP_TRACKER_RECHECK_INTERVAL = 60
 HTTP_TRACKER_MAX_RETRIES = 0
@@ -36,17 +38,18 @@ DHT_TRACKER_MAX_RETRIES = 8
 MAX_TRACKER_MULTI_SCRAPE = 74
 
 
-def create_tracker_session(tracker_url, timeout):
+def create_tracker_session(tracker_url, timeout, udp_socket=None):
     """
     Creates a tracker session with the given tracker URL.
     :param tracker_url: The given tracker URL.
     :param timeout: The timeout for the session.
+    :param udp_socket: The UDPScraperSocket that is used by UDP tracker sessions, if any.
     :return: The tracker session.
     """
     tracker_type, tracker_address, announce_page = parse_tracker_url(tracker_url)
 
     if tracker_type == u'udp':
-        return UdpTrackerSession(tracker_url, tracker_address, announce_page, timeout)
+        return UdpTrackerSession(tracker_url, tracker_address, announce_page, timeout, udp_socket)
     else:
         return HttpTrackerSession(tracker_url, tracker_address, announce_page, timeout)
 
@@ -334,11 +337,97 @@ class HttpTrackerSession(TrackerSession):
         self.result_deferred = None
 
 
-class UDPScraper(DatagramProtocol):
+class UDPScraperSocket(DatagramProtocol):
     """
-    The UDP scraper connects to a UDP tracker and queries
-    seeders and leechers for every infohash appended to the UDP session.
-    All data received is given to the UDP session it's associated with.
+    The UDP scraper socket is a single UDP port that is shared by many UDP tracker sessions.
+    Responses are dispatched to the scraper that sent the request with the same transaction id.
+    It also caches the connection ids handed out by trackers and the resolved addresses of trackers,
+    so subsequent sessions to the same tracker can skip the DNS lookup and the connect handshake.
+    """
+
+    _reactor = reactor
+
+    def __init__(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.listening_port = None
+        self.scrapers = {}
+        # (ip address, port) -> (connection id, expiration time)
+        self._connection_ids = {}
+        # hostname -> (ip address, expiration time)
+        self._resolved_hosts = {}
+
+    def listen(self):
+        """
+        Starts listening on a UDP port, if not done already.
+        """
+        if self.listening_port is None:
+            self.listening_port = self._reactor.listenUDP(0, self)
+
+    def stop(self):
+        """
+        Stops listening.
+        :return: A deferred that fires once the port has been closed.
+        """
+        self.scrapers = {}
+        if self.listening_port is not None:
+            listening_port, self.listening_port = self.listening_port, None
+            return maybeDeferred(listening_port.stopListening)
+        return defer.succeed(True)
+
+    def resolve(self, hostname):
+        """
+        Resolves the hostname of a tracker.
+        :return: A deferred that fires with the ip address of the tracker.
+        """
+        now = time.time()
+        ip_address, expiration_time = self._resolved_hosts.get(hostname, (None, 0))
+        if expiration_time > now:
+            return defer.succeed(ip_address)
+
+        def on_resolved(ip_address):
+            self._resolved_hosts[hostname] = (ip_address, time.time() + UDP_TRACKER_DNS_CACHE_TIMEOUT)
+            return ip_address
+
+        return self._reactor.resolve(hostname).addCallback(on_resolved)
+
+    def get_connection_id(self, address):
+        """
+        Returns the connection id of a tracker if it is still valid, or None otherwise.
+        """
+        connection_id, expiration_time = self._connection_ids.get(address, (None, 0))
+        return connection_id if expiration_time > time.time() else None
+
+    def set_connection_id(self, address, connection_id):
+        self._connection_ids[address] = (connection_id, time.time() + UDP_TRACKER_CONNECTION_ID_TIMEOUT)
+
+    def remove_connection_id(self, address):
+        self._connection_ids.pop(address, None)
+
+    def write(self, data, address):
+        self.transport.write(data, address)
+
+    def datagramReceived(self, data, address):
+        """
+        Dispatches a response of a tracker to the scraper that is waiting for it.
+        """
+        if len(data) < 8:
+            self._logger.info(u"Ignoring too short UDP tracker response from %s", address)
+            return
+
+        _, transaction_id = struct.unpack_from('!ii', data, 0)
+        scraper = self.scrapers.get(transaction_id)
+        if scraper is None or address != (scraper.ip_address, scraper.port):
+            self._logger.debug(u"Ignoring UDP tracker response from %s with unknown transaction id", address)
+            return
+
+        scraper.datagramReceived(data, address)
+
+
+class UDPScraper(object):
+    """
+    The UDP scraper queries a UDP tracker for seeders and leechers for every infohash appended to the UDP session.
+    It sends its requests through the UDP scraper socket of the session, and all data received for these requests is
+    given to the UDP session it's associated with.
     """
 
     _reactor = reactor
@@ -346,10 +435,12 @@ class UDPScraper(DatagramProtocol):
     def __init__(self, udpsession, ip_address, port, timeout):
         self._logger = logging.getLogger(self.__class__.__name__)
         self.udpsession = udpsession
+        self.udp_socket = udpsession.udp_socket
         self.ip_address = ip_address
         self.port = port
         self.expect_connection_response = True
-        # Timeout after x seconds if nothing received.
+        self.transaction_ids = set()
+        # Timeout after x seconds if the scrape has not been completed.
         self.timeout = timeout
         self.timeout_call = self._reactor.callLater(self.timeout, self.on_error)
 
@@ -360,34 +451,39 @@ class UDPScraper(DatagramProtocol):
         """
         self.udpsession.failed()
 
+    def start(self):
+        """
+        Starts the scraper, which initiates the connection with the tracker.
+        """
+        self.udp_socket.listen()
+        self._logger.info("UDP health scraper started for host %s port %d", self.ip_address, self.port)
+        self.udpsession.on_start()
+
     def stop(self):
         """
-        Stops the UDP scraper and closes the socket.
-        :return: A deferred that fires once it has closed the connection.
+        Stops the UDP scraper, after which responses are not dispatched to it anymore.
+        :return: A deferred that fires once the scraper has been stopped.
         """
         self._logger.info("Shutting down scraper which was connected to ip %s, port %s", self.ip_address, self.port)
         if self.timeout_call.active():
             self.timeout_call.cancel()
 
-        if self.transport and self.numPorts and self.transport.connected:
-            return maybeDeferred(self.transport.stopListening)
+        for transaction_id in self.transaction_ids:
+            if self.udp_socket.scrapers.get(transaction_id) is self:
+                del self.udp_socket.scrapers[transaction_id]
+        self.transaction_ids.clear()
         return defer.succeed(True)
 
-    def startProtocol(self):
-        """
-        This function is called when the scraper is initialized.
-        Initiates the connection with the tracker.
-        """
-        self.transport.connect(self.ip_address, self.port)
-        self._logger.info("UDP health scraper connected to host %s port %d", self.ip_address, self.port)
-        self.udpsession.on_start()
-
     def write_data(self, data):
         """
         This function can be called to send serialized data to the tracker.
+        The response to the data is dispatched to this scraper by the transaction id in it.
         :param data: The serialized data to be send.
         """
-        self.transport.write(data)  # no need to pass the ip and port
+        transaction_id = struct.unpack_from('!i', data, 12)[0]
+        self.transaction_ids.add(transaction_id)
+        self.udp_socket.scrapers[transaction_id] = self
+        self.udp_socket.write(data, (self.ip_address, self.port))
 
     def datagramReceived(self, data, (_host, _port)):
         """
@@ -399,10 +495,6 @@ class UDPScraper(DatagramProtocol):
         """
         # If we expect a connection response, pass it to handle connection response
         if self.expect_connection_response:
-            # Cancel the timeout
-            if self.timeout_call.active():
-                self.timeout_call.cancel()
-
             # Pass the response to the udp tracker session
             self.udpsession.handle_connection_response(data)
             self.expect_connection_response = False
@@ -410,15 +502,6 @@ class UDPScraper(DatagramProtocol):
         else:
             self.udpsession.handle_response(data)
 
-    # Possibly invoked if there is no server listening on the
-    # address to which we are sending.
-    def connectionRefused(self):
-        """
-        Handles the case of a connection being refused by a tracker.
-        """
-        self._logger.info("UDP Scraper could not connect to %s %s", self.ip_address, self.port)
-        self.on_error()
-
 
 class UdpTrackerSession(TrackerSession):
     """
@@ -430,7 +513,7 @@ class UdpTrackerSession(TrackerSession):
     # A list of transaction IDs that have been used in order to avoid conflict.
     _active_session_dict = dict()
 
-    def __init__(self, tracker_url, tracker_address, announce_page, timeout):
+    def __init__(self, tracker_url, tracker_address, announce_page, timeout, udp_socket=None):
         super(UdpTrackerSession, self).__init__(u'udp', tracker_url, tracker_address, announce_page, timeout)
         self._connection_id = 0
         self._transaction_id = 0
@@ -440,6 +523,10 @@ class UdpTrackerSession(TrackerSession):
         self.ip_resolve_deferred = None
         self.clean_defer_list = []
 
+        # A session that does not share the socket of a torrent checker uses a socket of its own
+        self._owns_udp_socket = udp_socket is None
+        self.udp_socket = UDPScraperSocket() if udp_socket is None else udp_socket
+
         # prepare connection message
         self._connection_id = UDP_TRACKER_INIT_CONNECTION_ID
         self._action = TRACKER_ACTION_CONNECT
@@ -467,15 +554,14 @@ class UdpTrackerSession(TrackerSession):
     def on_ip_address_resolved(self, ip_address, start_scraper=True):
         """
         Called when a hostname has been resolved to an ip address.
-        Constructs a scraper and opens a UDP port to listen on.
-        Removes an old scraper if present.
+        Constructs a scraper that sends its requests through the UDP scraper socket.
         :param ip_address: The ip address that matches the hostname of the tracker_url.
         :param start_scraper: Whether we should start the scraper immediately.
         """
         self.ip_address = ip_address
         self.scraper = UDPScraper(self, self.ip_address, self.port, self.timeout)
         if start_scraper:
-            reactor.listenUDP(0, self.scraper)
+            self.scraper.start()
 
     def failed(self, msg=None):
         """
@@ -487,6 +573,10 @@ class UdpTrackerSession(TrackerSession):
             self.scraper.stop()
             self.scraper = None
 
+        # The tracker may have rejected a cached connection id
+        if self.ip_address:
+            self.udp_socket.remove_connection_id((self.ip_address, self.port))
+
         if self.result_deferred:
             result_msg = "UDP tracker failed for url %s" % self._tracker_url
             if msg:
@@ -500,7 +590,7 @@ class UdpTrackerSession(TrackerSession):
         while True:
             # make sure there is no duplicated transaction IDs
             transaction_id = random.randint(0, MAX_INT32)
-            if transaction_id not in UdpTrackerSession._active_session_dict.items():
+            if transaction_id not in UdpTrackerSession._active_session_dict.values():
                 UdpTrackerSession._active_session_dict[self] = transaction_id
                 self._transaction_id = transaction_id
                 break
@@ -532,6 +622,9 @@ class UdpTrackerSession(TrackerSession):
             self.clean_defer_list.append(self.scraper.stop())
             self.scraper = None
 
+        if self._owns_udp_socket:
+            self.clean_defer_list.append(self.udp_socket.stop())
+
         # Return a deferredlist with all clean deferreds we have to wait on
         res = yield DeferredList(self.clean_defer_list)
         returnValue(res)
@@ -564,7 +657,7 @@ class UdpTrackerSession(TrackerSession):
         self.cancel_pending_task("resolve")
 
         # Resolve the hostname to an IP address if not done already
-        self.ip_resolve_deferred = self.register_task("resolve", reactor.resolve(self._tracker_address[0]))
+        self.ip_resolve_deferred = self.register_task("resolve", self.udp_socket.resolve(self._tracker_address[0]))
         self.ip_resolve_deferred.addCallbacks(self.on_ip_address_resolved, self.on_error)
 
         self._last_contact = int(time.time())
@@ -574,9 +667,17 @@ class UdpTrackerSession(TrackerSession):
 
     def on_start(self):
         """
-        Called by the UDPScraper when it is connected to the tracker.
-        Creates a connection message and calls the scraper to send it.
+        Called by the UDPScraper when it is started.
+        Creates a connection message and calls the scraper to send it. If we still have a valid connection id for this
+        tracker, the scrape message is sent right away instead.
         """
+        connection_id = self.udp_socket.get_connection_id((self.ip_address, self.port))
+        if connection_id is not None:
+            self.scraper.expect_connection_response = False
+            self._connection_id = connection_id
+            self.send_scrape_request()
+            return
+
         # Initiate the connection
         message = struct.pack('!qii', self._connection_id, self._action, self._transaction_id)
         self.scraper.write_data(message)
@@ -608,8 +709,16 @@ class UdpTrackerSession(TrackerSession):
             self.failed(msg=''.join(error_message))
             return
 
-        # update action and IDs
+        # update the connection id, which can be reused by other sessions to this tracker for a while
         self._connection_id = struct.unpack_from('!q', response, 8)[0]
+        self.udp_socket.set_connection_id((self.ip_address, self.port), self._connection_id)
+
+        self.send_scrape_request()
+
+    def send_scrape_request(self):
+        """
+        Queries the tracker for seed/leech data of all infohashes in this session, using the current connection id.
+        """
         self._action = TRACKER_ACTION_SCRAPE
         self.generate_transaction_id()
 
@@ -1,20 +1,26 @@
 import logging
 import time
-from binascii import hexlify
+from binascii import hexlify, unhexlify
+from collections import OrderedDict
+from heapq import heappop, heappush
 from twisted.internet import reactor
-from twisted.internet.defer import DeferredList, CancelledError, fail, succeed
+from twisted.internet.defer import DeferredList, CancelledError, fail, maybeDeferred, succeed
 from twisted.internet.error import ConnectingCancelledError
+from twisted.internet.task import LoopingCall
 from twisted.python.failure import Failure
 
-from Tribler.Core.TorrentChecker.session import create_tracker_session, FakeDHTSession
+from Tribler.Core.Modules.tracker_manager import TRACKER_RETRY_INTERVAL
+from Tribler.Core.TorrentChecker.session import create_tracker_session, FakeDHTSession, UDPScraperSocket
 from Tribler.Core.Utilities.tracker_utils import MalformedTrackerURLException
 from Tribler.Core.simpledefs import NTFY_TORRENTS
 from Tribler.dispersy.taskmanager import TaskManager
 from Tribler.dispersy.util import blocking_call_on_reactor_thread, call_on_reactor_thread
 
 # some settings
-DEFAULT_TORRENT_SELECTION_INTERVAL = 20  # every 20 seconds, the thread will select torrents to check
+DEFAULT_CHECK_QUEUE_REFILL_INTERVAL = 60  # every 60 seconds, the torrents that are due soon are loaded into the queue
+DEFAULT_CHECK_QUEUE_SIZE = 10000  # the maximum number of torrents that are loaded into the queue at once
 DEFAULT_TORRENT_CHECK_INTERVAL = 900  # base multiplier for the check delay
+AUTO_CHECK_TIMEOUT = 30
 
 DEFAULT_MAX_TORRENT_CHECK_RETRIES = 8  # max check delay increments when failed.
 DEFAULT_TORRENT_CHECK_RETRY_INTERVAL = 30  # interval when the torrent was successfully checked for the last time
@@ -36,7 +42,20 @@ class TorrentChecker(TaskManager):
         self._max_torrent_check_retries = DEFAULT_MAX_TORRENT_CHECK_RETRIES
 
         self._session_list = {'DHT': []}
-        self._last_torrent_selection_time = 0
+
+        # All UDP tracker sessions send their requests through the same socket
+        self._udp_socket = UDPScraperSocket()
+
+        # The scheduled automatic checks: a heap of (next_check, infohash, tracker_url) tuples, the due infohashes per
+        # tracker and the trackers that are being checked.
+        self._check_queue_refill_interval = DEFAULT_CHECK_QUEUE_REFILL_INTERVAL
+        self._check_queue_size = DEFAULT_CHECK_QUEUE_SIZE
+        self._max_concurrent_checks = 1
+        self._check_queue = []
+        self._queued_infohashes = set()
+        self._due_checks = OrderedDict()
+        self._active_checks = set()
+        self._malformed_trackers = set()
 
         # Track all session cleanups
         self.session_stop_defer_list = []
@@ -44,7 +63,9 @@ class TorrentChecker(TaskManager):
     @blocking_call_on_reactor_thread
     def initialize(self):
         self._torrent_db = self.tribler_session.open_dbhandler(NTFY_TORRENTS)
-        self._reschedule_tracker_select()
+        self._max_concurrent_checks = self.tribler_session.config.get_torrent_checking_max_concurrent_checks()
+        self.register_task(u"torrent_checker_refill_queue",
+                           LoopingCall(self._refill_check_queue)).start(self._check_queue_refill_interval, now=True)
 
     def shutdown(self):
         """
@@ -63,6 +84,8 @@ class TorrentChecker(TaskManager):
             for session in self._session_list[tracker_url]:
                 self.session_stop_defer_list.append(session.cleanup())
 
+        self.session_stop_defer_list.append(self._udp_socket.stop())
+
         defer_stop_list = DeferredList(self.session_stop_defer_list)
 
         self._session_list = None
@@ -72,58 +95,117 @@ class TorrentChecker(TaskManager):
 
         return defer_stop_list
 
-    def _reschedule_tracker_select(self):
+    def _refill_check_queue(self):
         """
-        Changes the tracker selection interval dynamically and schedules the task.
+        Loads the torrents that have to be checked within the next refill interval into the check queue.
+        The torrents are selected on a read-only connection, so sorting a large catalogue does not block the reactor.
+        Errors are logged rather than returned, since a failed deferred would stop the looping call for good.
+        :return: A deferred that fires once the loaded checks have been scheduled.
         """
-        # dynamically change the interval: update at least every 2h
-        num_torrents = self._torrent_db.getNumberCollectedTorrents()
+        now = int(time.time())
+        return maybeDeferred(self._torrent_db.get_torrents_to_check_async, now + self._check_queue_refill_interval,
+                             now - TRACKER_RETRY_INTERVAL, self._check_queue_size)\
+            .addCallback(self._on_torrents_to_check)\
+            .addErrback(self._on_refill_error)
 
-        tracker_select_interval = min(max(7200 / num_torrents, 10), 100) if num_torrents \
-            else DEFAULT_TORRENT_SELECTION_INTERVAL
+    def _on_refill_error(self, failure):
+        self._logger.error(u"Failed to refill the check queue: %s", failure.getErrorMessage())
 
-        self._logger.debug(u"tracker selection interval changed to %s", tracker_select_interval)
-
-        self.register_task(u"torrent_checker_tracker_selection",
-                           reactor.callLater(tracker_select_interval, self._task_select_tracker))
-
-    def _task_select_tracker(self):
+    def _on_torrents_to_check(self, torrents):
         """
-        The regularly scheduled task that selects torrents associated with a specific tracker to check.
+        Adds the loaded (infohash, next_check, tracker_url) tuples to the check queue, unless the torrent is already
+        queued or being checked.
         """
+        if self._should_stop:
+            return
 
-        # update the torrent selection interval
-        self._reschedule_tracker_select()
-
-        # start selecting torrents
-        tracker_url = self.tribler_session.lm.tracker_manager.get_next_tracker_for_auto_check()
-        if tracker_url is None:
-            self._logger.warn(u"No tracker to select from, skip")
-            return succeed(None)
-
-        self._logger.debug(u"Start selecting torrents on tracker %s.", tracker_url)
+        for infohash, next_check, tracker_url in torrents:
+            if infohash not in self._queued_infohashes and tracker_url not in self._malformed_trackers:
+                self._queued_infohashes.add(infohash)
+                heappush(self._check_queue, (next_check, infohash, tracker_url))
 
-        # get the torrents that should be checked
-        infohashes = self._torrent_db.getTorrentsOnTracker(tracker_url, int(time.time()))
+        self._logger.debug(u"%d torrents in the check queue", len(self._queued_infohashes))
+        self._schedule_checks()
 
-        if len(infohashes) == 0:
-            # We have not torrent to recheck for this tracker. Still update the last_check for this tracker.
-            self._logger.info("No torrent to check for tracker %s", tracker_url)
-            self.tribler_session.lm.tracker_manager.update_tracker_info(tracker_url, True)
+    def _schedule_checks(self):
+        """
+        Starts checking the trackers of the torrents that are due, as long as the number of concurrently checked
+        trackers is below the limit. Every tracker is checked by at most one session at a time.
+        """
+        now = time.time()
+        while self._check_queue and self._check_queue[0][0] <= now:
+            _, infohash, tracker_url = heappop(self._check_queue)
+            self._due_checks.setdefault(tracker_url, []).append(infohash)
+
+        for tracker_url in self._due_checks.keys():
+            if len(self._active_checks) >= self._max_concurrent_checks:
+                break
+            # A check that finishes immediately schedules the next checks itself
+            if tracker_url in self._due_checks and tracker_url not in self._active_checks:
+                self._check_tracker(tracker_url)
+
+        # The remaining due checks are started once one of the active checks is done
+        self.cancel_pending_task(u"torrent_checker_schedule_checks")
+        if self._check_queue:
+            self.register_task(u"torrent_checker_schedule_checks",
+                               reactor.callLater(self._check_queue[0][0] - now, self._schedule_checks))
+
+    def _check_tracker(self, tracker_url):
+        """
+        Scrapes a tracker for as many of its due torrents as fit in a single session.
+        :return: A deferred that fires once the results have been stored.
+        """
+        infohashes = self._due_checks[tracker_url]
+
+        try:
+            session = self._create_session_for_request(tracker_url, timeout=AUTO_CHECK_TIMEOUT)
+        except MalformedTrackerURLException as e:
+            self._logger.error(e)
+            self._malformed_trackers.add(tracker_url)
+            del self._due_checks[tracker_url]
+            self._queued_infohashes.difference_update(infohashes)
             return succeed(None)
-        elif tracker_url != u'DHT' and tracker_url != u'no-DHT':
-            try:
-                session = self._create_session_for_request(tracker_url, timeout=30)
-            except MalformedTrackerURLException as e:
-                self._logger.error(e)
-                return succeed(None)
-
-            for infohash in infohashes:
-                session.add_infohash(infohash)
 
-            self._logger.info(u"Selected %d new torrents to check on tracker: %s", len(infohashes), tracker_url)
-            return session.connect_to_tracker().addCallbacks(*self.get_callbacks_for_session(session))\
-                .addErrback(lambda _: None)
+        checked_infohashes = []
+        while infohashes and session.can_add_request():
+            infohash = infohashes.pop(0)
+            session.add_infohash(infohash)
+            checked_infohashes.append(infohash)
+        if not infohashes:
+            del self._due_checks[tracker_url]
+
+        self._active_checks.add(tracker_url)
+        self._logger.info(u"Selected %d torrents to check on tracker: %s", len(checked_infohashes), tracker_url)
+
+        def on_check_done(result):
+            self._active_checks.discard(tracker_url)
+            self._queued_infohashes.difference_update(checked_infohashes)
+            if not self._should_stop:
+                self._schedule_checks()
+            return result
+
+        # Session errors have been logged by on_session_error already
+        return session.connect_to_tracker().addCallbacks(*self.get_callbacks_for_session(session))\
+            .addErrback(lambda _: None)\
+            .addCallback(self._on_auto_check_result, checked_infohashes)\
+            .addBoth(on_check_done)
+
+    def _on_auto_check_result(self, result, infohashes):
+        """
+        Stores the results of an automatic check of the given infohashes.
+        """
+        if not result:
+            return
+
+        infohashes = set(infohashes)
+        last_check = int(time.time())
+        results = []
+        for response_list in result.itervalues():
+            for response in response_list:
+                infohash = unhexlify(response['infohash'])
+                if infohash in infohashes:
+                    results.append((infohash, response['seeders'], response['leechers'], last_check))
+        self._update_torrent_results(results)
 
     def get_callbacks_for_session(self, session):
         success_lambda = lambda info_dict: self._on_result_from_session(session, info_dict)
@@ -225,7 +307,7 @@ class TorrentChecker(TaskManager):
         return failure
 
     def _create_session_for_request(self, tracker_url, timeout=20):
-        session = create_tracker_session(tracker_url, timeout)
+        session = create_tracker_session(tracker_url, timeout, self._udp_socket)
 
         if tracker_url not in self._session_list:
             self._session_list[tracker_url] = []
@@ -252,34 +334,14 @@ class TorrentChecker(TaskManager):
         return result_list
 
     def _update_torrent_result(self, response):
-        infohash = response['infohash']
-        seeders = response['seeders']
-        leechers = response['leechers']
-        last_check = response['last_check']
-
-        # the torrent status logic, TODO: do it in other way
-        self._logger.debug(u"Update result %s/%s for %s", seeders, leechers, hexlify(infohash))
+        self._update_torrent_results([(response['infohash'], response['seeders'], response['leechers'],
+                                       response['last_check'])])
 
-        result = self._torrent_db.getTorrent(infohash, (u'torrent_id', u'tracker_check_retries'), include_mypref=False)
-        torrent_id = result[u'torrent_id']
-        retries = result[u'tracker_check_retries']
-
-        # the status logic
-        if seeders > 0:
-            retries = 0
-            status = u'good'
-        else:
-            retries += 1
-            if retries < self._max_torrent_check_retries:
-                status = u'unknown'
-            else:
-                status = u'dead'
-                # prevent retries from exceeding the maximum
-                retries = self._max_torrent_check_retries
-
-        # calculate next check time: <last-time> + <interval> * (2 ^ <retries>)
-        next_check = last_check + self._torrent_check_retry_interval * (2 ** retries)
-
-        self._torrent_db.updateTorrentCheckResult(torrent_id,
-                                                  infohash, seeders, leechers, last_check, next_check,
-                                                  status, retries)
+    def _update_torrent_results(self, results):
+        """
+        Stores the results of multiple torrent checks in the database at once.
+        :param results: A list of (infohash, seeders, leechers, last_check) tuples.
+        """
+        self._logger.debug(u"Update %d torrent check results", len(results))
+        self._torrent_db.updateTorrentCheckResults(results, self._torrent_check_retry_interval,
+                                                   self._max_torrent_check_retries)
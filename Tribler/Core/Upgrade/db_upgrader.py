@@ -9,7 +9,7 @@ from binascii import hexlify
 from shutil import rmtree
 from sqlite3 import Connection
 
-from Tribler.Core.CacheDB.SqliteCacheDBHandler import TorrentDBHandler
+from Tribler.Core.CacheDB.SqliteCacheDBHandler import TorrentDBHandler, ChannelCastDBHandler
 from Tribler.Core.CacheDB.db_versions import LOWEST_SUPPORTED_DB_VERSION, LATEST_DB_VERSION
 from Tribler.Core.CacheDB.sqlitecachedb import str2bin
 from Tribler.Core.Category.Category import Category
@@ -82,6 +82,10 @@ class DBUpgrader(object):
         if self.db.version == 28:
             self._upgrade_28_to_29()
 
+        # version 29 -> 30
+        if self.db.version == 29:
+            self._upgrade_29_to_30()
+
         # check if we managed to upgrade to the latest DB version.
         if self.db.version == LATEST_DB_VERSION:
             self.status_update_func(u"Database upgrade finished.")
@@ -533,6 +537,69 @@ CREATE VIRTUAL TABLE FullTextIndex USING fts4(swarmname, filenames, fileextensio
         # update database version
         self.db.write_version(29)
 
+    def _upgrade_29_to_30(self):
+        self.status_update_func(u"Upgrading database from v%s to v%s..." % (29, 30))
+
+        self.db.execute(u"""
+ALTER TABLE _ChannelMetaData ADD COLUMN global_time integer;
+ALTER TABLE _ChannelMetaData ADD COLUMN mid blob;
+
+CREATE TABLE IF NOT EXISTS LatestModification (
+  target_type           text            NOT NULL,
+  target_id             integer         NOT NULL,
+  type                  text            NOT NULL,
+  dispersy_id           integer         NOT NULL,
+  prev_global_time      integer,
+  global_time           integer,
+  mid                   blob,
+  PRIMARY KEY (target_type, target_id, type)
+);
+        """)
+
+        self.status_update_func(u"Determining the latest channel modifications...")
+        self._copy_modification_global_times()
+
+        channelcast_db_handler = ChannelCastDBHandler(self.session)
+        try:
+            channelcast_db_handler.rebuild_latest_modifications()
+        finally:
+            channelcast_db_handler.close()
+        self.db.commit_now()
+
+        # update database version
+        self.db.write_version(30)
+
+    def _copy_modification_global_times(self):
+        """
+        Copies the global time and member of the modifications in the channels from the Dispersy database, which are
+        needed to determine which modification of a channel, playlist or torrent is the latest one.
+        """
+        db_path = os.path.join(self.session.config.get_state_dir(), u"sqlite", u"dispersy.db")
+        if not os.path.isfile(db_path):
+            return
+
+        dispersy_ids = [dispersy_id for dispersy_id, in self.db.fetchall(u"SELECT dispersy_id FROM _ChannelMetaData")]
+
+        connection = Connection(db_path)
+        cursor = connection.cursor()
+
+        for index in xrange(0, len(dispersy_ids), 500):
+            batch = dispersy_ids[index:index + 500]
+            try:
+                rows = list(cursor.execute(u"SELECT sync.global_time, member.mid, sync.id FROM sync "
+                                           u"JOIN member ON (member.id = sync.member) WHERE sync.id IN (%s)"
+                                           % u", ".join(u"?" * len(batch)), batch))
+            except Exception as e:
+                self._logger.error(u"Could not read the modifications from the Dispersy database: %s", e)
+                break
+
+            if rows:
+                self.db.executemany(u"UPDATE _ChannelMetaData SET global_time = ?, mid = ? WHERE dispersy_id = ?",
+                                    [(global_time, buffer(mid), dispersy_id) for global_time, mid, dispersy_id in rows])
+
+        cursor.close()
+        connection.close()
+
     def reimport_torrents(self):
         """Import all torrent files in the collected torrent dir, all the files already in the database will be ignored.
         """
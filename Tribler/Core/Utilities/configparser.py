@@ -6,6 +6,7 @@ Author(s): Egbert Bouman
 import ast
 import codecs
 from ConfigParser import DEFAULTSECT, RawConfigParser
+from StringIO import StringIO
 from threading import RLock
 
 from Tribler.Core.exceptions import OperationNotPossibleAtRuntimeException
@@ -28,6 +29,9 @@ class CallbackConfigParser(RawConfigParser):
         with codecs.open(filename, 'rb', encoding) as fp:
             self.readfp(fp)
 
+    def read_string(self, string, encoding='utf-8'):
+        self.readfp(StringIO(string.decode(encoding)))
+
     def set(self, section, option, new_value):
         with self.lock:
             if self.callback and self.has_section(section) and self.has_option(section, option):
@@ -59,6 +63,11 @@ class CallbackConfigParser(RawConfigParser):
         with codecs.open(filename, 'wb', encoding) as fp:
             self.write(fp)
 
+    def write_string(self, encoding='utf-8'):
+        fp = StringIO()
+        self.write(fp)
+        return fp.getvalue().encode(encoding)
+
     def write(self, fp):
         with self.lock:
             if self._defaults:
@@ -12,6 +12,7 @@ from time import time
 from libtorrent import bencode
 import chardet
 
+from Tribler.Core.Utilities.piece_hasher import hash_pieces
 from Tribler.Core.Utilities.unicode import bin2unicode
 from Tribler.Core.Utilities.utilities import create_valid_metainfo
 from Tribler.Core.defaults import tdefdictdefaults
@@ -84,12 +85,8 @@ def makeinfo(input, userabortflag, userprogresscallback):
     """ Calculate hashes and create torrent file's 'info' part """
     encoding = input['encoding']
 
-    pieces = []
-    sh = sha1()
-    done = 0
     fs = []
     totalsize = 0
-    totalhashed = 0
 
     # 1. Determine which files should go into the torrent (=expand any dirs
     # specified by user in input['files']
@@ -133,50 +130,18 @@ def makeinfo(input, userabortflag, userprogresscallback):
     else:
         piece_length = input['piece length']
 
-    # 4. Read files and calc hashes
-    for p, f, size in subs:
-        pos = 0
-
-        h = open(f, 'rb')
-
-        while pos < size:
-            a = min(size - pos, piece_length - done)
-
-            # See if the user cancelled
-            if userabortflag is not None and userabortflag.isSet():
-                return None, None
-
-            readpiece = h.read(a)
-
-            # See if the user cancelled
-            if userabortflag is not None and userabortflag.isSet():
-                return None, None
-
-            sh.update(readpiece)
-
-            done += a
-            pos += a
-            totalhashed += a
-
-            if done == piece_length:
-                pieces.append(sh.digest())
-                done = 0
-                sh = sha1()
-
-            if userprogresscallback is not None:
-                userprogresscallback(float(totalhashed) / float(totalsize))
+    # 4. Read files and calc hashes, large inputs are hashed by multiple processes
+    pieces = hash_pieces([(f, size) for _, f, size in subs], piece_length, userabortflag, userprogresscallback)
+    if pieces is None:
+        return None, None
 
+    for p, _, size in subs:
         newdict = {'length': size,
                    'path': uniconvertl(p, encoding),
                    'path.utf-8': uniconvertl(p, 'utf-8')}
 
         fs.append(newdict)
 
-        h.close()
-
-    if done > 0:
-        pieces.append(sh.digest())
-
     # 5. Create info dict
     if len(subs) == 1:
         flkey = 'length'
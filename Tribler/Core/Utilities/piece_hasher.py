@@ -0,0 +1,165 @@
+"""
+Piece hashing for torrent creation.
+
+The pieces of large inputs are divided in ranges that are hashed by a pool of processes.
+"""
+import logging
+import multiprocessing
+from hashlib import sha1
+from itertools import izip
+
+logger = logging.getLogger(__name__)
+
+# Inputs smaller than this number of bytes are hashed by the calling thread, since starting a pool costs more time
+# than it saves
+MULTIPROCESS_MIN_SIZE = 64 * 1024 * 1024
+
+# The number of bytes in a range of pieces that is hashed by a single process, progress is reported per range
+PIECE_RANGE_SIZE = 32 * 1024 * 1024
+
+# The buffer size used when reading files, so small pieces are read from disk with large sequential reads
+READ_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def get_piece_ranges(total_size, piece_length, range_size=PIECE_RANGE_SIZE):
+    """
+    Divide the pieces of total_size bytes in ranges of about range_size bytes.
+    :return: a list of (first piece, end piece) tuples, the end piece is not part of the range.
+    """
+    num_pieces = (total_size + piece_length - 1) // piece_length
+    pieces_per_range = max(1, range_size // piece_length)
+    return [(first_piece, min(first_piece + pieces_per_range, num_pieces))
+            for first_piece in xrange(0, num_pieces, pieces_per_range)]
+
+
+def hash_piece_range(files, piece_length, first_piece, end_piece):
+    """
+    Return the SHA1 digests of the pieces from first_piece up to end_piece.
+
+    The files are (path, size) tuples in the order in which they appear in the torrent, a path of None denotes a pad
+    file that consists of zeros. A piece can span multiple files.
+    """
+    start = first_piece * piece_length
+    end = end_piece * piece_length
+
+    digests = []
+    piece_hash = sha1()
+    piece_done = 0
+    file_start = 0
+    for path, size in files:
+        file_end = file_start + size
+        read_start = max(start, file_start)
+        read_end = min(end, file_end)
+
+        if read_start < read_end:
+            file_handle = open(path, 'rb', READ_BUFFER_SIZE) if path is not None else None
+            try:
+                if file_handle:
+                    file_handle.seek(read_start - file_start)
+
+                remaining = read_end - read_start
+                while remaining:
+                    length = min(remaining, piece_length - piece_done)
+                    data = file_handle.read(length) if file_handle else '\0' * length
+                    if len(data) != length:
+                        raise IOError('File %s is smaller than expected' % path)
+
+                    piece_hash.update(data)
+                    piece_done += length
+                    remaining -= length
+
+                    if piece_done == piece_length:
+                        digests.append(piece_hash.digest())
+                        piece_hash = sha1()
+                        piece_done = 0
+            finally:
+                if file_handle:
+                    file_handle.close()
+
+        file_start = file_end
+        if file_start >= end:
+            break
+
+    # The last piece of the torrent can be smaller than the piece length
+    if piece_done:
+        digests.append(piece_hash.digest())
+    return digests
+
+
+def hash_file(path):
+    """
+    Return the SHA1 digest of a whole file.
+    """
+    file_hash = sha1()
+    with open(path, 'rb') as file_handle:
+        for data in iter(lambda: file_handle.read(READ_BUFFER_SIZE), ''):
+            file_hash.update(data)
+    return file_hash.digest()
+
+
+def _hash_piece_range_task(args):
+    """
+    Called by a process of the pool.
+    """
+    return hash_piece_range(*args)
+
+
+def create_pool(total_size, num_ranges, processes=None):
+    """
+    Create a pool of processes to hash an input of total_size bytes, or return None if the input should be hashed by
+    the calling thread.
+    """
+    if total_size < MULTIPROCESS_MIN_SIZE or num_ranges < 2:
+        return None
+
+    try:
+        processes = min(processes or multiprocessing.cpu_count(), num_ranges)
+    except NotImplementedError:
+        return None
+    if processes < 2:
+        return None
+
+    try:
+        return multiprocessing.Pool(processes)
+    except (OSError, AssertionError) as exc:
+        # AssertionError is raised when the calling process is a daemonic process itself
+        logger.warning("Could not create a pool to hash pieces, hashing in a single process: %s", exc)
+        return None
+
+
+def hash_pieces(files, piece_length, userabortflag=None, userprogresscallback=None, processes=None):
+    """
+    Return the SHA1 digests of the pieces of the files, see hash_piece_range. Large inputs are hashed by a pool of
+    processes, small inputs by the calling thread.
+
+    :param userabortflag: threading.Event() object that aborts the hashing when it is set.
+    :param userprogresscallback: function that is called by the calling thread with the fraction of the input that
+    has been hashed.
+    :param processes: the number of processes in the pool, defaults to the number of CPUs.
+    :return: a list of digests, or None if the hashing was aborted.
+    """
+    total_size = sum(size for _, size in files)
+    ranges = get_piece_ranges(total_size, piece_length, PIECE_RANGE_SIZE)
+
+    pool = create_pool(total_size, len(ranges), processes)
+    if pool:
+        results = pool.imap(_hash_piece_range_task, [(files, piece_length, first_piece, end_piece)
+                                                     for first_piece, end_piece in ranges])
+    else:
+        results = (hash_piece_range(files, piece_length, first_piece, end_piece) for first_piece, end_piece in ranges)
+
+    try:
+        digests = []
+        for (_, end_piece), range_digests in izip(ranges, results):
+            # See if the user cancelled
+            if userabortflag is not None and userabortflag.isSet():
+                return None
+
+            digests.extend(range_digests)
+            if userprogresscallback is not None:
+                userprogresscallback(float(min(end_piece * piece_length, total_size)) / total_size)
+        return digests
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
@@ -3,11 +3,17 @@ Search utilities.
 
 Author(s): Jelle Roozenburg, Arno Bakker
 """
+import math
 import re
+from struct import unpack_from
 
 RE_KEYWORD_SPLIT = re.compile(r"[\W_]", re.UNICODE)
 DIALOG_STOPWORDS = {'an', 'and', 'by', 'for', 'from', 'of', 'the', 'to', 'with'}
 
+# The relevance of a torrent is 80% dependent on matching in the name of the torrent, 10% on the names of the files in
+# the torrent and 10% on the extensions of files in the torrent.
+BM25_COLUMN_WEIGHTS = (0.8, 0.1, 0.1)
+
 
 def split_into_keywords(string, to_filter_stopwords=False):
     """
@@ -27,3 +33,38 @@ def split_into_keywords(string, to_filter_stopwords=False):
 
 def filter_keywords(keywords):
     return [kw for kw in keywords if len(kw) > 0 and kw not in DIALOG_STOPWORDS]
+
+
+def get_bm25_score(matchinfo, column_weights=BM25_COLUMN_WEIGHTS):
+    """
+    Computes a relevance score from a FTS matchinfo object, created with the 'pcnalx' format string.
+    The algorithm is based on BM25. The document length factor is regarded since our "documents" are very small
+    (often a few keywords). See https://en.wikipedia.org/wiki/Okapi_BM25 for more information about BM25 and
+    https://www.sqlite.org/fts3.html#matchinfo for information about the matchinfo object.
+
+    This function is registered in the database as the bm25_score SQL function, so results can be ranked by SQLite.
+    """
+    num_phrases, num_cols, num_rows = unpack_from('III', matchinfo)
+
+    # Skip the p, c, n values and the a and l values (one per column) to get to the x values
+    hits = unpack_from('I' * (3 * num_cols * num_phrases), matchinfo, 4 * (3 + 2 * num_cols))
+
+    score = 0.0
+    for col_ind in xrange(min(num_cols, len(column_weights))):
+        col_score = 0.0
+        for phrase_ind in xrange(num_phrases):
+            # Fetch info about the current matching term from the x values of the matchinfo object.
+            base_term_offset = 3 * (col_ind + phrase_ind * num_cols)
+            term_freq = hits[base_term_offset]
+            if not term_freq:
+                continue
+            rows_with_term = hits[base_term_offset + 2]
+
+            inv_doc_freq = math.log((num_rows - rows_with_term + 0.5) / (rows_with_term + 0.5), 2)
+            right_side = ((term_freq * (1.2 + 1)) / (term_freq + 1.2))
+
+            col_score += inv_doc_freq * right_side
+
+        score += column_weights[col_ind] * col_score
+
+    return score
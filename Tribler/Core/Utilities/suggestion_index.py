@@ -0,0 +1,155 @@
+"""
+An in-memory index of the terms in the names of the known torrents, used for search suggestions and auto completion.
+
+Similar terms are found with a trigram index: a term within edit distance k of a word shares all but at most 3k of the
+trigrams of that word. Therefore, every similar term is in the postings of at least one of the 3k + 1 rarest trigrams of
+the word, so only these postings have to be checked with an actual edit distance computation.
+"""
+from array import array
+from bisect import bisect_left
+from heapq import nlargest
+
+TRIGRAM_PADDING = u"$$"
+MAX_TERM_LENGTH = 50
+
+
+def levenshtein_distance(a, b):
+    """
+    Calculates the Levenshtein distance between a and b.
+    """
+    n, m = len(a), len(b)
+    if n > m:
+        # Make sure n <= m, to use O(min(n,m)) space
+        a, b = b, a
+        n, m = m, n
+
+    current = range(n + 1)
+    for i in xrange(1, m + 1):
+        previous, current = current, [i] + [0] * n
+        for j in xrange(1, n + 1):
+            add, delete = previous[j] + 1, current[j - 1] + 1
+            change = previous[j - 1]
+            if a[j - 1] != b[i - 1]:
+                change += 1
+            current[j] = min(add, delete, change)
+
+    return current[n]
+
+
+def get_trigrams(term):
+    """
+    Returns the set of trigrams of a term. The term is padded, so a term of n characters has n + 2 trigrams.
+    """
+    padded = TRIGRAM_PADDING + term + TRIGRAM_PADDING
+    return set(padded[i:i + 3] for i in xrange(len(padded) - 2))
+
+
+class SearchSuggestionIndex(object):
+    """
+    Keeps the distinct terms of the indexed texts, their frequencies and a trigram index over them.
+    """
+
+    def __init__(self):
+        self._term_ids = {}
+        self._terms = []
+        self._frequencies = array('I')
+        self._trigrams = {}
+
+        # Terms that are sorted lazily, on the next prefix lookup
+        self._sorted_terms = []
+        self._unsorted_terms = []
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        return term in self._term_ids
+
+    def get_frequency(self, term):
+        term_id = self._term_ids.get(term)
+        return 0 if term_id is None else self._frequencies[term_id]
+
+    def add_text(self, text):
+        """
+        Adds all terms in a space separated text (i.e. the keywords of a swarmname) to the index.
+        """
+        for term in text.split():
+            self.add_term(term)
+
+    def add_term(self, term, frequency=1):
+        """
+        Adds a term to the index or increases the frequency of a term that is already in the index.
+        Numbers and very long terms (hashes and such) are not interesting as a suggestion and are skipped.
+        """
+        term_id = self._term_ids.get(term)
+        if term_id is not None:
+            self._frequencies[term_id] += frequency
+            return
+
+        if term.isdigit() or len(term) > MAX_TERM_LENGTH:
+            return
+
+        term_id = len(self._terms)
+        self._term_ids[term] = term_id
+        self._terms.append(term)
+        self._frequencies.append(frequency)
+        self._unsorted_terms.append(term)
+
+        for trigram in get_trigrams(term):
+            postings = self._trigrams.get(trigram)
+            if postings is None:
+                self._trigrams[trigram] = array('I', [term_id])
+            else:
+                postings.append(term_id)
+
+    def merge(self, other):
+        """
+        Adds all terms of another index to this index.
+        """
+        for term_id, term in enumerate(other._terms):
+            self.add_term(term, other._frequencies[term_id])
+
+    def get_similar_terms(self, word, max_distance=2, limit=None):
+        """
+        Returns the terms within max_distance edits of word, ordered by distance and then by frequency.
+        The allowed distance is lowered for short words, as almost any short term is a few edits away from these.
+        """
+        max_distance = min(max_distance, max(1, len(word) // 4))
+
+        # The trigrams of the word that are not in the index are the rarest of all, those have no postings though
+        trigrams = sorted(get_trigrams(word), key=lambda trigram: len(self._trigrams.get(trigram, ())))
+        candidates = set()
+        for trigram in trigrams[:3 * max_distance + 1]:
+            candidates.update(self._trigrams.get(trigram, ()))
+
+        similar_terms = []
+        for term_id in candidates:
+            term = self._terms[term_id]
+            if abs(len(term) - len(word)) > max_distance:
+                continue
+
+            distance = levenshtein_distance(word, term)
+            if distance <= max_distance:
+                similar_terms.append((distance, -self._frequencies[term_id], term))
+
+        similar_terms.sort()
+        return [term for _, _, term in similar_terms[:limit]]
+
+    def get_completions(self, prefix, limit=10):
+        """
+        Returns the most frequent terms that start with prefix, excluding prefix itself.
+        """
+        if self._unsorted_terms:
+            self._sorted_terms.extend(self._unsorted_terms)
+            self._sorted_terms.sort()
+            self._unsorted_terms = []
+
+        def iter_completions():
+            for index in xrange(bisect_left(self._sorted_terms, prefix), len(self._sorted_terms)):
+                term = self._sorted_terms[index]
+                if not term.startswith(prefix):
+                    return
+                if term != prefix:
+                    yield term
+
+        return nlargest(limit, iter_completions(), key=self.get_frequency)
@@ -3,6 +3,8 @@ import os
 
 import libtorrent
 
+from Tribler.Core.Utilities.piece_hasher import hash_file, hash_pieces
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +26,7 @@ def commonprefix(l):
     return os.path.sep.join(cp)
 
 
-def create_torrent_file(file_path_list, params):
+def create_torrent_file(file_path_list, params, progress_callback=None):
     fs = libtorrent.file_storage()
 
     # filter all non-files
@@ -95,9 +97,9 @@ def create_torrent_file(file_path_list, params):
 
     # read the files and calculate the hashes
     if len(file_path_list) == 1:
-        libtorrent.set_piece_hashes(torrent, base_path)
+        set_piece_hashes(torrent, base_path, progress_callback)
     else:
-        libtorrent.set_piece_hashes(torrent, base_dir)
+        set_piece_hashes(torrent, base_dir, progress_callback)
 
     t1 = torrent.generate()
     torrent = libtorrent.bencode(t1)
@@ -119,6 +121,35 @@ def create_torrent_file(file_path_list, params):
             'torrent_file_path': torrent_file_name}
 
 
+def set_piece_hashes(torrent, base_path, progress_callback=None):
+    """
+    Hash the files of a libtorrent create_torrent object, like libtorrent.set_piece_hashes does. Large inputs are hashed
+    by a pool of processes, see hash_pieces.
+    :param progress_callback: function that is called with the fraction of the files that has been hashed.
+    """
+    # The files of the torrent may have been reordered and pad files may have been added to them
+    storage = torrent.files()
+    files = []
+    for index in xrange(storage.num_files()):
+        if storage.file_flags(index) & storage.flag_pad_file:
+            files.append((None, storage.file_size(index)))
+            continue
+
+        path = storage.file_path(index)
+        if isinstance(base_path, unicode) and not isinstance(path, unicode):
+            path = path.decode('utf-8')
+        files.append((os.path.join(base_path, path), storage.file_size(index)))
+
+    for index, digest in enumerate(hash_pieces(files, torrent.piece_length(), userprogresscallback=progress_callback)):
+        torrent.set_hash(index, digest)
+
+    # libtorrent < 1.1 includes the SHA1 hashes of the files in the torrent
+    if hasattr(libtorrent.create_torrent_flags_t, 'calculate_file_hashes'):
+        for index, (path, _) in enumerate(files):
+            if path is not None:
+                torrent.set_file_hash(index, hash_file(path))
+
+
 def get_info_from_handle(handle):
     # In libtorrent 0.16.18, the torrent_handle.torrent_file method is not available.
     # this method checks whether the torrent_file method is available on a given handle.
@@ -211,9 +211,7 @@ class VideoRequestHandler(BaseHTTPRequestHandler):
                 stream.close()
 
     def wait_for_handle(self, download):
-        # TODO(Martijn): Ugly time.sleep required, should be refactored when we Twistify the video server
-        while not (download.handle and download.handle.is_valid()):
-            time.sleep(1)
+        download.wait_for_handle()
 
     def wait_for_buffer(self, download):
         self.event = Event()
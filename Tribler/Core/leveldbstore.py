@@ -37,6 +37,7 @@ except ImportError:
 
 from twisted.internet import reactor
 from twisted.internet.task import LoopingCall
+from twisted.python.threadable import isInIOThread
 
 from Tribler.dispersy.taskmanager import TaskManager
 
@@ -77,7 +78,11 @@ class LevelDbStore(MutableMapping, TaskManager):
 
         self._writeback_lc = self.register_task("flush cache ", LoopingCall(self.flush))
         self._writeback_lc.clock = self._reactor
-        self._writeback_lc.start(WRITEBACK_PERIOD)
+        # The store might be opened from the thread pool during startup, the writeback loop runs on the reactor
+        if isInIOThread():
+            self._writeback_lc.start(WRITEBACK_PERIOD)
+        else:
+            reactor.callFromThread(self._writeback_lc.start, WRITEBACK_PERIOD)
 
     def __getitem__(self, key):
         try:
@@ -67,6 +67,7 @@ NTFY_IP_CREATED = 'intropointcreated'
 NTFY_RP_CREATED = 'rendezvouspointcreated'
 NTFY_UPGRADER = 'upgraderdone'
 NTFY_UPGRADER_TICK = 'upgradertick'
+NTFY_TORRENT_CREATION = 'torrentcreation'
 
 NTFY_STARTUP_TICK = 'startuptick'
 NTFY_CLOSE_TICK = 'closetick'
@@ -1,6 +1,6 @@
 from Tribler.Test.Community.AbstractTestCommunity import AbstractTestCommunity
 from Tribler.Test.twisted_thread import deferred
-from Tribler.community.allchannel.community import AllChannelCommunity
+from Tribler.community.allchannel.community import AllChannelCommunity, CHANNELCAST_CACHE_PERIOD
 from Tribler.community.channel.preview import PreviewChannelCommunity
 from Tribler.dispersy.member import DummyMember
 from Tribler.dispersy.message import Message
@@ -40,3 +40,14 @@ class TestAllChannelCommunity(AbstractTestCommunity):
         preview_community.init_timestamp = -500
         self.dispersy._communities['c' * 20] = preview_community
         return self.community.unload_preview().addCallback(verify_unloaded)
+
+    def test_get_channelcast_torrents_cached(self):
+        """
+        Test whether the torrents selected for a channelcast message are reused for a while
+        """
+        self.community._channelcast_db.getRecentAndRandomTorrents = lambda *_: {"a" * 20: set(["b" * 20])}
+        torrents = self.community.get_channelcast_torrents(False, 1000)
+        self.community._channelcast_db.getRecentAndRandomTorrents = lambda *_: {}
+        self.assertEqual(self.community.get_channelcast_torrents(False, 1000 + CHANNELCAST_CACHE_PERIOD), torrents)
+        self.assertEqual(self.community.get_channelcast_torrents(True, 1000), {})
+        self.assertEqual(self.community.get_channelcast_torrents(False, 1001 + CHANNELCAST_CACHE_PERIOD), {})
@@ -0,0 +1,90 @@
+import networkx as nx
+
+from Tribler.Test.Community.Market.Reputation.test_reputation_base import TestReputationBase
+from Tribler.community.market.reputation.incremental_pagerank_manager import IncrementalPagerankReputationManager
+
+
+class TestReputationIncrementalPagerank(TestReputationBase):
+    """
+    Contains tests to test the reputation based on incrementally updated pagerank
+    """
+
+    def setUp(self, annotate=True):
+        super(TestReputationIncrementalPagerank, self).setUp(annotate=annotate)
+        self.insert_transaction('a', 'b', 1, 20, 2, 20)
+        self.insert_transaction('a', 'b', 1, 20, 2, 20)
+        self.insert_transaction('b', 'c', 1, 20, 2, 20)
+        self.insert_transaction('b', 'd', 1, 20, 2, 20)
+        self.insert_transaction('d', 'e', 1, 10, 2, 30)
+
+    def get_networkx_pagerank(self, own_public_key):
+        # The trade graph is built like the reputation has always been computed, the last trade determines the weight
+        graph = nx.Graph()
+        for block in self.market_db.get_all_blocks():
+            graph.add_edge(block.public_key, block.link_public_key, weight=block.transaction["asset1_amount"])
+            graph.add_edge(block.link_public_key, block.public_key, weight=block.transaction["asset2_amount"])
+
+        personalization = dict((node, 0) for node in graph.nodes())
+        personalization[own_public_key] = 1
+        return nx.pagerank_scipy(graph, personalization=personalization, max_iter=1000, tol=1e-10)
+
+    def assert_reputation_equal(self, reputation, expected_reputation):
+        self.assertEqual(set(reputation.keys()), set(expected_reputation.keys()))
+        for public_key, value in expected_reputation.iteritems():
+            self.assertAlmostEqual(reputation[public_key], value, places=5)
+
+    def test_compute(self):
+        """
+        Test whether the pagerank is equal to the pagerank that networkx computes
+        """
+        rep_manager = IncrementalPagerankReputationManager(self.market_db.get_all_blocks(), tolerance=1e-7)
+        self.assert_reputation_equal(rep_manager.compute(own_public_key='a'), self.get_networkx_pagerank('a'))
+
+    def test_compute_incremental(self):
+        """
+        Test whether adding blocks after a computation results in the same pagerank as computing it from scratch
+        """
+        rep_manager = IncrementalPagerankReputationManager(self.market_db.get_all_blocks(), own_public_key='a',
+                                                           tolerance=1e-7)
+        rep_manager.compute()
+
+        self.insert_transaction('e', 'f', 1, 5, 2, 5)
+        self.insert_transaction('c', 'a', 1, 5, 2, 5)
+        rep_manager.add_blocks(self.market_db.get_all_blocks())
+        self.assertEqual(len(rep_manager), 6)
+        self.assert_reputation_equal(rep_manager.compute(), self.get_networkx_pagerank('a'))
+
+    def test_compute_last_trade_weight(self):
+        """
+        Test whether the last trade between two nodes determines the weight of their edge
+        """
+        rep_manager = IncrementalPagerankReputationManager(self.market_db.get_all_blocks(), own_public_key='a',
+                                                           tolerance=1e-7)
+        rep_manager.compute()
+
+        self.insert_transaction('d', 'e', 1, 10, 2, 5)
+        self.insert_transaction('a', 'b', 1, 20, 2, 80)
+        rep_manager.add_blocks(self.market_db.get_all_blocks())
+        self.assert_reputation_equal(rep_manager.compute(), self.get_networkx_pagerank('a'))
+
+    def test_add_block_twice(self):
+        """
+        Test whether a block that is added twice is only counted once
+        """
+        blocks = self.market_db.get_all_blocks()
+        rep_manager = IncrementalPagerankReputationManager(blocks, own_public_key='a')
+        self.assertFalse(rep_manager.add_block(blocks[0]))
+
+    def test_reputation_dict_staleness(self):
+        """
+        Test whether the reputation dictionary is only recomputed when it is older than the maximum staleness
+        """
+        rep_manager = IncrementalPagerankReputationManager(own_public_key='a', max_staleness=3600)
+        self.assertEqual(rep_manager.reputation_dict, {})
+        rep_manager.compute()
+
+        rep_manager.add_blocks(self.market_db.get_all_blocks())
+        self.assertEqual(rep_manager.reputation_dict, {})
+
+        rep_manager.max_staleness = 0
+        self.assertEqual(len(rep_manager.reputation_dict), 5)
@@ -388,6 +388,33 @@ class CommunityTestSuite(AbstractTestMarketCommunity):
         self.market_community.compute_reputation()
         self.assertFalse(self.market_community.reputation_dict)
 
+    @blocking_call_on_reactor_thread
+    def test_compute_reputation_new_blocks(self):
+        """
+        Test whether the blocks that are inserted after the first computation are included in the reputation
+        """
+        def create_block(public_key, link_public_key, insert_time):
+            block = MockObject()
+            block.public_key = public_key
+            block.link_public_key = link_public_key
+            block.sequence_number = 1
+            block.insert_time = insert_time
+            block.transaction = {"asset1_amount": 10, "asset2_amount": 20}
+            return block
+
+        block1 = create_block('a', 'b', u"2017-01-01 00:00:00")
+        block2 = create_block('b', 'c', u"2017-01-01 00:00:01")
+        persistence = MockObject()
+        persistence.get_all_blocks = lambda: [block1]
+        persistence.get_blocks_since = lambda insert_time: [block1, block2] if insert_time == block1.insert_time else []
+        self.market_community.tradechain_community = MockObject()
+        self.market_community.tradechain_community.persistence = persistence
+
+        self.market_community.compute_reputation()
+        self.assertEqual(set(self.market_community.reputation_dict), {'a', 'b'})
+        self.market_community.compute_reputation()
+        self.assertEqual(set(self.market_community.reputation_dict), {'a', 'b', 'c'})
+
     @blocking_call_on_reactor_thread
     def test_abort_transaction(self):
         """
@@ -181,66 +181,69 @@ class PriceTimeStrategyTestSuite(AbstractServer):
         self.assertEquals(Price(200, 'BTC'), self.bid2.price)
         self.assertEquals(Quantity(30, 'MC'), matching_ticks[0][2])
 
-    def test_search_for_quantity_in_order_book_partial_ask_low(self):
+    def test_match_order_multiple_price_levels_ask(self):
         """
-        Test for protected search for quantity in order book partial ask when price is too low
+        Test for match ask order over multiple price levels, starting at the highest bid
         """
         self.order_book.insert_bid(self.bid)
         self.order_book.insert_bid(self.bid2)
         self.order_book.insert_bid(self.bid3)
         self.order_book.insert_bid(self.bid4)
-        matching_ticks = self.price_time_strategy._search_for_quantity_in_order_book_partial_ask(
-            self.ask_order2.order_id, Price(100, 'BTC'), Quantity(30, 'MC'), [], self.ask_order2.price, True)
-        self.assertEquals(1, len(matching_ticks))
-        self.assertEquals(Quantity(30, 'MC'), matching_ticks[0][2])
+        matching_ticks = self.price_time_strategy.match(self.ask_order2.order_id, self.ask_order2.price,
+                                                        self.ask_order2.available_quantity, True)
+        self.assertEquals(2, len(matching_ticks))
+        self.assertEquals(self.order_book.get_tick(self.bid2.order_id), matching_ticks[0][1])
+        self.assertEquals(self.order_book.get_tick(self.bid.order_id), matching_ticks[1][1])
+        self.assertEquals(Quantity(30, 'MC'), matching_ticks[1][2])
 
-    def test_search_for_quantity_in_order_book_partial_ask(self):
+    def test_match_order_ask_price_too_low(self):
         """
-        Test for protected search for quantity in order book partial ask
+        Test whether an ask order is not matched with bids that have a lower price
         """
-        self.order_book.insert_bid(self.bid)
         self.order_book.insert_bid(self.bid2)
         self.order_book.insert_bid(self.bid3)
-        self.order_book.insert_bid(self.bid4)
-        matching_ticks = self.price_time_strategy._search_for_quantity_in_order_book_partial_ask(
-            self.ask_order.order_id, Price(100, 'BTC'), Quantity(30, 'MC'), [], self.ask_order.price, True)
-        self.assertEquals(0, len(matching_ticks))
+        matching_ticks = self.price_time_strategy.match(self.ask_order.order_id, self.ask_order.price,
+                                                        Quantity(60, 'MC'), True)
+        self.assertEquals(1, len(matching_ticks))
+        self.assertEquals(self.order_book.get_tick(self.bid2.order_id), matching_ticks[0][1])
 
-    def test_search_for_quantity_in_order_book_partial_bid_high(self):
+    def test_match_order_multiple_price_levels_bid(self):
         """
-        Test for protected search for quantity in order book partial bid when price is too high
+        Test for match bid order over multiple price levels, starting at the lowest ask
         """
         self.order_book.insert_ask(self.ask)
-        self.order_book.insert_ask(self.ask2)
         self.order_book.insert_ask(self.ask3)
         self.order_book.insert_ask(self.ask4)
-        matching_ticks = self.price_time_strategy._search_for_quantity_in_order_book_partial_bid(
-            self.bid_order.order_id, Price(100, 'BTC'), Quantity(30, 'MC'), [], self.bid_order.price, False)
-        self.assertEquals(0, len(matching_ticks))
+        matching_ticks = self.price_time_strategy.match(self.bid_order.order_id, self.bid_order.price,
+                                                        Quantity(230, 'MC'), False)
+        self.assertEquals(2, len(matching_ticks))
+        self.assertEquals(self.order_book.get_tick(self.ask4.order_id), matching_ticks[0][1])
+        self.assertEquals(Quantity(200, 'MC'), matching_ticks[0][2])
+        self.assertEquals(self.order_book.get_tick(self.ask.order_id), matching_ticks[1][1])
+        self.assertEquals(Quantity(30, 'MC'), matching_ticks[1][2])
 
-    def test_search_for_quantity_in_order_book_partial_bid(self):
+    def test_match_order_bid_price_too_high(self):
         """
-        Test for protected search for quantity in order book partial bid
+        Test whether a bid order is not matched with asks that have a higher price
         """
         self.order_book.insert_ask(self.ask)
-        self.order_book.insert_ask(self.ask2)
         self.order_book.insert_ask(self.ask3)
-        self.order_book.insert_ask(self.ask4)
-        matching_ticks = self.price_time_strategy._search_for_quantity_in_order_book_partial_bid(
-            self.bid_order.order_id, Price(50, 'BTC'), Quantity(30, 'MC'), [], self.bid_order.price, False)
+        matching_ticks = self.price_time_strategy.match(self.bid_order2.order_id, self.bid_order2.price,
+                                                        self.bid_order2.available_quantity, False)
         self.assertEquals(1, len(matching_ticks))
         self.assertEquals(Quantity(30, 'MC'), matching_ticks[0][2])
 
-    def test_search_for_quantity_in_price_level(self):
+    def test_match_order_deep_price_level(self):
         """
-        Test searching within a price level
+        Test matching against a price level with more ticks than the recursion limit
         """
-        self.bid_order._order_id = self.ask.order_id
-        self.order_book.insert_ask(self.ask)
-        self.order_book.insert_ask(self.ask2)
-        matching_ticks = self.price_time_strategy._search_for_quantity_in_price_level(
-            self.bid_order.order_id, None, Quantity(10, 'MC'), self.bid_order.price, False)
-        self.assertFalse(matching_ticks)
+        for order_number in xrange(2000):
+            self.order_book.insert_ask(Ask(OrderId(TraderId('1'), OrderNumber(order_number + 100)),
+                                           Price(100, 'BTC'), Quantity(1, 'MC'), Timeout(100), Timestamp.now()))
+        matching_ticks = self.price_time_strategy.match(self.bid_order.order_id, self.bid_order.price,
+                                                        Quantity(2000, 'MC'), False)
+        self.assertEquals(2000, len(matching_ticks))
+        self.assertEquals(2000, len(set(match_id for match_id, _, _ in matching_ticks)))
 
     def test_bid_blocked_for_matching(self):
         """
@@ -0,0 +1,91 @@
+import logging
+import os
+import time
+from unittest import skipUnless
+
+from twisted.internet.defer import inlineCallbacks
+
+from Tribler.Test.test_as_server import AbstractServer
+from Tribler.community.market.core.matching_engine import MatchingEngine, PriceTimeStrategy
+from Tribler.community.market.core.message import TraderId
+from Tribler.community.market.core.order import OrderId, OrderNumber
+from Tribler.community.market.core.orderbook import OrderBook
+from Tribler.community.market.core.price import Price
+from Tribler.community.market.core.quantity import Quantity
+from Tribler.community.market.core.tick import Ask, Bid
+from Tribler.community.market.core.timeout import Timeout
+from Tribler.community.market.core.timestamp import Timestamp
+from Tribler.dispersy.util import blocking_call_on_reactor_thread
+
+TICKS_PER_PRICE_LEVEL = 10
+
+
+class MatchingEngineBenchmarkTestSuite(AbstractServer):
+    """Matching engine benchmarks, over order books of different sizes."""
+
+    @blocking_call_on_reactor_thread
+    @inlineCallbacks
+    def setUp(self, annotate=True):
+        yield super(MatchingEngineBenchmarkTestSuite, self).setUp(annotate=annotate)
+        self.order_book = OrderBook()
+        self.matching_engine = MatchingEngine(PriceTimeStrategy(self.order_book))
+
+    @blocking_call_on_reactor_thread
+    @inlineCallbacks
+    def tearDown(self, annotate=True):
+        self.order_book.cancel_all_pending_tasks()
+        yield super(MatchingEngineBenchmarkTestSuite, self).tearDown(annotate=annotate)
+
+    def fill_order_book(self, num_ticks):
+        """
+        Insert num_ticks asks with a quantity of 1, spread over price levels of TICKS_PER_PRICE_LEVEL ticks each
+        """
+        start_time = time.time()
+        for order_number in xrange(num_ticks):
+            self.order_book.insert_ask(Ask(OrderId(TraderId('1'), OrderNumber(order_number)),
+                                           Price(order_number // TICKS_PER_PRICE_LEVEL + 1, 'BTC'),
+                                           Quantity(1, 'MC'), Timeout(3600), Timestamp.now()))
+        self._logger.info("Inserted %d asks in %.2f seconds", num_ticks, time.time() - start_time)
+
+    def benchmark_match(self, num_ticks):
+        """
+        Match bids that sweep an increasing part of an order book with num_ticks asks and log the matches per second
+        """
+        self.fill_order_book(num_ticks)
+        num_price_levels = num_ticks // TICKS_PER_PRICE_LEVEL
+
+        num_matches = 0
+        start_time = time.time()
+        for order_number in xrange(100):
+            price_levels = min(num_price_levels, 2 ** (order_number % 10))
+            bid = Bid(OrderId(TraderId('2'), OrderNumber(order_number)), Price(price_levels, 'BTC'),
+                      Quantity(price_levels * TICKS_PER_PRICE_LEVEL, 'MC'), Timeout(3600), Timestamp.now())
+            self.order_book.insert_bid(bid)
+            matching_ticks = self.matching_engine.match(self.order_book.get_bid(bid.order_id))
+            self.order_book.remove_bid(bid.order_id)
+
+            self.assertEqual(price_levels * TICKS_PER_PRICE_LEVEL, len(matching_ticks))
+            num_matches += len(matching_ticks)
+
+        duration = time.time() - start_time
+        self._logger.info("Found %d matches in an order book with %d ticks at %.0f matches/second",
+                          num_matches, num_ticks, num_matches / duration)
+
+        # A bid that sweeps the whole order book
+        bid = Bid(OrderId(TraderId('2'), OrderNumber(100)), Price(num_price_levels, 'BTC'),
+                  Quantity(num_ticks, 'MC'), Timeout(3600), Timestamp.now())
+        self.order_book.insert_bid(bid)
+        start_time = time.time()
+        self.assertEqual(num_ticks, len(self.matching_engine.match(self.order_book.get_bid(bid.order_id))))
+        self._logger.info("Matched a bid against all %d ticks in %.3f seconds", num_ticks, time.time() - start_time)
+
+    def test_match_1k_ticks(self):
+        self.benchmark_match(1000)
+
+    @skipUnless(os.environ.get("TEST_BENCHMARK") == "yes", "Not running large benchmarks by default")
+    def test_match_10k_ticks(self):
+        self.benchmark_match(10000)
+
+    @skipUnless(os.environ.get("TEST_BENCHMARK") == "yes", "Not running large benchmarks by default")
+    def test_match_100k_ticks(self):
+        self.benchmark_match(100000)
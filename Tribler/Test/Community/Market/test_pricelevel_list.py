@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from Tribler.community.market.core.price import Price
@@ -102,3 +103,29 @@ class PriceLevelListTestSuite(unittest.TestCase):
     def test_items_reverse_empty(self):
         # Test for items when empty with reverse attribute
         self.assertEquals([], self.price_level_list2.items(reverse=True))
+
+    def test_len(self):
+        # Test for the number of prices
+        self.assertEquals(4, len(self.price_level_list))
+        self.assertEquals(0, len(self.price_level_list2))
+
+    def test_succ_prev_item_unknown_price(self):
+        # Test for succ and prev item of a price that is not in the list
+        self.price_level_list.remove(self.price2)
+        self.assertEquals((self.price3, self.price_level3), self.price_level_list.succ_item(self.price2))
+        self.assertEquals((self.price, self.price_level), self.price_level_list.prev_item(self.price2))
+
+    def test_many_prices(self):
+        # Test whether the prices stay sorted when inserting and removing prices in a random order
+        prices = [Price(price, 'BTC') for price in xrange(1000)]
+        random.shuffle(prices)
+        for price in prices:
+            self.price_level_list2.insert(price, PriceLevel('MC'))
+        for price in prices[:500]:
+            self.price_level_list2.remove(price)
+
+        remaining = sorted(float(price) for price in prices[500:])
+        self.assertEquals(remaining, [float(price) for price, _ in self.price_level_list2.items()])
+        self.assertEquals(remaining[0], float(self.price_level_list2.min_key()))
+        self.assertEquals(remaining[-1], float(self.price_level_list2.max_key()))
+        self.assertEquals(remaining[1], float(self.price_level_list2.succ_item(Price(remaining[0], 'BTC'))[0]))
@@ -33,3 +33,43 @@ class TestDatabase(TrustChainTestCase):
         self.db.add_block(self.block1)
         self.db.add_block(self.block2)
         self.assertEqual((2, 2), self.db.get_num_unique_interactors(self.block1.public_key))
+
+    @blocking_call_on_reactor_thread
+    def test_get_statistics(self):
+        """
+        Test whether the statistics are those of the latest block, even when blocks are added out of order
+        """
+        self.block1 = TestBlock(transaction={'up': 42, 'down': 0, 'total_up': 42, 'total_down': 0})
+        self.block2 = TestBlock(previous=self.block1, transaction={'up': 0, 'down': 10, 'total_up': 42,
+                                                                   'total_down': 10})
+        self.db.add_block(self.block2)
+        self.db.add_block(self.block1)
+
+        statistics = self.db.get_statistics(self.block1.public_key)
+        self.assertEqual(statistics["latest_sequence_number"], self.block2.sequence_number)
+        self.assertEqual(statistics["total_up"], 42)
+        self.assertEqual(statistics["total_down"], 10)
+        self.assertEqual((1, 1), self.db.get_num_unique_interactors(self.block1.public_key))
+
+    @blocking_call_on_reactor_thread
+    def test_get_statistics_unknown(self):
+        """
+        Test whether the statistics of an unknown public key are empty
+        """
+        statistics = self.db.get_statistics(self.block1.public_key)
+        self.assertEqual(statistics["latest_sequence_number"], 0)
+        self.assertEqual((0, 0), self.db.get_num_unique_interactors(self.block1.public_key))
+
+    @blocking_call_on_reactor_thread
+    def test_backfill_statistics(self):
+        """
+        Test whether the statistics are computed for the blocks in a database that had no statistics yet
+        """
+        self.block2 = TestBlock(previous=self.block1, transaction={'up': 42, 'down': 42})
+        self.db.add_block(self.block1)
+        self.db.add_block(self.block2)
+        self.db.execute(u"DELETE FROM statistics")
+        self.db.execute(u"DELETE FROM interactors")
+
+        self.db.backfill_statistics()
+        self.assertEqual((2, 2), self.db.get_num_unique_interactors(self.block1.public_key))
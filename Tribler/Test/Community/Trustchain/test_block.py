@@ -51,6 +51,10 @@ class MockDatabase(object):
         item = [i for i in self.data[blk.public_key] if i.sequence_number < blk.sequence_number]
         return item[-1] if item else None
 
+    def get_block_neighbourhood(self, blk):
+        return (self.get(blk.public_key, blk.sequence_number), self.get_linked(blk),
+                self.get_block_before(blk), self.get_block_after(blk))
+
 
 class TestBlocks(TrustChainTestCase):
     """
@@ -117,6 +117,42 @@ class TestDatabase(TrustChainTestCase):
         # Assert
         self.assertEqual_block(self.block1, result)
 
+    @blocking_call_on_reactor_thread
+    def test_get_block_neighbourhood(self):
+        # Arrange
+        self.block2 = TestBlock.create({"id": 42}, self.db, self.block2.public_key, link=self.block1)
+        block3 = TestBlock()
+        block3.public_key = self.block1.public_key
+        block3.sequence_number = self.block1.sequence_number + 10
+        self.db.add_block(self.block1, commit=False)
+        self.db.add_block(self.block2, commit=False)
+        self.db.add_block(block3, commit=False)
+        self.db.commit()
+        # Act
+        blk, link, prev_blk, next_blk = self.db.get_block_neighbourhood(self.block1)
+        # Assert
+        self.assertEqual_block(self.block1, blk)
+        self.assertEqual_block(self.block2, link)
+        self.assertIsNone(prev_blk)
+        self.assertEqual_block(block3, next_blk)
+
+        blk, link, prev_blk, next_blk = self.db.get_block_neighbourhood(block3)
+        self.assertEqual_block(block3, blk)
+        self.assertIsNone(link)
+        self.assertEqual_block(self.block1, prev_blk)
+        self.assertIsNone(next_blk)
+
+    @blocking_call_on_reactor_thread
+    def test_crawl(self):
+        # Arrange
+        self.block2 = TestBlock.create({"id": 42}, self.db, self.block2.public_key, link=self.block1)
+        self.db.add_block(self.block1)
+        self.db.add_block(self.block2)
+        # Act & Assert
+        self.assertEqual(2, len(self.db.crawl(self.block1.public_key, self.block1.sequence_number)))
+        self.assertEqual(1, len(self.db.crawl(self.block1.public_key, self.block1.sequence_number, limit=1)))
+        self.assertEqual([], self.db.crawl(self.block1.public_key, self.block1.sequence_number - 1))
+
     @blocking_call_on_reactor_thread
     def test_save_large_upload_download_block(self):
         """
@@ -160,9 +196,13 @@ class TestDatabase(TrustChainTestCase):
 
     @blocking_call_on_reactor_thread
     def test_database_upgrade(self):
+        self.db.add_block(self.block1)
+        self.db.execute(u"DROP INDEX blocks_link_idx")
         self.set_db_version(1)
         version, = next(self.db.execute(u"SELECT value FROM option WHERE key = 'database_version' LIMIT 1"))
-        self.assertEqual(version, u"1")
+        self.assertEqual(version, unicode(TrustChainDB.LATEST_DB_VERSION))
+        self.assertTrue(list(self.db.execute(u"SELECT name FROM sqlite_master WHERE name = 'blocks_link_idx'")))
+        self.assertTrue(self.db.contains(self.block1))
 
     @blocking_call_on_reactor_thread
     def test_database_no_downgrade(self):
@@ -0,0 +1,70 @@
+from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
+
+from Tribler.Test.Core.base_test import TriblerCoreTest, MockObject
+from Tribler.community.tunnel.dns_cache import DNSCache
+
+
+class TestDNSCache(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestDNSCache, self).setUp(annotate=annotate)
+        self.lookups = {}
+
+        def resolve(hostname):
+            self.lookups[hostname] = Deferred()
+            return self.lookups[hostname]
+
+        self.dns_cache = DNSCache(max_size=2)
+        self.dns_cache._reactor = MockObject()
+        self.dns_cache._reactor.resolve = resolve
+
+    def test_lookup_ip_address(self):
+        """
+        Test whether ip addresses are never resolved
+        """
+        self.assertEqual(self.dns_cache.lookup("1.2.3.4"), (True, "1.2.3.4"))
+        self.assertFalse(self.dns_cache.stats['dns_cache_misses'])
+
+    def test_resolve(self):
+        """
+        Test whether a resolved hostname is cached and whether concurrent lookups are combined
+        """
+        results = []
+        self.assertEqual(self.dns_cache.lookup("tribler.org"), (False, None))
+        self.dns_cache.resolve("tribler.org").addCallback(results.append)
+        self.dns_cache.resolve("tribler.org").addCallback(results.append)
+        self.assertEqual(len(self.lookups), 1)
+
+        self.lookups["tribler.org"].callback("1.2.3.4")
+        self.assertEqual(results, ["1.2.3.4", "1.2.3.4"])
+        self.assertEqual(self.dns_cache.lookup("tribler.org"), (True, "1.2.3.4"))
+        self.assertEqual(self.dns_cache.stats['dns_cache_hits'], 1)
+        self.assertEqual(self.dns_cache.stats['dns_cache_misses'], 1)
+
+    def test_resolve_error(self):
+        """
+        Test whether a hostname that could not be resolved is cached as well
+        """
+        failures = []
+        self.dns_cache.resolve("tribler.invalid").addErrback(failures.append)
+        self.lookups["tribler.invalid"].errback(Failure(RuntimeError("no such host")))
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(self.dns_cache.lookup("tribler.invalid"), (True, None))
+
+    def test_expired_entries(self):
+        """
+        Test whether entries expire and whether the number of entries is bounded
+        """
+        self.dns_cache.ttl = -1
+        self.dns_cache.resolve("a.org")
+        self.lookups["a.org"].callback("1.2.3.4")
+        self.assertEqual(self.dns_cache.lookup("a.org"), (False, None))
+
+        self.dns_cache.ttl = 60
+        for hostname in ["b.org", "c.org", "d.org"]:
+            self.dns_cache.resolve(hostname)
+            self.lookups[hostname].callback("1.2.3.4")
+        self.assertEqual(len(self.dns_cache), 2)
+        self.assertEqual(self.dns_cache.lookup("b.org"), (False, None))
+        self.assertEqual(self.dns_cache.lookup("d.org"), (True, "1.2.3.4"))
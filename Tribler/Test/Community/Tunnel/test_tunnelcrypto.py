@@ -0,0 +1,113 @@
+import logging
+import os
+import time
+from unittest import skipUnless
+
+from Tribler.Test.Core.base_test import TriblerCoreTest
+from Tribler.community.tunnel import EXIT_NODE, EXIT_NODE_SALT
+from Tribler.community.tunnel.crypto import tunnelcrypto
+from Tribler.community.tunnel.crypto.cryptowrapper import modes
+from Tribler.community.tunnel.crypto.tunnelcrypto import TunnelCrypto, MIN_AESGCM_NONCE_LENGTH
+
+# Large enough for salt + str(salt_explicit) to be accepted as AESGCM nonce
+FIRST_SALT_EXPLICIT = 10000
+
+
+def cipher_accepts_short_nonces():
+    """
+    Recent versions of cryptography do not accept GCM nonces shorter than 8 bytes at all.
+    """
+    try:
+        modes.GCM("x" * (MIN_AESGCM_NONCE_LENGTH - 1))
+    except ValueError:
+        return False
+    return True
+
+
+class TestTunnelCrypto(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestTunnelCrypto, self).setUp(annotate=annotate)
+        self.crypto = TunnelCrypto()
+        self.session_keys = self.crypto.generate_session_keys("1234")
+        self.key = self.session_keys[EXIT_NODE]
+        self.salt = self.session_keys[EXIT_NODE_SALT]
+
+    def test_encrypt_decrypt(self):
+        """
+        Test whether encrypted content can be decrypted again
+        """
+        encrypted = self.crypto.encrypt_str("content", self.key, self.salt, FIRST_SALT_EXPLICIT)
+        self.assertEqual(self.crypto.decrypt_str(encrypted, self.key, self.salt), "content")
+
+    def test_encrypt_decrypt_short_nonce(self):
+        """
+        Test whether content encrypted with a nonce that is too short for AESGCM can be decrypted again, if the
+        installed version of cryptography accepts such a nonce at all
+        """
+        if not cipher_accepts_short_nonces():
+            self.assertRaises(ValueError, self.crypto.encrypt_str, "content", self.key, self.salt, 2)
+            return
+
+        encrypted = self.crypto.encrypt_str("content", self.key, self.salt, 2)
+        self.assertEqual(self.crypto.decrypt_str(encrypted, self.key, self.salt), "content")
+
+    def test_aesgcm_cache_lru(self):
+        """
+        Test whether the least recently used cipher is evicted once the cache is full
+        """
+        if tunnelcrypto.AESGCM is None:
+            return
+
+        self.crypto.max_cached_ciphers = 2
+        keys = [self.crypto.generate_session_keys(str(hop))[EXIT_NODE] for hop in xrange(3)]
+        self.crypto.encrypt_str("content", keys[0], self.salt, FIRST_SALT_EXPLICIT)
+        self.crypto.encrypt_str("content", keys[1], self.salt, FIRST_SALT_EXPLICIT)
+        self.crypto.encrypt_str("content", keys[0], self.salt, FIRST_SALT_EXPLICIT)
+        self.crypto.encrypt_str("content", keys[2], self.salt, FIRST_SALT_EXPLICIT)
+
+        self.assertEqual(list(self.crypto._aesgcm_cache), [keys[0], keys[2]])
+
+    def test_aesgcm_compatible(self):
+        """
+        Test whether the content encrypted with AESGCM can be decrypted with a Cipher and vice versa
+        """
+        if tunnelcrypto.AESGCM is None:
+            return
+
+        encrypted = self.crypto.encrypt_str("content", self.key, self.salt, FIRST_SALT_EXPLICIT)
+        self.assertIn(self.key, self.crypto._aesgcm_cache)
+
+        old_aesgcm = tunnelcrypto.AESGCM
+        tunnelcrypto.AESGCM = None
+        try:
+            self.assertEqual(self.crypto.decrypt_str(encrypted, self.key, self.salt), "content")
+            encrypted_with_cipher = self.crypto.encrypt_str("content", self.key, self.salt, FIRST_SALT_EXPLICIT)
+        finally:
+            tunnelcrypto.AESGCM = old_aesgcm
+
+        self.assertEqual(encrypted_with_cipher, encrypted)
+
+    @skipUnless(os.environ.get("TEST_BENCHMARK") == "yes", "Not running benchmarks by default")
+    def test_layers_benchmark(self):
+        """
+        Measure the number of 3-hop packets per second that can be encrypted and decrypted
+        """
+        layers = [self.crypto.generate_session_keys(str(hop)) for hop in xrange(3)]
+        for session_keys in layers:
+            session_keys[4] = session_keys[5] = FIRST_SALT_EXPLICIT
+
+        content = "x" * 1400
+        num_packets = 1000
+        start_time = time.time()
+        for _ in xrange(num_packets):
+            encrypted = content
+            for session_keys in reversed(layers):
+                session_keys[4] += 1
+                encrypted = self.crypto.encrypt_str(encrypted, session_keys[0], session_keys[2], session_keys[4])
+            for session_keys in layers:
+                encrypted = self.crypto.decrypt_str(encrypted, session_keys[0], session_keys[2])
+            self.assertEqual(encrypted, content)
+
+        logging.getLogger(self.__class__.__name__).info("Encrypted and decrypted %.0f packets/second over 3 hops",
+                                                        num_packets / (time.time() - start_time))
@@ -147,6 +147,8 @@ class TestTriblerConfig(TriblerCoreTest):
         """
         self.tribler_config.set_torrent_checking_enabled(True)
         self.assertEqual(self.tribler_config.get_torrent_checking_enabled(), True)
+        self.tribler_config.set_torrent_checking_max_concurrent_checks(5)
+        self.assertEqual(self.tribler_config.get_torrent_checking_max_concurrent_checks(), 5)
 
     def test_get_set_methods_http_api(self):
         """
@@ -165,6 +167,8 @@ class TestTriblerConfig(TriblerCoreTest):
         self.assertEqual(self.tribler_config.get_dispersy_enabled(), True)
         self.tribler_config.set_dispersy_port(True)
         self.assertEqual(self.tribler_config.get_dispersy_port(), True)
+        self.tribler_config.set_dispersy_tftp_window_size(8)
+        self.assertEqual(self.tribler_config.get_dispersy_tftp_window_size(), 8)
 
     def test_get_set_methods_libtorrent(self):
         """
@@ -188,6 +192,8 @@ class TestTriblerConfig(TriblerCoreTest):
         self.assertEqual(self.tribler_config.get_anon_proxy_settings(), (3, ("TEST", [5]), ("TUN", "TPW")))
         self.tribler_config.set_libtorrent_max_conn_download(True)
         self.assertEqual(self.tribler_config.get_libtorrent_max_conn_download(), True)
+        self.tribler_config.set_libtorrent_max_metainfo_requests(5)
+        self.assertEqual(self.tribler_config.get_libtorrent_max_metainfo_requests(), 5)
         self.tribler_config.set_libtorrent_max_upload_rate(True)
         self.assertEqual(self.tribler_config.get_libtorrent_max_upload_rate(), True)
         self.tribler_config.set_libtorrent_max_download_rate(True)
@@ -249,6 +255,16 @@ class TestTriblerConfig(TriblerCoreTest):
         self.tribler_config.set_state_dir("TEST")
         self.assertEqual(self.tribler_config.get_torrent_store_dir(), os.path.join("TEST", "TESTDIR"))
 
+    def test_get_set_methods_checkpoint_store(self):
+        """
+        Check whether checkpoint store get and set methods are working as expected.
+        """
+        self.tribler_config.set_checkpoint_store_enabled(True)
+        self.assertEqual(self.tribler_config.get_checkpoint_store_enabled(), True)
+        self.tribler_config.set_checkpoint_store_dir("TESTDIR")
+        self.tribler_config.set_state_dir("TEST")
+        self.assertEqual(self.tribler_config.get_checkpoint_store_dir(), os.path.join("TEST", "TESTDIR"))
+
     def test_get_set_methods_wallets(self):
         """
         Check whether wallet get and set methods are working as expected.
@@ -612,3 +612,61 @@ class TestLibtorrentDownloadImplNoSession(TriblerCoreTest):
             self.libtorrent_download_impl._on_resume_err).addCallback(on_error))
         self.libtorrent_download_impl.on_save_resume_data_failed_alert(mock_alert)
         return test_deferred
+
+    def test_get_byte_pieces(self):
+        """
+        Testing whether the right pieces are returned for a byte range in LibtorrentDownloadImpl
+        """
+        # Scenario: we have a file with 4 pieces, 250 bytes in each piece.
+        def map_file(_dummy1, start_byte, _dummy2):
+            res = MockObject()
+            res.piece = int(start_byte / 250)
+            return res
+
+        self.libtorrent_download_impl.handle.get_torrent_info().num_pieces = lambda: 4
+        self.libtorrent_download_impl.handle.get_torrent_info().map_file = map_file
+        self.assertEqual(self.libtorrent_download_impl.get_byte_pieces([(0, 270, 520), (0, 10, 20)]), [0, 1, 2])
+
+        self.libtorrent_download_impl.handle.is_valid = lambda: False
+        self.assertIsNone(self.libtorrent_download_impl.get_byte_pieces([(0, 10, 20)]))
+
+    def test_wait_for_pieces(self):
+        """
+        Testing whether a thread waiting for a piece is woken up by the piece finished alert of that piece
+        """
+        pieces_have = set([0])
+        self.libtorrent_download_impl.handle.have_piece = lambda piece: piece in pieces_have
+
+        self.assertTrue(self.libtorrent_download_impl.wait_for_pieces([0], timeout=0.01))
+        self.assertFalse(self.libtorrent_download_impl.wait_for_pieces([0, 1], timeout=0.01))
+        self.assertIn(1, self.libtorrent_download_impl.piece_waiters)
+
+        event = self.libtorrent_download_impl.piece_waiters[1]
+        pieces_have.add(1)
+        mock_alert = MockObject()
+        mock_alert.piece_index = 1
+        self.libtorrent_download_impl.on_piece_finished_alert(mock_alert)
+        self.assertTrue(event.is_set())
+        self.assertNotIn(1, self.libtorrent_download_impl.piece_waiters)
+        self.assertTrue(self.libtorrent_download_impl.wait_for_pieces([0, 1], timeout=0.01))
+
+    def test_wake_piece_waiters(self):
+        """
+        Testing whether all threads waiting for pieces are woken up when VOD mode is disabled
+        """
+        self.libtorrent_download_impl.handle.have_piece = lambda _: False
+        self.assertFalse(self.libtorrent_download_impl.wait_for_pieces([2, 3], timeout=0.01))
+        event = self.libtorrent_download_impl.piece_waiters[2]
+
+        self.libtorrent_download_impl.set_vod_mode(False)
+        self.assertTrue(event.is_set())
+        self.assertFalse(self.libtorrent_download_impl.piece_waiters)
+
+    def test_wait_for_handle(self):
+        """
+        Testing whether waiting for the handle returns whether the download has a valid handle
+        """
+        self.assertTrue(self.libtorrent_download_impl.wait_for_handle(0.01))
+
+        self.libtorrent_download_impl.handle = None
+        self.assertFalse(self.libtorrent_download_impl.wait_for_handle(0.01))
@@ -3,11 +3,13 @@ import os
 import shutil
 import tempfile
 from libtorrent import bencode
+from twisted.internet import reactor
 from twisted.internet.defer import inlineCallbacks, Deferred
+from twisted.internet.task import deferLater
 
 from Tribler.Core.CacheDB.Notifier import Notifier
 from Tribler.Core.Libtorrent.LibtorrentDownloadImpl import LibtorrentDownloadImpl
-from Tribler.Core.Libtorrent.LibtorrentMgr import LibtorrentMgr
+from Tribler.Core.Libtorrent.LibtorrentMgr import LibtorrentMgr, MetainfoCache, METAINFO_PRIORITY_HIGH
 from Tribler.Core.exceptions import DuplicateDownloadException, TorrentFileException
 from Tribler.Test.Core.base_test import MockObject
 from Tribler.Test.test_as_server import AbstractServer
@@ -39,6 +41,7 @@ class TestLibtorrentMgr(AbstractServer):
         self.tribler_session.config.set_listen_port_runtime = lambda: None
         self.tribler_session.config.get_libtorrent_max_upload_rate = lambda: 100
         self.tribler_session.config.get_libtorrent_max_download_rate = lambda: 120
+        self.tribler_session.config.get_libtorrent_max_metainfo_requests = lambda: 1
 
         self.ltmgr = LibtorrentMgr(self.tribler_session)
 
@@ -90,12 +93,12 @@ class TestLibtorrentMgr(AbstractServer):
         test_deferred = Deferred()
 
         def metainfo_cb(metainfo):
-            self.assertEqual(metainfo, "test")
+            self.assertEqual(metainfo, {'info': 'test'})
             test_deferred.callback(None)
 
         self.ltmgr.initialize()
         self.ltmgr.is_dht_ready = lambda: True
-        self.ltmgr.metainfo_cache[("a" * 20).encode('hex')] = {'meta_info': 'test'}
+        self.ltmgr.metainfo_cache.put(("a" * 20).encode('hex'), bencode({'info': 'test'}))
         self.ltmgr.get_metainfo("a" * 20, metainfo_cb)
 
         return test_deferred
@@ -126,7 +129,8 @@ class TestLibtorrentMgr(AbstractServer):
             'handle': fake_handle,
             'timeout_callbacks': [],
             'callbacks': [metainfo_cb],
-            'notify': False
+            'notify': False,
+            'request_time': 0
         }
         self.ltmgr.got_metainfo("a" * 20)
 
@@ -155,6 +159,149 @@ class TestLibtorrentMgr(AbstractServer):
 
         return test_deferred
 
+    def test_get_metainfo_queue(self):
+        """
+        Testing whether metainfo requests beyond the maximum number of handles are queued and coalesced
+        """
+        self.ltmgr.initialize()
+        self.ltmgr.is_dht_ready = lambda: True
+        added_handles = []
+
+        def mocked_add_torrent(atp):
+            handle = MockObject()
+            handle.info_hash = str(atp['info_hash'])
+            added_handles.append(handle)
+            return handle
+
+        self.ltmgr.get_session().add_torrent = mocked_add_torrent
+        self.ltmgr.get_session().remove_torrent = lambda *_: None
+
+        self.ltmgr.get_metainfo("a" * 20, lambda _: None, notify=False)
+        self.ltmgr.get_metainfo("b" * 20, lambda _: None, notify=False)
+        self.ltmgr.get_metainfo("c" * 20, lambda _: None, notify=False, priority=METAINFO_PRIORITY_HIGH)
+        self.ltmgr.get_metainfo("b" * 20, lambda _: None, notify=False)
+        self.assertEqual(len(added_handles), 1)
+        self.assertEqual(len(self.ltmgr.metainfo_requests), 3)
+        self.assertEqual(len(self.ltmgr.metainfo_requests[("b" * 20).encode('hex')]['callbacks']), 2)
+
+        # The high priority request gets the handle of the first request when it times out
+        self.ltmgr.got_metainfo(("a" * 20).encode('hex'), timeout=True)
+        self.assertEqual(len(added_handles), 2)
+        self.assertTrue(self.ltmgr.metainfo_requests[("c" * 20).encode('hex')]['handle'])
+        self.assertFalse(self.ltmgr.metainfo_requests[("b" * 20).encode('hex')]['handle'])
+
+        statistics = self.ltmgr.get_metainfo_statistics()
+        self.assertEqual(statistics['queued'], 1)
+        self.assertEqual(statistics['active'], 1)
+
+    def test_get_metainfo_queued_timeout(self):
+        """
+        Testing whether the timeout callback of a metainfo request that is still queued is invoked
+        """
+        self.ltmgr.initialize()
+        self.ltmgr.is_dht_ready = lambda: True
+        self.ltmgr.get_session().add_torrent = lambda _: MockObject()
+        timed_out = []
+
+        self.ltmgr.get_metainfo("a" * 20, lambda _: None, notify=False)
+        self.ltmgr.get_metainfo("b" * 20, lambda _: None, timeout_callback=timed_out.append, notify=False)
+        self.ltmgr.got_metainfo(("b" * 20).encode('hex'), timeout=True)
+        self.assertEqual(timed_out, ["b" * 20])
+        self.assertNotIn(("b" * 20).encode('hex'), self.ltmgr.metainfo_requests)
+
+    @deferred(timeout=10)
+    def test_get_metainfo_timeout_after_start(self):
+        """
+        Testing whether the timeout of a metainfo request only starts once the request gets a handle
+        """
+        self.ltmgr.initialize()
+        self.ltmgr.is_dht_ready = lambda: True
+        self.ltmgr.get_session().add_torrent = lambda _: MockObject()
+        self.ltmgr.get_session().remove_torrent = lambda *_: None
+        timed_out = []
+
+        self.ltmgr.get_metainfo("a" * 20, lambda _: None, notify=False)
+        self.ltmgr.get_metainfo("b" * 20, lambda _: None, timeout=0.1, timeout_callback=timed_out.append,
+                                notify=False)
+
+        def verify_queued():
+            # The queued request has outlived its timeout, but it has not been started yet
+            self.assertFalse(timed_out)
+            self.assertFalse(self.ltmgr.metainfo_requests[("b" * 20).encode('hex')]['handle'])
+            self.ltmgr.got_metainfo(("a" * 20).encode('hex'), timeout=True)
+            self.assertTrue(self.ltmgr.metainfo_requests[("b" * 20).encode('hex')]['handle'])
+            return deferLater(reactor, 0.3, verify_timed_out)
+
+        def verify_timed_out():
+            self.assertEqual(timed_out, ["b" * 20])
+            self.assertFalse(self.ltmgr.metainfo_requests)
+
+        return deferLater(reactor, 0.3, verify_queued)
+
+    def test_get_metainfo_add_torrent_error(self):
+        """
+        Testing whether a metainfo request that libtorrent does not accept times out and the queue is still processed
+        """
+        self.ltmgr.initialize()
+        self.ltmgr.is_dht_ready = lambda: True
+        added_handles = []
+        timed_out = []
+
+        def mocked_add_torrent(_):
+            if not timed_out:
+                raise RuntimeError("invalid torrent")
+            handle = MockObject()
+            added_handles.append(handle)
+            return handle
+
+        self.ltmgr.get_session().add_torrent = mocked_add_torrent
+        self.ltmgr.get_metainfo("a" * 20, lambda _: None, timeout_callback=timed_out.append, notify=False)
+        self.assertEqual(timed_out, ["a" * 20])
+        self.assertFalse(self.ltmgr.metainfo_requests)
+
+        self.ltmgr.get_metainfo("b" * 20, lambda _: None, notify=False)
+        self.assertEqual(len(added_handles), 1)
+
+    def test_get_metainfo_queue_timeout(self):
+        """
+        Testing whether a metainfo request times out if it waits for a handle too long
+        """
+        self.ltmgr.initialize()
+        self.ltmgr.is_dht_ready = lambda: True
+        self.ltmgr.get_session().add_torrent = lambda _: MockObject()
+        timed_out = []
+
+        self.ltmgr.get_metainfo("a" * 20, lambda _: None, timeout_callback=timed_out.append, notify=False)
+        self.ltmgr.get_metainfo("b" * 20, lambda _: None, timeout_callback=timed_out.append, notify=False)
+
+        # The request with a handle has its own timeout
+        self.ltmgr._on_metainfo_queue_timeout(("a" * 20).encode('hex'))
+        self.ltmgr._on_metainfo_queue_timeout(("b" * 20).encode('hex'))
+        self.assertEqual(timed_out, ["b" * 20])
+        self.assertEqual(self.ltmgr.metainfo_requests.keys(), [("a" * 20).encode('hex')])
+
+    def test_metainfo_cache(self):
+        """
+        Testing whether the metainfo cache evicts the least recently used and the expired metainfo
+        """
+        cache = MetainfoCache(max_size=10, max_age=60)
+        cache.put('a', 'aaaa')
+        cache.put('b', 'bbbb')
+        self.assertEqual(cache.get('a'), 'aaaa')
+        cache.put('c', 'cccc')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 'cccc')
+        self.assertEqual(cache.size, 8)
+
+        cache.put('d', 'd' * 11)
+        self.assertIsNone(cache.get('d'))
+
+        cache.max_age = -1
+        cache.expire()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(cache.get_statistics()['hit_rate'], 0.5)
+
     def test_add_torrent(self):
         """
         Testing the addition of a torrent to the libtorrent manager
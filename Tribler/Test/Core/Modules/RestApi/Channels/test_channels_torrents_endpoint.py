@@ -201,7 +201,7 @@ class TestModifyChannelTorrentEndpoint(AbstractTestChannelsEndpoint):
         """
         my_channel_id = self.create_fake_channel("channel", "")
 
-        def fake_get_metainfo(_, callback, timeout=10, timeout_callback=None, notify=True):
+        def fake_get_metainfo(_, callback, timeout=10, timeout_callback=None, notify=True, priority=None):
             meta_info = TorrentDef.load(TORRENT_UBUNTU_FILE).get_metainfo()
             callback(meta_info)
 
@@ -235,7 +235,7 @@ class TestModifyChannelTorrentEndpoint(AbstractTestChannelsEndpoint):
         """
         self.create_fake_channel("channel", "")
 
-        def fake_get_metainfo(_, callback, timeout=10, timeout_callback=None, notify=True):
+        def fake_get_metainfo(_, callback, timeout=10, timeout_callback=None, notify=True, priority=None):
             raise ValueError(u"Test error")
 
         self.session.lm.ltmgr.get_metainfo = fake_get_metainfo
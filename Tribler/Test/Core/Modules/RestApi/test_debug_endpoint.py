@@ -112,6 +112,28 @@ class TestCircuitDebugEndpoint(AbstractApiTest):
         self.should_check_equality = False
         return self.do_request('debug/threads', expected_code=200).addCallback(verify_response)
 
+    @deferred(timeout=10)
+    def test_get_notifier_statistics(self):
+        """
+        Test whether the API returns the statistics of the notifier
+        """
+
+        def verify_response(response):
+            response_json = json.loads(response)
+            self.assertIn('events', response_json)
+            self.assertIn('slow_observers', response_json)
+
+        self.should_check_equality = False
+        return self.do_request('debug/notifier', expected_code=200).addCallback(verify_response)
+
+    @deferred(timeout=10)
+    def test_get_metainfo_statistics_no_libtorrent(self):
+        """
+        Test whether the API returns an error when requesting the metainfo statistics without libtorrent
+        """
+        self.should_check_equality = False
+        return self.do_request('debug/metainfo', expected_code=404)
+
     @deferred(timeout=10)
     def test_get_cpu_history(self):
         """
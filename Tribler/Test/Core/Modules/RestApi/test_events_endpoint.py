@@ -3,6 +3,7 @@ from twisted.internet import reactor
 from twisted.internet.defer import Deferred, inlineCallbacks
 from twisted.internet.protocol import Protocol
 from twisted.internet.task import deferLater
+from twisted.internet.threads import deferToThread
 from twisted.web.client import Agent, HTTPConnectionPool
 from twisted.web.http_headers import Headers
 
@@ -10,9 +11,12 @@ from Tribler.Core.simpledefs import SIGNAL_CHANNEL, SIGNAL_ON_SEARCH_RESULTS, SI
     NTFY_STARTED, NTFY_FINISHED, NTFY_UPGRADER_TICK, NTFY_WATCH_FOLDER_CORRUPT_TORRENT, NTFY_INSERT, NTFY_NEW_VERSION, \
     NTFY_CHANNEL, NTFY_DISCOVERED, NTFY_TORRENT, NTFY_ERROR, NTFY_DELETE, NTFY_MARKET_ON_ASK, NTFY_UPDATE, \
     NTFY_MARKET_ON_BID, NTFY_MARKET_ON_ASK_TIMEOUT, NTFY_MARKET_ON_BID_TIMEOUT, NTFY_MARKET_ON_TRANSACTION_COMPLETE, \
-    NTFY_MARKET_ON_PAYMENT_RECEIVED, NTFY_MARKET_ON_PAYMENT_SENT
+    NTFY_MARKET_ON_PAYMENT_RECEIVED, NTFY_MARKET_ON_PAYMENT_SENT, NTFY_STATE, DLSTATUS_DOWNLOADING, DLSTATUS_SEEDING, \
+    DLMODE_NORMAL, NTFY_TORRENT_CREATION
+from Tribler.Core.DownloadState import DownloadState
 import Tribler.Core.Utilities.json_util as json
 from Tribler.Core.version import version_id
+from Tribler.Test.Core.base_test import MockObject
 from Tribler.Test.Core.Modules.RestApi.base_api_test import AbstractApiTest
 from Tribler.Test.twisted_thread import deferred
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
@@ -99,7 +103,7 @@ class TestEventsEndpoint(AbstractApiTest):
         """
         Testing whether various events are coming through the events endpoints
         """
-        self.messages_to_wait_for = 20
+        self.messages_to_wait_for = 21
 
         def send_notifications(_):
             self.session.lm.api_manager.root_endpoint.events_endpoint.start_new_query()
@@ -123,6 +127,7 @@ class TestEventsEndpoint(AbstractApiTest):
             self.session.notifier.notify(NTFY_MARKET_ON_TRANSACTION_COMPLETE, NTFY_UPDATE, None, {'a': 'b'})
             self.session.notifier.notify(NTFY_MARKET_ON_PAYMENT_RECEIVED, NTFY_UPDATE, None, {'a': 'b'})
             self.session.notifier.notify(NTFY_MARKET_ON_PAYMENT_SENT, NTFY_UPDATE, None, {'a': 'b'})
+            self.session.notifier.notify(NTFY_TORRENT_CREATION, NTFY_UPDATE, None, [u'a.txt'], 0.5)
             self.session.lm.api_manager.root_endpoint.events_endpoint.on_tribler_exception("hi")
 
         self.socket_open_deferred.addCallback(send_notifications)
@@ -154,3 +159,71 @@ class TestEventsEndpoint(AbstractApiTest):
         self.socket_open_deferred.addCallback(send_searches)
 
         return self.events_deferred
+
+    @staticmethod
+    def create_mock_download():
+        tdef = MockObject()
+        tdef.get_name = lambda: "test.iso"
+        tdef.get_infohash = lambda: "a" * 20
+        tdef.get_length = lambda: 1234
+        download = MockObject()
+        download.get_def = lambda: tdef
+        download.get_hops = lambda: 0
+        download.get_anon_mode = lambda: False
+        download.get_safe_seeding = lambda: False
+        download.get_dest_dir = lambda: "/tmp"
+        download.get_num_pieces = lambda: 42
+        download.get_mode = lambda: DLMODE_NORMAL
+        download.get_time_added = lambda: 1234
+        return download
+
+    @deferred(timeout=20)
+    def test_download_states_from_thread(self):
+        """
+        Testing whether download states that are notified by a thread of the thread pool are pushed
+        """
+        def verify_download_states(results):
+            self.assertEqual(results[0]["type"], "download_states")
+            self.assertEqual(results[0]["event"]["downloads"][0]["name"], "test.iso")
+
+        self.messages_to_wait_for = 1
+
+        def send_download_states(_):
+            self.session.lm.api_manager.root_endpoint.events_endpoint.download_states_sent_time = 0
+            download_states = [DownloadState(self.create_mock_download(), DLSTATUS_DOWNLOADING, None, 0.5)]
+            return deferToThread(self.session.notifier.notify, NTFY_TORRENT, NTFY_STATE, None, download_states)
+
+        self.socket_open_deferred.addCallback(send_download_states)
+
+        return self.events_deferred.addCallback(verify_download_states)
+
+    @deferred(timeout=20)
+    def test_download_states(self):
+        """
+        Testing whether only the changes in the download states are pushed over the events endpoint
+        """
+        def verify_download_states(results):
+            self.assertEqual(len(results), 3)
+            self.assertEqual(results[0]["type"], "download_states")
+            self.assertEqual(results[0]["event"]["downloads"][0]["name"], "test.iso")
+            self.assertEqual(results[0]["event"]["downloads"][0]["status"], "DLSTATUS_DOWNLOADING")
+            self.assertEqual(results[1]["event"], {"downloads": [{"infohash": ("a" * 20).encode('hex'),
+                                                                  "status": "DLSTATUS_SEEDING", "progress": 1.0}],
+                                                   "removed": []})
+            self.assertEqual(results[2]["event"], {"downloads": [], "removed": [("a" * 20).encode('hex')]})
+
+        self.messages_to_wait_for = 3
+
+        def send_download_states(_):
+            events_endpoint = self.session.lm.api_manager.root_endpoint.events_endpoint
+            download = self.create_mock_download()
+            for download_states in [[DownloadState(download, DLSTATUS_DOWNLOADING, None, 0.5)],
+                                    [DownloadState(download, DLSTATUS_DOWNLOADING, None, 0.5)],
+                                    [DownloadState(download, DLSTATUS_SEEDING, None, 1.0)],
+                                    []]:
+                events_endpoint.download_states_sent_time = 0
+                self.session.notifier.notify(NTFY_TORRENT, NTFY_STATE, None, download_states)
+
+        self.socket_open_deferred.addCallback(send_download_states)
+
+        return self.events_deferred.addCallback(verify_download_states)
@@ -1,4 +1,4 @@
-from twisted.internet.defer import inlineCallbacks
+from twisted.internet.defer import inlineCallbacks, Deferred, gatherResults
 
 from Tribler.Core.simpledefs import NTFY_CHANNELCAST, NTFY_TORRENTS, SIGNAL_CHANNEL, SIGNAL_ON_SEARCH_RESULTS, \
     SIGNAL_TORRENT
@@ -49,14 +49,33 @@ class TestSearchEndpoint(AbstractApiTest):
 
         self.search_results_list = [] # List of incoming torrent/channel results
         self.expected_num_results_list = [] # List of expected number of results for each item in search_results_list
+        self.search_results_deferred = Deferred()
 
     def on_search_results_torrents(self, subject, changetype, objectID, results):
         self.search_results_list.append(results['result_list'])
         self.results_torrents_called = True
+        self.check_search_results_complete()
 
     def on_search_results_channels(self, subject, changetype, objectID, results):
         self.search_results_list.append(results['result_list'])
         self.results_channels_called = True
+        self.check_search_results_complete()
+
+    def check_search_results_complete(self):
+        if len(self.search_results_list) == len(self.expected_num_results_list) \
+                and not self.search_results_deferred.called:
+            self.search_results_deferred.callback(None)
+
+    def do_search_request(self, endpoint):
+        """
+        Perform a search request and wait until all expected search results have been received.
+        """
+        # The local database search only sees committed data
+        self.session.sqlite_db.commit_now()
+
+        expected_json = {"queried": True}
+        request_deferred = self.do_request(endpoint, expected_code=200, expected_json=expected_json)
+        return gatherResults([request_deferred, self.search_results_deferred]).addCallback(self.verify_search_results)
 
     def insert_channels_in_db(self, num):
         for i in xrange(0, num):
@@ -93,9 +112,7 @@ class TestSearchEndpoint(AbstractApiTest):
         self.insert_torrents_in_db(6)
         self.expected_num_results_list = [0, 0]
 
-        expected_json = {"queried": True}
-        return self.do_request('search?q=tribler', expected_code=200, expected_json=expected_json)\
-            .addCallback(self.verify_search_results)
+        return self.do_search_request('search?q=tribler')
 
     @deferred(timeout=10)
     def test_search(self):
@@ -110,9 +127,7 @@ class TestSearchEndpoint(AbstractApiTest):
         self.session.config.get_channel_search_enabled = lambda: True
         self.session.lm.search_manager = FakeSearchManager(self.session.notifier)
 
-        expected_json = {"queried": True}
-        return self.do_request('search?q=test', expected_code=200, expected_json=expected_json)\
-            .addCallback(self.verify_search_results)
+        return self.do_search_request('search?q=test')
 
     @deferred(timeout=10)
     def test_completions_no_query(self):
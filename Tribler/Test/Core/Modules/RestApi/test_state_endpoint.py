@@ -10,5 +10,6 @@ class TestStateEndpoint(AbstractApiTest):
         Testing whether the API returns a correct state when requested
         """
         self.session.lm.api_manager.root_endpoint.state_endpoint.on_tribler_exception("abcd")
-        expected_json = {"state": "EXCEPTION", "last_exception": "abcd"}
+        self.session.lm.startup_timings = {"dispersy": 1.5}
+        expected_json = {"state": "EXCEPTION", "last_exception": "abcd", "startup_timings": {"dispersy": 1.5}}
         return self.do_request('state', expected_code=200, expected_json=expected_json)
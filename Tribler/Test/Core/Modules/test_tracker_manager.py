@@ -62,13 +62,3 @@ class TestTrackerManager(TriblerCoreTest):
         self.tracker_manager.update_tracker_info("http://test1.com/announce", True)
         tracker_info = self.tracker_manager.get_tracker_info("http://test1.com/announce")
         self.assertTrue(tracker_info['is_alive'])
-
-    @blocking_call_on_reactor_thread
-    def test_get_tracker_for_check(self):
-        """
-        Test whether the correct tracker is returned when fetching the next eligable tracker for the auto check
-        """
-        self.assertFalse(self.tracker_manager.get_next_tracker_for_auto_check())
-
-        self.tracker_manager.add_tracker("http://test1.com:80/announce")
-        self.assertEqual('http://test1.com/announce', self.tracker_manager.get_next_tracker_for_auto_check())
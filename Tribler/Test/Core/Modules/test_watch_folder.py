@@ -3,6 +3,7 @@ import shutil
 
 from Tribler.Test.common import TORRENT_UBUNTU_FILE, TESTS_DATA_DIR
 from Tribler.Test.test_as_server import TestAsServer
+from Tribler.Test.twisted_thread import deferred
 
 
 class TestWatchFolder(TestAsServer):
@@ -18,28 +19,54 @@ class TestWatchFolder(TestAsServer):
 
         self.config.set_watch_folder_path(self.watch_dir)
 
+    def check_watch_folder(self, expected_downloads):
+        return self.session.lm.watch_folder.check_watch_folder().addCallback(
+            lambda _: self.assertEqual(len(self.session.get_downloads()), expected_downloads))
+
+    @deferred(timeout=10)
     def test_watchfolder_no_files(self):
-        self.session.lm.watch_folder.check_watch_folder()
-        self.assertEqual(len(self.session.get_downloads()), 0)
+        return self.check_watch_folder(0)
 
+    @deferred(timeout=10)
     def test_watchfolder_no_torrent_file(self):
         shutil.copyfile(TORRENT_UBUNTU_FILE, os.path.join(self.watch_dir, "test.txt"))
-        self.session.lm.watch_folder.check_watch_folder()
-        self.assertEqual(len(self.session.get_downloads()), 0)
+        return self.check_watch_folder(0)
 
+    @deferred(timeout=10)
     def test_watchfolder_invalid_dir(self):
         shutil.copyfile(TORRENT_UBUNTU_FILE, os.path.join(self.watch_dir, "test.txt"))
         self.session.config.set_watch_folder_path(os.path.join(self.watch_dir, "test.txt"))
+        return self.check_watch_folder(0)
 
-        self.session.lm.watch_folder.check_watch_folder()
-        self.assertEqual(len(self.session.get_downloads()), 0)
-
+    @deferred(timeout=10)
     def test_watchfolder_torrent_file_one_corrupt(self):
         shutil.copyfile(TORRENT_UBUNTU_FILE, os.path.join(self.watch_dir, "test.torrent"))
         shutil.copyfile(os.path.join(TESTS_DATA_DIR, 'test_rss.xml'), os.path.join(self.watch_dir, "test2.torrent"))
-        self.session.lm.watch_folder.check_watch_folder()
-        self.assertEqual(len(self.session.get_downloads()), 1)
-        self.assertTrue(os.path.isfile(os.path.join(self.watch_dir, "test2.torrent.corrupt")))
+
+        def verify_corrupt_file(_):
+            self.assertTrue(os.path.isfile(os.path.join(self.watch_dir, "test2.torrent.corrupt")))
+
+        return self.check_watch_folder(1).addCallback(verify_corrupt_file)
+
+    @deferred(timeout=10)
+    def test_watchfolder_fingerprints(self):
+        """
+        Test whether torrent files that have been handled are not parsed again, unless they are removed
+        """
+        torrent_path = os.path.join(self.watch_dir, "test.torrent")
+        shutil.copyfile(TORRENT_UBUNTU_FILE, torrent_path)
+        watch_folder = self.session.lm.watch_folder
+
+        def verify_fingerprint(_):
+            self.assertIn(torrent_path, watch_folder.fingerprints)
+            self.assertEqual(watch_folder.get_changed_files(self.watch_dir), ({torrent_path}, []))
+            os.remove(torrent_path)
+            return watch_folder.check_watch_folder()
+
+        def verify_fingerprint_removed(_):
+            self.assertNotIn(torrent_path, watch_folder.fingerprints)
+
+        return self.check_watch_folder(1).addCallback(verify_fingerprint).addCallback(verify_fingerprint_removed)
 
     def test_cleanup(self):
         self.session.lm.watch_folder.cleanup_torrent_file(TESTS_DATA_DIR, 'thisdoesnotexist123.bla')
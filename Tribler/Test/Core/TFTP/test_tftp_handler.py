@@ -3,7 +3,8 @@ from twisted.internet.defer import inlineCallbacks
 
 from Tribler.Core.TFTP.exception import FileNotFound
 from Tribler.Core.TFTP.handler import TftpHandler, METADATA_PREFIX
-from Tribler.Core.TFTP.packet import OPCODE_OACK, OPCODE_ERROR, OPCODE_RRQ
+from Tribler.Core.TFTP.packet import OPCODE_OACK, OPCODE_ERROR, OPCODE_RRQ, OPCODE_ACK, OPCODE_DATA
+from Tribler.Core.TFTP.session import Session
 from Tribler.Test.Core.base_test import TriblerCoreTest, MockObject
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
 
@@ -221,3 +222,68 @@ class TestTFTPHandler(TriblerCoreTest):
         mock_session = MockObject()
         mock_session.session_id = 42
         self.handler._send_error_packet(mock_session, 43, "test")
+
+    def create_sender_session(self, file_data, window_size):
+        session = Session(False, 42, ("127.0.0.1", 1234), OPCODE_RRQ, u"test", file_data, len(file_data), None,
+                          block_size=4, window_size=window_size)
+        sent_blocks = []
+        self.handler._send_data_packet = lambda _, block_number, data: \
+            sent_blocks.append((block_number, data.tobytes()))
+        return session, sent_blocks
+
+    def test_send_window(self):
+        """
+        Testing whether a window of DATA blocks is sent after an ACK and the transfer finishes on the last ACK
+        """
+        session, sent_blocks = self.create_sender_session("a" * 10, 2)
+
+        self.handler._handle_packet_as_sender(session, {'opcode': OPCODE_ACK, 'block_number': 0})
+        self.assertEqual(sent_blocks, [(1, "aaaa"), (2, "aaaa")])
+
+        self.handler._handle_packet_as_sender(session, {'opcode': OPCODE_ACK, 'block_number': 2})
+        self.assertEqual(sent_blocks[2:], [(3, "aa")])
+        self.assertTrue(session.is_waiting_for_last_ack)
+
+        self.handler._handle_packet_as_sender(session, {'opcode': OPCODE_ACK, 'block_number': 3})
+        self.assertTrue(session.is_done)
+
+    def test_send_window_retransmit(self):
+        """
+        Testing whether the sender continues after the last block the receiver got when a block got lost
+        """
+        session, sent_blocks = self.create_sender_session("a" * 20, 3)
+
+        self.handler._handle_packet_as_sender(session, {'opcode': OPCODE_ACK, 'block_number': 0})
+        self.handler._handle_packet_as_sender(session, {'opcode': OPCODE_ACK, 'block_number': 1})
+        self.assertEqual([block_number for block_number, _ in sent_blocks], [1, 2, 3, 2, 3, 4])
+
+    def test_receive_window(self):
+        """
+        Testing whether the receiver only acknowledges the last block of a window, and reports a lost block once
+        """
+        session = Session(True, 42, ("127.0.0.1", 1234), OPCODE_RRQ, u"test", None, None, None, block_size=4,
+                          window_size=2)
+        session.block_number = 1
+        acked_blocks = []
+        self.handler._send_ack_packet = lambda _, block_number: acked_blocks.append(block_number)
+
+        self.handler._handle_packet_as_receiver(session, {'opcode': OPCODE_DATA, 'block_number': 1, 'data': "aaaa"})
+        self.assertEqual(acked_blocks, [])
+        self.handler._handle_packet_as_receiver(session, {'opcode': OPCODE_DATA, 'block_number': 2, 'data': "aaaa"})
+        self.assertEqual(acked_blocks, [2])
+
+        self.handler._handle_packet_as_receiver(session, {'opcode': OPCODE_DATA, 'block_number': 4, 'data': "aaaa"})
+        self.handler._handle_packet_as_receiver(session, {'opcode': OPCODE_DATA, 'block_number': 5, 'data': "aa"})
+        self.assertEqual(acked_blocks, [2, 2])
+        self.assertFalse(session.is_done)
+
+    def test_statistics(self):
+        """
+        Testing whether the throughput of a finished session is kept
+        """
+        session = Session(False, 42, ("127.0.0.1", 1234), OPCODE_RRQ, u"test", "a" * 10, 10, None)
+        self.handler._add_session_statistics(session)
+
+        statistics = self.handler.get_statistics()
+        self.assertEqual(statistics["bandwidth"], 10)
+        self.assertEqual(statistics["sessions"][0]["size"], 10)
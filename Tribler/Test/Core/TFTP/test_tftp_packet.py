@@ -2,7 +2,7 @@ from nose.tools import raises
 
 from Tribler.Core.TFTP.exception import InvalidStringException, InvalidPacketException, InvalidOptionException
 from Tribler.Core.TFTP.packet import _get_string, _decode_options, _decode_data, _decode_ack, _decode_error, \
-    decode_packet, OPCODE_ERROR, encode_packet
+    decode_packet, OPCODE_ERROR, OPCODE_DATA, encode_packet
 from Tribler.Test.Core.base_test import TriblerCoreTest
 
 
@@ -102,3 +102,19 @@ class TestTFTPPacket(TriblerCoreTest):
         encoded = encode_packet({'opcode': OPCODE_ERROR, 'session_id': 123, 'error_code': 1, 'error_msg': 'hi'})
         self.assertEqual(encoded[-3], 'h')
         self.assertEqual(encoded[-2], 'i')
+
+    def test_decode_options_windowsize(self):
+        """
+        Testing whether the windowsize option is decoded as an integer
+        """
+        packet = {}
+        _decode_options(packet, "windowsize\x0016\x00", 0)
+        self.assertEqual(packet['options']['windowsize'], 16)
+
+    def test_encode_packet_data_memoryview(self):
+        """
+        Testing whether a DATA packet with a memoryview on the data is encoded correctly
+        """
+        encoded = encode_packet({'opcode': OPCODE_DATA, 'session_id': 123, 'block_number': 1,
+                                 'data': memoryview("abcdef")[2:4]})
+        self.assertEqual(decode_packet(encoded)['data'], "cd")
@@ -43,15 +43,7 @@ class TestTorrentChecker(TriblerCoreTest):
         """
         self.torrent_checker.initialize()
         self.assertIsNotNone(self.torrent_checker._torrent_db)
-        self.assertTrue(self.torrent_checker.is_pending_task_active("torrent_checker_tracker_selection"))
-
-    @blocking_call_on_reactor_thread
-    def test_reschedule_tracker_select(self):
-        """
-        Test the rescheduling of the tracker select task
-        """
-        self.torrent_checker._reschedule_tracker_select()
-        self.assertTrue(self.torrent_checker.is_pending_task_active("torrent_checker_tracker_selection"))
+        self.assertTrue(self.torrent_checker.is_pending_task_active("torrent_checker_refill_queue"))
 
     @blocking_call_on_reactor_thread
     def test_add_gui_request_no_trackers(self):
@@ -92,35 +84,115 @@ class TestTorrentChecker(TriblerCoreTest):
         self.torrent_checker.add_gui_request('a' * 20).addErrback(lambda _: test_deferred.callback(None))
         return test_deferred
 
-    @blocking_call_on_reactor_thread
-    def test_task_select_no_tracker(self):
-        self.torrent_checker._task_select_tracker()
+    @deferred(timeout=10)
+    def test_refill_check_queue_no_torrents(self):
+        """
+        Test whether the check queue stays empty if there are no torrents to check
+        """
+        def verify_queue(_):
+            self.assertFalse(self.torrent_checker._check_queue)
+            self.assertFalse(self.torrent_checker._due_checks)
 
-    @blocking_call_on_reactor_thread
-    def test_task_select_tracker(self):
+        return self.torrent_checker._refill_check_queue().addCallback(verify_queue)
+
+    @deferred(timeout=10)
+    def test_refill_check_queue(self):
+        """
+        Test whether the torrents that have to be checked are loaded and checked on their tracker
+        """
         self.torrent_checker._torrent_db.addExternalTorrentNoDef(
             'a' * 20, 'ubuntu.iso', [['a.test', 1234]], ['http://google.com/announce'], 5)
+        self.session.sqlite_db.commit_now()
 
-        controlled_session = HttpTrackerSession(None, None, None, None)
+        controlled_session = HttpTrackerSession(u'http://google.com/announce', None, None, None)
         controlled_session.connect_to_tracker = lambda: Deferred()
-
         self.torrent_checker._create_session_for_request = lambda *args, **kwargs: controlled_session
-        self.torrent_checker._task_select_tracker()
 
-        self.assertEqual(len(controlled_session.infohash_list), 1)
+        def verify_session(_):
+            self.assertEqual(controlled_session.infohash_list, ['a' * 20])
+            self.assertEqual(self.torrent_checker._active_checks, {'http://google.com/announce'})
+
+            # A torrent that is being checked should not be queued again
+            return self.torrent_checker._refill_check_queue().addCallback(verify_not_queued)
+
+        def verify_not_queued(_):
+            self.assertFalse(self.torrent_checker._check_queue)
+            self.assertFalse(self.torrent_checker._due_checks)
+
+        return self.torrent_checker._refill_check_queue().addCallback(verify_session)
+
+    @deferred(timeout=10)
+    def test_refill_check_queue_error(self):
+        """
+        Test whether an error while refilling the check queue is logged instead of stopping the periodic refill
+        """
+        def raise_error(_):
+            raise RuntimeError(u"test")
+
+        self.torrent_checker._on_torrents_to_check = raise_error
+        return self.torrent_checker._refill_check_queue().addCallback(self.assertIsNone)
+
+    @blocking_call_on_reactor_thread
+    def test_schedule_checks_concurrency(self):
+        """
+        Test whether no more than the maximum number of trackers are checked at the same time
+        """
+        sessions = []
+
+        def create_session(tracker_url, **_):
+            session = HttpTrackerSession(tracker_url, None, None, None)
+            session.connect_to_tracker = lambda: Deferred()
+            sessions.append(session)
+            return session
+
+        self.torrent_checker._create_session_for_request = create_session
+        self.torrent_checker._max_concurrent_checks = 2
+        self.torrent_checker._on_torrents_to_check([('a' * 20, 0, u'http://tracker1.com/announce'),
+                                                    ('b' * 20, 0, u'http://tracker2.com/announce'),
+                                                    ('c' * 20, 0, u'http://tracker3.com/announce'),
+                                                    ('d' * 20, 0, u'http://tracker1.com/announce'),
+                                                    ('e' * 20, time.time() + 100, u'http://tracker3.com/announce')])
+
+        self.assertEqual(len(sessions), 2)
+        self.assertEqual(sessions[0].infohash_list, ['a' * 20, 'd' * 20])
+        self.assertEqual(self.torrent_checker._due_checks.keys(), [u'http://tracker3.com/announce'])
+        self.assertEqual(len(self.torrent_checker._check_queue), 1)
+        self.assertTrue(self.torrent_checker.is_pending_task_active("torrent_checker_schedule_checks"))
+
+    @blocking_call_on_reactor_thread
+    def test_auto_check_result(self):
+        """
+        Test whether the result of an automatic check is stored in the database
+        """
+        self.torrent_checker._torrent_db.addExternalTorrentNoDef(
+            'a' * 20, 'ubuntu.iso', [['a.test', 1234]], ['http://google.com/announce'], 5)
+        self.torrent_checker._on_auto_check_result(
+            {'http://google.com/announce': [{'infohash': ('a' * 20).encode('hex'), 'seeders': 5, 'leechers': 3},
+                                            {'infohash': ('b' * 20).encode('hex'), 'seeders': 1, 'leechers': 1}]},
+            ['a' * 20])
+
+        result = self.torrent_checker._torrent_db.getTorrent('a' * 20, (u'num_seeders', u'status'), False)
+        self.assertEqual(result[u'num_seeders'], 5)
+        self.assertEqual(result[u'status'], u'good')
 
     @deferred(timeout=30)
     def test_tracker_test_error_resolve(self):
         """
         Test whether we capture the error when a tracker check fails
         """
+        tracker_url = u'udp://non123exiszzting456tracker89fle.abc:80/announce'
+
         def verify_cleanup(_):
             # Verify whether we successfully cleaned up the session after an error
             self.assertEqual(len(self.torrent_checker._session_list), 1)
+            self.assertFalse(self.torrent_checker._active_checks)
+            self.assertFalse(self.torrent_checker._queued_infohashes)
 
         self.torrent_checker._torrent_db.addExternalTorrentNoDef(
-            'a' * 20, 'ubuntu.iso', [['a.test', 1234]], ['udp://non123exiszzting456tracker89fle.abc:80/announce'], 5)
-        return self.torrent_checker._task_select_tracker().addCallback(verify_cleanup)
+            'a' * 20, 'ubuntu.iso', [['a.test', 1234]], [tracker_url], 5)
+        self.torrent_checker._queued_infohashes.add('a' * 20)
+        self.torrent_checker._due_checks[tracker_url] = ['a' * 20]
+        return self.torrent_checker._check_tracker(tracker_url).addCallback(verify_cleanup)
 
     @deferred(timeout=30)
     def test_tracker_test_invalid_tracker(self):
@@ -139,16 +211,11 @@ class TestTorrentChecker(TriblerCoreTest):
 
         def verify_response(resp):
             self.assertIsNone(resp)
+            self.assertFalse(self.torrent_checker._due_checks)
+            self.assertIn(bad_tracker_url, self.torrent_checker._malformed_trackers)
 
-        return self.torrent_checker._task_select_tracker().addCallback(verify_response)
-
-    @deferred(timeout=10)
-    def test_tracker_no_infohashes(self):
-        """
-        Test the check of a tracker without associated torrents
-        """
-        self.session.lm.tracker_manager.add_tracker('http://trackertest.com:80/announce')
-        return self.torrent_checker._task_select_tracker()
+        self.torrent_checker._due_checks[bad_tracker_url] = ['a' * 20]
+        return self.torrent_checker._check_tracker(bad_tracker_url).addCallback(verify_response)
 
     @blocking_call_on_reactor_thread
     def tearDown(self, annotate=True):
@@ -1,4 +1,5 @@
 import struct
+import time
 from libtorrent import bencode
 from twisted.internet.defer import Deferred, DeferredList
 from twisted.internet.task import Clock
@@ -7,7 +8,7 @@ from twisted.python.failure import Failure
 from Tribler.Core.Config.tribler_config import TriblerConfig
 from Tribler.Core.Session import Session
 from Tribler.Core.TorrentChecker.session import FakeDHTSession, DHT_TRACKER_MAX_RETRIES, DHT_TRACKER_RECHECK_INTERVAL, \
-    UdpTrackerSession, UDPScraper, HttpTrackerSession
+    UdpTrackerSession, UDPScraper, HttpTrackerSession, UDPScraperSocket, TRACKER_ACTION_CONNECT, TRACKER_ACTION_SCRAPE
 from Tribler.Test.Core.base_test import TriblerCoreTest, MockObject
 from Tribler.Test.twisted_thread import deferred
 
@@ -115,12 +116,6 @@ class TestTorrentCheckerSession(TriblerCoreTest):
 
         return DeferredList([stop_deferred, session.cleanup()])
 
-    def test_udpsession_udp_tracker_connection_refused(self):
-        session = UdpTrackerSession("localhost", ("localhost", 4782), "/announce", 5)
-        session.scraper = UDPScraper(session, "127.0.0.1", 4782, 5)
-        session.scraper.connectionRefused()
-        self.assertTrue(session.is_failed, "Session did not fail while it should")
-
     def test_udpsession_handle_response_wrong_len(self):
         session = UdpTrackerSession("localhost", ("localhost", 4782), "/announce", 5)
         session.on_ip_address_resolved("127.0.0.1", start_scraper=False)
@@ -224,7 +219,7 @@ class TestTorrentCheckerSession(TriblerCoreTest):
     def test_big_correct_run(self):
         session = UdpTrackerSession("localhost", ("192.168.1.1", 1234), "/announce", 1)
         session.on_ip_address_resolved("192.168.1.1", start_scraper=False)
-        session.scraper.transport = self.mock_transport
+        session.udp_socket.transport = self.mock_transport
         session.result_deferred = Deferred()
         self.assertFalse(session.is_failed)
         packet = struct.pack("!iiq", session._action, session._transaction_id, 126)
@@ -236,6 +231,71 @@ class TestTorrentCheckerSession(TriblerCoreTest):
 
         return session.result_deferred
 
+    def test_udpsession_cached_connection_id(self):
+        """
+        Test whether a session skips the connect handshake if a valid connection id of the tracker is cached
+        """
+        sent_messages = []
+        self.mock_transport.write = lambda data, _: sent_messages.append(data)
+
+        udp_socket = UDPScraperSocket()
+        udp_socket.transport = self.mock_transport
+        udp_socket.set_connection_id(("192.168.1.1", 1234), 126)
+
+        session = UdpTrackerSession("localhost", ("192.168.1.1", 1234), "/announce", 5, udp_socket)
+        session.add_infohash('a' * 20)
+        session.on_ip_address_resolved("192.168.1.1", start_scraper=False)
+        session.on_start()
+
+        connection_id, action, transaction_id = struct.unpack_from('!qii', sent_messages[0], 0)
+        self.assertEqual(connection_id, 126)
+        self.assertEqual(action, TRACKER_ACTION_SCRAPE)
+        self.assertIs(udp_socket.scrapers[transaction_id], session.scraper)
+        session.scraper.stop()
+
+    @deferred(timeout=5)
+    def test_udp_socket_dispatch(self):
+        """
+        Test whether the UDP scraper socket dispatches responses to the session by their transaction id
+        """
+        udp_socket = UDPScraperSocket()
+        udp_socket.transport = self.mock_transport
+
+        session = UdpTrackerSession("localhost", ("192.168.1.1", 1234), "/announce", 5, udp_socket)
+        session.result_deferred = Deferred()
+        session.add_infohash('a' * 20)
+        session.on_ip_address_resolved("192.168.1.1", start_scraper=False)
+        session.on_start()
+
+        # Responses from other hosts or for other transactions are ignored
+        packet = struct.pack("!iiq", session._action, session._transaction_id, 126)
+        udp_socket.datagramReceived(packet, ("192.168.1.2", 1234))
+        udp_socket.datagramReceived(struct.pack("!iiq", session._action, 1 << 20, 126), ("192.168.1.1", 1234))
+        self.assertEqual(session._action, TRACKER_ACTION_CONNECT)
+
+        udp_socket.datagramReceived(packet, ("192.168.1.1", 1234))
+        self.assertEqual(udp_socket.get_connection_id(("192.168.1.1", 1234)), 126)
+
+        packet = struct.pack("!iiiii", session._action, session._transaction_id, 0, 1, 2)
+        udp_socket.datagramReceived(packet, ("192.168.1.1", 1234))
+        self.assertTrue(session.is_finished)
+        self.assertFalse(udp_socket.scrapers)
+
+        return session.result_deferred
+
+    @deferred(timeout=5)
+    def test_udp_socket_resolve_cached(self):
+        """
+        Test whether the UDP scraper socket caches resolved hostnames
+        """
+        udp_socket = UDPScraperSocket()
+        udp_socket._resolved_hosts["tracker.test"] = ("1.2.3.4", time.time() + 10)
+
+        def verify_ip_address(ip_address):
+            self.assertEqual(ip_address, "1.2.3.4")
+
+        return udp_socket.resolve("tracker.test").addCallback(verify_ip_address)
+
     def test_http_unprocessed_infohashes(self):
         session = HttpTrackerSession("localhost", ("localhost", 8475), "/announce", 5)
         result_deffered = Deferred()
@@ -0,0 +1,73 @@
+import os
+from hashlib import sha1
+from threading import Event
+
+from Tribler.Core.Utilities import piece_hasher
+from Tribler.Core.Utilities.piece_hasher import get_piece_ranges, hash_file, hash_piece_range, hash_pieces
+from Tribler.Test.Core.base_test import TriblerCoreTest
+
+
+class TestPieceHasher(TriblerCoreTest):
+
+    def create_file(self, name, size):
+        path = os.path.join(self.session_base_dir, name)
+        with open(path, 'wb') as file_handle:
+            file_handle.write(os.urandom(size))
+        return path
+
+    def create_files(self):
+        """
+        Create files with pieces that span file boundaries, and a pad file in between
+        """
+        paths = [self.create_file('a', 100000), self.create_file('b', 10), self.create_file('c', 250000)]
+        files = [(paths[0], 100000), (paths[1], 10), (None, 1000), (paths[2], 250000)]
+        data = ''
+        for path, size in files:
+            data += open(path, 'rb').read() if path else '\0' * size
+        return files, data
+
+    @staticmethod
+    def get_expected_digests(data, piece_length):
+        return [sha1(data[offset:offset + piece_length]).digest() for offset in xrange(0, len(data), piece_length)]
+
+    def test_get_piece_ranges(self):
+        self.assertEqual(get_piece_ranges(100, 32, range_size=64), [(0, 2), (2, 4)])
+        self.assertEqual(get_piece_ranges(100, 32, range_size=16), [(0, 1), (1, 2), (2, 3), (3, 4)])
+        self.assertEqual(get_piece_ranges(0, 32), [])
+
+    def test_hash_piece_range(self):
+        files, data = self.create_files()
+        expected_digests = self.get_expected_digests(data, 2 ** 15)
+        self.assertEqual(hash_piece_range(files, 2 ** 15, 2, 5), expected_digests[2:5])
+        self.assertEqual(hash_piece_range(files, 2 ** 15, 8, 11), expected_digests[8:])
+
+    def test_hash_pieces_single_process(self):
+        files, data = self.create_files()
+        progress = []
+        self.assertEqual(hash_pieces(files, 2 ** 15, userprogresscallback=progress.append),
+                         self.get_expected_digests(data, 2 ** 15))
+        self.assertEqual(progress, [1.0])
+
+    def test_hash_pieces_multiple_processes(self):
+        files, data = self.create_files()
+        piece_hasher.MULTIPROCESS_MIN_SIZE, old_min_size = 0, piece_hasher.MULTIPROCESS_MIN_SIZE
+        piece_hasher.PIECE_RANGE_SIZE, old_range_size = 2 ** 16, piece_hasher.PIECE_RANGE_SIZE
+        try:
+            progress = []
+            self.assertEqual(hash_pieces(files, 2 ** 15, userprogresscallback=progress.append, processes=2),
+                             self.get_expected_digests(data, 2 ** 15))
+            self.assertEqual(progress[-1], 1.0)
+        finally:
+            piece_hasher.MULTIPROCESS_MIN_SIZE = old_min_size
+            piece_hasher.PIECE_RANGE_SIZE = old_range_size
+
+    def test_hash_pieces_abort(self):
+        files, _ = self.create_files()
+        abort_flag = Event()
+        abort_flag.set()
+        self.assertIsNone(hash_pieces(files, 2 ** 15, userabortflag=abort_flag))
+
+    def test_hash_file(self):
+        path = self.create_file('a', 100000)
+        with open(path, 'rb') as file_handle:
+            self.assertEqual(hash_file(path), sha1(file_handle.read()).digest())
@@ -0,0 +1,56 @@
+import os
+import time
+from unittest import skipUnless
+
+from Tribler.Core.Utilities.piece_hasher import hash_pieces
+from Tribler.Test.Core.base_test import TriblerCoreTest
+
+BLOCK_SIZE = 1024 * 1024
+PIECE_LENGTH = 2 ** 20
+
+
+class PieceHasherBenchmarkTestSuite(TriblerCoreTest):
+    """Piece hashing benchmarks, over synthetic file sets of different sizes."""
+
+    def create_file_set(self, num_files, file_size):
+        """
+        Write num_files files of file_size bytes, filled with a repeated block of random data
+        """
+        block = os.urandom(BLOCK_SIZE)
+        files = []
+        for file_index in xrange(num_files):
+            path = os.path.join(self.session_base_dir, "file%d" % file_index)
+            with open(path, 'wb') as file_handle:
+                for _ in xrange(file_size // BLOCK_SIZE):
+                    file_handle.write(block)
+                file_handle.write(block[:file_size % BLOCK_SIZE])
+            files.append((path, file_size))
+        return files
+
+    def benchmark_hash_pieces(self, num_files, file_size):
+        """
+        Hash a file set of num_files files of file_size bytes in a single process and with a pool of processes, and
+        log the throughput of both
+        """
+        files = self.create_file_set(num_files, file_size)
+        total_size = num_files * file_size
+
+        start_time = time.time()
+        single_process_digests = hash_pieces(files, PIECE_LENGTH, processes=1)
+        duration = time.time() - start_time
+        self._logger.info("Hashed %d MB in a single process in %.2f seconds (%.0f MB/s)",
+                          total_size / BLOCK_SIZE, duration, total_size / BLOCK_SIZE / duration)
+
+        start_time = time.time()
+        self.assertEqual(single_process_digests, hash_pieces(files, PIECE_LENGTH))
+        duration = time.time() - start_time
+        self._logger.info("Hashed %d MB with a pool of processes in %.2f seconds (%.0f MB/s)",
+                          total_size / BLOCK_SIZE, duration, total_size / BLOCK_SIZE / duration)
+
+    @skipUnless(os.environ.get("TEST_BENCHMARK") == "yes", "Not writing a 256 MB file set by default")
+    def test_hash_256mb(self):
+        self.benchmark_hash_pieces(4, 64 * 1024 * 1024 + 12345)
+
+    @skipUnless(os.environ.get("TEST_BENCHMARK") == "yes", "Not writing a multi-GB file set by default")
+    def test_hash_4gb(self):
+        self.benchmark_hash_pieces(16, 256 * 1024 * 1024 + 12345)
@@ -0,0 +1,51 @@
+from Tribler.Core.Utilities.suggestion_index import SearchSuggestionIndex, levenshtein_distance
+from Tribler.Test.Core.base_test import TriblerCoreTest
+
+
+class TestSearchSuggestionIndex(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestSearchSuggestionIndex, self).setUp(annotate=annotate)
+        self.index = SearchSuggestionIndex()
+        self.index.add_text(u"ubuntu desktop 16 04")
+        self.index.add_text(u"ubuntu server")
+        self.index.add_text(u"debian desktop")
+        self.index.add_text(u"ubunto")
+
+    def test_levenshtein_distance(self):
+        self.assertEqual(levenshtein_distance(u"kitten", u"sitting"), 3)
+        self.assertEqual(levenshtein_distance(u"", u"abc"), 3)
+        self.assertEqual(levenshtein_distance(u"abc", u"abc"), 0)
+
+    def test_add_text(self):
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.index.get_frequency(u"ubuntu"), 2)
+        self.assertEqual(self.index.get_frequency(u"unknown"), 0)
+        self.assertNotIn(u"16", self.index)
+
+    def test_get_similar_terms(self):
+        self.assertEqual(self.index.get_similar_terms(u"ubunty"), [u"ubuntu", u"ubunto"])
+        self.assertEqual(self.index.get_similar_terms(u"ubuntu"), [u"ubuntu", u"ubunto"])
+        self.assertEqual(self.index.get_similar_terms(u"desktp"), [u"desktop"])
+        self.assertEqual(self.index.get_similar_terms(u"fedora"), [])
+
+    def test_get_similar_terms_limit(self):
+        self.assertEqual(self.index.get_similar_terms(u"ubuntu", limit=1), [u"ubuntu"])
+
+    def test_get_completions(self):
+        self.assertEqual(self.index.get_completions(u"ub"), [u"ubuntu", u"ubunto"])
+        self.assertEqual(self.index.get_completions(u"ubuntu"), [])
+        self.assertEqual(self.index.get_completions(u"ser"), [u"server"])
+        self.assertEqual(self.index.get_completions(u"x"), [])
+
+    def test_get_completions_added_terms(self):
+        self.assertEqual(self.index.get_completions(u"ser", limit=1), [u"server"])
+        self.index.add_text(u"serenity serenity")
+        self.assertEqual(self.index.get_completions(u"ser", limit=1), [u"serenity"])
+
+    def test_merge(self):
+        other = SearchSuggestionIndex()
+        other.add_text(u"ubuntu fedora")
+        self.index.merge(other)
+        self.assertEqual(self.index.get_frequency(u"ubuntu"), 3)
+        self.assertEqual(self.index.get_similar_terms(u"fedorx"), [u"fedora"])
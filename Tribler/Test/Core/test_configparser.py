@@ -77,3 +77,13 @@ class TestConfigParser(TriblerCoreTest):
         self.assertTrue(os.path.isfile(new_path))
         ccp.read_file(new_path)
         self.assertEqual(ccp.get('DEFAULT', 'foo'), 'bar')
+
+    def test_configparser_write_string(self):
+        ccp = CallbackConfigParser()
+        ccp.read_file(os.path.join(self.CONFIG_FILES_DIR, 'config1.conf'))
+
+        new_ccp = CallbackConfigParser()
+        new_ccp.read_string(ccp.write_string())
+
+        self.assertEqual(new_ccp.get('general', 'version'), 11)
+        self.assertIsInstance(new_ccp.get('tunnel_community', 'socks5_listen_ports'), list)
@@ -3,9 +3,10 @@ from nose.tools import raises
 from twisted.internet.defer import Deferred
 
 from Tribler.Core import NoDispersyRLock
-from Tribler.Core.APIImplementation.LaunchManyCore import TriblerLaunchMany
+from Tribler.Core.APIImplementation.LaunchManyCore import TriblerLaunchMany, CHECKPOINT_BATCH_SIZE
 from Tribler.Core.DownloadConfig import DefaultDownloadStartupConfig
 from Tribler.Core.TorrentDef import TorrentDef
+from Tribler.Core.leveldbstore import LevelDbStore
 from Tribler.Core.Utilities.configparser import CallbackConfigParser
 from Tribler.Core.exceptions import DuplicateDownloadException
 from Tribler.Core.simpledefs import DLSTATUS_STOPPED_ON_ERROR
@@ -96,25 +97,114 @@ class TestLaunchManyCore(TriblerCoreTest):
 
         return error_stop_deferred
 
+    @deferred(timeout=10)
     def test_load_checkpoint(self):
         """
         Test whether we are resuming downloads after loading checkpoint
         """
-        def mocked_resume_download(filename, setupDelay=3):
+        def mocked_resume_download(filename, pstate=None):
             self.assertTrue(filename.endswith('abcd.state'))
-            self.assertEqual(setupDelay, 0)
+            self.assertIsInstance(pstate, CallbackConfigParser)
             mocked_resume_download.called = True
 
         mocked_resume_download.called = False
         self.lm.session.get_downloads_pstate_dir = lambda: self.session_base_dir
 
         with open(os.path.join(self.lm.session.get_downloads_pstate_dir(), 'abcd.state'), 'wb') as state_file:
-            state_file.write("hi")
+            state_file.write("[general]\nversion = 11\n")
 
         self.lm.initComplete = True
         self.lm.resume_download = mocked_resume_download
-        self.lm.load_checkpoint()
-        self.assertTrue(mocked_resume_download.called)
+        return self.lm.load_checkpoint().addCallback(lambda _: self.assertTrue(mocked_resume_download.called))
+
+    @deferred(timeout=10)
+    def test_load_checkpoint_batches(self):
+        """
+        Test whether all checkpointed downloads are resumed when they span multiple batches
+        """
+        resumed_filenames = []
+        self.lm.session.get_downloads_pstate_dir = lambda: self.session_base_dir
+        self.lm.resume_download = lambda filename, pstate=None: resumed_filenames.append(filename)
+
+        for index in xrange(CHECKPOINT_BATCH_SIZE + 1):
+            with open(os.path.join(self.session_base_dir, '%040x.state' % index), 'wb') as state_file:
+                state_file.write("invalid")
+
+        self.lm.initComplete = True
+        return self.lm.load_checkpoint().addCallback(
+            lambda _: self.assertEqual(len(resumed_filenames), CHECKPOINT_BATCH_SIZE + 1))
+
+    def test_checkpoint_store(self):
+        """
+        Test whether pstates are written to and read from the checkpoint store
+        """
+        self.lm.session.get_downloads_pstate_dir = lambda: self.session_base_dir
+        self.lm.checkpoint_store = LevelDbStore(os.path.join(self.session_base_dir, 'checkpoints'))
+
+        pstate = self.lm.load_download_pstate(os.path.join(self.DATA_DIR, u"config_files", u"config1.conf"))
+        self.assertFalse(self.lm.has_download_pstate('a' * 20))
+        self.lm.write_download_pstate('a' * 20, pstate)
+        self.lm.checkpoint_store.flush()
+
+        self.assertTrue(self.lm.has_download_pstate('a' * 20))
+        self.assertFalse(os.path.isfile(self.lm.get_download_pstate_filename('a' * 20)))
+        self.assertEqual(self.lm.load_download_pstate_noexc('a' * 20).get('general', 'version'), 11)
+        self.lm.checkpoint_store.close()
+
+    def create_checkpoint_files(self):
+        self.lm.session.get_downloads_pstate_dir = lambda: self.session_base_dir
+        self.lm.checkpoint_store = LevelDbStore(os.path.join(self.session_base_dir, 'checkpoints'))
+
+        filenames = [os.path.join(self.session_base_dir, '%040x.state' % index) for index in xrange(2)]
+        for filename in filenames:
+            with open(filename, 'wb') as state_file:
+                state_file.write("[general]\nversion = 11\n")
+        return filenames
+
+    @deferred(timeout=10)
+    def test_migrate_checkpoints(self):
+        """
+        Test whether checkpoint files are removed once they have been written to the checkpoint store
+        """
+        filenames = self.create_checkpoint_files()
+
+        def mocked_resume_download(filename, pstate=None):
+            # The first file disappears, which should not stop the migration of the second one
+            if filename == filenames[0] and os.path.isfile(filename):
+                os.remove(filename)
+
+        def verify_migrated(_):
+            self.assertFalse(os.path.isfile(filenames[1]))
+            self.assertFalse(self.lm.checkpoint_store._pending_torrents)
+            for index in xrange(2):
+                pstate = self.lm.load_download_pstate_noexc(('%040x' % index).decode('hex'))
+                self.assertEqual(pstate.get('general', 'version'), 11)
+            self.lm.checkpoint_store.close()
+
+        self.lm.resume_download = mocked_resume_download
+        self.lm.initComplete = True
+        return self.lm.load_checkpoint().addCallback(verify_migrated)
+
+    @deferred(timeout=10)
+    def test_migrate_checkpoints_flush_error(self):
+        """
+        Test whether checkpoint files are kept if they could not be written to the checkpoint store
+        """
+        filenames = self.create_checkpoint_files()
+
+        def mocked_flush():
+            raise IOError("test")
+
+        def verify_not_migrated(_):
+            self.assertTrue(all(os.path.isfile(filename) for filename in filenames))
+            self.lm.checkpoint_store.flush = original_flush
+            self.lm.checkpoint_store.close()
+
+        original_flush = self.lm.checkpoint_store.flush
+        self.lm.checkpoint_store.flush = mocked_flush
+        self.lm.resume_download = lambda filename, pstate=None: None
+        self.lm.initComplete = True
+        return self.lm.load_checkpoint().addCallback(verify_not_migrated)
 
     def test_resume_download(self):
         with open(os.path.join(TESTS_DATA_DIR, "bak_single.torrent"), mode='rb') as torrent_file:
@@ -1,6 +1,8 @@
+import time
+
 from twisted.internet.defer import inlineCallbacks, Deferred
 
-from Tribler.Core.CacheDB.Notifier import Notifier
+from Tribler.Core.CacheDB.Notifier import Notifier, SLOW_OBSERVER_THRESHOLD
 from Tribler.Core.simpledefs import NTFY_TORRENTS, NTFY_STARTED, NTFY_FINISHED
 from Tribler.Test.Core.base_test import TriblerCoreTest
 from Tribler.Test.twisted_thread import deferred
@@ -70,3 +72,29 @@ class TriblerCoreTestNotifier(TriblerCoreTest):
         notifier.notify(NTFY_TORRENTS, NTFY_STARTED, None)
         notifier.remove_observers()
         self.assertEqual(len(notifier.observertimers), 0)
+
+    def test_notifier_remove_observer(self):
+        notifier = Notifier()
+        notifier.add_observer(self.callback_func, NTFY_TORRENTS, [NTFY_STARTED, NTFY_FINISHED])
+        notifier.remove_observer(self.callback_func)
+        notifier.notify(NTFY_TORRENTS, NTFY_STARTED, None)
+        self.assertFalse(self.called_callback)
+        self.assertFalse(notifier.observers_by_event)
+
+    def test_notifier_wrong_id(self):
+        notifier = Notifier()
+        notifier.add_observer(self.callback_func, NTFY_TORRENTS, [NTFY_STARTED], id="a")
+        notifier.notify(NTFY_TORRENTS, NTFY_STARTED, "b")
+        self.assertFalse(self.called_callback)
+
+    def test_notifier_statistics(self):
+        notifier = Notifier()
+        notifier.notify(NTFY_TORRENTS, NTFY_STARTED, None)
+        notifier.notify(NTFY_TORRENTS, NTFY_FINISHED, None)
+        self.assertEqual(notifier.get_statistics()["events"][NTFY_TORRENTS]["count"], 2)
+
+    def test_notifier_slow_observer(self):
+        notifier = Notifier()
+        notifier.add_observer(lambda *_: time.sleep(SLOW_OBSERVER_THRESHOLD * 2), NTFY_TORRENTS, [NTFY_STARTED])
+        notifier.notify(NTFY_TORRENTS, NTFY_STARTED, None)
+        self.assertEqual(notifier.get_statistics()["slow_observers"]["<lambda>"]["count"], 1)
@@ -1,4 +1,7 @@
-from Tribler.Core.Utilities.search_utils import split_into_keywords, filter_keywords
+import math
+from struct import pack
+
+from Tribler.Core.Utilities.search_utils import split_into_keywords, filter_keywords, get_bm25_score
 from Tribler.Test.Core.base_test import TriblerCoreTest
 
 
@@ -17,3 +20,13 @@ class TriblerCoreTestSearchUtils(TriblerCoreTest):
         result = filter_keywords(["to", "be", "or", "not", "to", "be"])
         self.assertIsInstance(result, list)
         self.assertEqual(len(result), 4)
+
+    def test_get_bm25_score(self):
+        # One phrase, three columns and ten rows. The phrase occurs twice in the first column of this row.
+        matchinfo = pack('I' * 18, 1, 3, 10, 1, 1, 1, 1, 1, 1, 2, 4, 3, 0, 1, 1, 0, 0, 0)
+        expected_score = 0.8 * math.log(7.5 / 3.5, 2) * (2 * 2.2 / 3.2)
+        self.assertAlmostEqual(get_bm25_score(matchinfo), expected_score)
+
+    def test_get_bm25_score_no_match(self):
+        matchinfo = pack('I' * 18, 1, 3, 10, 1, 1, 1, 1, 1, 1, 0, 4, 3, 0, 1, 1, 0, 0, 0)
+        self.assertEqual(get_bm25_score(matchinfo), 0.0)
@@ -9,6 +9,7 @@ from twisted.internet.defer import inlineCallbacks
 
 from Tribler.Core.CacheDB.sqlitecachedb import SQLiteCacheDB, DB_SCRIPT_ABSOLUTE_PATH, CorruptedDatabaseError
 from Tribler.Test.Core.base_test import TriblerCoreTest
+from Tribler.Test.twisted_thread import deferred
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
 
 
@@ -219,3 +220,47 @@ class TestSqliteCacheDB(TriblerCoreTest):
         self.sqlite_test.delete("person", lastname=("LIKE", "a"))
         one = self.sqlite_test.fetchone(u"SELECT * FROM person")
         self.assertEqual(one, ('x', 'z'))
+
+    @deferred(timeout=10)
+    def test_fetchall_async_in_memory(self):
+        """
+        Test whether asynchronous queries on an in-memory database are executed on the main connection
+        """
+        self.test_insertmany()
+        self.assertFalse(self.sqlite_test.supports_async_reads)
+
+        def verify_results(results):
+            self.assertEqual(len(results), 100)
+
+        return self.sqlite_test.fetchall_async(u"SELECT * FROM person").addCallback(verify_results)
+
+    @deferred(timeout=10)
+    def test_fetchone_async_file(self):
+        """
+        Test whether asynchronous queries are answered by the read-only connections
+        """
+        sqlite_test_2 = SQLiteCacheDB(os.path.join(self.session_base_dir, "test_db.db"), DB_SCRIPT_ABSOLUTE_PATH)
+        sqlite_test_2.initialize()
+        self.assertTrue(sqlite_test_2.supports_async_reads)
+
+        def verify_results(version):
+            self.assertEqual(int(version), sqlite_test_2.version)
+            sqlite_test_2.close()
+
+        return sqlite_test_2.fetchone_async(u"SELECT value FROM MyInfo WHERE entry == 'version'")\
+            .addCallback(verify_results)
+
+    @deferred(timeout=10)
+    def test_get_all_async_file(self):
+        """
+        Test whether getAllAsync returns the same rows as getAll
+        """
+        sqlite_test_2 = SQLiteCacheDB(os.path.join(self.session_base_dir, "test_db.db"), DB_SCRIPT_ABSOLUTE_PATH)
+        sqlite_test_2.initialize()
+        expected = sqlite_test_2.getAll(u"MyInfo", (u"entry", u"value"))
+
+        def verify_results(results):
+            self.assertEqual(results, expected)
+            sqlite_test_2.close()
+
+        return sqlite_test_2.getAllAsync(u"MyInfo", (u"entry", u"value")).addCallback(verify_results)
@@ -79,3 +79,28 @@ class TestSqliteBasicDBHandler(AbstractDB):
     def test_size(self):
         size = self.db.size()  # there are 3995 peers in the table, however the upgrade scripts remove 8 superpeers
         assert size == 3987, size
+
+    @blocking_call_on_reactor_thread
+    def test_fetch_random_rows(self):
+        """
+        Test whether random rows are returned without duplicates, also when few of the probed rows match the query
+        """
+        range_sql = u"SELECT MIN(peer_id), MAX(peer_id) FROM Peer"
+        rows = self.db._fetch_random_rows(u"SELECT peer_id FROM Peer WHERE %s", (), u"peer_id", 10, range_sql)
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(len(set(rows)), 10)
+
+        rows = self.db._fetch_random_rows(u"SELECT peer_id FROM Peer WHERE peer_id < ? AND %s", (50,), u"peer_id",
+                                          500, range_sql)
+        self.assertEqual(sorted(rows), self.db._db.fetchall(u"SELECT peer_id FROM Peer WHERE peer_id < 50"))
+
+    @blocking_call_on_reactor_thread
+    def test_fetch_random_rows_empty(self):
+        """
+        Test whether no rows are returned when the sampled table is empty or no rows are requested
+        """
+        range_sql = u"SELECT MIN(peer_id), MAX(peer_id) FROM Peer WHERE peer_id < 0"
+        self.assertEqual(self.db._fetch_random_rows(u"SELECT peer_id FROM Peer WHERE %s", (), u"peer_id", 10,
+                                                    range_sql), [])
+        self.assertEqual(self.db._fetch_random_rows(u"SELECT peer_id FROM Peer WHERE %s", (), u"peer_id", 0,
+                                                    u"SELECT MIN(peer_id), MAX(peer_id) FROM Peer"), [])
@@ -3,6 +3,8 @@ from twisted.internet.defer import inlineCallbacks
 
 from Tribler.Core.CacheDB.SqliteCacheDBHandler import ChannelCastDBHandler, TorrentDBHandler, VoteCastDBHandler
 from Tribler.Core.CacheDB.sqlitecachedb import str2bin
+from Tribler.Core.Upgrade.db_upgrader import DBUpgrader
+from Tribler.Test.Core.Upgrade.upgrade_base import MockTorrentStore
 from Tribler.Test.Core.test_sqlitecachedbhandler import AbstractDB
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
 
@@ -125,3 +127,89 @@ class TestChannelDBHandler(AbstractDB):
 
         results = self.cdb.search_in_local_channels_db("fdajlkerhui")
         self.assertEqual(len(results), 0)
+
+    def test_get_random_torrents(self):
+        """
+        Testing whether random torrents are returned from a channel
+        """
+        self.assertEqual(len(self.cdb.getRandomTorrents(1)), 2)
+        self.assertEqual(len(self.cdb.getRandomTorrents(1, limit=1)), 1)
+        self.assertEqual(self.cdb.getRandomTorrents(1234), [])
+
+    def test_get_random_channel_torrents(self):
+        """
+        Testing whether random channel torrents are returned
+        """
+        self.assertEqual(len(self.cdb.get_random_channel_torrents(['infohash'], limit=2)), 2)
+
+    def test_get_channel_nr_torrents(self):
+        """
+        Testing whether the number of torrents of random channels is returned
+        """
+        self.assertEqual(sorted(self.cdb.getChannelNrTorrents(limit=5)), sorted(self.cdb.getChannelNrTorrents()))
+        self.assertEqual(len(self.cdb.getChannelNrTorrents(limit=1)), 1)
+
+
+class TestLatestModification(AbstractDB):
+
+    @blocking_call_on_reactor_thread
+    @inlineCallbacks
+    def setUp(self):
+        yield super(TestLatestModification, self).setUp()
+
+        # The test database predates the LatestModification table
+        self.sqlitedb.initial_begin()
+        DBUpgrader(self.session, self.sqlitedb, torrent_store=MockTorrentStore())._upgrade_29_to_30()
+
+        self.cdb = ChannelCastDBHandler(self.session)
+
+    def add_modification(self, dispersy_id, global_time, prev_global_time, value, mid="a" * 20):
+        self.cdb.on_metadata_from_dispersy(u"channel", None, None, 1, dispersy_id, None,
+                                           "%s@%d" % (mid, global_time), u"name", value, 1234, None,
+                                           prev_global_time)
+
+    @blocking_call_on_reactor_thread
+    def test_rebuild_latest_modifications(self):
+        """
+        Testing whether the latest modifications are determined when upgrading the database
+        """
+        self.assertEqual(self.cdb.get_latest_modification(u"torrent", 1, u"metadata-json"),
+                         (3, u'{"thumb_hash":"1234"}'))
+        self.assertIsNone(self.cdb.get_latest_modification(u"torrent", 1, u"name"))
+
+    @blocking_call_on_reactor_thread
+    def test_latest_modification(self):
+        """
+        Testing whether the modification that supersedes the others is the latest modification
+        """
+        self.add_modification(100, 10, None, u"first")
+        self.assertEqual(self.cdb.get_latest_modification(u"channel", 1, u"name"), (100, u"first"))
+
+        self.add_modification(101, 12, 10, u"second")
+        self.add_modification(102, 11, 10, u"conflicting")
+        self.assertEqual(self.cdb.get_latest_modification(u"channel", 1, u"name"), (101, u"second"))
+
+        self.add_modification(103, 12, 10, u"same time", mid="0" * 20)
+        self.assertEqual(self.cdb.get_latest_modification(u"channel", 1, u"name"), (103, u"same time"))
+
+    @blocking_call_on_reactor_thread
+    def test_latest_modification_undone(self):
+        """
+        Testing whether the latest modification is determined again when a modification is undone or moderated
+        """
+        self.add_modification(100, 10, None, u"first")
+        self.add_modification(101, 12, 10, u"second")
+
+        self.cdb.on_remove_metadata_from_dispersy(1, 101, False)
+        self.assertEqual(self.cdb.get_latest_modification(u"channel", 1, u"name"), (100, u"first"))
+        self.cdb.on_remove_metadata_from_dispersy(1, 101, True)
+        self.assertEqual(self.cdb.get_latest_modification(u"channel", 1, u"name"), (101, u"second"))
+
+        self.cdb.on_moderation(1, 200, None, None, 101, u"spam", 1234, 1)
+        self.assertEqual(self.cdb.get_latest_modification(u"channel", 1, u"name"), (100, u"first"))
+        self.cdb.on_remove_moderation(1, 200, False)
+        self.assertEqual(self.cdb.get_latest_modification(u"channel", 1, u"name"), (101, u"second"))
+
+        self.cdb.on_remove_metadata_from_dispersy(1, 100, False)
+        self.cdb.on_remove_metadata_from_dispersy(1, 101, False)
+        self.assertIsNone(self.cdb.get_latest_modification(u"channel", 1, u"name"))
@@ -10,6 +10,7 @@ from Tribler.Core.TorrentDef import TorrentDef
 from Tribler.Core.leveldbstore import LevelDbStore
 from Tribler.Test.Core.test_sqlitecachedbhandler import AbstractDB
 from Tribler.Test.common import TESTS_DATA_DIR
+from Tribler.Test.twisted_thread import deferred
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
 
 S_TORRENT_PATH_BACKUP = os.path.join(TESTS_DATA_DIR, 'bak_single.torrent')
@@ -204,6 +205,63 @@ class TestTorrentDBHandler(AbstractDB):
                                          [], 1234)
         self.assertFalse(self.tdb.getTorrentID(infohash))
 
+    @blocking_call_on_reactor_thread
+    def test_add_external_torrents_no_def_batch(self):
+        infohashes = [unhexlify('%02x865489ac16e2f34ea0cd3043cfd970cc24ec09' % ind) for ind in xrange(60, 70)]
+        torrents = [(infohash, "test torrent %d" % ind, [("file1", 42), ("file2", 43)],
+                     ['http://localhost/announce'], 1234, {}) for ind, infohash in enumerate(infohashes)]
+        torrents.append(torrents[0])
+        self.tdb.addExternalTorrentsNoDef(torrents)
+
+        torrent_ids = self.tdb.getTorrentIDS(infohashes)
+        self.assertTrue(all(torrent_ids.values()))
+        self.assertEqual(self.tdb.getOne('name', torrent_id=torrent_ids[infohashes[3]]), "test torrent 3")
+        self.assertEqual(len(self.tdb.getTrackerListByInfohash(infohashes[3])), 2)
+
+    @blocking_call_on_reactor_thread
+    def test_queue_external_torrent_no_def(self):
+        infohash = unhexlify('51865489ac16e2f34ea0cd3043cfd970cc24ec09')
+        self.tdb.queue_external_torrent_no_def(infohash, "test torrent", [("file1", 42)], [], 1234)
+        self.assertFalse(self.tdb.getTorrentID(infohash))
+        self.assertTrue(self.tdb.is_pending_task_active(u"flush pending torrents"))
+
+        self.tdb.flush_pending_torrents()
+        self.assertTrue(self.tdb.getTorrentID(infohash))
+        self.assertFalse(self.tdb.is_pending_task_active(u"flush pending torrents"))
+
+    @blocking_call_on_reactor_thread
+    def test_queue_external_torrent_no_def_full(self):
+        """
+        Test whether the queued torrents are written immediately when the queue is full
+        """
+        infohashes = [unhexlify('%02x865489ac16e2f34ea0cd3043cfd970cc24ec09' % ind) for ind in xrange(52, 54)]
+        self.tdb.max_pending_torrents = 2
+        self.tdb.queue_external_torrent_no_def(infohashes[0], "test torrent", [("file1", 42)], [], 1234)
+        self.assertFalse(self.tdb.getTorrentID(infohashes[0]))
+        self.tdb.queue_external_torrent_no_def(infohashes[1], "test torrent", [("file1", 42)], [], 1234)
+        self.assertTrue(all(self.tdb.getTorrentIDS(infohashes).values()))
+
+    @blocking_call_on_reactor_thread
+    def test_update_torrent_check_results(self):
+        """
+        Test whether the status and next check of multiple torrents are updated at once
+        """
+        infohashes = [unhexlify('%02x865489ac16e2f34ea0cd3043cfd970cc24ec09' % ind) for ind in xrange(54, 57)]
+        self.tdb.addExternalTorrentsNoDef([(infohash, "test torrent", [("file1", 42)], [], 1234, {})
+                                           for infohash in infohashes])
+        torrent_ids = self.tdb.getTorrentIDS(infohashes)
+        self.tdb.updateTorrentCheckResult(torrent_ids[infohashes[2]], infohashes[2], 0, 0, 1000, 1000, u'unknown', 2)
+
+        self.tdb.updateTorrentCheckResults([(infohashes[0], 5, 3, 1000), (infohashes[1], 0, 3, 1000),
+                                            (infohashes[2], 0, 0, 1000)], 30, 3)
+
+        keys = (u'num_seeders', u'num_leechers', u'status', u'tracker_check_retries', u'next_tracker_check')
+        results = [self.tdb.getTorrent(infohash, keys, include_mypref=False) for infohash in infohashes]
+        self.assertEqual([result[u'num_seeders'] for result in results], [5, 0, 0])
+        self.assertEqual([result[u'status'] for result in results], [u'good', u'unknown', u'dead'])
+        self.assertEqual([result[u'tracker_check_retries'] for result in results], [0, 1, 3])
+        self.assertEqual([result[u'next_tracker_check'] for result in results], [1030, 1060, 1240])
+
     @blocking_call_on_reactor_thread
     def test_add_get_torrent_id(self):
         infohash = str2bin('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
@@ -247,6 +305,20 @@ class TestTorrentDBHandler(AbstractDB):
     def test_get_autocomplete_terms(self):
         self.assertEqual(len(self.tdb.getAutoCompleteTerms("content", 100)), 0)
 
+    @deferred(timeout=10)
+    def test_suggestion_index(self):
+        """
+        Test whether search suggestions and completions are taken from the suggestion index once it is loaded
+        """
+        def verify_suggestions(_):
+            suggestions = self.tdb.getSearchSuggestion(["contant"])
+            self.assertEqual(len(suggestions), 1)
+            self.assertTrue(suggestions[0].startswith("content"))
+            self.assertIn("content", self.tdb.getAutoCompleteTerms("conte", 100))
+            self.assertIn("some content", self.tdb.getAutoCompleteTerms("some conte", 100))
+
+        return self.tdb._load_suggestion_index().addCallback(verify_suggestions)
+
     @blocking_call_on_reactor_thread
     def test_get_recently_randomly_collected_torrents(self):
         self.assertEqual(len(self.tdb.getRecentlyCollectedTorrents(limit=10)), 10)
@@ -296,3 +368,13 @@ class TestTorrentDBHandler(AbstractDB):
         self.assertNotEqual(results[0][-1], 0.0)  # Relevance score of result should not be zero
         results = self.tdb.search_in_local_torrents_db('fdsafasfds', ['infohash'])
         self.assertEqual(len(results), 0)
+
+    @blocking_call_on_reactor_thread
+    def test_search_local_torrents_limit(self):
+        """
+        Test whether only the most relevant torrents are returned when searching with a limit
+        """
+        results = self.tdb.search_in_local_torrents_db('content', ['infohash'], limit=10)
+        self.assertEqual(len(results), 10)
+        scores = [result[-1] for result in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
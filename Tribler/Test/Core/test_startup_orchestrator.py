@@ -0,0 +1,82 @@
+from twisted.internet.defer import Deferred, fail
+
+from Tribler.Core.APIImplementation.startup_orchestrator import StartupOrchestrator
+from Tribler.Test.Core.base_test import TriblerCoreTest
+from Tribler.Test.twisted_thread import deferred
+
+
+class TestStartupOrchestrator(TriblerCoreTest):
+    """
+    This class contains tests for the startup orchestrator of the session components.
+    """
+
+    def setUp(self, annotate=True):
+        TriblerCoreTest.setUp(self, annotate=annotate)
+        self.orchestrator = StartupOrchestrator()
+        self.started_components = []
+
+    def start_function(self, name):
+        return lambda: self.started_components.append(name)
+
+    @deferred(timeout=10)
+    def test_dependency_order(self):
+        """
+        Testing whether components are started after the components they depend on
+        """
+        self.orchestrator.add_component("c", self.start_function("c"), ["b"])
+        self.orchestrator.add_component("b", self.start_function("b"), ["a"], in_thread=True)
+        self.orchestrator.add_component("a", self.start_function("a"))
+
+        def on_started(timings):
+            self.assertEqual(self.started_components, ["a", "b", "c"])
+            self.assertEqual(set(timings), {"a", "b", "c"})
+
+        return self.orchestrator.start().addCallback(on_started)
+
+    @deferred(timeout=10)
+    def test_concurrent_start(self):
+        """
+        Testing whether independent components are started without waiting for each other
+        """
+        slow_deferred = Deferred()
+        self.orchestrator.add_component("slow", lambda: slow_deferred)
+        self.orchestrator.add_component("fast", self.start_function("fast"))
+        self.orchestrator.add_component("dependent", lambda: slow_deferred.callback(None), ["fast"])
+        return self.orchestrator.start()
+
+    def test_unknown_dependency(self):
+        """
+        Testing whether an error is raised when a component depends on an unknown component
+        """
+        self.orchestrator.add_component("a", self.start_function("a"), ["b"])
+        self.assertRaises(ValueError, self.orchestrator.start)
+
+    def test_duplicate_component(self):
+        """
+        Testing whether an error is raised when a component is added twice
+        """
+        self.orchestrator.add_component("a", self.start_function("a"))
+        self.assertRaises(ValueError, self.orchestrator.add_component, "a", self.start_function("a"))
+
+    @deferred(timeout=10)
+    def test_circular_dependency(self):
+        """
+        Testing whether starting components with circular dependencies fails
+        """
+        self.orchestrator.add_component("a", self.start_function("a"), ["b"])
+        self.orchestrator.add_component("b", self.start_function("b"), ["a"])
+        return self.orchestrator.start().addErrback(lambda failure: failure.trap(ValueError))
+
+    @deferred(timeout=10)
+    def test_component_failure(self):
+        """
+        Testing whether the failure of a component is propagated and its dependents are not started
+        """
+        self.orchestrator.add_component("a", lambda: fail(RuntimeError("test")))
+        self.orchestrator.add_component("b", self.start_function("b"), ["a"])
+
+        def on_failure(failure):
+            failure.trap(RuntimeError)
+            self.assertEqual(self.started_components, [])
+
+        return self.orchestrator.start().addCallbacks(lambda _: self.fail("Startup should fail"), on_failure)
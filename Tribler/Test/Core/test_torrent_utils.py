@@ -1,6 +1,8 @@
 import os
 
-from Tribler.Core.Utilities.torrent_utils import create_torrent_file, get_info_from_handle
+import libtorrent
+
+from Tribler.Core.Utilities.torrent_utils import create_torrent_file, get_info_from_handle, set_piece_hashes
 from Tribler.Test.Core.base_test import TriblerCoreTest, MockObject
 
 
@@ -46,6 +48,62 @@ class TriblerCoreTestTorrentUtils(TriblerCoreTest):
         self.assertTrue(os.path.isfile(result["torrent_file_path"]))
         os.remove(result["torrent_file_path"])
 
+    def create_files(self):
+        """
+        Create files in a directory, with sizes that are not a multiple of the piece length
+        """
+        names = [os.path.join(u"files", name) for name in [u"a.bin", u"b.bin", u"c.bin", u"d.bin"]]
+        os.mkdir(os.path.join(self.session_base_dir, u"files"))
+        for name, size in zip(names, [100000, 10, 250000, 40000]):
+            with open(os.path.join(self.session_base_dir, name), 'wb') as file_handle:
+                file_handle.write(os.urandom(size))
+        return names
+
+    def create_reference_torrent(self, names, piece_length, pad_file_limit=-1):
+        fs = libtorrent.file_storage()
+        for name in names:
+            fs.add_file(name, os.path.getsize(os.path.join(self.session_base_dir, name)))
+
+        flags = libtorrent.create_torrent_flags_t.optimize
+        if hasattr(libtorrent.create_torrent_flags_t, 'calculate_file_hashes'):
+            flags |= libtorrent.create_torrent_flags_t.calculate_file_hashes
+        return libtorrent.create_torrent(fs, piece_length, pad_file_limit, flags)
+
+    @staticmethod
+    def get_info(torrent):
+        return libtorrent.bdecode(libtorrent.bencode(torrent.generate()))['info']
+
+    def test_create_torrent_hashes(self):
+        """
+        Test whether the pieces of a created torrent are equal to the pieces that libtorrent calculates
+        """
+        names = self.create_files()
+        file_path_list = [os.path.join(self.session_base_dir, name) for name in names]
+        progress = []
+        result = create_torrent_file(file_path_list, {'piece length': 2 ** 14}, progress_callback=progress.append)
+        with open(result['torrent_file_path'], 'rb') as torrent_file:
+            info = libtorrent.bdecode(torrent_file.read())['info']
+
+        reference_torrent = self.create_reference_torrent(names, 2 ** 14)
+        libtorrent.set_piece_hashes(reference_torrent, self.session_base_dir)
+        self.assertEqual(info, self.get_info(reference_torrent))
+        self.assertEqual(progress[-1], 1.0)
+
+    def test_set_piece_hashes_pad_files(self):
+        """
+        Test whether the pieces are equal to the pieces that libtorrent calculates when there are pad files
+        """
+        names = self.create_files()
+        torrent = self.create_reference_torrent(names, 2 ** 14, pad_file_limit=0)
+        storage = torrent.files()
+        self.assertTrue(any(storage.file_flags(index) & storage.flag_pad_file
+                            for index in xrange(storage.num_files())))
+        set_piece_hashes(torrent, self.session_base_dir)
+
+        reference_torrent = self.create_reference_torrent(names, 2 ** 14, pad_file_limit=0)
+        libtorrent.set_piece_hashes(reference_torrent, self.session_base_dir)
+        self.assertEqual(self.get_info(torrent), self.get_info(reference_torrent))
+
     def test_get_info_from_handle(self):
         mock_handle = MockObject()
 
@@ -23,6 +23,7 @@ from .conversion import AllChannelConversion
 CHANNELCAST_FIRST_MESSAGE = 3.0
 CHANNELCAST_INTERVAL = 15.0
 CHANNELCAST_BLOCK_PERIOD = 10.0 * 60.0  # block for 10 minutes
+CHANNELCAST_CACHE_PERIOD = 60.0  # reuse the torrents selected for a channelcast message for 1 minute
 UNLOAD_COMMUNITY_INTERVAL = 60.0
 
 DEBUG = False
@@ -115,6 +116,7 @@ class AllChannelCommunity(Community):
 
         self._blocklist = {}
         self._recentlyRequested = []
+        self._channelcast_cache = {}  # didFavorite -> (timestamp, torrents)
 
         self.tribler_session = None
         self.auto_join_channel = None
@@ -164,9 +166,6 @@ class AllChannelCommunity(Community):
         assert isInIOThread()
         now = time()
 
-        favoriteTorrents = None
-        normalTorrents = None
-
         # cleanup blocklist
         for candidate in self._blocklist.keys():
             if self._blocklist[candidate] + CHANNELCAST_BLOCK_PERIOD < now:  # unblock address
@@ -195,14 +194,7 @@ class AllChannelCommunity(Community):
                         break
 
             # Modify type of message depending on if all peers have marked my channels as their favorite
-            if didFavorite:
-                if not favoriteTorrents:
-                    favoriteTorrents = self._channelcast_db.getRecentAndRandomTorrents(0, 0, 25, 25, 5)
-                torrents = favoriteTorrents
-            else:
-                if not normalTorrents:
-                    normalTorrents = self._channelcast_db.getRecentAndRandomTorrents()
-                torrents = normalTorrents
+            torrents = self.get_channelcast_torrents(didFavorite, now)
 
             # torrents is a dictionary of channel_id (key) and infohashes (value)
             if len(torrents) > 0:
@@ -224,6 +216,20 @@ class AllChannelCommunity(Community):
         else:
             self._logger.debug("Did not send channelcast messages, no candidates or torrents")
 
+    def get_channelcast_torrents(self, didFavorite, now):
+        """
+        Return the torrents to include in a channelcast message. Selecting them is expensive on large databases, so
+        the selection is reused for CHANNELCAST_CACHE_PERIOD seconds.
+        """
+        timestamp, torrents = self._channelcast_cache.get(didFavorite, (None, None))
+        if timestamp is None or timestamp + CHANNELCAST_CACHE_PERIOD < now:
+            if didFavorite:
+                torrents = self._channelcast_db.getRecentAndRandomTorrents(0, 0, 25, 25, 5)
+            else:
+                torrents = self._channelcast_db.getRecentAndRandomTorrents()
+            self._channelcast_cache[didFavorite] = (now, torrents)
+        return torrents
+
     def get_nr_connections(self):
         return len(list(self.dispersy_yield_candidates()))
 
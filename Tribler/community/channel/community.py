@@ -819,22 +819,24 @@ class ChannelCommunity(Community):
                     channeltorrent_id = channeltorrentDict[modifying_dispersy_id]
 
                     if channeltorrent_id:
-                        latest = self._get_latest_modification_from_torrent_id(channeltorrent_id, modification_type)
-                        if not latest or latest.packet_id == dispersy_id:
+                        latest = self._channelcast_db.get_latest_modification(u"torrent", channeltorrent_id,
+                                                                              modification_type)
+                        if not latest or latest[0] == dispersy_id:
                             self._channelcast_db.on_torrent_modification_from_dispersy(
                                 channeltorrent_id, modification_type, modification_value)
 
                 elif message_name == u"playlist":
                     playlist_id = playlistDict[modifying_dispersy_id]
 
-                    latest = self._get_latest_modification_from_playlist_id(playlist_id, modification_type)
-                    if not latest or latest.packet_id == dispersy_id:
+                    latest = self._channelcast_db.get_latest_modification(u"playlist", playlist_id, modification_type)
+                    if not latest or latest[0] == dispersy_id:
                         self._channelcast_db.on_playlist_modification_from_dispersy(
                             playlist_id, modification_type, modification_value)
 
                 elif message_name == u"channel":
-                    latest = self._get_latest_modification_from_channel_id(modification_type)
-                    if not latest or latest.packet_id == dispersy_id:
+                    latest = self._channelcast_db.get_latest_modification(u"channel", self._channel_id,
+                                                                          modification_type)
+                    if not latest or latest[0] == dispersy_id:
                         self._channelcast_db.on_channel_modification_from_dispersy(
                             self._channel_id, modification_type, modification_value)
 
@@ -858,26 +860,28 @@ class ChannelCommunity(Community):
                 self._channelcast_db.on_remove_metadata_from_dispersy(self._channel_id, dispersy_id, redo)
 
                 if message_name == u"torrent":
-                    latest = self._get_latest_modification_from_torrent_id(channeltorrent_id, modification_type)
+                    latest = self._channelcast_db.get_latest_modification(u"torrent", channeltorrent_id,
+                                                                          modification_type)
 
-                    if not latest or latest.packet_id == dispersy_id:
-                        modification_value = latest.payload.modification_value if latest else ''
+                    if not latest or latest[0] == dispersy_id:
+                        modification_value = latest[1] if latest else ''
                         self._channelcast_db.on_torrent_modification_from_dispersy(
                             channeltorrent_id, modification_type, modification_value)
 
                 elif message_name == u"playlist":
-                    latest = self._get_latest_modification_from_playlist_id(playlist_id, modification_type)
+                    latest = self._channelcast_db.get_latest_modification(u"playlist", playlist_id, modification_type)
 
-                    if not latest or latest.packet_id == dispersy_id:
-                        modification_value = latest.payload.modification_value if latest else ''
+                    if not latest or latest[0] == dispersy_id:
+                        modification_value = latest[1] if latest else ''
                         self._channelcast_db.on_playlist_modification_from_dispersy(
                             playlist_id, modification_type, modification_value)
 
                 elif message_name == u"channel":
-                    latest = self._get_latest_modification_from_channel_id(modification_type)
+                    latest = self._channelcast_db.get_latest_modification(u"channel", self._channel_id,
+                                                                          modification_type)
 
-                    if not latest or latest.packet_id == dispersy_id:
-                        modification_value = latest.payload.modification_value if latest else ''
+                    if not latest or latest[0] == dispersy_id:
+                        modification_value = latest[1] if latest else ''
                         self._channelcast_db.on_channel_modification_from_dispersy(
                             self._channel_id, modification_type, modification_value)
 
@@ -1007,8 +1011,9 @@ class ChannelCommunity(Community):
                 if channeltorrent_id:
                     modification_type = unicode(cause_message.payload.modification_type)
 
-                    latest = self._get_latest_modification_from_torrent_id(channeltorrent_id, modification_type)
-                    if not latest or latest.packet_id == cause_message.packet_id:
+                    latest = self._channelcast_db.get_latest_modification(u"torrent", channeltorrent_id,
+                                                                          modification_type)
+                    if not latest or latest[0] == cause_message.packet_id:
                         updateTorrent = True
 
                 self._channelcast_db.on_moderation(self._channel_id,
@@ -1019,9 +1024,10 @@ class ChannelCommunity(Community):
                                                     message.payload.severity)
 
                 if updateTorrent:
-                    latest = self._get_latest_modification_from_torrent_id(channeltorrent_id, modification_type)
+                    latest = self._channelcast_db.get_latest_modification(u"torrent", channeltorrent_id,
+                                                                          modification_type)
 
-                    modification_value = latest.payload.modification_value if latest else ''
+                    modification_value = latest[1] if latest else ''
                     self._channelcast_db.on_torrent_modification_from_dispersy(
                         channeltorrent_id, modification_type, modification_value)
 
@@ -1187,88 +1193,31 @@ class ChannelCommunity(Community):
 
     def _get_latest_modification_from_channel_id(self, type_name):
         assert isinstance(type_name, basestring), "type_name is not a basestring: %s" % repr(type_name)
-
-        # 1. get the dispersy identifier from the channel_id
-        dispersy_ids = self._channelcast_db._db.fetchall(
-            u"SELECT dispersy_id, prev_global_time " + \
-            u"FROM ChannelMetaData WHERE type = ? " + \
-            u"AND channel_id = ? " + \
-            u"AND id NOT IN (SELECT metadata_id FROM MetaDataTorrent) " + \
-            u"AND id NOT IN (SELECT metadata_id FROM MetaDataPlaylist) " + \
-            u"AND dispersy_id not in (SELECT cause FROM Moderations " + \
-            u"WHERE channel_id = ?) ORDER BY prev_global_time DESC",
-            (type_name, self._channel_id, self._channel_id))
-        return self._determine_latest_modification(dispersy_ids)
+        return self._get_latest_modification(u"channel", self._channel_id, type_name)
 
     def _get_latest_modification_from_torrent_id(self, channeltorrent_id, type_name):
         assert isinstance(channeltorrent_id, (int, long)), "channeltorrent_id type is '%s'" % type(channeltorrent_id)
         assert isinstance(type_name, basestring), "type_name is not a basestring: %s" % repr(type_name)
-
-        # 1. get the dispersy identifier from the channel_id
-        dispersy_ids = self._channelcast_db._db.fetchall(u"SELECT dispersy_id, prev_global_time " + \
-                                                         u"FROM ChannelMetaData, MetaDataTorrent " + \
-                                                         u"WHERE ChannelMetaData.id = MetaDataTorrent.metadata_id " + \
-                                                         u"AND type = ? AND channeltorrent_id = ? " + \
-                                                         u"AND dispersy_id not in " + \
-                                                         u"(SELECT cause FROM Moderations WHERE channel_id = ?) " + \
-                                                         u"ORDER BY prev_global_time DESC",
-            (type_name, channeltorrent_id, self._channel_id))
-        return self._determine_latest_modification(dispersy_ids)
+        return self._get_latest_modification(u"torrent", channeltorrent_id, type_name)
 
     def _get_latest_modification_from_playlist_id(self, playlist_id, type_name):
         assert isinstance(playlist_id, (int, long)), "playlist_id type is '%s'" % type(playlist_id)
         assert isinstance(type_name, basestring), "type_name is not a basestring: %s" % repr(type_name)
-
-        # 1. get the dispersy identifier from the channel_id
-        dispersy_ids = self._channelcast_db._db.fetchall(u"SELECT dispersy_id, prev_global_time " + \
-                                                         u"FROM ChannelMetaData, MetaDataPlaylist " + \
-                                                         u"WHERE ChannelMetaData.id = MetaDataPlaylist.metadata_id " + \
-                                                         u"AND type = ? AND playlist_id = ? " + \
-                                                         u"AND dispersy_id not in " + \
-                                                         u"(SELECT cause FROM Moderations WHERE channel_id = ?) " + \
-                                                         u"ORDER BY prev_global_time DESC",
-            (type_name, playlist_id, self._channel_id))
-        return self._determine_latest_modification(dispersy_ids)
+        return self._get_latest_modification(u"playlist", playlist_id, type_name)
 
     @warnIfNotDispersyThread
-    def _determine_latest_modification(self, list):
-
-        if len(list) > 0:
-            # 1. determine if we have a conflict
-            max_global_time = list[0][1]
-            conflicting_messages = []
-            for dispersy_id, prev_global_time in list:
-                if prev_global_time >= max_global_time:
-                    try:
-                        message = self._dispersy.load_message_by_packetid(self, dispersy_id)
-                        if message:
-                            message = message.load_message()
-                            conflicting_messages.append(message)
-
-                            max_global_time = prev_global_time
-                    except RuntimeError:
-                        pass
-                else:
-                    break
-
-            # 2. see if we have a conflict
-            if len(conflicting_messages) > 1:
+    def _get_latest_modification(self, target_type, target_id, type_name):
+        # 1. get the dispersy identifier of the latest modification, conflicts are resolved by the database
+        latest = self._channelcast_db.get_latest_modification(target_type, target_id, type_name)
 
-                # 3. solve conflict using mid to sort on
-                def cleverSort(message_a, message_b):
-                    public_key_a = message_a.authentication.member.public_key
-                    public_key_b = message_a.authentication.member.public_key
-
-                    if public_key_a == public_key_b:
-                        return cmp(message_b.distribution.global_time, message_a.distribution.global_time)
-
-                    return cmp(public_key_a, public_key_b)
-
-                conflicting_messages.sort(cleverSort)
-
-            if len(conflicting_messages) > 0:
-                # 4. return first message
-                return conflicting_messages[0]
+        # 2. get the message
+        if latest:
+            try:
+                message = self._dispersy.load_message_by_packetid(self, latest[0])
+                if message:
+                    return message.load_message()
+            except RuntimeError:
+                pass
 
     @warnIfNotDispersyThread
     def _get_packet_id(self, global_time, mid):
@@ -33,7 +33,7 @@ from Tribler.community.market.database import MarketDB
 from Tribler.community.market.payload import TradePayload, DeclinedTradePayload,\
     StartTransactionPayload, WalletInfoPayload, PaymentPayload, MatchPayload, AcceptMatchPayload, DeclineMatchPayload, \
     InfoPayload, OrderStatusRequestPayload, OrderStatusResponsePayload
-from Tribler.community.market.reputation.pagerank_manager import PagerankReputationManager
+from Tribler.community.market.reputation.incremental_pagerank_manager import IncrementalPagerankReputationManager
 from Tribler.community.market.tradechain.block import TradeChainBlock
 from Tribler.community.market.wallet.tc_wallet import TrustchainWallet
 from Tribler.community.trustchain.community import TrustChainCommunity, HALF_BLOCK_BROADCAST, BLOCK_PAIR, \
@@ -127,7 +127,8 @@ class MarketCommunity(TrustChainCommunity):
         self.tradechain_community = None
         self.wallets = None
         self.transaction_manager = None
-        self.reputation_dict = {}
+        self.reputation_manager = None
+        self.reputation_insert_time = None
         self.use_local_address = False
         self.matching_enabled = True
         self.is_matchmaker = True
@@ -163,6 +164,7 @@ class MarketCommunity(TrustChainCommunity):
         self.tradechain_community = tradechain_community
         self.wallets = wallets or {}
         self.transaction_manager = TransactionManager(transaction_repository)
+        self.reputation_manager = IncrementalPagerankReputationManager(own_public_key=self.my_member.public_key)
 
         # Determine the reputation of peers every five minutes
         self.register_task("calculate_reputation", LoopingCall(self.compute_reputation)).start(300.0, now=False)
@@ -1708,9 +1710,27 @@ class MarketCommunity(TrustChainCommunity):
         bid_order_id = OrderId(TraderId(tx_dict["bid"]["trader_id"]), OrderNumber(tx_dict["bid"]["order_number"]))
         self.match_order_ids([ask_order_id, bid_order_id])
 
+    @property
+    def reputation_dict(self):
+        """
+        The reputation of peers in the community, at most reputation_manager.max_staleness seconds old.
+        """
+        return self.reputation_manager.reputation_dict if self.reputation_manager else {}
+
     def compute_reputation(self):
         """
-        Compute the reputation of peers in the community
+        Compute the reputation of peers in the community. All blocks are only loaded from the database the first time,
+        after that only the blocks that have been inserted since the previous computation are loaded.
         """
-        rep_manager = PagerankReputationManager(self.tradechain_community.persistence.get_all_blocks())
-        self.reputation_dict = rep_manager.compute(self.my_member.public_key)
+        persistence = self.tradechain_community.persistence if self.tradechain_community else self.persistence
+        if self.reputation_insert_time is None:
+            blocks = persistence.get_all_blocks()
+        else:
+            # The blocks inserted in the same second as the last loaded block are loaded again, the reputation
+            # manager ignores the blocks it has seen before
+            blocks = persistence.get_blocks_since(self.reputation_insert_time)
+
+        if blocks:
+            self.reputation_insert_time = max(block.insert_time for block in blocks)
+        self.reputation_manager.add_blocks(blocks)
+        self.reputation_manager.compute()
@@ -1,12 +1,11 @@
 import logging
-import random
+import os
 from abc import ABCMeta, abstractmethod
 from time import time
 
 from Tribler.community.market.core.order import OrderId
 from Tribler.community.market.core.orderbook import OrderBook
 from Tribler.community.market.core.price import Price
-from Tribler.community.market.core.pricelevel import PriceLevel
 from Tribler.community.market.core.quantity import Quantity
 from Tribler.community.market.core.tickentry import TickEntry
 
@@ -34,7 +33,7 @@ class MatchingStrategy(object):
         :return: A random matching ID
         :rtype: str
         """
-        return ''.join(random.choice('0123456789abcdef') for _ in xrange(20))
+        return os.urandom(10).encode('hex')
 
     def get_unique_match_id(self):
         """
@@ -81,183 +80,69 @@ class PriceTimeStrategy(MatchingStrategy):
         :return: A list of tuples containing the ticks and the matched quantity
         :rtype: [(str, TickEntry, Quantity)]
         """
-        matched_ticks = self._match_ask(order_id, price, quantity, is_ask) if is_ask \
-            else self._match_bid(order_id, price, quantity, is_ask)
-
-        return matched_ticks
+        # An ask is matched against the bids, starting at the highest bid, and the other way around
+        side = self.order_book.bids if is_ask else self.order_book.asks
+        try:
+            price_level_list = side.get_price_level_list(price.wallet_id, quantity.wallet_id)
+        except KeyError:
+            return []
 
-    def _match_ask(self, order_id, price, quantity, is_ask):
-        matched_ticks = []
+        return self._search_for_quantity_in_price_levels(order_id, price_level_list.iter_items(reverse=is_ask),
+                                                         quantity, price, is_ask)
 
-        if price <= self.order_book.get_bid_price(price.wallet_id, quantity.wallet_id) \
-                and quantity > Quantity(0, quantity.wallet_id):
-            # Scan the price levels in the order book
-            matched_ticks = self._search_for_quantity_in_order_book(
-                order_id,
-                self.order_book.get_bid_price(price.wallet_id, quantity.wallet_id),
-                self.order_book.get_bid_price_level(price.wallet_id, quantity.wallet_id),
-                quantity, price, is_ask)
-        return matched_ticks
+    def _search_for_quantity_in_price_levels(self, order_id, price_levels, quantity_to_trade, tick_price, is_ask):
+        """
+        Search through the price levels in the order book, from the best price level onwards, until either all
+        quantity is matched or the price levels do not match the price of the tick anymore.
 
-    def _match_bid(self, order_id, price, quantity, is_ask):
-        matched_ticks = []
+        The prices and quantities are compared as plain numbers, a Quantity is only created for the matches.
 
-        if price >= self.order_book.get_ask_price(price.wallet_id, quantity.wallet_id) \
-                and quantity > Quantity(0, quantity.wallet_id):
-            # Scan the price levels in the order book
-            matched_ticks = self._search_for_quantity_in_order_book(
-                order_id,
-                self.order_book.get_ask_price(price.wallet_id, quantity.wallet_id),
-                self.order_book.get_ask_price_level(price.wallet_id, quantity.wallet_id),
-                quantity, price, is_ask)
-        return matched_ticks
-
-    def _search_for_quantity_in_order_book(self, order_id, price, price_level, quantity_to_trade, tick_price, is_ask):
-        """
-        Search through the price levels in the order book
         :param order_id: The order id of the tick to match
-        :param price: The price of the price level
-        :param price_level: The price level to search in
-        :param quantity_to_trade: The quantity still to be matched
+        :param price_levels: An iterable of (price, price level) tuples, ordered from the best price onwards
+        :param quantity_to_trade: The quantity to be matched
         :param tick_price: The price of the tick being matched
         :param is_ask: Whether our tick being matched is an ask
         :type order_id: OrderId
-        :type price: Price
-        :type price_level: PriceLevel
-        :type quantity_to_trade: Quantity
-        :type tick_price: Price
-        :type is_ask: bool
-        :return: A list of tuples containing the ticks and the matched quantity
-        :rtype: [(str, TickEntry, Quantity)]
-        """
-        if price_level is None:  # Last price level
-            return []
-
-        assert isinstance(order_id, OrderId), type(order_id)
-        assert isinstance(price, Price), type(price)
-        assert isinstance(price_level, PriceLevel), type(price_level)
-        assert isinstance(quantity_to_trade, Quantity), type(quantity_to_trade)
-        assert isinstance(tick_price, Price), type(tick_price)
-        assert isinstance(is_ask, bool), type(is_ask)
-
-        self._logger.debug("Searching in price level: %f", float(price))
-
-        if quantity_to_trade <= price_level.depth - price_level.reserved:
-            # All the quantity can be matched in this price level
-            return self._search_for_quantity_in_price_level(order_id, price_level.first_tick,
-                                                            quantity_to_trade,
-                                                            tick_price, is_ask)
-        else:
-            # Not all the quantity can be matched in this price level
-            return self._search_for_quantity_in_order_book_partial(order_id, price, price_level, quantity_to_trade,
-                                                                   tick_price, is_ask)
-
-    def _search_for_quantity_in_order_book_partial(self, order_id, price, price_level, quantity_to_trade,
-                                                   tick_price, is_ask):
-        # Not all the quantity can be matched in this price level
-        matching_ticks = self._search_for_quantity_in_price_level(order_id, price_level.first_tick, quantity_to_trade,
-                                                                  tick_price, is_ask)
-        if is_ask:
-            return self._search_for_quantity_in_order_book_partial_ask(order_id, price, quantity_to_trade,
-                                                                       matching_ticks, tick_price, is_ask)
-        else:
-            return self._search_for_quantity_in_order_book_partial_bid(order_id, price, quantity_to_trade,
-                                                                       matching_ticks, tick_price, is_ask)
-
-    def _search_for_quantity_in_order_book_partial_ask(self, order_id, price, quantity_to_trade, matching_ticks,
-                                                       tick_price, is_ask):
-        # Select the next price level
-        try:
-            # Search the next price level
-            next_price, next_price_level = self.order_book.bids.\
-                get_price_level_list(price.wallet_id, quantity_to_trade.wallet_id).prev_item(price)
-        except IndexError:
-            return matching_ticks
-
-        if tick_price > next_price:  # Price is too low
-            return matching_ticks
-
-        matching_ticks += self._search_for_quantity_in_order_book(order_id, next_price, next_price_level,
-                                                                  quantity_to_trade, tick_price, is_ask)
-
-        return matching_ticks
-
-    def _search_for_quantity_in_order_book_partial_bid(self, order_id, price, quantity_to_trade, matching_ticks,
-                                                       tick_price, is_ask):
-        # Select the next price level
-        try:
-            # Search the next price level
-            next_price, next_price_level = self.order_book.asks.\
-                get_price_level_list(price.wallet_id, quantity_to_trade.wallet_id).succ_item(price)
-        except IndexError:
-            return matching_ticks
-
-        if tick_price < next_price:  # Price is too high
-            return matching_ticks
-
-        matching_ticks += self._search_for_quantity_in_order_book(order_id, next_price, next_price_level,
-                                                                  quantity_to_trade, tick_price, is_ask)
-
-        return matching_ticks
-
-    def _search_for_quantity_in_price_level(self, order_id, tick_entry, quantity_to_trade, tick_price, is_ask):
-        """
-        Search through the tick entries in the price levels
-
-        :param order_id: The order id to match
-        :param tick_entry: The tick entry to match against
-        :param quantity_to_trade: The quantity still to be matched
-        :param tick_price: The price of the tick being matched
-        :param is_ask: Whether our tick being matched is an ask
-        :type tick_entry: TickEntry
         :type quantity_to_trade: Quantity
         :type tick_price: Price
         :type is_ask: bool
         :return: A list of tuples containing the ticks and the matched quantity
         :rtype: [(str, TickEntry, Quantity)]
         """
-        if tick_entry is None:  # Last tick
-            return []
-
         assert isinstance(order_id, OrderId), type(order_id)
-        assert isinstance(tick_entry, TickEntry), type(tick_entry)
         assert isinstance(quantity_to_trade, Quantity), type(quantity_to_trade)
         assert isinstance(tick_price, Price), type(tick_price)
         assert isinstance(is_ask, bool), type(is_ask)
 
-        if quantity_to_trade <= tick_entry.quantity - tick_entry.reserved_for_matching \
-                and not tick_entry.is_blocked_for_matching(order_id):
-            # All the quantity can be matched in this tick
-            return self._search_for_quantity_in_price_level_total(tick_entry, quantity_to_trade)
-        else:
-            # Not all the quantity can be matched in this tick
-            return self._search_for_quantity_in_price_level_partial(order_id, tick_entry, quantity_to_trade,
-                                                                    tick_price, is_ask)
-
-    def _search_for_quantity_in_price_level_total(self, tick_entry, quantity_to_trade):
-        trading_quantity = quantity_to_trade
-
-        self._logger.debug("Match with the id (%s) was found: price %i, quantity %i",
-                           str(tick_entry.order_id), float(tick_entry.price), int(trading_quantity))
+        quantity_wallet_id = quantity_to_trade.wallet_id
+        remaining_quantity = float(quantity_to_trade)
+        limit_price = float(tick_price)
+        matching_ticks = []
 
-        return [(self.get_unique_match_id(), tick_entry, trading_quantity)]
+        for price, price_level in price_levels:
+            if remaining_quantity <= 0:
+                break
+            if (is_ask and float(price) < limit_price) or (not is_ask and float(price) > limit_price):
+                break  # Price is too low (for an ask) or too high (for a bid)
+            if float(price_level.depth) - float(price_level.reserved) <= 0:
+                continue
 
-    def _search_for_quantity_in_price_level_partial(self, order_id, tick_entry, quantity_to_trade, tick_price, is_ask):
-        matched_quantity = tick_entry.quantity - tick_entry.reserved_for_matching
-        matching_ticks = []
+            self._logger.debug("Searching in price level: %f", float(price))
 
-        if matched_quantity > Quantity(0, matched_quantity.wallet_id) and not \
-                tick_entry.is_blocked_for_matching(order_id):
-            quantity_to_trade -= matched_quantity
+            tick_entry = price_level.first_tick
+            while tick_entry is not None and remaining_quantity > 0:
+                available_quantity = float(tick_entry.quantity) - float(tick_entry.reserved_for_matching)
+                if available_quantity > 0 and not tick_entry.is_blocked_for_matching(order_id):
+                    trading_quantity = min(available_quantity, remaining_quantity)
+                    remaining_quantity -= trading_quantity
 
-            self._logger.debug("Match with the id (%s) was found: price %i, quantity %i",
-                               str(tick_entry.order_id), float(tick_entry.price), int(matched_quantity))
+                    self._logger.debug("Match with the id (%s) was found: price %f, quantity %f",
+                                       tick_entry.order_id, float(price), trading_quantity)
 
-            matching_ticks = [(self.get_unique_match_id(), tick_entry, matched_quantity)]
+                    matching_ticks.append((self.get_unique_match_id(), tick_entry,
+                                           Quantity(trading_quantity, quantity_wallet_id)))
+                tick_entry = tick_entry.next_tick
 
-        # Search the next tick
-        matching_ticks += self._search_for_quantity_in_price_level(order_id, tick_entry.next_tick, quantity_to_trade,
-                                                                   tick_price, is_ask)
         return matching_ticks
 
 
@@ -1,17 +1,27 @@
+from bisect import bisect_left, bisect_right
+
 from Tribler.community.market.core.price import Price
 from Tribler.community.market.core.pricelevel import PriceLevel
 
 
 class PriceLevelList(object):
     """
-    Sorted doubly linked dictionary implementation.
+    Sorted dictionary of prices to price levels.
+
+    The prices are kept in a sorted list, together with a list of their float values that is searched with bisect.
+    All prices in a price level list have the same wallet id, so comparing these floats is equivalent to comparing the
+    prices themselves, and a lot cheaper. Neighbour lookups are O(log n), the lowest and highest price are O(1).
     """
 
     def __init__(self):
         super(PriceLevelList, self).__init__()
         self._price_list = []
+        self._price_keys = []
         self._price_level_dictionary = {}
 
+    def __len__(self):
+        return len(self._price_list)
+
     def insert(self, price, price_level):
         """
         :type price: Price
@@ -20,17 +30,30 @@ class PriceLevelList(object):
         assert isinstance(price, Price), type(price)
         assert isinstance(price_level, PriceLevel), type(price_level)
 
-        self._price_list.append(price)
-        self._price_list.sort()
+        key = float(price)
+        index = bisect_left(self._price_keys, key)
+        if index < len(self._price_keys) and self._price_keys[index] == key:
+            # Replace the price level of an existing price
+            self._price_list[index] = price
+        else:
+            self._price_keys.insert(index, key)
+            self._price_list.insert(index, price)
         self._price_level_dictionary[price] = price_level
 
     def remove(self, price):
         """
         :type price: Price
+        :raises ValueError: Thrown when the price is not in the price level list
         """
         assert isinstance(price, Price), type(price)
 
-        self._price_list.remove(price)
+        key = float(price)
+        index = bisect_left(self._price_keys, key)
+        if index == len(self._price_keys) or self._price_keys[index] != key:
+            raise ValueError("Price %s is not in the price level list" % price)
+
+        del self._price_keys[index]
+        del self._price_list[index]
         del self._price_level_dictionary[price]
 
     def succ_item(self, price):
@@ -39,10 +62,11 @@ class PriceLevelList(object):
 
         :type price: Price
         :rtype: (Price, PriceLevel)
+        :raises IndexError: Thrown when there is no higher price
         """
         assert isinstance(price, Price), type(price)
 
-        index = self._price_list.index(price) + 1
+        index = bisect_right(self._price_keys, float(price))
         if index >= len(self._price_list):
             raise IndexError
         succ_price = self._price_list[index]
@@ -54,10 +78,11 @@ class PriceLevelList(object):
 
         :type price: Price
         :rtype: (Price, PriceLevel)
+        :raises IndexError: Thrown when there is no lower price
         """
         assert isinstance(price, Price), type(price)
 
-        index = self._price_list.index(price) - 1
+        index = bisect_left(self._price_keys, float(price)) - 1
         if index < 0:
             raise IndexError
         prev_price = self._price_list[index]
@@ -87,13 +112,18 @@ class PriceLevelList(object):
         :type reverse: bool
         :rtype: List[(Price, PriceLevel)]
         """
-        items = []
-        for price in self._price_list:
-            if reverse:
-                items.insert(0, (price, self._price_level_dictionary[price]))
-            else:
-                items.append((price, self._price_level_dictionary[price]))
-        return items
+        return list(self.iter_items(reverse=reverse))
+
+    def iter_items(self, reverse=False):
+        """
+        Iterates over the price, price_level tuples in sorted order, without building a list of all of them first
+
+        :param reverse: When true iterates from the highest to the lowest price
+        :type reverse: bool
+        """
+        prices = reversed(self._price_list) if reverse else self._price_list
+        for price in prices:
+            yield price, self._price_level_dictionary[price]
 
     def get_ticks_list(self):
         """
@@ -10,7 +10,7 @@ from Tribler.community.market.core.payment import Payment
 from Tribler.community.market.core.quantity import Quantity
 from Tribler.community.market.core.tick import Tick
 from Tribler.community.market.core.transaction import Transaction, TransactionId, TransactionNumber
-from Tribler.community.trustchain.database import TrustChainDB
+from Tribler.community.trustchain.database import TrustChainDB, BLOCK_INDEXES
 from Tribler.dispersy.database import Database
 
 
@@ -18,7 +18,7 @@ DATABASE_DIRECTORY = path.join(u"sqlite")
 # Path to the database location + dispersy._workingdirectory
 DATABASE_PATH = path.join(DATABASE_DIRECTORY, u"market.db")
 # Version to keep track if the db schema needs to be updated.
-LATEST_DB_VERSION = 1
+LATEST_DB_VERSION = 2
 # Schema for the Market DB.
 schema = u"""
 CREATE TABLE IF NOT EXISTS blocks(
@@ -35,6 +35,7 @@ CREATE TABLE IF NOT EXISTS blocks(
 
  PRIMARY KEY (public_key, sequence_number)
  );
+""" + BLOCK_INDEXES + u"""
 
 CREATE TABLE IF NOT EXISTS orders(
  trader_id            TEXT NOT NULL,
@@ -153,6 +154,12 @@ class MarketDB(TrustChainDB):
         """
         return self._getall(u"", ())
 
+    def get_blocks_since(self, insert_time):
+        """
+        Return the blocks that have been inserted at or after insert_time, in the order in which they were inserted.
+        """
+        return self._getall(u"WHERE insert_time >= ? ORDER BY insert_time ASC, rowid ASC", (insert_time,))
+
     def get_all_orders(self):
         """
         Return all orders in the database.
@@ -352,6 +359,8 @@ class MarketDB(TrustChainDB):
         database_version = int(database_version)
 
         if database_version < LATEST_DB_VERSION:
+            # All tables are created if they do not exist yet, only the option table has to be recreated
+            self.executescript(u"DROP TABLE IF EXISTS option;")
             self.executescript(self.get_schema())
             self.commit()
 
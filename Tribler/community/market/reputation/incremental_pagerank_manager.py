@@ -0,0 +1,196 @@
+import logging
+import time
+from array import array
+
+import numpy as np
+import scipy.sparse
+
+from Tribler.community.market.reputation.reputation_manager import ReputationManager
+
+DEFAULT_ALPHA = 0.85
+DEFAULT_TOLERANCE = 1.0e-6
+DEFAULT_MAX_ITERATIONS = 100
+DEFAULT_MAX_STALENESS = 300
+
+
+class IncrementalPagerankReputationManager(ReputationManager):
+    """
+    Computes a personalized PageRank over the TradeChain transactions, without rebuilding the trade graph every time.
+
+    The trade graph is undirected. The weight of the edge between two nodes is the asset2 amount of the last trade
+    between them.
+
+    The weighted adjacency matrix of the trade graph is kept as a sparse CSR matrix. Blocks that arrive are first
+    collected as changes to the edge weights and are merged into the matrix on the next computation. Each computation
+    starts the power iteration from the previous PageRank vector, which only takes a few iterations if the graph
+    changed a little.
+    """
+
+    def __init__(self, blocks=None, own_public_key=None, max_staleness=DEFAULT_MAX_STALENESS, alpha=DEFAULT_ALPHA,
+                 tolerance=DEFAULT_TOLERANCE, max_iterations=DEFAULT_MAX_ITERATIONS):
+        """
+        :param blocks: The blocks that are initially added to the trade graph.
+        :param own_public_key: The public key that the PageRank is personalized for.
+        :param max_staleness: The maximum number of seconds the reputation_dict lags behind the received blocks.
+        """
+        super(IncrementalPagerankReputationManager, self).__init__([])
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+        self.own_public_key = own_public_key
+        self.max_staleness = max_staleness
+        self.alpha = alpha
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+        self._node_ids = {}  # public key -> row/column in the adjacency matrix
+        self._public_keys = []
+        self._seen_blocks = set()
+        self._edge_weights = {}  # (node id, node id) -> weight, the smallest node id first
+        self._adjacency = scipy.sparse.csr_matrix((0, 0))
+        self._pending_rows = array('l')
+        self._pending_cols = array('l')
+        self._pending_weights = array('d')
+
+        self._pagerank = np.zeros(0)
+        self._reputation_dict = {}
+        self._last_computed = 0
+        self._dirty = False
+
+        if blocks:
+            self.add_blocks(blocks)
+
+    def __len__(self):
+        return len(self._public_keys)
+
+    def _get_node_id(self, public_key):
+        node_id = self._node_ids.get(public_key)
+        if node_id is None:
+            node_id = self._node_ids[public_key] = len(self._public_keys)
+            self._public_keys.append(public_key)
+        return node_id
+
+    def add_block(self, block):
+        """
+        Add the trade in a block to the graph. Blocks that are not a trade, or that were added before, are ignored.
+        :return: True if the block changed the graph, False otherwise.
+        """
+        block_id = (block.public_key, block.sequence_number)
+        transaction = block.transaction
+        if block_id in self._seen_blocks or "asset1_amount" not in transaction or "asset2_amount" not in transaction:
+            return False
+        self._seen_blocks.add(block_id)
+
+        node_id = self._get_node_id(block.public_key)
+        link_node_id = self._get_node_id(block.link_public_key)
+
+        # The new weight replaces the old weight, so the difference is added to both entries of the symmetric matrix
+        edge = (min(node_id, link_node_id), max(node_id, link_node_id))
+        weight = transaction["asset2_amount"]
+        difference = weight - self._edge_weights.get(edge, 0)
+        self._edge_weights[edge] = weight
+        if difference:
+            if node_id == link_node_id:
+                self._pending_rows.append(node_id)
+                self._pending_cols.append(node_id)
+                self._pending_weights.append(difference)
+            else:
+                self._pending_rows.extend([node_id, link_node_id])
+                self._pending_cols.extend([link_node_id, node_id])
+                self._pending_weights.extend([difference, difference])
+        self._dirty = True
+        return True
+
+    def add_blocks(self, blocks):
+        for block in blocks:
+            self.add_block(block)
+
+    def _merge_pending_edges(self):
+        """
+        Grow the adjacency matrix to the current number of nodes and add the edges of the new blocks to it.
+        """
+        num_nodes = len(self._public_keys)
+        old_num_nodes = self._adjacency.shape[0]
+        adjacency = self._adjacency
+        if num_nodes != old_num_nodes:
+            # New nodes only add empty rows at the end, so the existing data and indices stay valid
+            indptr = np.concatenate([adjacency.indptr,
+                                     np.repeat(adjacency.indptr[-1], num_nodes - old_num_nodes)])
+            adjacency = scipy.sparse.csr_matrix((adjacency.data, adjacency.indices, indptr),
+                                                shape=(num_nodes, num_nodes))
+
+        if self._pending_weights:
+            pending = scipy.sparse.csr_matrix((np.frombuffer(self._pending_weights, dtype=np.float64),
+                                               (np.frombuffer(self._pending_rows, dtype=np.int_),
+                                                np.frombuffer(self._pending_cols, dtype=np.int_))),
+                                              shape=(num_nodes, num_nodes))
+            adjacency = adjacency + pending
+            self._pending_rows = array('l')
+            self._pending_cols = array('l')
+            self._pending_weights = array('d')
+
+        self._adjacency = adjacency
+
+    def _get_personalization(self, own_public_key):
+        num_nodes = len(self._public_keys)
+        node_id = self._node_ids.get(own_public_key)
+        if node_id is None:
+            # We have not traded with anyone yet, so we have no reason to trust anyone more than others
+            return np.repeat(1.0 / num_nodes, num_nodes)
+        personalization = np.zeros(num_nodes)
+        personalization[node_id] = 1.0  # You trust yourself the most
+        return personalization
+
+    def compute(self, own_public_key=None):
+        """
+        Compute the personalized PageRank of all nodes in the trade graph.
+        :return: A dictionary of public key -> reputation
+        """
+        own_public_key = own_public_key or self.own_public_key
+        self._merge_pending_edges()
+        self._dirty = False
+        self._last_computed = time.time()
+
+        num_nodes = len(self._public_keys)
+        if not num_nodes:
+            self._reputation_dict = {}
+            return self._reputation_dict
+
+        # Row-normalize the adjacency matrix, nodes without outgoing trades hand out their rank as a teleport
+        out_weights = np.asarray(self._adjacency.sum(axis=1)).flatten()
+        is_dangling = out_weights == 0
+        out_weights[~is_dangling] = 1.0 / out_weights[~is_dangling]
+        transitions = scipy.sparse.diags(out_weights) * self._adjacency
+
+        personalization = self._get_personalization(own_public_key)
+
+        # Warm start from the previous PageRank vector, the new nodes start at zero
+        x = np.zeros(num_nodes)
+        x[:len(self._pagerank)] = self._pagerank
+        if x.sum() <= 0:
+            x = personalization.copy()
+        x /= x.sum()
+
+        for iteration in xrange(self.max_iterations):
+            last_x = x
+            x = self.alpha * (x * transitions + x[is_dangling].sum() * personalization) + \
+                (1 - self.alpha) * personalization
+            if np.absolute(x - last_x).sum() < num_nodes * self.tolerance:
+                self._logger.debug("PageRank of %d nodes converged after %d iterations", num_nodes, iteration + 1)
+                break
+        else:
+            self._logger.warning("PageRank of %d nodes did not converge in %d iterations",
+                                 num_nodes, self.max_iterations)
+
+        self._pagerank = x
+        self._reputation_dict = dict(zip(self._public_keys, x.tolist()))
+        return self._reputation_dict
+
+    @property
+    def reputation_dict(self):
+        """
+        The reputation of the nodes in the trade graph. It is recomputed when blocks have been added and the last
+        computation is more than max_staleness seconds ago.
+        """
+        if self._dirty and time.time() - self._last_computed >= self.max_staleness:
+            self.compute()
+        return self._reputation_dict
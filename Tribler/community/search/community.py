@@ -614,7 +614,10 @@ class SearchCommunity(Community):
 
     def on_torrent(self, messages):
         for message in messages:
-            self._torrent_db.addExternalTorrentNoDef(message.payload.infohash, message.payload.name, message.payload.files, message.payload.trackers, message.payload.timestamp, {'dispersy_id': message.packet_id})
+            self._torrent_db.queue_external_torrent_no_def(message.payload.infohash, message.payload.name,
+                                                           message.payload.files, message.payload.trackers,
+                                                           message.payload.timestamp,
+                                                           {'dispersy_id': message.packet_id})
 
     def _get_channel_id(self, cid):
         assert isinstance(cid, str)
@@ -129,16 +129,17 @@ class TriblerChainCommunity(TrustChainCommunity):
         """
         if public_key is None:
             public_key = self.my_member.public_key
-        latest_block = self.persistence.get_latest(public_key)
+        aggregated = self.persistence.get_statistics(public_key)
+        latest_block = self.persistence.get(public_key, aggregated["latest_sequence_number"]) \
+            if aggregated["latest_sequence_number"] else None
         statistics = dict()
         statistics["id"] = public_key.encode("hex")
-        interacts = self.persistence.get_num_unique_interactors(public_key)
-        statistics["peers_that_pk_helped"] = interacts[0] if interacts[0] is not None else 0
-        statistics["peers_that_helped_pk"] = interacts[1] if interacts[1] is not None else 0
+        statistics["peers_that_pk_helped"] = aggregated["peers_helped"]
+        statistics["peers_that_helped_pk"] = aggregated["peers_helped_by"]
         if latest_block:
             statistics["total_blocks"] = latest_block.sequence_number
-            statistics["total_up"] = latest_block.transaction["total_up"]
-            statistics["total_down"] = latest_block.transaction["total_down"]
+            statistics["total_up"] = aggregated["total_up"]
+            statistics["total_down"] = aggregated["total_down"]
             statistics["latest_block"] = dict(latest_block)
 
             # Set up/down
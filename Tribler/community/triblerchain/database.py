@@ -1,11 +1,104 @@
 from Tribler.community.trustchain.database import TrustChainDB
 
+# Aggregated statistics per public key, kept up to date while adding blocks, so that they do not have to be computed
+# from all blocks of a peer when they are requested.
+STATISTICS_SCHEMA = u"""
+CREATE TABLE IF NOT EXISTS statistics(
+ public_key             TEXT NOT NULL,
+ latest_sequence_number INTEGER NOT NULL,
+ total_up               INTEGER NOT NULL,
+ total_down             INTEGER NOT NULL,
+ peers_helped           INTEGER NOT NULL,
+ peers_helped_by        INTEGER NOT NULL,
+
+ PRIMARY KEY (public_key)
+ );
+
+CREATE TABLE IF NOT EXISTS interactors(
+ public_key             TEXT NOT NULL,
+ link_public_key        TEXT NOT NULL,
+ helped                 INTEGER NOT NULL,
+ helped_by              INTEGER NOT NULL,
+
+ PRIMARY KEY (public_key, link_public_key)
+ );
+"""
+
 
 class TriblerChainDB(TrustChainDB):
     """
     Persistence layer for the TriblerChain Community.
     """
-    LATEST_DB_VERSION = 4
+    LATEST_DB_VERSION = 6
+
+    def add_block(self, block, commit=True):
+        """
+        Persist a block and update the statistics of its public key in the same transaction.
+        :param block: The data that will be saved.
+        :param commit: Whether to commit right away. When adding many blocks, commit once after adding all of them.
+        """
+        super(TriblerChainDB, self).add_block(block, commit=False)
+        self._update_statistics(block)
+        if commit:
+            self.commit()
+
+    def _update_statistics(self, block):
+        public_key = buffer(block.public_key)
+        link_public_key = buffer(block.link_public_key)
+
+        statistics = self.execute(u"SELECT latest_sequence_number, peers_helped, peers_helped_by FROM statistics "
+                                  u"WHERE public_key = ?", (public_key,)).fetchone()
+        latest_sequence_number, peers_helped, peers_helped_by = statistics or (0, 0, 0)
+
+        interactor = self.execute(u"SELECT helped, helped_by FROM interactors WHERE public_key = ? AND "
+                                  u"link_public_key = ?", (public_key, link_public_key)).fetchone()
+        helped, helped_by = interactor or (0, 0)
+
+        if int(block.transaction["up"]) > 0 and not helped:
+            helped = 1
+            peers_helped += 1
+        if int(block.transaction["down"]) > 0 and not helped_by:
+            helped_by = 1
+            peers_helped_by += 1
+        if not interactor or (helped, helped_by) != tuple(interactor):
+            self.execute(u"INSERT OR REPLACE INTO interactors (public_key, link_public_key, helped, helped_by) "
+                         u"VALUES (?, ?, ?, ?)", (public_key, link_public_key, helped, helped_by))
+
+        if not statistics:
+            self.execute(u"INSERT INTO statistics (public_key, latest_sequence_number, total_up, total_down, "
+                         u"peers_helped, peers_helped_by) VALUES (?, 0, 0, 0, 0, 0)", (public_key,))
+        # Blocks can be added in any order, the totals are those of the block with the highest sequence number
+        if block.sequence_number > latest_sequence_number:
+            self.execute(u"UPDATE statistics SET latest_sequence_number = ?, total_up = ?, total_down = ? "
+                         u"WHERE public_key = ?", (block.sequence_number, block.transaction.get("total_up", 0),
+                                                   block.transaction.get("total_down", 0), public_key))
+        self.execute(u"UPDATE statistics SET peers_helped = ?, peers_helped_by = ? WHERE public_key = ?",
+                     (peers_helped, peers_helped_by, public_key))
+
+    def backfill_statistics(self):
+        """
+        Compute the statistics of all blocks in the database, i.e. after upgrading a database without statistics.
+        """
+        self.execute(u"DELETE FROM statistics")
+        self.execute(u"DELETE FROM interactors")
+        public_keys = [public_key for public_key, in self.execute(u"SELECT DISTINCT public_key FROM blocks").fetchall()]
+        for public_key in public_keys:
+            for block in self._getall(u"WHERE public_key = ? ORDER BY sequence_number ASC", (public_key,)):
+                self._update_statistics(block)
+        self.commit()
+        self._logger.info("Computed the statistics of %d public keys", len(public_keys))
+
+    def get_statistics(self, public_key):
+        """
+        Returns the aggregated statistics of a public key.
+        :param public_key: The public key of the member of which we want the information
+        :return: A dictionary with the latest sequence number, the total up and down and the number of interactors
+        """
+        statistics = self.execute(u"SELECT latest_sequence_number, total_up, total_down, peers_helped, "
+                                  u"peers_helped_by FROM statistics WHERE public_key = ?",
+                                  (buffer(public_key),)).fetchone() or (0, 0, 0, 0, 0)
+        return dict(zip(["latest_sequence_number", "total_up", "total_down", "peers_helped", "peers_helped_by"],
+                        statistics))
 
     def get_num_unique_interactors(self, public_key):
         """
@@ -13,14 +106,14 @@ class TriblerChainDB(TrustChainDB):
         :param public_key: The public key of the member of which we want the information
         :return: A tuple of unique number of interactors that helped you and that you have helped respectively
         """
-        peers_you_helped = set()
-        peers_helped_you = set()
-        for block in self.get_latest_blocks(public_key, limit=-1):
-            if int(block.transaction["up"]) > 0:
-                peers_you_helped.add(block.link_public_key)
-            if int(block.transaction["down"]) > 0:
-                peers_helped_you.add(block.link_public_key)
-        return len(peers_you_helped), len(peers_helped_you)
+        statistics = self.get_statistics(public_key)
+        return statistics["peers_helped"], statistics["peers_helped_by"]
+
+    def get_schema(self):
+        """
+        Return the schema for the database.
+        """
+        return super(TriblerChainDB, self).get_schema() + STATISTICS_SCHEMA
 
     def get_upgrade_script(self, current_version):
         """
@@ -32,3 +125,17 @@ class TriblerChainDB(TrustChainDB):
             DROP TABLE IF EXISTS blocks;
             DROP TABLE IF EXISTS option;
             """
+        elif current_version == 4 or current_version == 5:
+            # The schema adds the indexes on the blocks table and the statistics tables, it recreates the option table
+            # with the new version
+            return u"DROP TABLE IF EXISTS option;"
+
+    def check_database(self, database_version):
+        """
+        Ensure the proper schema is used by the database and compute the statistics if the tables were just created.
+        :param database_version: Current version of the database.
+        """
+        version = super(TriblerChainDB, self).check_database(database_version)
+        if int(database_version) < 6:
+            self.backfill_statistics()
+        return version
@@ -99,10 +99,7 @@ class TrustChainBlock(object):
         # cases subsequent blocks can get validation errors and will not get inserted into the database. Thus we can
         # assume that all retrieved blocks are not invalid themselves. Blocks can get inserted into the database in any
         # order, so we need to find successors, predecessors as well as the block itself and its linked block.
-        blk = database.get(self.public_key, self.sequence_number)
-        link = database.get_linked(self)
-        prev_blk = database.get_block_before(self)
-        next_blk = database.get_block_after(self)
+        blk, link, prev_blk, next_blk = database.get_block_neighbourhood(self)
 
         # Step 2: determine the maximum validation level
         # Depending on the blocks we get from the database, we can decide to reduce the validation level. We must do
@@ -252,10 +252,11 @@ class TrustChainCommunity(Community):
 
         return block
 
-    def validate_persist_block(self, block):
+    def validate_persist_block(self, block, commit=True):
         """
         Validate a block and if it's valid, persist it. Return the validation result.
         :param block: The block to validate and persist.
+        :param commit: Whether to commit the block right away, or leave that to the caller.
         :return: [ValidationResult]
         """
         validation = block.validate(self.persistence)
@@ -263,7 +264,7 @@ class TrustChainCommunity(Community):
         if validation[0] == ValidationResult.invalid:
             pass
         elif not self.persistence.contains(block):
-            self.persistence.add_block(block)
+            self.persistence.add_block(block, commit=commit)
         else:
             self.logger.debug("Received already known block (%s)", block)
 
@@ -285,7 +286,7 @@ class TrustChainCommunity(Community):
                 self.dispersy.store_update_forward([message], False, False, True)
                 self.relayed_broadcasts.append(block_id)
 
-            validation = self.validate_persist_block(blk)
+            validation = self.validate_persist_block(blk, commit=False)
 
             # Check if we are waiting for this block
             if block_id in self.expected_sig_requests:
@@ -337,14 +338,17 @@ class TrustChainCommunity(Community):
                     self.cancel_pending_task(crawl_task)
                     continue
 
+        # The received blocks (i.e. a crawl response) are committed at once
+        self.persistence.commit()
+
     def received_block_pair(self, messages):
         """
         We received block pairs. Verify them and persist them to the local storage.
         :param messages: The block pair messages
         """
         for message in messages:
-            self.validate_persist_block(message.payload.block1)
-            self.validate_persist_block(message.payload.block2)
+            self.validate_persist_block(message.payload.block1, commit=False)
+            self.validate_persist_block(message.payload.block2, commit=False)
 
             blk = message.payload.block1
             block_id = "%s.%s" % (blk.public_key.encode('hex'), blk.sequence_number)
@@ -355,6 +359,8 @@ class TrustChainCommunity(Community):
                 self.dispersy.store_update_forward([message], False, False, True)
                 self.relayed_broadcasts.append(block_id)
 
+        self.persistence.commit()
+
     def send_crawl_request(self, candidate, public_key, sequence_number=None):
         sq = sequence_number
         if sequence_number is None:
@@ -9,6 +9,13 @@ from Tribler.community.trustchain.block import TrustChainBlock
 
 DATABASE_DIRECTORY = os.path.join(u"sqlite")
 
+# Indexes on the blocks table, used for looking up linked blocks and for crawling. The statements are idempotent, so
+# they are part of the schema of both new and upgraded databases.
+BLOCK_INDEXES = u"""
+CREATE INDEX IF NOT EXISTS blocks_link_idx ON blocks(link_public_key, link_sequence_number);
+CREATE INDEX IF NOT EXISTS blocks_insert_time_idx ON blocks(insert_time);
+"""
+
 
 class TrustChainDB(Database):
     """
@@ -16,7 +23,7 @@ class TrustChainDB(Database):
     Connection layer to SQLiteDB.
     Ensures a proper DB schema on startup.
     """
-    LATEST_DB_VERSION = 1
+    LATEST_DB_VERSION = 2
 
     def __init__(self, working_directory, db_name):
         """
@@ -30,16 +37,18 @@ class TrustChainDB(Database):
         self._logger.debug("TrustChain database path: %s", db_path)
         self.open()
 
-    def add_block(self, block):
+    def add_block(self, block, commit=True):
         """
         Persist a block
         :param block: The data that will be saved.
+        :param commit: Whether to commit right away. When adding many blocks, commit once after adding all of them.
         """
         self.execute(
             u"INSERT INTO blocks (tx, public_key, sequence_number, link_public_key,"
             u"link_sequence_number, previous_hash, signature, block_hash) VALUES(?,?,?,?,?,?,?,?)",
             block.pack_db_insert())
-        self.commit()
+        if commit:
+            self.commit()
 
     def _get(self, query, params):
         db_result = self.execute(self.get_sql_header() + query, params).fetchone()
@@ -102,16 +111,50 @@ class TrustChainDB(Database):
         :param block: The block for which to get the linked block
         :return: the latest block or None if it is not known
         """
-        return self._get(u"WHERE public_key = ? AND sequence_number = ? OR link_public_key = ? AND "
-                         u"link_sequence_number = ?", (buffer(block.link_public_key), block.link_sequence_number,
-                                                       buffer(block.public_key), block.sequence_number))
+        # Two separate lookups instead of an OR, so both the primary key and the link index are used
+        return self._get(u"WHERE public_key = ? AND sequence_number = ? UNION ALL " + self.get_sql_header() +
+                         u"WHERE link_public_key = ? AND link_sequence_number = ?",
+                         (buffer(block.link_public_key), block.link_sequence_number,
+                          buffer(block.public_key), block.sequence_number))
+
+    def get_block_neighbourhood(self, block):
+        """
+        Get all blocks that are needed to validate the given block, with a single query.
+        :param block: The block that is validated
+        :return: A (block, linked block, previous block, next block) tuple, with None for the blocks that are unknown.
+        """
+        header = u"SELECT * FROM (SELECT %%d, %s" % self.get_sql_header()[len(u"SELECT "):]
+        query = u" UNION ALL ".join([
+            header % 0 + u"WHERE public_key = ? AND sequence_number = ?)",
+            header % 1 + u"WHERE public_key = ? AND sequence_number = ?)",
+            header % 1 + u"WHERE link_public_key = ? AND link_sequence_number = ?)",
+            header % 2 + u"WHERE public_key = ? AND sequence_number < ? ORDER BY sequence_number DESC LIMIT 1)",
+            header % 3 + u"WHERE public_key = ? AND sequence_number > ? ORDER BY sequence_number ASC LIMIT 1)"])
+        public_key = buffer(block.public_key)
+        params = (public_key, block.sequence_number,
+                  buffer(block.link_public_key), block.link_sequence_number,
+                  public_key, block.sequence_number,
+                  public_key, block.sequence_number,
+                  public_key, block.sequence_number)
+
+        neighbourhood = [None, None, None, None]
+        for db_item in self.execute(query, params).fetchall():
+            if neighbourhood[db_item[0]] is None:
+                neighbourhood[db_item[0]] = TrustChainBlock(db_item[1:])
+        return tuple(neighbourhood)
 
     def crawl(self, public_key, sequence_number, limit=100):
         assert limit <= 100, "Don't fetch too much"
-        return self._getall(u"WHERE insert_time >= (SELECT MAX(insert_time) FROM blocks WHERE public_key = ? AND "
-                            u"sequence_number <= ?) AND (public_key = ? OR link_public_key = ?) "
-                            u"ORDER BY insert_time ASC LIMIT ?",
-                            (buffer(public_key), sequence_number, buffer(public_key), buffer(public_key), limit))
+        insert_time, = self.execute(u"SELECT MAX(insert_time) FROM blocks "
+                                    u"WHERE public_key = ? AND sequence_number <= ?",
+                                    (buffer(public_key), sequence_number)).fetchone()
+        if insert_time is None:
+            return []
+
+        # The blocks created by public_key and the blocks linked to it are fetched separately, to use the indexes
+        return self._getall(u"WHERE public_key = ? AND insert_time >= ? UNION " + self.get_sql_header() +
+                            u"WHERE link_public_key = ? AND insert_time >= ? ORDER BY insert_time ASC LIMIT ?",
+                            (buffer(public_key), insert_time, buffer(public_key), insert_time, limit))
 
     def get_sql_header(self):
         """
@@ -140,16 +183,19 @@ class TrustChainDB(Database):
 
          PRIMARY KEY (public_key, sequence_number)
          );
-
+        %s
         CREATE TABLE option(key TEXT PRIMARY KEY, value BLOB);
         INSERT INTO option(key, value) VALUES('database_version', '%s');
-        """ % (str(self.LATEST_DB_VERSION))
+        """ % (BLOCK_INDEXES, str(self.LATEST_DB_VERSION))
 
     def get_upgrade_script(self, current_version):
         """
         Return the upgrade script for a specific version.
         :param current_version: the version of the script to return.
         """
+        if current_version == 1:
+            # The schema adds the new indexes, it recreates the option table with the new version
+            return u"DROP TABLE IF EXISTS option;"
         return None
 
     def open(self, initial_statements=True, prepare_visioning=True):
@@ -272,10 +272,10 @@ class TunnelConversion(BinaryConversion):
     def _encode_stats_response(self, message):
         stats_list = []
         for key in ['uptime', 'bytes_up', 'bytes_down', 'bytes_relay_up', 'bytes_relay_down',
-                    'bytes_enter', 'bytes_exit']:
+                    'bytes_enter', 'bytes_exit', 'dns_cache_hits', 'dns_cache_misses']:
             stats_list.append(message.payload.stats.get(key, 0))
 
-        return pack('!HIQQQQQQ', *([message.payload.identifier] + stats_list)),
+        return pack('!HIQQQQQQQQ', *([message.payload.identifier] + stats_list)),
 
     def _decode_stats_response(self, placeholder, offset, data):
         identifier, = unpack_from('!H', data, offset)
@@ -287,6 +287,11 @@ class TunnelConversion(BinaryConversion):
             zip(['uptime', 'bytes_up', 'bytes_down', 'bytes_relay_up', 'bytes_relay_down',
                  'bytes_enter', 'bytes_exit'], stats_list))
 
+        # The DNS cache statistics are not included by older peers
+        if len(data) - offset >= 16:
+            stats_dict['dns_cache_hits'], stats_dict['dns_cache_misses'] = unpack_from('!QQ', data, offset)
+            offset += 16
+
         # Ignore the rest
         offset += len(data[offset:])
 
@@ -18,3 +18,9 @@ try:
 except ImportError:
     logger.error("cannnot continue without cryptography")
     raise
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:
+    # cryptography < 2.0, fall back to the Cipher interface
+    AESGCM = None
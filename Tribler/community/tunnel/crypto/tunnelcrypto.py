@@ -1,8 +1,14 @@
 import struct
+from collections import OrderedDict
 
 from Tribler.dispersy.crypto import ECCrypto, LibNaCLPK
 from Tribler.community.tunnel.crypto.cryptowrapper import crypto_box_beforenm, crypto_auth, crypto_auth_verify, Cipher,\
-    algorithms, modes, HKDFExpand, hashes, default_backend
+    algorithms, modes, HKDFExpand, hashes, default_backend, AESGCM
+
+# The AESGCM interface does not accept nonces shorter than 8 bytes
+MIN_AESGCM_NONCE_LENGTH = 8
+MAX_CACHED_CIPHERS = 1024
+GCM_TAG_LENGTH = 16
 
 
 class CryptoException(Exception):
@@ -11,6 +17,12 @@ class CryptoException(Exception):
 
 class TunnelCrypto(ECCrypto):
 
+    def __init__(self):
+        super(TunnelCrypto, self).__init__()
+        # session key -> AESGCM, ordered from least to most recently used
+        self._aesgcm_cache = OrderedDict()
+        self.max_cached_ciphers = MAX_CACHED_CIPHERS
+
     def initialize(self, community):
         self.community = community
         self.key = self.community.my_member._ec
@@ -62,11 +74,35 @@ class TunnelCrypto(ECCrypto):
 
         return salt + str(salt_explicit)
 
+    def _get_aesgcm(self, key, iv):
+        """
+        Returns the AESGCM instance of a session key, which is reused for all packets of the session.
+        Returns None if the AESGCM interface cannot be used, in which case a Cipher has to be created instead.
+        """
+        if AESGCM is None or len(iv) < MIN_AESGCM_NONCE_LENGTH:
+            return None
+
+        aesgcm = self._aesgcm_cache.pop(key, None)
+        if aesgcm is None:
+            if len(self._aesgcm_cache) >= self.max_cached_ciphers:
+                # Evict the least recently used session, which is likely to belong to a closed circuit
+                self._aesgcm_cache.popitem(last=False)
+            aesgcm = AESGCM(key)
+        self._aesgcm_cache[key] = aesgcm
+        return aesgcm
+
     def encrypt_str(self, content, key, salt, salt_explicit):
         # return the encrypted content prepended with the
         # gcm tag and salt_explicit
+        iv = self._bulid_iv(salt, salt_explicit)
+        aesgcm = self._get_aesgcm(key, iv)
+        if aesgcm:
+            # AESGCM appends the tag to the ciphertext
+            ciphertext = aesgcm.encrypt(iv, content, None)
+            return struct.pack('!q16s', salt_explicit, ciphertext[-GCM_TAG_LENGTH:]) + ciphertext[:-GCM_TAG_LENGTH]
+
         cipher = Cipher(algorithms.AES(key),
-                        modes.GCM(initialization_vector=self._bulid_iv(salt, salt_explicit)),
+                        modes.GCM(initialization_vector=iv),
                         backend=default_backend()
                         ).encryptor()
         ciphertext = cipher.update(content) + cipher.finalize()
@@ -78,8 +114,13 @@ class TunnelCrypto(ECCrypto):
             raise CryptoException("truncated content")
 
         salt_explicit, gcm_tag = struct.unpack_from('!q16s', content)
+        iv = self._bulid_iv(salt, salt_explicit)
+        aesgcm = self._get_aesgcm(key, iv)
+        if aesgcm:
+            return aesgcm.decrypt(iv, content[24:] + gcm_tag, None)
+
         cipher = Cipher(algorithms.AES(key),
-                        modes.GCM(initialization_vector=self._bulid_iv(salt, salt_explicit), tag=gcm_tag),
+                        modes.GCM(initialization_vector=iv, tag=gcm_tag),
                         backend=default_backend()
                         ).decryptor()
         return cipher.update(content[24:]) + cipher.finalize()
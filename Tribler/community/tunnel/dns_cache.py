@@ -0,0 +1,92 @@
+import logging
+import time
+from collections import OrderedDict, defaultdict
+
+from twisted.internet import reactor
+from twisted.internet.abstract import isIPAddress
+from twisted.internet.defer import Deferred
+
+DNS_CACHE_TTL = 300
+DNS_CACHE_NEGATIVE_TTL = 60
+DNS_CACHE_MAX_SIZE = 5000
+
+
+class DNSCache(object):
+
+    """
+    Caches the ip addresses of the hostnames that exit sockets send data to, so resolving a hostname is only done once
+    per TTL instead of for every packet. Hostnames that could not be resolved are cached as well, for a shorter time.
+    """
+
+    _reactor = reactor
+
+    def __init__(self, stats=None, ttl=DNS_CACHE_TTL, negative_ttl=DNS_CACHE_NEGATIVE_TTL, max_size=DNS_CACHE_MAX_SIZE):
+        """
+        :param stats: The dictionary in which the number of cache hits and misses is counted.
+        :param ttl: The number of seconds a resolved hostname is cached.
+        :param negative_ttl: The number of seconds a hostname that could not be resolved is cached.
+        :param max_size: The maximum number of cached hostnames, the oldest entries are removed first.
+        """
+        self.tunnel_logger = logging.getLogger('TunnelLogger')
+        self.stats = stats if stats is not None else defaultdict(int)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+
+        # hostname -> (ip address or None, expiration time)
+        self._entries = OrderedDict()
+        # hostname -> deferreds waiting for the hostname to be resolved
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, hostname):
+        """
+        Looks up a hostname in the cache, without resolving it.
+        :return: A (is_cached, ip_address) tuple. The ip address is None if the hostname could not be resolved.
+        """
+        if isIPAddress(hostname):
+            return True, hostname
+
+        entry = self._entries.get(hostname)
+        if entry is not None:
+            if entry[1] > time.time():
+                self.stats['dns_cache_hits'] += 1
+                return True, entry[0]
+            del self._entries[hostname]
+
+        self.stats['dns_cache_misses'] += 1
+        return False, None
+
+    def resolve(self, hostname):
+        """
+        Resolves a hostname and caches the result. Concurrent requests for the same hostname share a single lookup.
+        :return: A deferred that fires with the ip address of the hostname.
+        """
+        deferred = Deferred()
+        if hostname in self._pending:
+            self._pending[hostname].append(deferred)
+            return deferred
+
+        self._pending[hostname] = [deferred]
+
+        def on_ip_address(ip_address):
+            self._add_entry(hostname, ip_address, self.ttl)
+            for pending_deferred in self._pending.pop(hostname):
+                pending_deferred.callback(ip_address)
+
+        def on_error(failure):
+            self.tunnel_logger.debug("Can't resolve ip address for hostname %s: %s", hostname, failure.value)
+            self._add_entry(hostname, None, self.negative_ttl)
+            for pending_deferred in self._pending.pop(hostname):
+                pending_deferred.errback(failure)
+
+        self._reactor.resolve(hostname).addCallbacks(on_ip_address, on_error)
+        return deferred
+
+    def _add_entry(self, hostname, ip_address, ttl):
+        self._entries.pop(hostname, None)
+        self._entries[hostname] = (ip_address, time.time() + ttl)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
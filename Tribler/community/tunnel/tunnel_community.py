@@ -25,6 +25,7 @@ from Tribler.community.tunnel import (CIRCUIT_ID_PORT, CIRCUIT_STATE_EXTENDING,
 from Tribler.community.tunnel.Socks5.server import Socks5Server
 from Tribler.community.tunnel.conversion import TunnelConversion
 from Tribler.community.tunnel.crypto.tunnelcrypto import CryptoException, TunnelCrypto
+from Tribler.community.tunnel.dns_cache import DNSCache
 from Tribler.community.tunnel.payload import (CellPayload, CreatePayload, CreatedPayload, DestroyPayload, ExtendPayload,
                                               ExtendedPayload, PingPayload, PongPayload, StatsRequestPayload,
                                               StatsResponsePayload, TunnelIntroductionRequestPayload,
@@ -146,27 +147,39 @@ class TunnelExitSocket(DatagramProtocol, TaskManager):
     def sendto(self, data, destination):
         if self.check_num_packets(destination, False):
             if TunnelConversion.is_allowed(data):
-                def on_error(failure):
-                    self.tunnel_logger.error("Can't resolve ip address for hostname %s. Failure: %s",
-                                             destination[0], failure)
-
-                def on_ip_address(ip_address):
-                    self.tunnel_logger.debug("Resolved hostname %s to ip_address %s", destination[0], ip_address)
-                    try:
-                        self.transport.write(data, (ip_address, destination[1]))
-                        self.community.increase_bytes_sent(self, len(data))
-                    except (AttributeError, MessageLengthError, socket.error) as exception:
-                        self.tunnel_logger.error(
-                            "Failed to write data to transport: %s. Destination: %r error was: %r",
-                            exception, destination, exception)
-
-                resolve_ip_address_deferred = reactor.resolve(destination[0])
-                resolve_ip_address_deferred.addCallbacks(on_ip_address, on_error)
-                self.register_task("resolving_%r" % destination[0], resolve_ip_address_deferred)
+                is_cached, ip_address = self.community.dns_cache.lookup(destination[0])
+                if ip_address:
+                    self.write_data(data, (ip_address, destination[1]))
+                elif is_cached:
+                    self.tunnel_logger.debug("Dropping packet to unresolvable hostname %s", destination[0])
+                else:
+                    def on_error(failure):
+                        self.tunnel_logger.error("Can't resolve ip address for hostname %s. Failure: %s",
+                                                 destination[0], failure)
+
+                    def on_ip_address(ip_address):
+                        self.tunnel_logger.debug("Resolved hostname %s to ip_address %s", destination[0], ip_address)
+                        self.write_data(data, (ip_address, destination[1]))
+
+                    resolve_ip_address_deferred = self.community.dns_cache.resolve(destination[0])
+                    resolve_ip_address_deferred.addCallbacks(on_ip_address, on_error)
+                    # Packets to a hostname that is being resolved are sent once the first lookup finishes
+                    task_name = "resolving_%r" % destination[0]
+                    if not self.is_pending_task_active(task_name):
+                        self.register_task(task_name, resolve_ip_address_deferred)
             else:
                 self.tunnel_logger.error("dropping forbidden packets from exit socket with circuit_id %d",
                                          self.circuit_id)
 
+    def write_data(self, data, destination):
+        try:
+            self.transport.write(data, destination)
+            self.community.increase_bytes_sent(self, len(data))
+        except (AttributeError, MessageLengthError, socket.error) as exception:
+            self.tunnel_logger.error(
+                "Failed to write data to transport: %s. Destination: %r error was: %r",
+                exception, destination, exception)
+
     def datagramReceived(self, data, source):
         self.community.increase_bytes_received(self, len(data))
         if self.check_num_packets(source, True):
@@ -293,6 +306,7 @@ class TunnelCommunity(Community):
         self.notifier = None
         self.selection_strategy = RoundRobin(self)
         self.stats = defaultdict(int)
+        self.dns_cache = DNSCache(self.stats)
         self.creation_time = time.time()
         self.crawler_mids = ['5e02620cfabea2d2d3bfdc2032f6307136a35e69'.decode('hex'),
                              '43e8807e6f86ef2f0a784fbc8fa21f8bc49a82ae'.decode('hex'),
@@ -24,6 +24,7 @@ class EventRequestManager(QNetworkAccessManager):
     discovered_channel = pyqtSignal(object)
     discovered_torrent = pyqtSignal(object)
     torrent_finished = pyqtSignal(object)
+    received_download_states = pyqtSignal(object)
     received_market_ask = pyqtSignal(object)
     received_market_bid = pyqtSignal(object)
     expired_market_ask = pyqtSignal(object)
@@ -103,6 +104,8 @@ class EventRequestManager(QNetworkAccessManager):
                         self.emitted_tribler_started = True
                 elif json_dict["type"] == "torrent_finished":
                     self.torrent_finished.emit(json_dict["event"])
+                elif json_dict["type"] == "download_states":
+                    self.received_download_states.emit(json_dict["event"])
                 elif json_dict["type"] == "market_ask":
                     self.received_market_ask.emit(json_dict["event"])
                 elif json_dict["type"] == "market_bid":
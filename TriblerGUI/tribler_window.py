@@ -196,6 +196,8 @@ class TriblerWindow(QMainWindow):
         self.core_manager.events_manager.received_search_result_torrent.connect(
             self.search_results_page.received_search_result_torrent)
         self.core_manager.events_manager.torrent_finished.connect(self.on_torrent_finished)
+        self.core_manager.events_manager.received_download_states.connect(
+            self.downloads_page.on_received_download_states)
         self.core_manager.events_manager.new_version_available.connect(self.on_new_version_available)
         self.core_manager.events_manager.tribler_started.connect(self.on_tribler_started)
 
@@ -27,7 +27,8 @@ class DownloadsPage(QWidget):
         self.export_dir = None
         self.filter = DOWNLOADS_FILTER_ALL
         self.download_widgets = {}  # key: infohash, value: QTreeWidgetItem
-        self.downloads = None
+        self.downloads = None  # key: infohash, value: the latest known state of the download
+        self.loading_downloads = False
         self.downloads_timer = QTimer()
         self.downloads_timeout_timer = QTimer()
         self.selected_item = None
@@ -64,6 +65,7 @@ class DownloadsPage(QWidget):
         self.update_download_visibility()
 
     def start_loading_downloads(self):
+        self.loading_downloads = True
         self.schedule_downloads_timer(now=True)
 
     def schedule_downloads_timer(self, now=False):
@@ -82,13 +84,35 @@ class DownloadsPage(QWidget):
         self.schedule_downloads_timer()
 
     def stop_loading_downloads(self):
+        self.loading_downloads = False
         self.downloads_timer.stop()
         self.downloads_timeout_timer.stop()
 
+    def get_detailed_infohashes(self):
+        """
+        Return the infohashes of the downloads of which we show the files, trackers, peers or pieces.
+        """
+        infohashes = set()
+        current_download = self.window().download_details_widget.current_download
+        if current_download is not None and self.window().download_details_widget.isVisible():
+            infohashes.add(current_download["infohash"])
+        if self.window().video_player_page.active_infohash != "":
+            infohashes.add(self.window().video_player_page.active_infohash)
+        return infohashes
+
     def load_downloads(self):
+        # The state of the downloads is pushed over the events connection, we only poll the files, trackers, peers and
+        # pieces of the downloads that are shown in detail.
+        infohashes = [infohash for infohash in self.get_detailed_infohashes()
+                      if self.downloads and infohash in self.downloads]
+        if not infohashes:
+            self.schedule_downloads_timer()
+            return
+
         url = "downloads?get_pieces=1"
         if self.window().download_details_widget.currentIndex() == 3:
             url = "downloads?get_peers=1&get_pieces=1"
+        url += "".join("&infohash=%s" % infohash for infohash in infohashes)
 
         self.downloads_request_mgr.generate_request_id()
         self.downloads_request_mgr.perform_request(url, self.on_received_downloads)
@@ -97,13 +121,40 @@ class DownloadsPage(QWidget):
         if not downloads:
             return  # This might happen when closing Tribler
 
+        for download in downloads["downloads"]:
+            if download["infohash"] in self.downloads:
+                self.downloads[download["infohash"]].update(download)
+        self.update_downloads()
+        self.schedule_downloads_timer()
+
+    def on_received_download_states(self, download_states):
+        """
+        Apply the changes in the state of the downloads, as pushed by the core over the events connection.
+        """
+        if self.downloads is None:
+            self.downloads = {}
+
+        for download in download_states["downloads"]:
+            if download["infohash"] in self.downloads:
+                self.downloads[download["infohash"]].update(download)
+            elif "name" in download:
+                # The first state of a download includes all fields, except for the files and trackers
+                download.setdefault("files", [])
+                download.setdefault("trackers", [])
+                self.downloads[download["infohash"]] = download
+
+        for infohash in download_states["removed"]:
+            self.downloads.pop(infohash, None)
+
+        if self.loading_downloads:
+            self.update_downloads()
+
+    def update_downloads(self):
         total_download = 0
         total_upload = 0
-        self.received_downloads.emit(downloads)
-        self.downloads = downloads
+        self.received_downloads.emit({"downloads": self.downloads.values()})
 
-        download_infohashes = set()
-        for download in downloads["downloads"]:
+        for download in self.downloads.itervalues():
             if download["infohash"] in self.download_widgets:
                 item = self.download_widgets[download["infohash"]]
             else:
@@ -120,8 +171,6 @@ class DownloadsPage(QWidget):
             total_download += download["speed_down"]
             total_upload += download["speed_up"]
 
-            download_infohashes.add(download["infohash"])
-
             if self.window().download_details_widget.current_download is not None and \
                     self.window().download_details_widget.current_download["infohash"] == download["infohash"]:
                 self.window().download_details_widget.current_download = download
@@ -130,7 +179,7 @@ class DownloadsPage(QWidget):
         # Check whether there are download that should be removed
         toremove = set()
         for infohash, item in self.download_widgets.iteritems():
-            if infohash not in download_infohashes:
+            if infohash not in self.downloads:
                 index = self.window().downloads_list.indexOfTopLevelItem(item)
                 toremove.add((infohash, index))
 
@@ -142,7 +191,6 @@ class DownloadsPage(QWidget):
             self.window().tray_icon.setToolTip(
                 "Down: %s, Up: %s" % (format_speed(total_download), format_speed(total_upload)))
         self.update_download_visibility()
-        self.schedule_downloads_timer()
 
         # Update the top download management button if we have a row selected
         if len(self.window().downloads_list.selectedItems()) > 0:
@@ -261,6 +309,8 @@ class DownloadsPage(QWidget):
             self.window().downloads_list.takeTopLevelItem(index)
             if infohash in self.download_widgets:  # Could have been removed already through API
                 del self.download_widgets[infohash]
+            if self.downloads:
+                self.downloads.pop(infohash, None)
             self.window().download_details_widget.hide()
 
     def on_force_recheck_download(self):